@@ -0,0 +1,512 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Punto de entrada sin interfaz gráfica (modo servicio) para la aplicación.
+
+Uso:
+    python cli.py daemon [--config archivo.yaml] [--db config.db] [--lock archivo.lock] [--metricas [HOST:]PUERTO]
+    python cli.py backfill CARPETA|ARCHIVO|GLOB... [--workers N] [--reporte reporte.csv] [--config archivo.yaml]
+    python cli.py dry-run CARPETA|ARCHIVO|GLOB... [--salida payloads.ndjson] [--procesos N] [--sin-body]
+    python cli.py reprocesar-errores [--config archivo.yaml] [--db config.db]
+    python cli.py generar CARPETA [--cantidad N] [--facturas 0.5] [--lineas N] [--lineas-max N] [--semilla N]
+    python cli.py benchmark [--documentos N] [--lineas N] [--repeticiones N] [--etiqueta v1.2.0] [--resultados archivo.jsonl]
+    python cli.py carga [--documentos N] [--tasa N] [--latencia S] [--tasa-error F] [--tamano-pdf BYTES] [--json archivo.json]
+
+Sin --config se usa la configuración guardada en config.db desde la interfaz
+gráfica. El servicio se detiene de forma ordenada con SIGINT o SIGTERM (Ctrl+C
+o Ctrl+Break en Windows): termina los envíos en curso, las descargas e
+impresiones pendientes y los logs por escribir antes de salir. Con --metricas
+expone su estado en http://HOST:PUERTO/metrics (Prometheus) y /metrics.json.
+"""
+
+import argparse
+import queue
+import signal
+import sys
+import threading
+import time
+from config.settings import DB_CONFIG, SERVICIO_CONFIG
+
+# Códigos de salida
+SALIDA_OK = 0
+SALIDA_ERROR_CONFIG = 1
+SALIDA_EN_EJECUCION = 2
+
+
+def crear_parser():
+    """
+    Construye el parser de argumentos de la línea de comandos.
+
+    Returns:
+        argparse.ArgumentParser: Parser con los subcomandos disponibles.
+    """
+    parser = argparse.ArgumentParser(prog="cli.py", description="Procesamiento de TXT a DTE sin interfaz gráfica.")
+    subparsers = parser.add_subparsers(dest="comando", required=True)
+
+    daemon = subparsers.add_parser("daemon", help="Procesa la carpeta de entrada hasta recibir una señal de término.")
+    daemon.add_argument("--config", help="Archivo YAML de configuración (por defecto se usa config.db).")
+    daemon.add_argument("--db", help="Ruta de la base de datos SQLite (reemplaza la de la configuración).")
+    daemon.add_argument("--lock", help="Archivo de bloqueo de instancia única.")
+    daemon.add_argument("--metricas", metavar="[HOST:]PUERTO",
+                        help="Expone las métricas por HTTP (por defecto solo si MONITOR_CONFIG lo habilita).")
+    daemon.set_defaults(funcion=comando_daemon)
+
+    backfill = subparsers.add_parser("backfill", help="Envía a la API un archivo de TXT históricos con un pool de hilos.")
+    backfill.add_argument("entradas", nargs="+", help="Carpetas, archivos TXT o patrones glob (p. ej. 'archivo/**/*.txt').")
+    backfill.add_argument("--workers", type=int, help="Envíos simultáneos (por defecto PROCESS_CONFIG['max_en_vuelo']).")
+    backfill.add_argument("--recursivo", action="store_true", help="Recorrer también las subcarpetas.")
+    backfill.add_argument("--ejecucion", help="Identificador de la ejecución a retomar (por defecto se deriva de las entradas).")
+    backfill.add_argument("--reintentar-rechazados", action="store_true", help="Al retomar, reenviar también los rechazados.")
+    backfill.add_argument("--reporte", help="Archivo CSV donde escribir el resultado de cada archivo.")
+    backfill.add_argument("--solo-fallidos", action="store_true", help="Incluir en el reporte solo los archivos fallidos.")
+    backfill.add_argument("--config", help="Archivo YAML de configuración (por defecto se usa config.db).")
+    backfill.add_argument("--db", help="Ruta de la base de datos SQLite (reemplaza la de la configuración).")
+    backfill.set_defaults(funcion=comando_backfill)
+
+    dry_run = subparsers.add_parser("dry-run", help="Construye y valida los payloads sin enviarlos a la API (NDJSON).")
+    dry_run.add_argument("entradas", nargs="+", help="Carpetas, archivos TXT o patrones glob.")
+    dry_run.add_argument("--salida", default="-", help="Archivo NDJSON de salida (por defecto, la salida estándar).")
+    dry_run.add_argument("--procesos", type=int, help="Procesos en paralelo (por defecto, uno por CPU).")
+    dry_run.add_argument("--sin-body", action="store_true", help="Escribir solo la validación de cada archivo.")
+    dry_run.add_argument("--recursivo", action="store_true", help="Recorrer también las subcarpetas.")
+    dry_run.add_argument("--config", help="Archivo YAML de configuración (por defecto se usa config.db).")
+    dry_run.add_argument("--db", help="Ruta de la base de datos SQLite (reemplaza la de la configuración).")
+    dry_run.set_defaults(funcion=comando_dry_run)
+
+    reprocesar = subparsers.add_parser("reprocesar-errores",
+                                       help="Permite reintentar los archivos antiguos de la carpeta de error en revisión.")
+    reprocesar.add_argument("--config", help="Archivo YAML de configuración (por defecto se usa config.db).")
+    reprocesar.add_argument("--db", help="Ruta de la base de datos SQLite (reemplaza la de la configuración).")
+    reprocesar.set_defaults(funcion=comando_reprocesar_errores)
+
+    generar = subparsers.add_parser("generar", help="Genera TXT sintéticos válidos (boletas y facturas) para pruebas.")
+    generar.add_argument("carpeta", help="Carpeta de destino.")
+    generar.add_argument("--cantidad", type=int, default=100, help="Cantidad de documentos (por defecto 100).")
+    generar.add_argument("--facturas", type=float, default=0.5, help="Fracción de facturas entre 0 y 1 (por defecto 0.5).")
+    generar.add_argument("--lineas", type=int, default=3, help="Líneas de detalle por documento (por defecto 3).")
+    generar.add_argument("--lineas-max", type=int, help="Máximo de líneas de detalle (cada documento elige entre --lineas y este valor).")
+    generar.add_argument("--combinaciones", help="Descuentos y recargos a incluir, separados por coma "
+                                                 "(ninguno, descuento, descuento_pct, recargo, recargo_descuento).")
+    generar.add_argument("--folio-inicial", type=int, default=1, help="Folio del primer documento (por defecto 1).")
+    generar.add_argument("--fecha", help="Fecha de emisión AAAA-MM-DD (por defecto, hoy).")
+    generar.add_argument("--semilla", type=int, help="Semilla para generar siempre los mismos documentos.")
+    generar.set_defaults(funcion=comando_generar)
+
+    benchmark = subparsers.add_parser("benchmark", help="Mide interpretación, construcción del body y serialización (sin red).")
+    benchmark.add_argument("--documentos", type=int, help="Documentos del corpus sintético.")
+    benchmark.add_argument("--lineas", type=int, help="Líneas de detalle por documento.")
+    benchmark.add_argument("--lineas-max", type=int, help="Máximo de líneas de detalle por documento.")
+    benchmark.add_argument("--repeticiones", type=int, help="Rondas por prueba (se informa la mediana).")
+    benchmark.add_argument("--pruebas", help="Pruebas a ejecutar, separadas por coma (por defecto, todas).")
+    benchmark.add_argument("--etiqueta", help="Nombre de la ejecución en el historial (p. ej. la versión).")
+    benchmark.add_argument("--resultados", help="Archivo JSON Lines con el historial de resultados.")
+    benchmark.add_argument("--no-guardar", action="store_true", help="No agregar el resultado al historial.")
+    benchmark.set_defaults(funcion=comando_benchmark)
+
+    carga = subparsers.add_parser("carga", help="Prueba de carga de extremo a extremo con una API e impresora simuladas.")
+    carga.add_argument("--documentos", type=int, help="Documentos a procesar.")
+    carga.add_argument("--tasa", type=float, help="Documentos por segundo que llegan a la carpeta (0: todos al inicio).")
+    carga.add_argument("--latencia", type=float, help="Segundos promedio de respuesta de la API simulada.")
+    carga.add_argument("--variacion", type=float, help="Variación relativa de la latencia (0.5 = ±50%%).")
+    carga.add_argument("--tasa-error", type=float, help="Fracción de envíos con error 503.")
+    carga.add_argument("--tasa-rechazo", type=float, help="Fracción de documentos rechazados por la API.")
+    carga.add_argument("--tamano-pdf", type=int, help="Bytes de cada PDF servido.")
+    carga.add_argument("--copias", type=int, help="Copias impresas por documento (0: sin impresión).")
+    carga.add_argument("--lineas", type=int, default=3, help="Líneas de detalle por documento (por defecto 3).")
+    carga.add_argument("--lineas-max", type=int, help="Máximo de líneas de detalle por documento.")
+    carga.add_argument("--timeout", type=float, help="Segundos máximos de la prueba.")
+    carga.add_argument("--carpeta", help="Carpeta de trabajo a conservar (por defecto, una temporal que se elimina).")
+    carga.add_argument("--json", help="Archivo donde guardar el resultado completo en JSON.")
+    carga.set_defaults(funcion=comando_carga)
+
+    return parser
+
+
+def preparar_configuracion(args):
+    """
+    Carga la configuración indicada en los argumentos y prepara la base de datos.
+
+    Si se entrega un archivo YAML, su configuración reemplaza a la de config.db;
+    la base de datos se sigue usando para logs, bandeja de salida y registros.
+
+    Args:
+        args: Argumentos de la línea de comandos.
+
+    Raises:
+        ValueError: Si el archivo YAML no tiene el formato esperado.
+        OSError: Si el archivo YAML no se puede leer.
+    """
+    snapshot = None
+    if args.config:
+        from config.yaml_config import cargar_yaml
+        snapshot, db_path = cargar_yaml(args.config)
+        if db_path:
+            DB_CONFIG["path"] = db_path
+    if args.db:
+        DB_CONFIG["path"] = args.db
+
+    # Crear o migrar las tablas antes de que los hilos las usen
+    from config.database import DatabaseManager
+    DatabaseManager().create_tables()
+
+    if snapshot is not None:
+        from config import config_service
+        config_service.fijar_config(snapshot)
+
+
+def instalar_senales(detener):
+    """
+    Hace que SIGINT y SIGTERM (y SIGBREAK en Windows) pidan una detención ordenada.
+
+    Args:
+        detener: Evento que se activa al recibir la señal.
+    """
+    def manejar(signum, frame):
+        detener.set()
+
+    for nombre in ("SIGINT", "SIGTERM", "SIGBREAK", "SIGHUP"):
+        senal = getattr(signal, nombre, None)
+        if senal is not None:
+            signal.signal(senal, manejar)
+
+
+def comando_daemon(args):
+    """
+    Ejecuta el procesamiento (entrada, envío e impresión) hasta recibir una señal.
+
+    Args:
+        args: Argumentos de la línea de comandos.
+
+    Returns:
+        int: Código de salida.
+    """
+    from utils.instancia import InstanceLock
+
+    try:
+        preparar_configuracion(args)
+    except Exception as e:
+        print(f"Error al cargar la configuración: {e}", file=sys.stderr)
+        return SALIDA_ERROR_CONFIG
+
+    bloqueo = InstanceLock(args.lock)
+    if not bloqueo.adquirir():
+        pid = bloqueo.pid_dueno()
+        print(f"Aplicación ya en ejecución con PID {pid}" if pid else "Aplicación ya en ejecución", file=sys.stderr)
+        return SALIDA_EN_EJECUCION
+
+    from config import config_service
+    from utils.logger import Logger
+    from utils.file_processor import FileProcessor
+    from utils.monitor import iniciar_monitor
+
+    detener = threading.Event()
+    instalar_senales(detener)
+    logger = Logger()
+    codigo = SALIDA_OK
+    monitor = None
+
+    try:
+        directorios = config_service.obtener_config(logger).directorios
+        if directorios is None or not directorios.ruta_procesar or not directorios.ruta_procesado:
+            logger.log_message("Rutas no configuradas. No se puede iniciar el servicio.", "ERROR")
+            return SALIDA_ERROR_CONFIG
+
+        file_processor = FileProcessor(logger)
+        file_processor.start()
+        file_processor.process_files(directorios.ruta_procesar, directorios.ruta_procesado,
+                                     int(directorios.intervalo_exec))
+        logger.log_message(f"Servicio iniciado. Procesando {directorios.ruta_procesar}", "INFO")
+        monitor = iniciar_monitor(file_processor, logger, args.metricas)
+
+        # El hilo principal solo atiende señales y consume los eventos de progreso
+        while not detener.is_set():
+            try:
+                evento = file_processor.eventos.get(timeout=SERVICIO_CONFIG["intervalo_eventos"])
+            except queue.Empty:
+                continue
+            if evento["tipo"] == "detenido":
+                # El hilo de trabajo terminó por sí mismo (p. ej. directorio inexistente)
+                logger.log_message("El procesamiento se detuvo inesperadamente.", "ERROR")
+                codigo = SALIDA_ERROR_CONFIG
+                break
+
+        logger.log_message("Deteniendo el servicio...", "INFO")
+        detener_ordenado(file_processor, logger)
+        logger.log_message("Servicio detenido.", "INFO")
+        return codigo
+    finally:
+        if monitor is not None:
+            monitor.detener()
+        logger.cerrar()
+        bloqueo.liberar()
+
+
+def detener_ordenado(file_processor, logger):
+    """
+    Detiene el procesamiento y espera los trabajos pendientes, con un tiempo máximo.
+
+    Args:
+        file_processor: FileProcessor en ejecución.
+        logger: Objeto Logger para registrar eventos.
+    """
+    limite = time.monotonic() + SERVICIO_CONFIG["timeout_cierre"]
+
+    file_processor.stop()
+    # El hilo de trabajo termina el documento en curso y espera los envíos en vuelo
+    if not file_processor.esperar(max(0, limite - time.monotonic())):
+        logger.log_message("El hilo de procesamiento no terminó a tiempo.", "WARNING")
+
+    # Descargas e impresiones encoladas
+    while file_processor.pdf_stage.pendientes or file_processor.pdf_stage.spooler.pendientes:
+        if time.monotonic() >= limite:
+            logger.log_message("Quedaron PDFs sin descargar o imprimir al detener el servicio.", "WARNING")
+            break
+        time.sleep(0.1)
+
+
+def mostrar_progreso(estadisticas):
+    """
+    Muestra el avance de la carga masiva en la salida de errores.
+
+    Args:
+        estadisticas: Estadísticas entregadas por BackfillRunner.
+    """
+    hechos = estadisticas["omitidos"] + estadisticas["procesados"]
+    total = estadisticas["total"]
+    restantes = total - hechos
+    eta = f"{restantes / estadisticas['por_segundo']:.0f} s" if estadisticas["por_segundo"] else "-"
+    linea = (f"{hechos}/{total} ({estadisticas['por_segundo']:.1f} doc/s, faltan {eta}) "
+             f"aceptados {estadisticas['aceptado']}, duplicados {estadisticas['duplicado']}, "
+             f"rechazados {estadisticas['rechazado']}, errores {estadisticas['error']}")
+    # En una terminal se reescribe la misma línea; redirigido, una línea por aviso
+    if sys.stderr.isatty():
+        print(f"\r{linea}", end="", file=sys.stderr, flush=True)
+    else:
+        print(linea, file=sys.stderr, flush=True)
+
+
+def comando_backfill(args):
+    """
+    Envía a la API los TXT indicados, retomando la ejecución si fue interrumpida.
+
+    Args:
+        args: Argumentos de la línea de comandos.
+
+    Returns:
+        int: Código de salida (1 si quedaron archivos rechazados o con error).
+    """
+    try:
+        preparar_configuracion(args)
+    except Exception as e:
+        print(f"Error al cargar la configuración: {e}", file=sys.stderr)
+        return SALIDA_ERROR_CONFIG
+
+    from utils.backfill import BackfillRunner, expandir_rutas, id_ejecucion
+
+    rutas = expandir_rutas(args.entradas, args.recursivo)
+    if not rutas:
+        print("No se encontraron archivos TXT.", file=sys.stderr)
+        return SALIDA_ERROR_CONFIG
+
+    ejecucion = args.ejecucion or id_ejecucion(args.entradas)
+    runner = BackfillRunner(ejecucion, args.workers, args.reintentar_rechazados)
+    print(f"Ejecución {ejecucion}: {len(rutas)} archivos, {runner.workers} envíos simultáneos.", file=sys.stderr)
+
+    detener = threading.Event()
+    instalar_senales(detener)
+    estadisticas = runner.ejecutar(rutas, detener, al_progresar=mostrar_progreso)
+    if sys.stderr.isatty():
+        print(file=sys.stderr)
+
+    if estadisticas["interrumpido"]:
+        print(f"Interrumpido. Para retomar: python cli.py backfill ... --ejecucion {ejecucion}", file=sys.stderr)
+
+    resumen = runner.resumen()
+    print(f"Resumen de la ejecución {ejecucion}: procesados {estadisticas['procesados']} en "
+          f"{estadisticas['segundos']} s ({estadisticas['por_segundo']} doc/s), omitidos {estadisticas['omitidos']}; "
+          + ", ".join(f"{estado} {cantidad}" for estado, cantidad in sorted(resumen.items())))
+
+    if args.reporte:
+        filas = runner.exportar_reporte(args.reporte, args.solo_fallidos)
+        print(f"Reporte escrito en {args.reporte} ({filas} filas).")
+
+    fallidos = resumen.get("rechazado", 0) + resumen.get("error", 0)
+    return SALIDA_ERROR_CONFIG if fallidos or estadisticas["interrumpido"] else SALIDA_OK
+
+
+def comando_dry_run(args):
+    """
+    Compila y valida los payloads de los TXT indicados sin llamar a la API.
+
+    Args:
+        args: Argumentos de la línea de comandos.
+
+    Returns:
+        int: Código de salida (1 si algún documento no es válido).
+    """
+    try:
+        preparar_configuracion(args)
+    except Exception as e:
+        print(f"Error al cargar la configuración: {e}", file=sys.stderr)
+        return SALIDA_ERROR_CONFIG
+
+    from config import config_service
+    from utils.backfill import expandir_rutas
+    from utils.dry_run import compilar
+
+    rutas = expandir_rutas(args.entradas, args.recursivo)
+    if not rutas:
+        print("No se encontraron archivos TXT.", file=sys.stderr)
+        return SALIDA_ERROR_CONFIG
+
+    estadisticas = compilar(rutas, args.salida, config_service.obtener_config().datos_api,
+                            args.procesos, incluir_body=not args.sin_body)
+    print(f"Compilados {estadisticas['total']} documentos en {estadisticas['segundos']} s "
+          f"({estadisticas['por_segundo']} doc/s): válidos {estadisticas['validos']}, "
+          f"inválidos {estadisticas['invalidos']}, con observaciones {estadisticas['con_problemas']}.", file=sys.stderr)
+    return SALIDA_ERROR_CONFIG if estadisticas["invalidos"] else SALIDA_OK
+
+
+def comando_reprocesar_errores(args):
+    """
+    Marca para reintento los archivos de la carpeta de error que quedaron en revisión.
+
+    Son los que ya estaban en la carpeta antes de que existiera su registro; el
+    reproceso del servicio (o de la interfaz) los reenvía en su próximo ciclo.
+
+    Args:
+        args: Argumentos de la línea de comandos.
+
+    Returns:
+        int: Código de salida.
+    """
+    try:
+        preparar_configuracion(args)
+    except Exception as e:
+        print(f"Error al cargar la configuración: {e}", file=sys.stderr)
+        return SALIDA_ERROR_CONFIG
+
+    from utils.reprocesador import ErrorReprocessor
+
+    liberados = ErrorReprocessor().liberar_revision()
+    print(f"{liberados} archivos en revisión quedaron listos para reintentar.", file=sys.stderr)
+    return SALIDA_OK
+
+
+def comando_generar(args):
+    """
+    Escribe TXT sintéticos en una carpeta.
+
+    Args:
+        args: Argumentos de la línea de comandos.
+
+    Returns:
+        int: Código de salida.
+    """
+    from utils.generador import generar_lote
+
+    combinaciones = args.combinaciones.split(",") if args.combinaciones else None
+    try:
+        rutas = generar_lote(args.carpeta, args.cantidad, proporcion_facturas=args.facturas, lineas=args.lineas,
+                             lineas_max=args.lineas_max, combinaciones=combinaciones,
+                             folio_inicial=args.folio_inicial, fecha=args.fecha, semilla=args.semilla)
+    except KeyError as e:
+        print(f"Combinación desconocida: {e}", file=sys.stderr)
+        return SALIDA_ERROR_CONFIG
+    print(f"Generados {len(rutas)} documentos en {args.carpeta}.", file=sys.stderr)
+    return SALIDA_OK
+
+
+def comando_benchmark(args):
+    """
+    Ejecuta los micro-benchmarks, los compara con la ejecución anterior y guarda el resultado.
+
+    Args:
+        args: Argumentos de la línea de comandos.
+
+    Returns:
+        int: Código de salida (1 si alguna prueba empeoró más del umbral).
+    """
+    from config.settings import BENCHMARK_CONFIG
+    from utils import benchmark
+
+    pruebas = args.pruebas.split(",") if args.pruebas else None
+    try:
+        registro = benchmark.ejecutar(args.documentos, args.lineas, args.lineas_max, args.repeticiones,
+                                      pruebas=pruebas, etiqueta=args.etiqueta)
+    except KeyError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return SALIDA_ERROR_CONFIG
+
+    ruta = args.resultados or BENCHMARK_CONFIG["resultados"]
+    anterior = benchmark.ultimo_registro(ruta, registro["parametros"])
+    regresiones = benchmark.comparar(registro, anterior)
+
+    print(f"{'prueba':<16}{'docs':>7}{'us/doc':>11}{'mínimo':>11}{'docs/s':>12}{'anterior':>11}")
+    for nombre, resultado in registro["resultados"].items():
+        if not resultado:
+            continue
+        previo = (anterior or {}).get("resultados", {}).get(nombre)
+        columna_previa = f"{previo['us_por_doc']:.2f}" if previo else "-"
+        marca = "  REGRESIÓN" if nombre in regresiones else ""
+        print(f"{nombre:<16}{resultado['documentos']:>7}{resultado['us_por_doc']:>11.2f}{resultado['us_minimo']:>11.2f}"
+              f"{resultado['docs_por_segundo']:>12.1f}{columna_previa:>11}{marca}")
+
+    if anterior:
+        print(f"Comparado con {anterior.get('etiqueta') or anterior.get('commit') or '-'} ({anterior['fecha']}).")
+    if not args.no_guardar:
+        print(f"Resultado agregado a {benchmark.guardar(registro, ruta)}.")
+    return SALIDA_ERROR_CONFIG if regresiones else SALIDA_OK
+
+
+def comando_carga(args):
+    """
+    Ejecuta la prueba de carga y muestra el throughput, la latencia por etapa y la memoria.
+
+    Args:
+        args: Argumentos de la línea de comandos.
+
+    Returns:
+        int: Código de salida (1 si la prueba no terminó dentro del tiempo máximo).
+    """
+    import json
+    from utils.carga import ejecutar_carga, ETAPAS
+
+    resultado = ejecutar_carga(args.documentos, args.tasa, args.latencia, args.variacion, args.tasa_error,
+                               args.tasa_rechazo, args.tamano_pdf, args.copias, args.timeout,
+                               lineas=args.lineas, lineas_max=args.lineas_max, carpeta=args.carpeta)
+
+    print(f"Documentos: {resultado['archivados']}/{resultado['documentos']} en {resultado['segundos']} s "
+          f"({resultado['docs_por_segundo']} doc/s); aceptados {resultado['aceptados']}, "
+          f"fallidos {resultado['fallidos']}, retenidos {resultado['retenidos']}.")
+    print(f"{'etapa':<20}{'n':>7}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'máx ms':>10}")
+    for etapa in ETAPAS:
+        valores = resultado["etapas"].get(etapa)
+        if valores:
+            print(f"{etapa:<20}{valores['cantidad']:>7}{valores['p50_ms']:>10.1f}{valores['p95_ms']:>10.1f}"
+                  f"{valores['p99_ms']:>10.1f}{valores['max_ms']:>10.1f}")
+    memoria = resultado["memoria_mb"]
+    if memoria["maxima"] is not None:
+        print(f"Memoria máxima: {memoria['maxima']} MB (al iniciar: {memoria['inicial']} MB).")
+    if resultado["carpeta"]:
+        print(f"Carpeta de trabajo: {resultado['carpeta']}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(resultado, f, ensure_ascii=False, indent=2)
+        print(f"Resultado guardado en {args.json}.")
+
+    if resultado["incompleto"]:
+        print("La prueba no terminó dentro del tiempo máximo.", file=sys.stderr)
+        return SALIDA_ERROR_CONFIG
+    return SALIDA_OK
+
+
+def main(argv=None):
+    """Función principal de la línea de comandos."""
+    args = crear_parser().parse_args(argv)
+    return args.funcion(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
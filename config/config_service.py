@@ -0,0 +1,126 @@
+# -*- coding: utf-8 -*-
+"""
+Módulo con la copia en memoria de la configuración guardada en la base de datos.
+"""
+
+import threading
+from config.database import DatabaseManager
+from config.modelos import ConfigSnapshot
+
+
+class ConfigService:
+    """
+    Clase que mantiene una copia en memoria (snapshot) de la configuración.
+
+    La copia se lee de SQLite solo la primera vez y después de cada invalidación,
+    de modo que los caminos frecuentes (envío a la API, impresión) no consultan la
+    base de datos. DatabaseManager invalida la copia al guardar cualquier sección,
+    por lo que nunca se trabaja con valores obsoletos.
+
+    El servicio sin interfaz puede fijar una configuración leída de un archivo
+    YAML con `fijar()`; en ese caso la base de datos no se consulta.
+    """
+
+    def __init__(self, db_path=None):
+        """
+        Inicializa el servicio.
+
+        Args:
+            db_path: Ruta al archivo de base de datos. Si es None, usa la ruta de DB_CONFIG.
+        """
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._snapshot = None
+        self._fija = None
+        self._version = 0
+
+    @property
+    def version(self):
+        """Versión actual de la configuración."""
+        return self._version
+
+    def obtener(self, logger=None):
+        """
+        Retorna la configuración vigente, leyéndola de la base de datos si es necesario.
+
+        Args:
+            logger: Objeto Logger para registrar eventos (opcional).
+
+        Returns:
+            ConfigSnapshot: Copia inmutable de la configuración.
+        """
+        snapshot = self._snapshot
+        if snapshot is not None:
+            return snapshot
+
+        with self._lock:
+            if self._snapshot is None:
+                self._snapshot = self._cargar(logger)
+            return self._snapshot
+
+    def invalidar(self):
+        """Descarta la copia actual; la próxima lectura vuelve a la base de datos."""
+        with self._lock:
+            self._version += 1
+            self._snapshot = None
+
+    def fijar(self, snapshot):
+        """
+        Reemplaza la configuración de la base de datos por una configuración fija.
+
+        Args:
+            snapshot: ConfigSnapshot a usar, o None para volver a la base de datos.
+        """
+        with self._lock:
+            self._fija = snapshot
+            self._version += 1
+            self._snapshot = None
+
+    def _cargar(self, logger=None):
+        """Lee todas las secciones de configuración de la base de datos (o usa la configuración fija)."""
+        if self._fija is not None:
+            return self._fija._replace(version=self._version)
+
+        db_manager = DatabaseManager(self.db_path, log_function=logger.log_message if logger else None)
+        snapshot = ConfigSnapshot(
+            version=self._version,
+            empresa=db_manager.get_config(),
+            directorios=db_manager.get_directories(),
+            impresion=db_manager.get_print_config(),
+            autoprocess=bool(db_manager.get_autoprocess_config())
+        )
+        if logger:
+            logger.log_message(f"Configuración cargada desde la base de datos (versión {snapshot.version})", "INFO")
+        return snapshot
+
+
+# Servicio compartido por toda la aplicación
+_servicio = ConfigService()
+
+
+def obtener_config(logger=None):
+    """
+    Retorna la configuración vigente del servicio compartido.
+
+    Args:
+        logger: Objeto Logger para registrar eventos (opcional).
+
+    Returns:
+        ConfigSnapshot: Copia inmutable de la configuración.
+    """
+    return _servicio.obtener(logger)
+
+
+def invalidar():
+    """Invalida la configuración del servicio compartido."""
+    _servicio.invalidar()
+
+
+def fijar_config(snapshot):
+    """
+    Fija la configuración del servicio compartido (p. ej. leída de un archivo YAML).
+
+    Args:
+        snapshot: ConfigSnapshot a usar, o None para volver a la base de datos.
+    """
+    _servicio.fijar(snapshot)
@@ -6,9 +6,114 @@ Módulo para manejar las operaciones de base de datos.
 import os
 import re
 import sqlite3
-import tkinter as tk
-from tkinter import messagebox
+import threading
 from config.settings import DB_CONFIG
+from config.modelos import EmpresaConfig, DirectoriosConfig, ImpresionConfig
+
+# Versión del esquema; se guarda en PRAGMA user_version
+SCHEMA_VERSION = 6
+
+# Pragmas aplicados a cada conexión
+PRAGMAS = (
+    "PRAGMA journal_mode = WAL",        # Lecturas y escrituras concurrentes sin bloquearse
+    "PRAGMA synchronous = NORMAL",      # Seguro con WAL y con menos fsync por transacción
+    "PRAGMA busy_timeout = 5000",       # Esperar al escritor en lugar de fallar con "database is locked"
+    "PRAGMA temp_store = MEMORY",
+    "PRAGMA foreign_keys = ON",
+)
+
+# Tablas de una sola fila: nombre -> columnas. La fila siempre tiene id = 1
+TABLAS_UNICAS = {
+    "admin": """
+        "password" TEXT(50) NOT NULL
+    """,
+    "config": """
+        "rut_empresa" TEXT(12) NOT NULL,
+        "razon_social" TEXT(200) NOT NULL,
+        "telefono" INTEGER,
+        "direccion" TEXT(200) NOT NULL,
+        "comuna" TEXT(25) NOT NULL,
+        "email" TEXT(100),
+        "codsuc_sii" INTEGER NOT NULL,
+        "giro" TEXT(80) NOT NULL,
+        "act_economica" INTEGER NOT NULL,
+        "apikey" TEXT NOT NULL,
+        "tpv" TEXT NOT NULL,
+        "ciudad" TEXT(30) NOT NULL,
+        "region" TEXT(35) NOT NULL
+    """,
+    "directorios": """
+        "ruta_procesar" TEXT NOT NULL,
+        "ruta_procesado" TEXT NOT NULL,
+        "intervalo_exec" INTEGER NOT NULL
+    """,
+    "impresion": """
+        "hab_printer" INTEGER,
+        "printer" TEXT,
+        "num_copias" INTEGER,
+        "habdesc_local" INTEGER,
+        "ruta_descargas" TEXT
+    """,
+    "app_config": """
+        "autoprocess" INTEGER DEFAULT 0,
+        "autostart_windows" INTEGER DEFAULT 0
+    """,
+}
+
+# Columnas de las tablas de configuración, en el orden en que las usa la aplicación
+COLUMNAS_CONFIG = EmpresaConfig._fields
+COLUMNAS_DIRECTORIOS = DirectoriosConfig._fields
+COLUMNAS_IMPRESION = ImpresionConfig._fields
+
+# Conexiones abiertas por hilo: ruta de la base de datos -> conexión
+_conexiones = threading.local()
+
+
+def conectar(db_path=None):
+    """
+    Retorna la conexión del hilo actual a la base de datos, abriéndola si no existe.
+
+    Cada hilo mantiene una única conexión de larga duración por base de datos, en
+    modo WAL y con los pragmas de PRAGMAS, de modo que no se paga la apertura en
+    cada consulta y las lecturas no bloquean a las escrituras de logs.
+
+    Args:
+        db_path: Ruta al archivo de base de datos. Si es None, usa la ruta de DB_CONFIG.
+
+    Returns:
+        sqlite3.Connection: Conexión del hilo actual.
+    """
+    db_path = db_path if db_path is not None else DB_CONFIG["path"]
+    abiertas = getattr(_conexiones, "abiertas", None)
+    if abiertas is None:
+        abiertas = _conexiones.abiertas = {}
+
+    conn = abiertas.get(db_path)
+    if conn is None:
+        # Asegurar que el directorio de la base de datos exista
+        db_dir = os.path.dirname(db_path)
+        if db_dir and not os.path.exists(db_dir):
+            os.makedirs(db_dir, exist_ok=True)
+
+        conn = sqlite3.connect(db_path)
+        for pragma in PRAGMAS:
+            conn.execute(pragma)
+        abiertas[db_path] = conn
+    return conn
+
+
+def cerrar_conexion(db_path=None):
+    """
+    Cierra la conexión del hilo actual a la base de datos, si existe.
+
+    Args:
+        db_path: Ruta al archivo de base de datos. Si es None, usa la ruta de DB_CONFIG.
+    """
+    db_path = db_path if db_path is not None else DB_CONFIG["path"]
+    conn = getattr(_conexiones, "abiertas", {}).pop(db_path, None)
+    if conn is not None:
+        conn.close()
+
 
 class DatabaseManager:
     """Clase para gestionar las operaciones de la base de datos."""
@@ -31,14 +136,9 @@ class DatabaseManager:
             self.log_function(message, tipo)
     
     def connect(self):
-        """Establece una conexión a la base de datos."""
+        """Retorna la conexión del hilo actual a la base de datos."""
         try:
-            # Asegurar que el directorio de la base de datos exista
-            db_dir = os.path.dirname(self.db_path)
-            if db_dir and not os.path.exists(db_dir):
-                os.makedirs(db_dir)
-                
-            return sqlite3.connect(self.db_path)
+            return conectar(self.db_path)
         except sqlite3.Error as e:
             self._log_message(f"Error al conectar con la base de datos: {e}", "ERROR")
             raise
@@ -75,97 +175,226 @@ class DatabaseManager:
                 conn.rollback()
             self._log_message(f"Error en la consulta SQL: {e}", "ERROR")
             raise
-        finally:
-            if conn:
-                conn.close()
+
+    def _upsert(self, tabla, columnas, valores):
+        """
+        Inserta o actualiza la única fila (id = 1) de una tabla de configuración.
+        
+        Args:
+            tabla: Nombre de la tabla.
+            columnas: Nombres de las columnas a guardar.
+            valores: Valores en el mismo orden que las columnas.
+        """
+        lista_columnas = ", ".join(columnas)
+        marcadores = ", ".join("?" for _ in columnas)
+        asignaciones = ", ".join(f"{columna} = excluded.{columna}" for columna in columnas)
+        self.execute_query(
+            f"INSERT INTO {tabla} (id, {lista_columnas}) VALUES (1, {marcadores}) "
+            f"ON CONFLICT(id) DO UPDATE SET {asignaciones}",
+            tuple(valores)
+        )
+
+    def _invalidar_snapshot(self):
+        """Invalida la copia en memoria de la configuración tras guardar un cambio."""
+        # Importación diferida: config_service depende de este módulo
+        from config import config_service
+        config_service.invalidar()
 
     def create_tables(self):
-        """Crea las tablas necesarias en la base de datos si no existen."""
+        """
+        Crea o migra las tablas de la base de datos.
+        
+        Si el esquema ya está en SCHEMA_VERSION no se ejecuta ninguna sentencia DDL.
+        """
+        conn = None
         try:
             conn = self.connect()
-            cursor = conn.cursor()
-            
-            # Definir las consultas SQL para crear las tablas
-            tablas_sql = [
-                """
-                CREATE TABLE IF NOT EXISTS "admin" (
-                    "password" TEXT(50) NOT NULL
-                );
-                """,
-                """
-                CREATE TABLE IF NOT EXISTS "config" (
-                    "rut_empresa" TEXT(12) NOT NULL,
-                    "razon_social" TEXT(200) NOT NULL,
-                    "telefono" INTEGER,
-                    "direccion" TEXT(200) NOT NULL,
-                    "comuna" TEXT(25) NOT NULL,
-                    "email" TEXT(100),
-                    "codsuc_sii" INTEGER NOT NULL,
-                    "giro" TEXT(80) NOT NULL,
-                    "act_economica" INTEGER NOT NULL,
-                    "apikey" TEXT NOT NULL,
-                    "tpv" TEXT NOT NULL,
-                    "ciudad" TEXT(30) NOT NULL,
-                    "region" TEXT(35) NOT NULL
-                );
-                """,
-                """
-                CREATE TABLE IF NOT EXISTS "directorios" (
-                    "ruta_procesar" TEXT NOT NULL,
-                    "ruta_procesado" TEXT NOT NULL,
-                    "intervalo_exec" INTEGER NOT NULL
-                );
-                """,
-                """
-                CREATE TABLE IF NOT EXISTS "impresion" (
-                    "hab_printer" INTEGER,
-                    "printer" TEXT,
-                    "num_copias" INTEGER,
-                    "habdesc_local" INTEGER,
-                    "ruta_descargas" TEXT
-                );
-                """,
-                """
-                CREATE TABLE IF NOT EXISTS "log_procesos" (
-                    "fecha"	TEXT NOT NULL,
-                    "hora"	TEXT,
-                    "tipo"	TEXT,
-                    "asunto"	TEXT
-                );
-                """,
-                """
-                CREATE TABLE IF NOT EXISTS "app_config" (
-                    "autoprocess" INTEGER DEFAULT 0,
-                    "autostart_windows" INTEGER DEFAULT 0
-                );
-                """
-            ]
-
-            # Crear tablas si no existen
-            for tabla_sql in tablas_sql:
-                cursor.execute(tabla_sql)
+            version = conn.execute("PRAGMA user_version").fetchone()[0]
+            if version >= SCHEMA_VERSION:
+                return
             
-            # Verificar si ya existe un registro en admin y agregarlo si no
-            cursor.execute("SELECT COUNT(*) FROM admin")
-            if cursor.fetchone()[0] == 0:
-                cursor.execute("INSERT INTO admin (password) VALUES ('admin00')")
+            # Toda la migración en una transacción (incluidas las sentencias DDL)
+            with conn:
+                conn.execute("BEGIN")
+                if version < 1:
+                    self._migrar_v1(conn)
+                if version < 2:
+                    self._migrar_v2(conn)
+                if version < 3:
+                    self._migrar_v3(conn)
+                if version < 4:
+                    self._migrar_v4(conn)
+                if version < 5:
+                    self._migrar_v5(conn)
+                if version < 6:
+                    self._migrar_v6(conn)
+                conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
             
-            # Verificar si ya existe un registro en app_config y agregarlo si no
-            cursor.execute("SELECT COUNT(*) FROM app_config")
-            if cursor.fetchone()[0] == 0:
-                cursor.execute("INSERT INTO app_config (autoprocess, autostart_windows) VALUES (0, 0)")
-            
-            conn.commit()
             self._log_message("Tablas creadas o verificadas correctamente.", "INFO")
             
         except sqlite3.Error as e:
             self._log_message(f"Error al crear tablas: {e}", "ERROR")
-            if conn:
-                conn.rollback()
             raise
-        finally:
-            if conn:
-                conn.close()
+
+    def _migrar_v1(self, conn):
+        """
+        Esquema versión 1: las tablas de una sola fila pasan a tener id = 1 como
+        clave primaria, lo que permite guardarlas con un upsert.
+        
+        Args:
+            conn: Conexión con una transacción abierta.
+        """
+        existentes = {fila[0] for fila in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+        
+        for tabla, columnas in TABLAS_UNICAS.items():
+            definicion = f'"id" INTEGER PRIMARY KEY CHECK ("id" = 1), {columnas}'
+            if tabla not in existentes:
+                conn.execute(f'CREATE TABLE "{tabla}" ({definicion})')
+                continue
+            
+            # Reconstruir la tabla conservando su primera fila
+            nombres = ", ".join(re.findall(r'"(\w+)"', columnas))
+            conn.execute(f'CREATE TABLE "{tabla}_v1" ({definicion})')
+            conn.execute(f'INSERT INTO "{tabla}_v1" (id, {nombres}) SELECT 1, {nombres} FROM "{tabla}" LIMIT 1')
+            conn.execute(f'DROP TABLE "{tabla}"')
+            conn.execute(f'ALTER TABLE "{tabla}_v1" RENAME TO "{tabla}"')
+        
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS "log_procesos" (
+                "fecha"	TEXT NOT NULL,
+                "hora"	TEXT,
+                "tipo"	TEXT,
+                "asunto"	TEXT
+            )
+        """)
+        
+        # Registros iniciales
+        conn.execute("INSERT OR IGNORE INTO admin (id, password) VALUES (1, 'admin00')")
+        conn.execute("INSERT OR IGNORE INTO app_config (id, autoprocess, autostart_windows) VALUES (1, 0, 0)")
+
+    def _migrar_v2(self, conn):
+        """
+        Esquema versión 2: bandeja de salida (outbox) de documentos retenidos
+        mientras la API no está disponible.
+        
+        Args:
+            conn: Conexión con una transacción abierta.
+        """
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS "outbox" (
+                "id" INTEGER PRIMARY KEY AUTOINCREMENT,
+                "nombre" TEXT NOT NULL,
+                "ruta" TEXT NOT NULL,
+                "ruta_procesado" TEXT NOT NULL,
+                "tipo_dte" INTEGER,
+                "folio" INTEGER,
+                "fecha" TEXT,
+                "payload" TEXT NOT NULL,
+                "intentos" INTEGER NOT NULL DEFAULT 0,
+                "ultimo_error" TEXT,
+                "creado" TEXT NOT NULL
+            )
+        """)
+    
+    def _migrar_v3(self, conn):
+        """
+        Esquema versión 3: registro de los archivos de la carpeta de error, con su
+        clasificación y la programación de reintentos.
+        
+        Args:
+            conn: Conexión con una transacción abierta.
+        """
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS "errores" (
+                "id" INTEGER PRIMARY KEY AUTOINCREMENT,
+                "ruta" TEXT NOT NULL UNIQUE,
+                "nombre" TEXT NOT NULL,
+                "ruta_procesado" TEXT NOT NULL,
+                "tipo_error" TEXT NOT NULL,
+                "status_code" INTEGER,
+                "detalle" TEXT,
+                "reintentable" INTEGER NOT NULL DEFAULT 0,
+                "intentos" INTEGER NOT NULL DEFAULT 0,
+                "proximo_intento" REAL,
+                "registrado" TEXT NOT NULL
+            )
+        """)
+        conn.execute('CREATE INDEX IF NOT EXISTS "idx_errores_proximo" ON "errores" ("reintentable", "proximo_intento")')
+    
+    def _migrar_v4(self, conn):
+        """
+        Esquema versión 4: registro de documentos enviados a la API (ledger), para
+        no volver a enviar ni imprimir un documento ya aceptado.
+        
+        Args:
+            conn: Conexión con una transacción abierta.
+        """
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS "ledger" (
+                "hash" TEXT PRIMARY KEY,
+                "tipo_dte" INTEGER,
+                "folio" INTEGER,
+                "rut_emisor" TEXT,
+                "estado" TEXT NOT NULL,
+                "respuesta" TEXT,
+                "creado" TEXT NOT NULL,
+                "confirmado" TEXT
+            ) WITHOUT ROWID
+        """)
+        conn.execute('CREATE INDEX IF NOT EXISTS "idx_ledger_folio" ON "ledger" ("rut_emisor", "tipo_dte", "folio")')
+    
+    def _migrar_v5(self, conn):
+        """
+        Esquema versión 5: avance de las cargas masivas (backfill), para poder
+        retomar una ejecución interrumpida.
+        
+        Args:
+            conn: Conexión con una transacción abierta.
+        """
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS "backfill" (
+                "ejecucion" TEXT NOT NULL,
+                "ruta" TEXT NOT NULL,
+                "nombre" TEXT,
+                "tipo_dte" INTEGER,
+                "folio" INTEGER,
+                "estado" TEXT NOT NULL,
+                "tipo_error" TEXT,
+                "detalle" TEXT,
+                "pdf" TEXT,
+                "segundos" REAL,
+                "procesado" TEXT NOT NULL,
+                PRIMARY KEY ("ejecucion", "ruta")
+            ) WITHOUT ROWID
+        """)
+    
+    def _migrar_v6(self, conn):
+        """
+        Esquema versión 6: tiempos de cada etapa del procesamiento de un documento
+        (métricas), para analizar la latencia por etapa, archivo o período.
+        
+        Args:
+            conn: Conexión con una transacción abierta.
+        """
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS "metricas_etapas" (
+                "id" INTEGER PRIMARY KEY,
+                "inicio" TEXT NOT NULL,
+                "etapa" TEXT NOT NULL,
+                "archivo" TEXT,
+                "tipo_dte" INTEGER,
+                "folio" INTEGER,
+                "duracion_ms" REAL NOT NULL,
+                "exito" INTEGER NOT NULL DEFAULT 1,
+                "detalle" TEXT
+            )
+        """)
+        # Percentiles por etapa y período se resuelven solo con el índice
+        conn.execute('CREATE INDEX IF NOT EXISTS "idx_metricas_etapa_inicio" '
+                     'ON "metricas_etapas" ("etapa", "inicio", "duracion_ms")')
+        conn.execute('CREATE INDEX IF NOT EXISTS "idx_metricas_inicio" ON "metricas_etapas" ("inicio")')
+        conn.execute('CREATE INDEX IF NOT EXISTS "idx_metricas_archivo" ON "metricas_etapas" ("archivo")')
+        conn.execute('CREATE INDEX IF NOT EXISTS "idx_metricas_documento" ON "metricas_etapas" ("tipo_dte", "folio")')
     
     def save_log(self, fecha, hora, tipo, asunto):
         """
@@ -191,11 +420,11 @@ class DatabaseManager:
         Obtiene la configuración guardada en la base de datos.
         
         Returns:
-            Registro de configuración o None si no existe.
+            EmpresaConfig: Registro de configuración o None si no existe.
         """
         try:
-            result = self.execute_query("SELECT * FROM config LIMIT 1")
-            return result[0] if result else None
+            result = self.execute_query(f"SELECT {', '.join(COLUMNAS_CONFIG)} FROM config LIMIT 1")
+            return EmpresaConfig(*result[0]) if result else None
         except sqlite3.Error as e:
             self._log_message(f"Error al obtener configuración: {e}", "ERROR")
             return None
@@ -211,35 +440,9 @@ class DatabaseManager:
             True si se guardó correctamente, False en caso contrario.
         """
         try:
-            # Verificar si existe un registro en la tabla config
-            result = self.execute_query("SELECT COUNT(*) FROM config")
-            tiene_registro = result[0][0] > 0
-
-            if tiene_registro:
-                # Actualizar el registro existente
-                self.execute_query(
-                    '''
-                    UPDATE config SET
-                        rut_empresa = ?, razon_social = ?, telefono = ?, direccion = ?, 
-                        comuna = ?, email = ?, codsuc_sii = ?, giro = ?, act_economica = ?, 
-                        apikey = ?, tpv = ?, ciudad = ?, region = ?
-                    ''', 
-                    config_data
-                )
-                self._log_message("Configuración actualizada exitosamente.", "INFO")
-            else:
-                # Insertar un nuevo registro
-                self.execute_query(
-                    '''
-                    INSERT INTO config (
-                        rut_empresa, razon_social, telefono, direccion, comuna, email,
-                        codsuc_sii, giro, act_economica, apikey, tpv, ciudad, region
-                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                    ''', 
-                    config_data
-                )
-                self._log_message("Configuración guardada exitosamente.", "INFO")
-            
+            self._upsert("config", COLUMNAS_CONFIG, config_data)
+            self._invalidar_snapshot()
+            self._log_message("Configuración guardada exitosamente.", "INFO")
             return True
         except Exception as e:
             self._log_message(f"Error al guardar configuración: {e}", "ERROR")
@@ -250,11 +453,11 @@ class DatabaseManager:
         Obtiene la configuración de directorios guardada.
         
         Returns:
-            Configuración de directorios o None si no existe.
+            DirectoriosConfig: Configuración de directorios o None si no existe.
         """
         try:
-            result = self.execute_query("SELECT * FROM directorios LIMIT 1")
-            return result[0] if result else None
+            result = self.execute_query(f"SELECT {', '.join(COLUMNAS_DIRECTORIOS)} FROM directorios LIMIT 1")
+            return DirectoriosConfig(*result[0]) if result else None
         except sqlite3.Error as e:
             self._log_message(f"Error al obtener directorios: {e}", "ERROR")
             return None
@@ -270,31 +473,9 @@ class DatabaseManager:
             True si se guardó correctamente, False en caso contrario.
         """
         try:
-            # Verificar si existe un registro en la tabla directorios
-            result = self.execute_query("SELECT COUNT(*) FROM directorios")
-            tiene_registro = result[0][0] > 0
-
-            if tiene_registro:
-                # Actualizar el registro existente
-                self.execute_query(
-                    '''
-                    UPDATE directorios SET
-                        ruta_procesar = ?, ruta_procesado = ?, intervalo_exec = ?
-                    ''', 
-                    directories_data
-                )
-                self._log_message("Directorios actualizados exitosamente.", "INFO")
-            else:
-                # Insertar un nuevo registro
-                self.execute_query(
-                    '''
-                    INSERT INTO directorios (ruta_procesar, ruta_procesado, intervalo_exec)
-                    VALUES (?, ?, ?)
-                    ''', 
-                    directories_data
-                )
-                self._log_message("Directorios guardados exitosamente.", "INFO")
-            
+            self._upsert("directorios", COLUMNAS_DIRECTORIOS, directories_data)
+            self._invalidar_snapshot()
+            self._log_message("Directorios guardados exitosamente.", "INFO")
             return True
         except Exception as e:
             self._log_message(f"Error al guardar directorios: {e}", "ERROR")
@@ -305,11 +486,11 @@ class DatabaseManager:
         Obtiene la configuración de impresión guardada.
         
         Returns:
-            Configuración de impresión o None si no existe.
+            ImpresionConfig: Configuración de impresión o None si no existe.
         """
         try:
-            result = self.execute_query("SELECT * FROM impresion LIMIT 1")
-            return result[0] if result else None
+            result = self.execute_query(f"SELECT {', '.join(COLUMNAS_IMPRESION)} FROM impresion LIMIT 1")
+            return ImpresionConfig(*result[0]) if result else None
         except sqlite3.Error as e:
             self._log_message(f"Error al obtener configuración de impresión: {e}", "ERROR")
             return None
@@ -325,31 +506,9 @@ class DatabaseManager:
             True si se guardó correctamente, False en caso contrario.
         """
         try:
-            # Verificar si existe un registro en la tabla impresion
-            result = self.execute_query("SELECT COUNT(*) FROM impresion")
-            tiene_registro = result[0][0] > 0
-
-            if tiene_registro:
-                # Actualizar el registro existente
-                self.execute_query(
-                    '''
-                    UPDATE impresion SET
-                        hab_printer = ?, printer = ?, num_copias = ?, habdesc_local = ?, ruta_descargas = ?
-                    ''', 
-                    print_data
-                )
-                self._log_message("Configuración de impresión actualizada exitosamente.", "INFO")
-            else:
-                # Insertar un nuevo registro
-                self.execute_query(
-                    '''
-                    INSERT INTO impresion (hab_printer, printer, num_copias, habdesc_local, ruta_descargas)
-                    VALUES (?, ?, ?, ?, ?)
-                    ''', 
-                    print_data
-                )
-                self._log_message("Configuración de impresión guardada exitosamente.", "INFO")
-            
+            self._upsert("impresion", COLUMNAS_IMPRESION, print_data)
+            self._invalidar_snapshot()
+            self._log_message("Configuración de impresión guardada exitosamente.", "INFO")
             return True
         except Exception as e:
             self._log_message(f"Error al guardar configuración de impresión: {e}", "ERROR")
@@ -401,18 +560,7 @@ class DatabaseManager:
             config = self.get_config()
             
             if config:
-                # Mapear los campos según el orden en la tabla
-                config_fields['rut_empresa'] = re.sub(r'\.', '', config[0])
-                config_fields['razon_social'] = config[1]
-                config_fields['telefono'] = config[2]
-                config_fields['direccion'] = config[3]
-                config_fields['comuna'] = config[4]
-                config_fields['email'] = config[5]
-                config_fields['codsuc_sii'] = config[6]
-                config_fields['giro'] = config[7]
-                config_fields['act_economica'] = config[8]
-                config_fields['apikey'] = config[9]
-                config_fields['tpv'] = config[10]
+                config_fields = config.datos_api()
         except Exception as e:
             if self.log_function:
                 self.log_function(f"Error al cargar configuración: {e}", "ERROR")
@@ -435,7 +583,7 @@ class DatabaseManager:
                 return bool(result[0][0])
             else:
                 # Si no hay registros, insertar uno con valor predeterminado False
-                self.execute_query("INSERT INTO app_config (autoprocess, autostart_windows) VALUES (0, 0)")
+                self.execute_query("INSERT OR IGNORE INTO app_config (id, autoprocess, autostart_windows) VALUES (1, 0, 0)")
                 return False
         except sqlite3.Error as e:
             self._log_message(f"Error al obtener configuración de autoprocess: {e}", "ERROR")
@@ -455,25 +603,13 @@ class DatabaseManager:
             # Convertir el booleano a INTEGER (0 o 1)
             autoprocess_value = 1 if enabled else 0
             
-            # Verificar si existe un registro en la tabla app_config
-            result = self.execute_query("SELECT COUNT(*) FROM app_config")
-            tiene_registro = result[0][0] > 0
-
-            if tiene_registro:
-                # Actualizar el registro existente
-                self.execute_query(
-                    "UPDATE app_config SET autoprocess = ?", 
-                    (autoprocess_value,)
-                )
-                self._log_message(f"Configuración de inicio automático de procesamiento {'habilitada' if enabled else 'deshabilitada'}.", "INFO")
-            else:
-                # Insertar un nuevo registro
-                self.execute_query(
-                    "INSERT INTO app_config (autoprocess, autostart_windows) VALUES (?, 0)",
-                    (autoprocess_value,)
-                )
-                self._log_message(f"Configuración de inicio automático de procesamiento {'habilitada' if enabled else 'deshabilitada'}.", "INFO")
-            
+            self.execute_query(
+                "INSERT INTO app_config (id, autoprocess) VALUES (1, ?) "
+                "ON CONFLICT(id) DO UPDATE SET autoprocess = excluded.autoprocess",
+                (autoprocess_value,)
+            )
+            self._invalidar_snapshot()
+            self._log_message(f"Configuración de inicio automático de procesamiento {'habilitada' if enabled else 'deshabilitada'}.", "INFO")
             return True
         except Exception as e:
             self._log_message(f"Error al guardar configuración de inicio automático: {e}", "ERROR")
@@ -0,0 +1,90 @@
+# -*- coding: utf-8 -*-
+"""
+Módulo con los tipos de las filas de configuración guardadas en la base de datos.
+
+Son NamedTuple, por lo que siguen siendo tuplas (se pueden desempaquetar o
+indexar como antes) pero además exponen cada campo por nombre.
+"""
+
+import re
+from typing import NamedTuple, Optional
+
+
+class EmpresaConfig(NamedTuple):
+    """Datos de la empresa emisora (tabla config)."""
+
+    rut_empresa: str
+    razon_social: str
+    telefono: Optional[int]
+    direccion: str
+    comuna: str
+    email: Optional[str]
+    codsuc_sii: int
+    giro: str
+    act_economica: int
+    apikey: str
+    tpv: str
+    ciudad: str
+    region: str
+
+    def datos_api(self):
+        """
+        Retorna los campos que necesita process_and_post_txt.
+
+        Returns:
+            dict: Campos de la empresa, con el RUT sin puntos.
+        """
+        return {
+            'rut_empresa': re.sub(r'\.', '', self.rut_empresa),
+            'razon_social': self.razon_social,
+            'giro': self.giro,
+            'act_economica': self.act_economica,
+            'direccion': self.direccion,
+            'comuna': self.comuna,
+            'telefono': self.telefono,
+            'codsuc_sii': self.codsuc_sii,
+            'email': self.email,
+            'apikey': self.apikey,
+            'tpv': self.tpv
+        }
+
+
+class DirectoriosConfig(NamedTuple):
+    """Carpetas de trabajo e intervalo de revisión (tabla directorios)."""
+
+    ruta_procesar: str
+    ruta_procesado: str
+    intervalo_exec: int
+
+
+class ImpresionConfig(NamedTuple):
+    """Configuración de impresión y descarga de PDFs (tabla impresion)."""
+
+    hab_printer: int
+    printer: str
+    num_copias: int
+    habdesc_local: int
+    ruta_descargas: str
+
+
+class ConfigSnapshot(NamedTuple):
+    """
+    Copia inmutable de toda la configuración en un momento dado.
+
+    `version` aumenta cada vez que se guarda un cambio, lo que permite saber si
+    una copia quedó obsoleta. Las secciones sin datos guardados son None.
+    """
+
+    version: int
+    empresa: Optional[EmpresaConfig]
+    directorios: Optional[DirectoriosConfig]
+    impresion: Optional[ImpresionConfig]
+    autoprocess: bool
+
+    @property
+    def datos_api(self):
+        """Campos de la empresa para la API, o un diccionario con campos vacíos si no hay configuración."""
+        if self.empresa is None:
+            return {campo: '' for campo in ('rut_empresa', 'razon_social', 'giro', 'act_economica', 'direccion',
+                                            'comuna', 'telefono', 'codsuc_sii', 'email', 'apikey', 'tpv')}
+        return self.empresa.datos_api()
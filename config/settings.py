@@ -38,4 +38,145 @@ WINDOW_CONFIG = {
     "title": "Plain_Text_Bowa",
     "resizable": (False, False),
     "icon": os.path.join(IMG_DIR, "logo.ico")  # Ruta absoluta al icono
-}
\ No newline at end of file
+}
+
+# Configuración del panel de rendimiento del panel lateral
+DASHBOARD_CONFIG = {
+    "ventana": 60,               # Segundos considerados para docs/min y la tasa de error
+    "muestras_latencia": 60,     # Últimos documentos dibujados en el gráfico de latencia
+    "intervalo_ms": 1000,        # Intervalo de actualización del panel
+    "umbral_pendientes": 50      # Pendientes sobre los que un atraso creciente se marca en rojo
+}
+
+# Configuración del ciclo de procesamiento de archivos
+PROCESS_CONFIG = {
+    "drenar_lote": True,         # Procesar toda la cola pendiente en cada ciclo
+    "presupuesto_lote": 2.0,     # Segundos máximos de trabajo antes de volver a listar
+    "espera_estabilidad": 1.0,   # Segundos sin cambios (mtime y tamaño) antes de tomar un TXT recién escrito
+    "max_en_vuelo": 4            # Documentos enviados a la API en paralelo (las respuestas se archivan en orden por tipo de DTE)
+}
+
+# Configuración de la vigilancia de carpetas por eventos (watchfiles)
+WATCH_CONFIG = {
+    "habilitado": True,          # Si es False se usa solo el sondeo por intervalo
+    "debounce_ms": 200,          # Ventana máxima para agrupar eventos
+    "step_ms": 20                # Silencio requerido antes de notificar un cambio
+}
+
+# Configuración del transporte HTTP hacia la API de DTE
+HTTP_CONFIG = {
+    "api_url": "https://api.qpos.io/cl/online/api/v1/edidte/Document",
+    "pool_size": 10,             # Conexiones persistentes por host
+    "timeout_conexion": 5,       # Segundos para establecer la conexión
+    "timeout_lectura": 60,       # Segundos de espera de la respuesta
+    "calentar_al_iniciar": True  # Abrir la conexión TLS al iniciar el procesamiento
+}
+
+# Configuración de la etapa de descarga/impresión de PDFs
+PDF_CONFIG = {
+    "workers": 2                 # Hilos que descargan, archivan e imprimen PDFs
+}
+
+# Configuración de la cola de impresión (spooler)
+SPOOLER_CONFIG = {
+    "backend": "auto",           # auto, sumatra, acrobat, shell, lp, archivo o simulado
+    "timeout": 120,              # Segundos antes de terminar un proceso de impresión colgado
+    "espera_acrobat": 15,        # Segundos que se conserva el PDF antes de cerrar Acrobat (que queda abierto) y revisar su resultado
+    "espera_shell": 5.0,         # Segundos que se conserva el PDF para que la acción "print" de Windows lo abra antes de borrarlo
+    "ruta_acrobat": "",          # Ejecutable de Adobe Acrobat Reader (opcional)
+    "carpeta_archivo": os.path.join(BASE_DIR, "impresiones"),  # Destino del backend "archivo"
+    "demora_simulada": 0.05      # Segundos por copia del backend "simulado"
+}
+
+# Configuración de la escritura de logs en la base de datos
+LOG_CONFIG = {
+    "tamano_lote": 200,          # Registros acumulados que fuerzan una escritura
+    "intervalo_escritura": 1.0,  # Segundos máximos que un registro espera en memoria
+    "lineas_visibles": 2000,     # Líneas máximas del textbox de logs (las anteriores se leen de SQLite)
+    "intervalo_vista_ms": 150,   # Intervalo de volcado de los mensajes acumulados al textbox
+    "lote_historial": 500        # Registros leídos de SQLite cada vez que se piden logs anteriores
+}
+
+# Configuración de la bandeja de salida (documentos retenidos sin API)
+OUTBOX_CONFIG = {
+    "lote": 50,                  # Documentos leídos de la bandeja por ciclo de envío
+    "fallos_para_retener": 3,    # Fallos transitorios seguidos tras los que los nuevos documentos se retienen sin intentar la API
+    "backoff_base": 2.0,         # Segundos de espera tras el primer fallo
+    "backoff_max": 300.0,        # Espera máxima entre reintentos
+    "carpeta": "pendiente"       # Subcarpeta de ruta_procesado donde se retienen los TXT
+}
+
+# Configuración del reproceso automático de la carpeta de error
+REINTENTO_CONFIG = {
+    "habilitado": True,
+    "intervalo_escaneo": 300,    # Segundos entre revisiones del árbol error/mm_yyyy/dd
+    "por_minuto": 30,            # Máximo de reintentos enviados a la API por minuto
+    "max_intentos": 5,           # Intentos antes de dejar el archivo en error definitivamente
+    "backoff_base": 60.0,        # Segundos de espera tras el primer reintento fallido
+    "backoff_max": 21600.0,      # Espera máxima entre reintentos (6 horas)
+    "lote": 100,                 # Archivos considerados por ciclo
+    # Reintentar los archivos que ya estaban en error/ sin registro (pueden haber sido aceptados
+    # por la API); si es False quedan "en revisión" hasta `cli.py reprocesar-errores`
+    "reintentar_existentes": False
+}
+
+# Configuración del servicio sin interfaz gráfica (cli.py)
+SERVICIO_CONFIG = {
+    "timeout_cierre": 30,        # Segundos para terminar envíos e impresiones pendientes al detenerse
+    "intervalo_eventos": 0.5     # Segundos entre revisiones de la cola de eventos y las señales
+}
+
+# Configuración de las métricas de latencia por etapa (tabla metricas_etapas)
+METRICAS_CONFIG = {
+    "habilitado": True,          # Registrar el tiempo de cada etapa de cada documento
+    "tamano_lote": 500,          # Registros acumulados que fuerzan una escritura
+    "intervalo_escritura": 2.0,  # Segundos máximos que un registro espera en memoria
+    "retencion_dias": 30,        # Registros más antiguos se eliminan al iniciar (0: no eliminar)
+    # Límites en segundos de los histogramas en memoria de cada etapa (endpoint de métricas)
+    "limites_histograma": (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+}
+
+# Configuración del endpoint HTTP local de métricas (formato Prometheus y JSON)
+MONITOR_CONFIG = {
+    "habilitado": False,         # Iniciar el endpoint junto con la aplicación (el servicio usa --metricas)
+    "host": "127.0.0.1",         # Dirección de escucha (solo local por defecto)
+    "puerto": 9464,              # Puerto del endpoint
+    "cache_errores": 5.0         # Segundos que se reutiliza el conteo de la carpeta de error
+}
+
+# Configuración de la validación local de documentos
+VALIDACION_CONFIG = {
+    "tolerancia": 1,             # Diferencia máxima (en pesos) aceptada por redondeo al cuadrar totales
+    "tasa_iva": 19,              # Tasa de IVA esperada (%)
+    "carpeta_cuarentena": "cuarentena"  # Subcarpeta de ruta_procesado para documentos inválidos
+}
+
+# Configuración de la compilación de payloads sin envío (dry-run)
+DRY_RUN_CONFIG = {
+    "procesos": None,            # Procesos en paralelo (None: uno por CPU)
+    "tamano_bloque": 64,         # Archivos por tarea enviada a cada proceso
+    "minimo_paralelo": 256       # Con menos archivos se compila en el mismo proceso
+}
+
+# Configuración de los micro-benchmarks (python cli.py benchmark)
+BENCHMARK_CONFIG = {
+    "resultados": "benchmarks/resultados.jsonl",  # Historial de resultados (una línea por ejecución)
+    "documentos": 500,           # Documentos sintéticos por ejecución
+    "lineas": 5,                 # Líneas de detalle por documento
+    "repeticiones": 5,           # Rondas por prueba (se informa la mediana)
+    "semilla": 1,                # Semilla del generador (mismo corpus en cada ejecución)
+    "umbral_regresion": 0.15     # Aumento de tiempo respecto de la ejecución anterior que se informa como regresión
+}
+
+# Configuración de la prueba de carga con la API simulada (python cli.py carga)
+CARGA_CONFIG = {
+    "documentos": 500,           # Documentos a generar
+    "tasa": 0,                   # Documentos por segundo que llegan a la carpeta (0: todos al inicio)
+    "latencia_api": 0.15,        # Segundos promedio de respuesta de la API simulada
+    "variacion_latencia": 0.5,   # Variación relativa de la latencia (0.5 = ±50%)
+    "tasa_error": 0.0,           # Fracción de envíos que reciben un 503 (se retienen y reintentan)
+    "tasa_rechazo": 0.0,         # Fracción de documentos rechazados por la API
+    "tamano_pdf": 40000,         # Bytes de cada PDF servido
+    "copias": 1,                 # Copias impresas por documento (0: sin impresión)
+    "timeout": 600               # Segundos máximos de la prueba
+}
@@ -0,0 +1,95 @@
+# -*- coding: utf-8 -*-
+"""
+Módulo para cargar la configuración desde un archivo YAML (servicio sin interfaz).
+
+Formato del archivo:
+
+    base_datos: /var/lib/bowa/config.db   # opcional, reemplaza DB_CONFIG["path"]
+    empresa:
+      rut_empresa: 76.123.456-7
+      razon_social: Mi Empresa SpA
+      ...                                 # mismos campos que la tabla config
+    directorios:
+      ruta_procesar: /srv/bowa/entrada
+      ruta_procesado: /srv/bowa/procesado
+      intervalo_exec: 10
+    impresion:                            # opcional
+      hab_printer: 0
+      ...
+"""
+
+from config.modelos import ConfigSnapshot, EmpresaConfig, DirectoriosConfig, ImpresionConfig
+
+# Valores por defecto de los campos opcionales de cada sección
+DEFAULTS_EMPRESA = {"telefono": None, "email": None, "tpv": "", "ciudad": "", "region": ""}
+DEFAULTS_DIRECTORIOS = {"intervalo_exec": 10}
+DEFAULTS_IMPRESION = {"hab_printer": 0, "printer": "", "num_copias": 1, "habdesc_local": 0, "ruta_descargas": ""}
+
+
+def _construir(tipo, datos, defaults, seccion):
+    """
+    Construye una sección de configuración validando que estén sus campos obligatorios.
+
+    Args:
+        tipo: Clase NamedTuple de la sección.
+        datos: Diccionario leído del YAML.
+        defaults: Valores de los campos opcionales.
+        seccion: Nombre de la sección (para los mensajes de error).
+
+    Returns:
+        NamedTuple: Sección de configuración.
+
+    Raises:
+        ValueError: Si la sección no es un diccionario o le faltan campos.
+    """
+    if not isinstance(datos, dict):
+        raise ValueError(f"La sección '{seccion}' debe ser un diccionario")
+
+    desconocidos = set(datos) - set(tipo._fields)
+    if desconocidos:
+        raise ValueError(f"Campos desconocidos en '{seccion}': {', '.join(sorted(desconocidos))}")
+
+    valores = dict(defaults, **datos)
+    faltantes = [campo for campo in tipo._fields if campo not in valores]
+    if faltantes:
+        raise ValueError(f"Faltan campos en '{seccion}': {', '.join(faltantes)}")
+
+    return tipo(**{campo: valores[campo] for campo in tipo._fields})
+
+
+def cargar_yaml(ruta):
+    """
+    Lee un archivo YAML de configuración.
+
+    Args:
+        ruta: Ruta del archivo YAML.
+
+    Returns:
+        tuple: (ConfigSnapshot, ruta de la base de datos o None).
+
+    Raises:
+        ValueError: Si el archivo no tiene el formato esperado.
+        OSError: Si el archivo no se puede leer.
+    """
+    # PyYAML solo se necesita en el servicio sin interfaz
+    import yaml
+
+    with open(ruta, "r", encoding="utf-8") as f:
+        datos = yaml.safe_load(f) or {}
+
+    if not isinstance(datos, dict):
+        raise ValueError("El archivo de configuración debe contener un diccionario")
+    for seccion in ("empresa", "directorios"):
+        if seccion not in datos:
+            raise ValueError(f"Falta la sección '{seccion}'")
+
+    empresa = _construir(EmpresaConfig, datos["empresa"], DEFAULTS_EMPRESA, "empresa")
+    directorios = _construir(DirectoriosConfig, datos["directorios"], DEFAULTS_DIRECTORIOS, "directorios")
+    impresion = _construir(ImpresionConfig, datos.get("impresion") or {}, DEFAULTS_IMPRESION, "impresion")
+
+    # El RUT se guarda como texto aunque en el YAML venga sin comillas
+    empresa = empresa._replace(rut_empresa=str(empresa.rut_empresa))
+
+    snapshot = ConfigSnapshot(version=0, empresa=empresa, directorios=directorios,
+                              impresion=impresion, autoprocess=True)
+    return snapshot, datos.get("base_datos")
@@ -4,6 +4,8 @@ Módulo principal de la interfaz gráfica.
 """
 
 import os
+import queue
+import time
 import tkinter as tk
 from tkinter import ttk
 from tkinter import messagebox
@@ -11,12 +13,15 @@ from PIL import Image, ImageTk
 from ttkthemes import ThemedTk
 from datetime import datetime
 import webbrowser
-from config.settings import IMG_DIR, WINDOW_CONFIG
+from config.settings import IMG_DIR, WINDOW_CONFIG, SERVICIO_CONFIG
 from config.database import DatabaseManager
+from config import config_service
 from utils.logger import Logger
 from utils.file_processor import FileProcessor
+from utils.monitor import iniciar_monitor
 from utils.system_tray import SystemTray  # Importamos el nuevo módulo
 from gui.styles import setup_styles
+from gui.dashboard import DashboardPanel
 from gui.tabs.config_tab import ConfigTab
 from gui.tabs.directory_tab import DirectoryTab
 from gui.tabs.print_tab import PrintTab
@@ -34,6 +39,7 @@ class Application:
         """
         self.root = root
         self.is_running = False
+        self._cerrando = False
         self.setup_window()
         self.load_icons()
         self.setup_frames()
@@ -47,6 +53,12 @@ class Application:
         # Inicializar el procesador de archivos
         self.file_processor = FileProcessor(logger=self.logger)
         
+        # Panel de rendimiento en vivo (alimentado por los eventos del procesador)
+        self.dashboard = DashboardPanel(self.side_panel, self.file_processor)
+        
+        # Endpoint HTTP local de métricas (solo si MONITOR_CONFIG lo habilita)
+        self.monitor = iniciar_monitor(self.file_processor, self.logger)
+        
         # Inicializar el gestor de base de datos
         self.db_manager = DatabaseManager(log_function=self.logger.log_message)
         
@@ -61,6 +73,9 @@ class Application:
         # Iniciar la actualización del tiempo
         self.update_time()
         
+        # Iniciar la lectura de eventos del procesador de archivos
+        self.procesar_eventos()
+        
         # Verificar si debe iniciar el procesamiento automáticamente
         self.check_autoprocess()
         
@@ -121,7 +136,7 @@ class Application:
     
     def setup_logger(self):
         """Configura el sistema de logs."""
-        self.logger = Logger(self.log_tab.log_textbox)
+        self.logger = Logger(self.log_tab.log_view)
     
     def open_website(self):
         """Abre una página web en el navegador predeterminado."""
@@ -146,7 +161,7 @@ class Application:
         self.button_frame.config(highlightbackground="red", highlightcolor="red", highlightthickness=2)
         
         # Crear los botones en el panel lateral
-        self.exit_button = self.create_button(self.side_panel, "Salir", self.icons["exit_icon"], command=self.root.quit)
+        self.exit_button = self.create_button(self.side_panel, "Salir", self.icons["exit_icon"], command=self.salir)
         self.check_button = self.create_button(self.side_panel, "Revisar", self.icons["check_icon"], command=self.open_website)
 
         
@@ -190,11 +205,76 @@ class Application:
         self.time_label.config(text=now.strftime("%H:%M:%S"))
         self.root.after(1000, self.update_time)  # Actualizar cada 1 segundo
     
+    def procesar_eventos(self):
+        """
+        Consume los eventos de progreso publicados por el hilo de procesamiento.
+        
+        Es el único punto de contacto entre el procesador y la interfaz, por lo que
+        la interfaz nunca espera al procesamiento ni viceversa.
+        """
+        try:
+            while True:
+                evento = self.file_processor.eventos.get_nowait()
+                self.dashboard.registrar_evento(evento)
+                
+                # El hilo de trabajo terminó por sí mismo (p. ej. directorio inexistente)
+                if evento["tipo"] == "detenido" and self.is_running and not self.file_processor.is_running:
+                    self.start_button.config(text="Iniciar", image=self.icons["start_icon"])
+                    self.button_frame.config(highlightbackground="red", highlightcolor="red")
+                    self.is_running = False
+                    self.logger.log_message("El procesamiento se detuvo.", "WARNING")
+        except queue.Empty:
+            pass
+        
+        self.root.after(200, self.procesar_eventos)
+    
+    def salir(self):
+        """
+        Detiene el procesamiento y cierra la aplicación.
+
+        Antes de cerrar espera, como máximo SERVICIO_CONFIG["timeout_cierre"] segundos,
+        los envíos en vuelo y los PDFs por descargar o imprimir: esos documentos ya
+        quedaron archivados como aceptados y no se volverían a imprimir.
+        """
+        if self._cerrando:
+            return
+        self._cerrando = True
+        self.exit_button.config(state=tk.DISABLED)
+        self.file_processor.stop()
+        if self._cierre_pendiente():
+            self.logger.log_message("Esperando envíos e impresiones pendientes antes de cerrar...", "INFO")
+        self._esperar_cierre(time.monotonic() + SERVICIO_CONFIG["timeout_cierre"])
+    
+    def _cierre_pendiente(self):
+        """Indica si queda trabajo en el hilo de procesamiento o en las colas de PDFs e impresión."""
+        pdf_stage = self.file_processor.pdf_stage
+        return not self.file_processor.esperar(0) or pdf_stage.pendientes or pdf_stage.spooler.pendientes
+    
+    def _esperar_cierre(self, limite):
+        """
+        Cierra la aplicación cuando ya no queda trabajo pendiente o se cumple el límite.
+        
+        Se revisa con `after` para que la ventana siga respondiendo mientras tanto.
+        
+        Args:
+            limite: Instante (time.monotonic) máximo de espera.
+        """
+        pendiente = self._cierre_pendiente()
+        if pendiente and time.monotonic() < limite:
+            self.root.after(100, self._esperar_cierre, limite)
+            return
+        if pendiente:
+            self.logger.log_message("Quedaron PDFs sin descargar o imprimir al cerrar la aplicación.", "WARNING")
+        if self.monitor is not None:
+            self.monitor.detener()
+        self.logger.cerrar()
+        self.root.quit()
+    
     def check_autoprocess(self):
         """Verifica si debe iniciar el procesamiento automáticamente."""
         try:
             # Verificar si el procesamiento automático está habilitado
-            autoprocess_enabled = self.db_manager.get_autoprocess_config()
+            autoprocess_enabled = config_service.obtener_config(self.logger).autoprocess
             
             if autoprocess_enabled:
                 self.logger.log_message("Iniciando procesamiento automáticamente...", "INFO")
@@ -236,7 +316,7 @@ class Application:
             
             # Iniciar el procesamiento de archivos
             self.file_processor.start()
-            self.file_processor.process_files(ruta_procesar, ruta_procesado, intervalo, self.root)
+            self.file_processor.process_files(ruta_procesar, ruta_procesado, intervalo)
             
             self.logger.log_message("Proceso iniciado automáticamente.", "INFO")
             self.logger.log_message_sindb("--------------------------------------------------------------------------------------------------------------", "INFO")
@@ -312,7 +392,7 @@ class Application:
                 self.file_processor.start()
                 
                 # Iniciar el procesamiento de archivos
-                self.file_processor.process_files(ruta_procesar, ruta_procesado, intervalo, self.root)
+                self.file_processor.process_files(ruta_procesar, ruta_procesado, intervalo)
                 self.logger.log_message("Proceso iniciado correctamente.", "INFO")
                 self.logger.log_message_sindb("--------------------------------------------------------------------------------------------------------------", "INFO")
                 
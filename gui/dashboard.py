@@ -0,0 +1,226 @@
+# -*- coding: utf-8 -*-
+"""
+Módulo para el panel de rendimiento en vivo del panel lateral.
+"""
+
+import statistics
+import time
+import tkinter as tk
+from collections import deque
+from tkinter import ttk
+from config.settings import DASHBOARD_CONFIG
+
+
+class DashboardStats:
+    """
+    Clase con las estadísticas del panel de rendimiento.
+
+    Se alimenta de los eventos "archivo" de la cola de eventos del procesador
+    (FileProcessor.eventos) y de la cantidad de pendientes informada en cada
+    actualización; no consulta la base de datos.
+    """
+
+    def __init__(self, ventana=None, muestras=None):
+        """
+        Inicializa las estadísticas.
+
+        Args:
+            ventana: Segundos considerados para docs/min y la tasa de error. Por defecto DASHBOARD_CONFIG.
+            muestras: Cantidad de latencias recientes a conservar. Por defecto DASHBOARD_CONFIG.
+        """
+        self.ventana = ventana or DASHBOARD_CONFIG["ventana"]
+        self.latencias = deque(maxlen=muestras or DASHBOARD_CONFIG["muestras_latencia"])
+        self._terminados = deque()   # (hora, exito) de los documentos archivados
+        self._retenidos = deque()    # hora de los documentos retenidos en la bandeja de salida
+        self._pendientes = deque()   # (hora, pendientes) para calcular la tendencia
+
+    def registrar_evento(self, evento):
+        """
+        Considera un evento de progreso del procesador.
+
+        Args:
+            evento: Evento de FileProcessor.eventos (solo se usan los de tipo "archivo").
+        """
+        if evento["tipo"] != "archivo":
+            return
+        hora = evento["hora"]
+        if evento.get("retenido"):
+            self._retenidos.append(hora)
+            return
+        self._terminados.append((hora, bool(evento.get("exito"))))
+        # Los documentos que archiva la bandeja de salida llegan sin duración
+        if evento.get("duracion"):
+            self.latencias.append(evento["duracion"])
+
+    def registrar_pendientes(self, pendientes, hora=None):
+        """
+        Guarda la cantidad de archivos pendientes para calcular si el atraso crece.
+
+        Args:
+            pendientes: Archivos pendientes en la carpeta de entrada.
+            hora: Instante de la medición (time.time). Por defecto, ahora.
+        """
+        self._pendientes.append((hora or time.time(), pendientes))
+
+    def resumen(self, ahora=None):
+        """
+        Calcula las estadísticas de la ventana actual.
+
+        Args:
+            ahora: Instante de referencia (time.time). Por defecto, ahora.
+
+        Returns:
+            dict: Documentos por minuto, documentos terminados, fallidos, retenidos y
+            tasa de error (0 a 1) de la ventana; variación de pendientes por minuto
+            (None sin suficientes mediciones); mediana y máximo de las latencias
+            recientes en segundos (None si no hay).
+        """
+        ahora = ahora or time.time()
+        desde = ahora - self.ventana
+        while self._terminados and self._terminados[0][0] < desde:
+            self._terminados.popleft()
+        while self._retenidos and self._retenidos[0] < desde:
+            self._retenidos.popleft()
+        while self._pendientes and self._pendientes[0][0] < desde:
+            self._pendientes.popleft()
+
+        terminados = len(self._terminados)
+        fallidos = sum(1 for _, exito in self._terminados if not exito)
+        intentos = terminados + len(self._retenidos)
+
+        tendencia = None
+        if len(self._pendientes) >= 2:
+            (hora_inicial, inicial), (hora_final, final) = self._pendientes[0], self._pendientes[-1]
+            # Con menos de 10 segundos de mediciones la tendencia es puro ruido
+            if hora_final - hora_inicial >= 10:
+                tendencia = (final - inicial) * 60 / (hora_final - hora_inicial)
+
+        return {
+            "docs_min": terminados * 60 / self.ventana,
+            "terminados": terminados,
+            "fallidos": fallidos,
+            "retenidos": len(self._retenidos),
+            "tasa_error": (fallidos + len(self._retenidos)) / intentos if intentos else 0.0,
+            "tendencia_pendientes": tendencia,
+            "latencia_mediana": statistics.median(self.latencias) if self.latencias else None,
+            "latencia_maxima": max(self.latencias) if self.latencias else None
+        }
+
+
+class DashboardPanel:
+    """
+    Clase para el panel de rendimiento del panel lateral.
+
+    Muestra docs/min, archivos pendientes y su tendencia, envíos en vuelo a la
+    API, tasa de error y un gráfico con la latencia de los últimos documentos.
+    Los eventos llegan desde Application.procesar_eventos; los pendientes y los
+    envíos en vuelo se leen de FileProcessor.estado (contadores en memoria).
+    """
+
+    ALTO_GRAFICO = 36
+
+    def __init__(self, parent, file_processor):
+        """
+        Inicializa el panel y programa su actualización periódica.
+
+        Args:
+            parent: Widget padre (panel lateral).
+            file_processor: FileProcessor cuyo estado se muestra.
+        """
+        self.file_processor = file_processor
+        self.stats = DashboardStats()
+        self.setup_panel(parent)
+        self.actualizar()
+
+    def setup_panel(self, parent):
+        """Crea los elementos del panel."""
+        self.frame = ttk.LabelFrame(parent, text="Rendimiento", style="Custom.TLabelframe", padding=5)
+        self.frame.pack(side=tk.TOP, fill=tk.X)
+        self.frame.columnconfigure(1, weight=1)
+
+        self.valores = {}
+        filas = (("docs_min", "Docs/min:"), ("pendientes", "Pendientes:"), ("en_vuelo", "En vuelo:"),
+                 ("errores", "Errores:"), ("latencia", "Latencia:"))
+        for fila, (clave, texto) in enumerate(filas):
+            ttk.Label(self.frame, text=texto, font=("Arial", 8, "bold")).grid(row=fila, column=0, sticky="w")
+            self.valores[clave] = ttk.Label(self.frame, text="-", font=("Arial", 8))
+            self.valores[clave].grid(row=fila, column=1, sticky="e")
+
+        # Gráfico de la latencia de los últimos documentos
+        self.grafico = tk.Canvas(self.frame, height=self.ALTO_GRAFICO, bg="white", highlightthickness=1,
+                                 highlightbackground="gray80")
+        self.grafico.grid(row=len(filas), column=0, columnspan=2, sticky="ew", pady=(3, 0))
+
+    def registrar_evento(self, evento):
+        """
+        Considera un evento de progreso del procesador.
+
+        Args:
+            evento: Evento de FileProcessor.eventos.
+        """
+        self.stats.registrar_evento(evento)
+
+    def actualizar(self):
+        """Actualiza los valores y el gráfico del panel."""
+        try:
+            estado = self.file_processor.estado()
+            if estado["pendientes_entrada"] is not None:
+                self.stats.registrar_pendientes(estado["pendientes_entrada"])
+            resumen = self.stats.resumen()
+
+            self.valores["docs_min"].config(text=f"{resumen['docs_min']:.0f}")
+            self.mostrar_pendientes(estado["pendientes_entrada"], resumen["tendencia_pendientes"])
+            self.valores["en_vuelo"].config(text=f"{estado['en_vuelo']}/{estado['max_en_vuelo']}")
+
+            errores = f"{resumen['tasa_error']:.0%}"
+            if resumen["retenidos"]:
+                errores += f" ({resumen['retenidos']} ret.)"
+            self.valores["errores"].config(text=errores, foreground="red" if resumen["tasa_error"] else "")
+
+            if resumen["latencia_mediana"] is None:
+                self.valores["latencia"].config(text="-")
+            else:
+                self.valores["latencia"].config(text=f"{resumen['latencia_mediana'] * 1000:.0f} ms")
+            self.dibujar_latencias(resumen["latencia_maxima"])
+        except Exception as e:
+            print(f"Error al actualizar el panel de rendimiento: {str(e)}")
+
+        self.frame.after(DASHBOARD_CONFIG["intervalo_ms"], self.actualizar)
+
+    def mostrar_pendientes(self, pendientes, tendencia):
+        """
+        Muestra los archivos pendientes y si aumentan, en rojo si el atraso crece sobre el umbral.
+
+        Args:
+            pendientes: Archivos pendientes en la carpeta de entrada (None si aún no se revisa).
+            tendencia: Variación de pendientes por minuto (None si aún no se conoce).
+        """
+        if pendientes is None:
+            self.valores["pendientes"].config(text="-", foreground="")
+            return
+        texto = str(pendientes)
+        if tendencia is not None and round(tendencia):
+            texto += f" ({tendencia:+.0f}/min)"
+        atrasado = pendientes > DASHBOARD_CONFIG["umbral_pendientes"] and (tendencia or 0) > 0
+        self.valores["pendientes"].config(text=texto, foreground="red" if atrasado else "")
+
+    def dibujar_latencias(self, maxima):
+        """
+        Dibuja la latencia de los últimos documentos, escalada a la máxima.
+
+        Args:
+            maxima: Latencia máxima de las muestras en segundos (None si no hay).
+        """
+        self.grafico.delete("latencia")
+        latencias = self.stats.latencias
+        if len(latencias) < 2 or not maxima:
+            return
+        ancho = max(self.grafico.winfo_width() - 4, 10)
+        alto = self.ALTO_GRAFICO - 4
+        paso = ancho / (latencias.maxlen - 1)
+        # Las muestras más recientes quedan a la derecha
+        inicio = ancho - paso * (len(latencias) - 1)
+        puntos = []
+        for indice, latencia in enumerate(latencias):
+            puntos.extend((2 + inicio + indice * paso, 2 + alto - latencia / maxima * alto))
+        self.grafico.create_line(*puntos, fill="steelblue", width=1, tags="latencia")
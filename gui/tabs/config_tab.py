@@ -3,6 +3,7 @@ from tkinter import ttk, messagebox, simpledialog
 import os
 import sys
 import winreg
+from config import config_service
 
 class ConfigTab:
     """Clase para gestionar la pestaña de Configuración."""
@@ -254,23 +255,23 @@ class ConfigTab:
     def load_config(self):
         """Carga la configuración desde la base de datos."""
         try:
-            config = self.db_manager.get_config()
+            config = config_service.obtener_config(self.logger).empresa
             
             if config:
                 # Cargar valores en los Entry y deshabilitarlos
-                self.rut_entry.insert(0, config[0])
-                self.razon_social_entry.insert(0, config[1])
-                self.telefono_entry.insert(0, config[2])
-                self.direc_entry.insert(0, config[3])
-                self.comuna_entry.insert(0, config[4])
-                self.email_entry.insert(0, config[5])
-                self.codsucursal_entry.insert(0, config[6])
-                self.giro_entry.insert(0, config[7])
-                self.act_entry.insert(0, config[8])
-                self.api_key_entry.insert(0, config[9])
-                self.tpv_entry.insert(0, config[10])
-                self.ciudad_entry.insert(0, config[11])
-                self.region_entry.insert(0, config[12])
+                self.rut_entry.insert(0, config.rut_empresa)
+                self.razon_social_entry.insert(0, config.razon_social)
+                self.telefono_entry.insert(0, config.telefono)
+                self.direc_entry.insert(0, config.direccion)
+                self.comuna_entry.insert(0, config.comuna)
+                self.email_entry.insert(0, config.email)
+                self.codsucursal_entry.insert(0, config.codsuc_sii)
+                self.giro_entry.insert(0, config.giro)
+                self.act_entry.insert(0, config.act_economica)
+                self.api_key_entry.insert(0, config.apikey)
+                self.tpv_entry.insert(0, config.tpv)
+                self.ciudad_entry.insert(0, config.ciudad)
+                self.region_entry.insert(0, config.region)
 
                 # Deshabilitar los Entry
                 self.disable_entries()
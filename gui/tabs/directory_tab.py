@@ -8,6 +8,7 @@ import sys
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
 import subprocess
+from config import config_service
 
 class DirectoryTab:
     """Clase para gestionar la pestaña de Directorios."""
@@ -264,13 +265,13 @@ class DirectoryTab:
     def load_directories(self):
         """Carga la configuración de directorios desde la base de datos."""
         try:
-            directories = self.db_manager.get_directories()
+            directories = config_service.obtener_config(self.logger).directorios
             
             if directories:
                 # Cargar valores en los Entry y Spinbox y deshabilitarlos
-                self.process_dir_entry.insert(0, directories[0])
-                self.processed_dir_entry.insert(0, directories[1])
-                self.spinbox.set(directories[2])
+                self.process_dir_entry.insert(0, directories.ruta_procesar)
+                self.processed_dir_entry.insert(0, directories.ruta_procesado)
+                self.spinbox.set(directories.intervalo_exec)
                 
                 for entry in [self.process_dir_entry, self.processed_dir_entry]:
                     entry.config(state='disabled')
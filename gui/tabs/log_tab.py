@@ -14,6 +14,7 @@ import pandas as pd
 import openpyxl
 from tkcalendar import DateEntry
 from config.settings import DB_CONFIG
+from utils.log_view import LogView
 
 class LogTab:
     """Clase para gestionar la pestaña de Log Procesos."""
@@ -53,6 +54,10 @@ class LogTab:
         self.confirm_button = ttk.Button(self.log_revision_labelframe, text="Confirmar", command=self.filter_logs)
         self.confirm_button.grid(row=1, column=1, padx=5, pady=10, sticky="w")
         
+        # Botón para mostrar los logs que ya no están en pantalla (leídos de la base de datos)
+        self.history_button = ttk.Button(self.log_revision_labelframe, text="Cargar anteriores", command=self.load_older_logs)
+        self.history_button.grid(row=1, column=2, padx=5, pady=10, sticky="w")
+        
         # LabelFrame para el "Log Procesos" que contendrá el Textbox, en la parte inferior
         self.log_text_labelframe = ttk.LabelFrame(self.log_process_frame, text="Log Procesos", style="Custom.TLabelframe")
         self.log_text_labelframe.grid(row=1, column=0, sticky="nsew", padx=10, pady=5)
@@ -74,6 +79,9 @@ class LogTab:
         # Configurar el Textbox para ser solo lectura y ocultar el parpadeo del cursor
         self.log_textbox.config(insertontime=0, state=tk.DISABLED)
         
+        # Vista acotada: inserciones por lotes y un máximo de líneas en memoria
+        self.log_view = LogView(self.log_textbox)
+        
         # Expansión del Textbox dentro del LabelFrame "Log Procesos"
         self.log_text_labelframe.rowconfigure(0, weight=1)
         self.log_text_labelframe.columnconfigure(0, weight=1)
@@ -99,22 +107,21 @@ class LogTab:
             message: Mensaje que se añadirá al textbox.
             tipo: Tipo de mensaje (INFO, ERROR, etc.).
         """
-        # Habilitar el textbox para escritura
-        self.log_textbox.config(state=tk.NORMAL)
-        
         # Añadir fecha y hora al mensaje con el formato estándar
         current_date = datetime.now().strftime("%d/%m/%Y")
         current_time = datetime.now().strftime("%H:%M:%S")
         log_message = f"{current_date} {current_time} - [{tipo}] {message}\n"
         
-        # Insertar el mensaje al final
-        self.log_textbox.insert(tk.END, log_message)
-        
-        # Desplazar hacia abajo para mostrar el mensaje más reciente
-        self.log_textbox.see(tk.END)
-        
-        # Deshabilitar el textbox de nuevo
-        self.log_textbox.config(state=tk.DISABLED)
+        # La vista inserta el mensaje en el próximo volcado y sigue el final si corresponde
+        self.log_view.agregar(log_message)
+    
+    def load_older_logs(self):
+        """Muestra al inicio del textbox los logs anteriores guardados en la base de datos."""
+        try:
+            if not self.log_view.cargar_anteriores():
+                messagebox.showinfo("Información", "No hay logs anteriores en la base de datos.")
+        except sqlite3.Error as e:
+            messagebox.showerror("Error de Base de Datos", f"No se pudieron leer los logs anteriores: {str(e)}")
 
     def filter_logs(self):
         """
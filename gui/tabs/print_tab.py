@@ -6,6 +6,7 @@ Módulo para la pestaña de Impresión.
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
 from utils.printer import obtener_impresoras
+from config import config_service
 
 class PrintTab:
     """Clase para gestionar la pestaña de Impresión."""
@@ -244,19 +245,18 @@ class PrintTab:
     def load_print_config(self):
         """Carga la configuración de impresión desde la base de datos."""
         try:
-            print_config = self.db_manager.get_print_config()
+            print_config = config_service.obtener_config(self.logger).impresion
             
             if print_config:
-                hab_printer, printer, num_copias, habdesc_local, ruta_descargas = print_config
                 self.logger.log_message("Cargando configuración de impresión...", "INFO")
                 
                 # Cargar los valores en los campos de la pestaña Impresión
-                self.enable_printing_var.set(bool(hab_printer))
-                self.printer_combobox.set(printer)
-                self.num_copias_spinbox.set(num_copias)
-                self.enable_local_download_var.set(bool(habdesc_local))
+                self.enable_printing_var.set(bool(print_config.hab_printer))
+                self.printer_combobox.set(print_config.printer)
+                self.num_copias_spinbox.set(print_config.num_copias)
+                self.enable_local_download_var.set(bool(print_config.habdesc_local))
                 self.local_download_entry.delete(0, tk.END)
-                self.local_download_entry.insert(0, ruta_descargas)
+                self.local_download_entry.insert(0, print_config.ruta_descargas)
                 
                 # Deshabilitar todos los campos de impresión si hay configuración
                 self.printer_combobox.config(state="disabled")
@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+"""
+Pruebas del transporte HTTP y del envío a la API contra la API simulada local.
+"""
+
+import unittest
+from utils import http_client
+from utils.api import enviar_request_api, es_reintentable
+from utils.api_simulada import ApiSimulada
+
+BODY = {"dte": {"Encabezado": {"IdDoc": {"Folio": 1}}}}
+
+
+class EnvioApiTest(unittest.TestCase):
+    """Pruebas de enviar_request_api y http_client con ApiSimulada."""
+
+    def setUp(self):
+        self.opciones = {nombre: http_client.obtener_opcion(nombre) for nombre in ("api_url", "timeout_lectura")}
+        self.api = None
+
+    def tearDown(self):
+        http_client.configurar(**self.opciones)
+        if self.api is not None:
+            self.api.detener()
+
+    def iniciar_api(self, **opciones):
+        """Inicia una API simulada sin latencia y apunta el transporte a ella."""
+        opciones.setdefault("latencia", 0.0)
+        self.api = ApiSimulada(**opciones)
+        http_client.configurar(api_url=self.api.iniciar())
+        return self.api
+
+    def test_aceptado(self):
+        self.iniciar_api()
+        resultado = enviar_request_api(BODY, "clave")
+        self.assertEqual(resultado["StatusCode"], "200")
+        self.assertEqual(resultado["FOLIO"], 1)
+        self.assertTrue(resultado["PDFPATH"].endswith("/pdf/1.pdf"))
+
+    def test_rechazo_no_es_reintentable(self):
+        self.iniciar_api(tasa_rechazo=1.0)
+        resultado = enviar_request_api(BODY, "clave")
+        self.assertEqual(resultado["StatusCode"], "400")
+        self.assertFalse(es_reintentable(resultado))
+
+    def test_error_503_es_reintentable(self):
+        self.iniciar_api(tasa_error=1.0)
+        resultado = enviar_request_api(BODY, "clave")
+        self.assertEqual(resultado["tipo_error"], "http")
+        self.assertEqual(resultado["status_code"], 503)
+        self.assertTrue(es_reintentable(resultado))
+
+    def test_error_404_no_es_reintentable(self):
+        api = self.iniciar_api()
+        http_client.configurar(api_url=f"http://{api.host}:{api.puerto}/otra/ruta")
+        resultado = enviar_request_api(BODY, "clave")
+        self.assertEqual(resultado["status_code"], 404)
+        self.assertFalse(es_reintentable(resultado))
+
+    def test_respuesta_200_sin_json_queda_para_revision(self):
+        self.iniciar_api(tasa_invalida=1.0)
+        resultado = enviar_request_api(BODY, "clave")
+        self.assertEqual(resultado["tipo_error"], "respuesta_invalida")
+        self.assertFalse(es_reintentable(resultado))
+
+    def test_timeout_de_lectura_es_transporte(self):
+        self.iniciar_api(latencia=1.0, variacion=0.0)
+        http_client.configurar(timeout_lectura=0.2)
+        resultado = enviar_request_api(BODY, "clave")
+        self.assertEqual(resultado["tipo_error"], "transporte")
+        self.assertTrue(es_reintentable(resultado))
+
+    def test_conexion_rechazada_es_transporte(self):
+        api = self.iniciar_api()
+        url = api.url_api
+        api.detener()
+        self.api = None
+        http_client.configurar(api_url=url)
+        resultado = enviar_request_api(BODY, "clave")
+        self.assertEqual(resultado["tipo_error"], "transporte")
+        self.assertTrue(es_reintentable(resultado))
+
+    def test_reutiliza_la_conexion(self):
+        api = self.iniciar_api()
+        for _ in range(5):
+            self.assertEqual(enviar_request_api(BODY, "clave")["StatusCode"], "200")
+        self.assertEqual(api.estadisticas["aceptado"], 5)
+        self.assertEqual(api.estadisticas["conexion"], 1)
+
+    def test_configurar_recrea_la_sesion(self):
+        self.iniciar_api()
+        sesion = http_client.obtener_sesion()
+        http_client.configurar(timeout_lectura=30)
+        self.assertIsNot(http_client.obtener_sesion(), sesion)
+
+    def test_configurar_rechaza_opciones_desconocidas(self):
+        with self.assertRaises(KeyError):
+            http_client.configurar(opcion_inexistente=1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*-
+"""
+Pruebas de la escritura por lotes en SQLite (BatchWriter).
+"""
+
+import os
+import shutil
+import sqlite3
+import tempfile
+import time
+import unittest
+from utils.batch_writer import BatchWriter
+
+SQL_PREPARAR = "CREATE TABLE IF NOT EXISTS filas (valor INTEGER)"
+SQL_INSERT = "INSERT INTO filas (valor) VALUES (?)"
+
+
+class BatchWriterTest(unittest.TestCase):
+    """Pruebas de escritura por tamaño, por intervalo, al vaciar y al cerrar."""
+
+    def setUp(self):
+        self.carpeta = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.carpeta, True)
+        self.db_path = os.path.join(self.carpeta, "prueba.db")
+
+    def escritor(self, **opciones):
+        escritor = BatchWriter(self.db_path, SQL_INSERT, sql_preparar=SQL_PREPARAR, **opciones)
+        self.addCleanup(escritor.cerrar)
+        return escritor
+
+    def filas(self):
+        conn = sqlite3.connect(self.db_path)
+        try:
+            return [fila[0] for fila in conn.execute("SELECT valor FROM filas ORDER BY rowid")]
+        finally:
+            conn.close()
+
+    def esperar_escritas(self, escritor, cantidad, timeout=5):
+        limite = time.monotonic() + timeout
+        while escritor.estado()["escritas"] < cantidad and time.monotonic() < limite:
+            time.sleep(0.01)
+
+    def test_escribe_al_completar_el_lote(self):
+        escritor = self.escritor(tamano_lote=5, intervalo=60)
+        for valor in range(5):
+            escritor.agregar((valor,))
+        self.esperar_escritas(escritor, 5)
+        self.assertEqual(self.filas(), [0, 1, 2, 3, 4])
+
+    def test_escribe_al_cumplir_el_intervalo(self):
+        escritor = self.escritor(tamano_lote=100, intervalo=0.1)
+        escritor.agregar((1,))
+        self.assertEqual(escritor.estado()["pendientes"], 1)
+        self.esperar_escritas(escritor, 1)
+        self.assertEqual(self.filas(), [1])
+        self.assertEqual(escritor.estado()["pendientes"], 0)
+
+    def test_vaciar_escribe_de_inmediato(self):
+        escritor = self.escritor(tamano_lote=100, intervalo=60)
+        for valor in range(3):
+            escritor.agregar((valor,))
+        self.assertTrue(escritor.vaciar(timeout=5))
+        self.assertEqual(self.filas(), [0, 1, 2])
+        self.assertEqual(escritor.estado(), {"pendientes": 0, "retraso": 0.0, "escritas": 3, "errores": 0})
+
+    def test_cerrar_escribe_lo_pendiente_y_descarta_lo_posterior(self):
+        escritor = self.escritor(tamano_lote=100, intervalo=60)
+        escritor.agregar((1,))
+        escritor.agregar((2,))
+        escritor.cerrar()
+        self.assertFalse(escritor._hilo.is_alive())
+        escritor.agregar((3,))
+        self.assertEqual(self.filas(), [1, 2])
+        self.assertTrue(escritor.vaciar())
+
+    def test_error_de_sqlite_cuenta_el_lote_perdido(self):
+        escritor = BatchWriter(self.db_path, "INSERT INTO inexistente (valor) VALUES (?)",
+                               tamano_lote=100, intervalo=60)
+        self.addCleanup(escritor.cerrar)
+        escritor.agregar((1,))
+        escritor.agregar((2,))
+        self.assertTrue(escritor.vaciar(timeout=5))
+        estado = escritor.estado()
+        self.assertEqual((estado["escritas"], estado["errores"], estado["pendientes"]), (0, 2, 0))
+
+
+if __name__ == "__main__":
+    unittest.main()
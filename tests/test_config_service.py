@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+"""
+Pruebas de la copia en memoria de la configuración (ConfigService).
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+from config import config_service
+from config.config_service import ConfigService
+from config.database import DatabaseManager, cerrar_conexion
+from config.modelos import ConfigSnapshot, DirectoriosConfig
+
+
+class ConfigServiceTest(unittest.TestCase):
+    """Pruebas de lectura única, invalidación y configuración fija."""
+
+    def setUp(self):
+        self.carpeta = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.carpeta, True)
+        self.db_path = os.path.join(self.carpeta, "config.db")
+        self.addCleanup(cerrar_conexion, self.db_path)
+        self.db = DatabaseManager(self.db_path)
+        self.db.create_tables()
+        self.db.save_directories(("C:/entrada", "C:/salida", 10))
+
+        self.servicio = ConfigService(self.db_path)
+        # Las escrituras de DatabaseManager invalidan el servicio compartido
+        parche = mock.patch.object(config_service, "_servicio", self.servicio)
+        parche.start()
+        self.addCleanup(parche.stop)
+
+    def test_lee_la_base_de_datos_una_sola_vez(self):
+        with mock.patch.object(DatabaseManager, "get_directories",
+                               autospec=True, side_effect=DatabaseManager.get_directories) as lectura:
+            primera = config_service.obtener_config()
+            segunda = config_service.obtener_config()
+        self.assertIs(primera, segunda)
+        self.assertEqual(lectura.call_count, 1)
+        self.assertEqual(primera.directorios.ruta_procesar, "C:/entrada")
+
+    def test_guardar_invalida_la_copia(self):
+        anterior = config_service.obtener_config()
+        self.db.save_directories(("C:/otra", "C:/salida", 5))
+        actual = config_service.obtener_config()
+
+        self.assertEqual(anterior.directorios.ruta_procesar, "C:/entrada")
+        self.assertEqual(actual.directorios, DirectoriosConfig("C:/otra", "C:/salida", 5))
+        self.assertGreater(actual.version, anterior.version)
+
+    def test_invalidar_aumenta_la_version(self):
+        version = self.servicio.version
+        config_service.invalidar()
+        self.assertEqual(self.servicio.version, version + 1)
+        self.assertEqual(config_service.obtener_config().version, version + 1)
+
+    def test_configuracion_fija_no_consulta_la_base_de_datos(self):
+        fija = ConfigSnapshot(version=0, empresa=None, directorios=DirectoriosConfig("/yaml", "/yaml/ok", 3),
+                              impresion=None, autoprocess=True)
+        config_service.fijar_config(fija)
+        with mock.patch.object(DatabaseManager, "get_directories") as lectura:
+            actual = config_service.obtener_config()
+        lectura.assert_not_called()
+        self.assertEqual(actual.directorios.ruta_procesar, "/yaml")
+        self.assertEqual(actual.version, self.servicio.version)
+
+        config_service.fijar_config(None)
+        self.assertEqual(config_service.obtener_config().directorios.ruta_procesar, "C:/entrada")
+
+    def test_datos_api_sin_empresa(self):
+        datos = config_service.obtener_config().datos_api
+        self.assertEqual(datos["apikey"], "")
+        self.assertEqual(set(datos.values()), {""})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+"""
+Pruebas de la migración del esquema y de las conexiones por hilo de la base de datos.
+"""
+
+import os
+import shutil
+import sqlite3
+import tempfile
+import threading
+import unittest
+from config.database import DatabaseManager, SCHEMA_VERSION, conectar, cerrar_conexion
+
+# Esquema original (versión 0): tablas de configuración sin clave primaria
+ESQUEMA_V0 = """
+    CREATE TABLE "admin" ("password" TEXT(50) NOT NULL);
+    CREATE TABLE "config" (
+        "rut_empresa" TEXT(12) NOT NULL, "razon_social" TEXT(200) NOT NULL, "telefono" INTEGER,
+        "direccion" TEXT(200) NOT NULL, "comuna" TEXT(25) NOT NULL, "email" TEXT(100),
+        "codsuc_sii" INTEGER NOT NULL, "giro" TEXT(80) NOT NULL, "act_economica" INTEGER NOT NULL,
+        "apikey" TEXT NOT NULL, "tpv" TEXT NOT NULL, "ciudad" TEXT(30) NOT NULL, "region" TEXT(35) NOT NULL
+    );
+    CREATE TABLE "directorios" ("ruta_procesar" TEXT NOT NULL, "ruta_procesado" TEXT NOT NULL,
+                                "intervalo_exec" INTEGER NOT NULL);
+    CREATE TABLE "impresion" ("hab_printer" INTEGER, "printer" TEXT, "num_copias" INTEGER,
+                              "habdesc_local" INTEGER, "ruta_descargas" TEXT);
+    CREATE TABLE "log_procesos" ("fecha" TEXT NOT NULL, "hora" TEXT, "tipo" TEXT, "asunto" TEXT);
+    CREATE TABLE "app_config" ("autoprocess" INTEGER DEFAULT 0, "autostart_windows" INTEGER DEFAULT 0);
+    INSERT INTO admin (password) VALUES ('clave-propia');
+    INSERT INTO config VALUES ('76000000-0', 'EMPRESA SPA', 221234567, 'CALLE 1', 'SANTIAGO', NULL,
+                               0, 'GIRO', 453000, 'apikey', '1', 'SANTIAGO', 'RM');
+    INSERT INTO directorios VALUES ('C:/entrada', 'C:/salida', 10);
+    INSERT INTO directorios VALUES ('C:/duplicado', 'C:/duplicado', 99);
+    INSERT INTO log_procesos VALUES ('2026-01-15', '10:00:00', 'INFO', 'registro antiguo');
+    INSERT INTO app_config VALUES (1, 0);
+"""
+
+
+class DatabaseManagerTest(unittest.TestCase):
+    """Pruebas de create_tables sobre una base de datos v0 y de conectar()."""
+
+    def setUp(self):
+        self.carpeta = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.carpeta, True)
+        self.db_path = os.path.join(self.carpeta, "config.db")
+        self.addCleanup(cerrar_conexion, self.db_path)
+        self.mensajes = []
+        self.db = DatabaseManager(self.db_path, log_function=lambda mensaje, tipo: self.mensajes.append(tipo))
+
+    def crear_v0(self):
+        conn = sqlite3.connect(self.db_path)
+        conn.executescript(ESQUEMA_V0)
+        conn.close()
+
+    def tablas(self):
+        return {fila[0] for fila in conectar(self.db_path).execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+
+    def test_migra_una_base_v0_conservando_los_datos(self):
+        self.crear_v0()
+        self.db.create_tables()
+
+        conn = conectar(self.db_path)
+        self.assertEqual(conn.execute("PRAGMA user_version").fetchone()[0], SCHEMA_VERSION)
+        self.assertTrue({"outbox", "errores", "ledger", "backfill", "metricas_etapas"} <= self.tablas())
+        self.assertTrue(self.db.verify_admin_password("clave-propia"))
+        self.assertEqual(self.db.get_config().razon_social, "EMPRESA SPA")
+        # Solo se conserva la primera fila de cada tabla de configuración
+        self.assertEqual(conn.execute("SELECT id, ruta_procesar FROM directorios").fetchall(), [(1, "C:/entrada")])
+        self.assertEqual(conn.execute("SELECT asunto FROM log_procesos").fetchall(), [("registro antiguo",)])
+        self.assertEqual(conn.execute("SELECT autoprocess FROM app_config").fetchall(), [(1,)])
+        self.assertNotIn("ERROR", self.mensajes)
+
+    def test_guardar_tras_migrar_actualiza_la_unica_fila(self):
+        self.crear_v0()
+        self.db.create_tables()
+        self.assertTrue(self.db.save_directories(("C:/nueva", "C:/procesado", 5)))
+        self.assertTrue(self.db.save_directories(("C:/otra", "C:/procesado", 7)))
+        filas = conectar(self.db_path).execute("SELECT id, ruta_procesar, intervalo_exec FROM directorios").fetchall()
+        self.assertEqual(filas, [(1, "C:/otra", 7)])
+
+    def test_base_nueva(self):
+        self.db.create_tables()
+        self.assertIsNone(self.db.get_config())
+        self.assertTrue(self.db.verify_admin_password("admin00"))
+        self.assertEqual(conectar(self.db_path).execute("PRAGMA journal_mode").fetchone()[0], "wal")
+
+    def test_esquema_al_dia_no_se_vuelve_a_migrar(self):
+        self.db.create_tables()
+        self.mensajes.clear()
+        self.db.create_tables()
+        self.assertEqual(self.mensajes, [])
+
+    def test_una_conexion_por_hilo(self):
+        conexiones = []
+        hilo = threading.Thread(target=lambda: conexiones.append(conectar(self.db_path)))
+        hilo.start()
+        hilo.join()
+        self.assertIs(conectar(self.db_path), conectar(self.db_path))
+        self.assertIsNot(conexiones[0], conectar(self.db_path))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,75 @@
+# -*- coding: utf-8 -*-
+"""
+Pruebas del índice incremental de la carpeta de entrada.
+"""
+
+import os
+import shutil
+import tempfile
+import time
+import unittest
+from utils.directory_index import DirectoryIndex
+
+
+class DirectoryIndexTest(unittest.TestCase):
+    """Pruebas de orden y de espera de archivos en escritura."""
+
+    def setUp(self):
+        self.carpeta = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.carpeta, True)
+
+    def escribir(self, nombre, texto="x", antiguedad=None):
+        """Escribe un archivo; con `antiguedad` se retrocede su mtime esa cantidad de segundos."""
+        ruta = os.path.join(self.carpeta, nombre)
+        with open(ruta, "w") as f:
+            f.write(texto)
+        if antiguedad is not None:
+            momento = time.time() - antiguedad
+            os.utime(ruta, (momento, momento))
+        return ruta
+
+    def test_orden_por_mtime_e_ignora_otras_extensiones(self):
+        self.escribir("b.txt", antiguedad=10)
+        self.escribir("a.txt", antiguedad=20)
+        self.escribir("c.pdf", antiguedad=30)
+        indice = DirectoryIndex(self.carpeta, estabilidad=0)
+        self.assertEqual(indice.refrescar(), 2)
+        self.assertEqual(indice.siguiente()[0], "a.txt")
+        self.assertEqual(indice.siguiente()[0], "b.txt")
+        self.assertIsNone(indice.siguiente())
+        self.assertFalse(indice.asentando)
+
+    def test_archivo_reciente_espera_a_estar_estable(self):
+        self.escribir("viejo.txt", antiguedad=10)
+        ruta = self.escribir("nuevo.txt")
+        indice = DirectoryIndex(self.carpeta, estabilidad=0.3)
+        indice.refrescar()
+
+        self.assertEqual(indice.siguiente()[0], "viejo.txt")
+        self.assertIsNone(indice.siguiente())
+        self.assertTrue(indice.asentando)
+
+        # Sigue escribiéndose: vuelve a esperar desde el último cambio
+        time.sleep(0.2)
+        with open(ruta, "a") as f:
+            f.write("más")
+        time.sleep(0.2)
+        self.assertIsNone(indice.siguiente())
+        self.assertTrue(indice.asentando)
+
+        time.sleep(0.35)
+        nombre, _, tamano = indice.siguiente()
+        self.assertEqual((nombre, tamano), ("nuevo.txt", os.path.getsize(ruta)))
+        self.assertEqual(len(indice), 0)
+
+    def test_archivo_eliminado_no_se_entrega(self):
+        ruta = self.escribir("a.txt", antiguedad=10)
+        indice = DirectoryIndex(self.carpeta, estabilidad=0.3)
+        indice.refrescar()
+        os.remove(ruta)
+        self.assertIsNone(indice.siguiente())
+        self.assertFalse(indice.asentando)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+"""
+Pruebas de la interpretación de los TXT en DocumentoDTE.
+"""
+
+import hashlib
+import os
+import shutil
+import tempfile
+import unittest
+from utils.documento import DocumentoDTE, parsear_documento, parsear_texto
+from utils.generador import generar_boleta, generar_factura, generar_lote
+
+
+class DocumentoDTETest(unittest.TestCase):
+    """Pruebas de parsear_texto, parsear_documento e inmutabilidad del documento."""
+
+    def test_boleta(self):
+        documento = parsear_texto(generar_boleta(15, "2026-01-15", lineas=2), "/tmp/B39_0000015.txt")
+        self.assertEqual((documento.tipo_dte, documento.folio, documento.fecha), (39, 15, "2026-01-15"))
+        self.assertEqual(documento.nombre, "B39_0000015.txt")
+        self.assertEqual(len(documento.detalle), 2)
+        self.assertEqual(documento.encabezado[0], "39")
+        self.assertEqual(documento.desc_rec, ())
+
+    def test_factura_toma_el_folio_de_la_referencia(self):
+        documento = parsear_texto(generar_factura(42, "2026-01-15", lineas=3))
+        self.assertEqual((documento.tipo_dte, documento.folio, documento.fecha), (33, 42, "2026-01-15"))
+        self.assertEqual(documento.encabezado[1], "0")
+        self.assertEqual(len(documento.detalle), 3)
+        self.assertEqual(documento.referencia[2], "42")
+
+    def test_descuentos_y_recargos_de_la_boleta(self):
+        documento = parsear_texto(generar_boleta(1, "2026-01-15", combinacion=(("R", "$"), ("D", "$"))))
+        self.assertEqual([linea[1] for linea in documento.desc_rec], ["R", "D"])
+
+    def test_texto_sin_secciones_conocidas(self):
+        documento = parsear_texto("->Otra<-\n1;2;3\n")
+        self.assertIsNone(documento.tipo_dte)
+        self.assertIsNone(documento.folio)
+        self.assertIsNone(documento.fecha)
+        self.assertEqual(documento.secciones["Otra"], ("1;2;3", ""))
+
+    def test_folio_no_numerico(self):
+        documento = parsear_texto("->Boleta<-\n39;ABC;2026-01-15;\n")
+        self.assertEqual(documento.tipo_dte, 39)
+        self.assertIsNone(documento.folio)
+
+    def test_es_inmutable(self):
+        documento = parsear_texto(generar_boleta(1, "2026-01-15"))
+        with self.assertRaises(AttributeError):
+            documento.folio = 2
+        with self.assertRaises(AttributeError):
+            del documento.folio
+        with self.assertRaises(TypeError):
+            documento.secciones["Boleta"] = ()
+        self.assertIsInstance(documento, DocumentoDTE)
+
+    def test_parsear_documento_calcula_el_hash_del_archivo(self):
+        carpeta = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, carpeta, True)
+        ruta = generar_lote(carpeta, 1, proporcion_facturas=1.0, folio_inicial=7, semilla=1)[0]
+        documento = parsear_documento(ruta)
+
+        with open(ruta, "rb") as f:
+            datos = f.read()
+        self.assertEqual(documento.hash_contenido, hashlib.sha256(datos).hexdigest())
+        self.assertEqual((documento.ruta, documento.nombre), (ruta, os.path.basename(ruta)))
+        self.assertEqual((documento.tipo_dte, documento.folio), (33, 7))
+
+    def test_archivo_que_no_es_utf8(self):
+        carpeta = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, carpeta, True)
+        ruta = os.path.join(carpeta, "roto.txt")
+        with open(ruta, "wb") as f:
+            f.write(b"\xff\xfe no es utf-8")
+        with self.assertRaises(UnicodeDecodeError):
+            parsear_documento(ruta)
+
+
+if __name__ == "__main__":
+    unittest.main()
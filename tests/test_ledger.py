@@ -0,0 +1,100 @@
+# -*- coding: utf-8 -*-
+"""
+Pruebas del registro de envíos (ledger) y de la omisión de documentos ya aceptados.
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+from config.database import DatabaseManager, conectar, cerrar_conexion
+from utils.api import enviar_documento
+from utils.documento import parsear_texto
+from utils.generador import generar_boleta
+from utils.ledger import SubmissionLedger, ESTADO_ACEPTADO, ESTADO_ENVIANDO
+
+RUT = "76000000-0"
+ACEPTADO = {"StatusCode": "200", "StatusDesc": "OK", "PDFPATH": "http://api/pdf/1.pdf"}
+NO_DISPONIBLE = {"success": False, "status_code": 503, "message": "", "tipo_error": "http"}
+
+
+class SubmissionLedgerTest(unittest.TestCase):
+    """Pruebas de SubmissionLedger y de enviar_documento con una base de datos temporal."""
+
+    def setUp(self):
+        self.carpeta = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.carpeta, True)
+        self.db_path = os.path.join(self.carpeta, "prueba.db")
+        self.addCleanup(cerrar_conexion, self.db_path)
+        DatabaseManager(self.db_path).create_tables()
+        self.ledger = SubmissionLedger(self.db_path)
+        self.documento = parsear_texto(generar_boleta(1, "2026-01-15"), "B39_0000001.txt")
+
+    def estado(self, hash_contenido):
+        fila = conectar(self.db_path).execute("SELECT estado FROM ledger WHERE hash = ?", (hash_contenido,)).fetchone()
+        return fila[0] if fila else None
+
+    def test_reservar_y_confirmar(self):
+        hash_contenido = self.documento.hash_contenido
+        self.ledger.reservar(self.documento, RUT)
+        self.assertEqual(self.estado(hash_contenido), ESTADO_ENVIANDO)
+        self.assertTrue(self.ledger.en_curso(hash_contenido))
+        self.assertIsNone(self.ledger.buscar(hash_contenido))
+
+        self.ledger.confirmar(hash_contenido, ACEPTADO)
+        self.assertEqual(self.estado(hash_contenido), ESTADO_ACEPTADO)
+        self.assertFalse(self.ledger.en_curso(hash_contenido))
+        self.assertEqual(self.ledger.buscar(hash_contenido), ACEPTADO)
+        # Otra instancia carga los aceptados desde la base de datos
+        self.assertEqual(SubmissionLedger(self.db_path).buscar(hash_contenido), ACEPTADO)
+
+    def test_liberar_solo_quita_reservas(self):
+        hash_contenido = self.documento.hash_contenido
+        self.ledger.reservar(self.documento, RUT)
+        self.ledger.liberar(hash_contenido)
+        self.assertIsNone(self.estado(hash_contenido))
+
+        self.ledger.reservar(self.documento, RUT)
+        self.ledger.confirmar(hash_contenido, ACEPTADO)
+        self.ledger.liberar(hash_contenido)
+        self.assertEqual(self.estado(hash_contenido), ESTADO_ACEPTADO)
+
+    def test_folio_aceptado_con_otro_contenido(self):
+        self.ledger.reservar(self.documento, RUT)
+        self.ledger.confirmar(self.documento.hash_contenido, ACEPTADO)
+        otro = parsear_texto(generar_boleta(1, "2026-01-16"), "B39_0000001_bis.txt")
+
+        self.assertEqual(self.ledger.folio_enviado(otro, RUT), self.documento.hash_contenido)
+        self.assertIsNone(self.ledger.folio_enviado(self.documento, RUT))
+        self.assertIsNone(self.ledger.folio_enviado(otro, "11111111-1"))
+
+    def enviar(self, respuesta):
+        """Envía el documento con enviar_documento respondiendo `respuesta`; retorna (resultado, llamadas)."""
+        with mock.patch("utils.api.obtener_ledger", return_value=self.ledger), \
+                mock.patch("utils.api.obtener_metricas"), \
+                mock.patch("utils.api.enviar_request_api", return_value=respuesta) as api:
+            resultado = enviar_documento(self.documento, {}, {"rut_empresa": RUT, "apikey": "clave"})
+        return resultado, api.call_count
+
+    def test_documento_aceptado_no_se_reenvia(self):
+        resultado, llamadas = self.enviar(ACEPTADO)
+        self.assertEqual((resultado, llamadas), (ACEPTADO, 1))
+
+        resultado, llamadas = self.enviar(ACEPTADO)
+        self.assertEqual(llamadas, 0)
+        self.assertTrue(resultado["duplicado"])
+        self.assertEqual(resultado["PDFPATH"], ACEPTADO["PDFPATH"])
+
+    def test_envio_fallido_se_puede_reintentar(self):
+        resultado, llamadas = self.enviar(NO_DISPONIBLE)
+        self.assertEqual((resultado, llamadas), (NO_DISPONIBLE, 1))
+        self.assertIsNone(self.estado(self.documento.hash_contenido))
+
+        resultado, llamadas = self.enviar(ACEPTADO)
+        self.assertEqual((resultado, llamadas), (ACEPTADO, 1))
+        self.assertEqual(self.estado(self.documento.hash_contenido), ESTADO_ACEPTADO)
+
+
+if __name__ == "__main__":
+    unittest.main()
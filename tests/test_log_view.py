@@ -0,0 +1,133 @@
+# -*- coding: utf-8 -*-
+"""
+Pruebas de la vista acotada de logs (LogView) con un widget de texto simulado.
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+from config.database import DatabaseManager, conectar, cerrar_conexion
+from utils.log_view import LogView
+
+
+class TextoFalso:
+    """Reemplazo mínimo de tk.Text: índices "línea.columna", inserción, borrado y desplazamiento."""
+
+    def __init__(self):
+        self.texto = ""
+        self.estado = "disabled"
+        self.al_final = True
+        self.inserciones = 0
+        self.programado = None
+
+    def _lineas(self):
+        return self.texto.split("\n")
+
+    def after(self, ms, funcion):
+        self.programado = funcion
+
+    def config(self, state):
+        self.estado = state
+
+    def insert(self, indice, texto):
+        self.inserciones += 1
+        self.texto = self.texto + texto if indice == "end" else texto + self.texto
+
+    def delete(self, inicio, fin):
+        self.texto = "\n".join(self._lineas()[int(fin.split(".")[0]) - 1:])
+
+    def index(self, indice):
+        lineas = self._lineas()
+        return f"{len(lineas)}.{len(lineas[-1])}"
+
+    def get(self, inicio, fin):
+        if fin == "end-1c":
+            return self.texto
+        return "\n".join(self._lineas()[:int(fin.split(".")[0]) - 1])
+
+    def yview(self):
+        return (0.0, 1.0) if self.al_final else (0.0, 0.5)
+
+    def see(self, indice):
+        pass
+
+    def lineas(self):
+        return self.texto.splitlines()
+
+
+class LogViewTest(unittest.TestCase):
+    """Pruebas del buffer circular, el recorte del widget y la lectura del historial."""
+
+    def setUp(self):
+        self.widget = TextoFalso()
+
+    def vista(self, lineas, db_path=None):
+        return LogView(self.widget, lineas=lineas, intervalo_ms=10, db_path=db_path)
+
+    def test_volcado_en_una_sola_insercion(self):
+        vista = self.vista(10)
+        for numero in range(4):
+            vista.agregar(f"mensaje {numero}\n")
+        self.assertEqual(self.widget.texto, "")
+        vista._volcar()
+
+        self.assertEqual(self.widget.lineas(), [f"mensaje {numero}" for numero in range(4)])
+        self.assertEqual(self.widget.inserciones, 1)
+        self.assertEqual(self.widget.estado, "disabled")
+        # El volcado se vuelve a programar
+        self.assertEqual(self.widget.programado, vista._volcar)
+
+    def test_buffer_circular_descarta_los_mas_antiguos(self):
+        vista = self.vista(5)
+        for numero in range(8):
+            vista.agregar(f"mensaje {numero}\n")
+        vista._volcar()
+
+        lineas = self.widget.lineas()
+        self.assertEqual(len(lineas), 5)
+        self.assertIn("4 mensajes no mostrados", lineas[0])
+        self.assertEqual(lineas[1:], [f"mensaje {numero}" for numero in range(4, 8)])
+
+    def test_widget_se_recorta_al_maximo(self):
+        vista = self.vista(3)
+        for numero in range(7):
+            vista.agregar(f"mensaje {numero}\n")
+            vista._volcar()
+        self.assertEqual(self.widget.lineas(), ["mensaje 4", "mensaje 5", "mensaje 6"])
+
+    def test_revisando_lineas_anteriores_se_tolera_el_doble(self):
+        vista = self.vista(3)
+        self.widget.al_final = False
+        for numero in range(7):
+            vista.agregar(f"mensaje {numero}\n")
+            vista._volcar()
+        self.assertEqual(len(self.widget.lineas()), 6)
+
+    def test_cargar_anteriores_sin_repetir_lineas(self):
+        carpeta = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, carpeta, True)
+        db_path = os.path.join(carpeta, "prueba.db")
+        self.addCleanup(cerrar_conexion, db_path)
+        DatabaseManager(db_path).create_tables()
+        registros = [("15/01/2026", f"10:00:{segundo:02d}", "INFO", f"registro {segundo}") for segundo in range(6)]
+        registros.append(("15/01/2026", "10:00:05", "INFO", "registro 5b"))
+        with conectar(db_path) as conn:
+            conn.executemany("INSERT INTO log_procesos (fecha, hora, tipo, asunto) VALUES (?, ?, ?, ?)", registros)
+
+        # En pantalla quedan los dos últimos, ambos del segundo 10:00:05
+        vista = self.vista(10, db_path)
+        vista.agregar("15/01/2026 10:00:05 - [INFO] registro 5\n15/01/2026 10:00:05 - [INFO] registro 5b\n")
+        vista._volcar()
+
+        self.assertEqual(vista.cargar_anteriores(limite=3), 1)
+        self.assertEqual(self.widget.lineas()[0], "15/01/2026 10:00:04 - [INFO] registro 4")
+        self.assertEqual(vista.cargar_anteriores(limite=3), 3)
+        self.assertEqual(vista.cargar_anteriores(limite=3), 1)
+        self.assertEqual(vista.cargar_anteriores(limite=3), 0)
+        self.assertEqual(self.widget.lineas(), [f"15/01/2026 10:00:{segundo:02d} - [INFO] registro {segundo}"
+                                                for segundo in range(6)] + ["15/01/2026 10:00:05 - [INFO] registro 5b"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,194 @@
+# -*- coding: utf-8 -*-
+"""
+Pruebas de la bandeja de salida: circuito, drenado en paralelo, archivos ilegibles y reinicio del hilo.
+"""
+
+import os
+import shutil
+import sqlite3
+import tempfile
+import threading
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+from unittest import mock
+from config.database import DatabaseManager, conectar
+from config.settings import OUTBOX_CONFIG
+from utils.documento import parsear_documento
+from utils.generador import generar_lote
+from utils.outbox import Outbox
+
+ACEPTADO = {"StatusCode": "200", "StatusDesc": "OK"}
+NO_DISPONIBLE = {"success": False, "status_code": 503, "message": "", "tipo_error": "http"}
+
+
+class OutboxTest(unittest.TestCase):
+    """Pruebas de Outbox con una base de datos temporal y envíos simulados."""
+
+    def setUp(self):
+        self.carpeta = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.carpeta, True)
+        self.db_path = os.path.join(self.carpeta, "prueba.db")
+        DatabaseManager(self.db_path).create_tables()
+        self.ruta_procesado = os.path.join(self.carpeta, "procesado")
+
+        self.terminados = []
+        self.descartados = []
+        self.outbox = Outbox(al_terminar=lambda doc, resultado, ruta: self.terminados.append((doc, resultado)),
+                             al_descartar=lambda ruta, base, resultado: self.descartados.append((ruta, resultado)),
+                             db_path=self.db_path)
+        self.addCleanup(self.outbox.detener)
+
+        parche = mock.patch("utils.outbox.config_service.obtener_config",
+                            return_value=SimpleNamespace(datos_api={}))
+        parche.start()
+        self.addCleanup(parche.stop)
+        self.executor = ThreadPoolExecutor(max_workers=4)
+        self.addCleanup(self.executor.shutdown)
+
+    def retener(self, cantidad, proporcion_facturas, folio_inicial=1):
+        """Genera documentos y los encola en la bandeja; retorna los documentos en orden."""
+        rutas = generar_lote(os.path.join(self.carpeta, "entrada"), cantidad, proporcion_facturas=proporcion_facturas,
+                             folio_inicial=folio_inicial, semilla=folio_inicial)
+        documentos = [parsear_documento(ruta) for ruta in rutas]
+        for documento in documentos:
+            self.outbox.encolar(documento, {"folio": documento.folio}, self.ruta_procesado)
+        return documentos
+
+    def drenar(self, responder):
+        """Drena un lote de la bandeja respondiendo cada envío con `responder(documento)`."""
+        enviados = []
+        lock = threading.Lock()
+
+        def enviar(documento, body, config_data, logger=None):
+            with lock:
+                enviados.append((documento.tipo_dte, documento.folio))
+            return responder(documento)
+
+        with mock.patch("utils.outbox.enviar_documento", enviar):
+            self.outbox._drenar(self.executor)
+        return enviados
+
+    def filas(self):
+        return conectar(self.db_path).execute("SELECT tipo_dte, folio, intentos FROM outbox ORDER BY id").fetchall()
+
+    def test_encolar_mueve_el_txt_a_pendientes(self):
+        documento = self.retener(1, 0.0)[0]
+        destino = os.path.join(self.ruta_procesado, OUTBOX_CONFIG["carpeta"], documento.nombre)
+        self.assertTrue(os.path.isfile(destino))
+        self.assertEqual(self.outbox.pendientes, 1)
+
+    def test_encolar_sin_registro_no_mueve_el_txt(self):
+        documento = parsear_documento(generar_lote(os.path.join(self.carpeta, "entrada"), 1, semilla=1)[0])
+        with conectar(self.db_path) as conn:
+            conn.execute("DROP TABLE outbox")
+        with self.assertRaises(sqlite3.Error):
+            self.outbox.encolar(documento, {}, self.ruta_procesado)
+        self.assertTrue(os.path.isfile(documento.ruta))
+
+    def test_encolar_sin_mover_deshace_el_registro(self):
+        documento = parsear_documento(generar_lote(os.path.join(self.carpeta, "entrada"), 1, semilla=1)[0])
+        os.remove(documento.ruta)
+        with self.assertRaises(OSError):
+            self.outbox.encolar(documento, {}, self.ruta_procesado)
+        self.assertEqual(self.filas(), [])
+        self.assertEqual(self.outbox.pendientes, 0)
+
+    def test_circuito_se_abre_tras_fallos_seguidos(self):
+        fallos = OUTBOX_CONFIG["fallos_para_retener"]
+        for _ in range(fallos - 1):
+            self.outbox.registrar_envio(NO_DISPONIBLE)
+        self.assertFalse(self.outbox.en_espera())
+        self.outbox.registrar_envio(NO_DISPONIBLE)
+        self.assertTrue(self.outbox.en_espera())
+        # Una respuesta definitiva (aceptado o rechazado) cierra el circuito
+        self.outbox.registrar_envio({"StatusCode": "400", "StatusDesc": "Rechazado"})
+        self.assertFalse(self.outbox.en_espera())
+
+    def test_fallo_aislado_no_abre_el_circuito(self):
+        self.outbox.registrar_envio(NO_DISPONIBLE)
+        self.outbox.registrar_envio(ACEPTADO)
+        self.outbox.registrar_envio(NO_DISPONIBLE)
+        self.assertFalse(self.outbox.en_espera())
+
+    def test_drenado_archiva_en_orden_de_llegada(self):
+        documentos = self.retener(6, 0.5)
+        enviados = self.drenar(lambda documento: ACEPTADO)
+
+        self.assertEqual(self.outbox.pendientes, 0)
+        self.assertEqual(self.filas(), [])
+        # Los envíos son concurrentes; el archivado respeta el orden de la bandeja
+        self.assertCountEqual(enviados, [(doc.tipo_dte, doc.folio) for doc in documentos])
+        self.assertEqual([doc.folio for doc, _ in self.terminados], [doc.folio for doc in documentos])
+
+    def test_fallo_transitorio_solo_retiene_ese_documento(self):
+        self.retener(3, 0.0, folio_inicial=1)
+        self.retener(2, 1.0, folio_inicial=10)
+        enviados = self.drenar(lambda documento: NO_DISPONIBLE if documento.folio == 2 else ACEPTADO)
+
+        self.assertEqual(len(enviados), 5)
+        self.assertEqual(self.filas(), [(39, 2, 1)])
+        self.assertEqual([doc.folio for doc, _ in self.terminados], [1, 3, 10, 11])
+        self.assertEqual(self.outbox.pendientes, 1)
+        self.assertEqual(self.outbox._fallos_consecutivos, 1)
+
+    def test_tras_un_fallo_se_prueba_con_un_documento(self):
+        self.retener(3, 0.0)
+        self.drenar(lambda documento: NO_DISPONIBLE)
+        self.outbox._reanudar_en = 0.0
+        enviados = self.drenar(lambda documento: ACEPTADO)
+        self.assertEqual(enviados, [(39, 1)])
+        self.assertEqual(self.outbox._fallos_consecutivos, 0)
+
+    def test_documento_ilegible_va_a_error(self):
+        documento = self.retener(1, 0.0)[0]
+        ruta = os.path.join(self.ruta_procesado, OUTBOX_CONFIG["carpeta"], documento.nombre)
+        with open(ruta, "wb") as f:
+            f.write(b"\xff\xfe no es utf-8")
+
+        enviados = self.drenar(lambda documento: ACEPTADO)
+
+        self.assertEqual(enviados, [])
+        self.assertEqual(self.filas(), [])
+        self.assertEqual(len(self.descartados), 1)
+        self.assertEqual(self.descartados[0][0], ruta)
+        self.assertEqual(self.descartados[0][1]["tipo_error"], "parseo")
+
+    def test_iniciar_tras_detener_crea_un_hilo_nuevo(self):
+        self.outbox.iniciar()
+        anterior = self.outbox._hilo
+        self.outbox.detener()
+        self.outbox.iniciar()
+        nuevo = self.outbox._hilo
+
+        self.assertIsNot(nuevo, anterior)
+        anterior.join(timeout=5)
+        self.assertFalse(anterior.is_alive())
+        self.assertTrue(nuevo.is_alive())
+        self.outbox.detener()
+        nuevo.join(timeout=5)
+        self.assertFalse(nuevo.is_alive())
+
+    def test_iniciar_dos_veces_deja_un_solo_hilo(self):
+        self.outbox.iniciar()
+        anterior = self.outbox._hilo
+        self.outbox.iniciar()
+        anterior.join(timeout=5)
+        self.assertFalse(anterior.is_alive())
+        self.assertTrue(self.outbox._hilo.is_alive())
+
+    def test_detener_una_ejecucion_anterior_no_afecta_a_la_nueva(self):
+        # Detener→Iniciar rápido: el bloque finally de la ejecución vieja llega después
+        vieja = self.outbox.iniciar()
+        self.outbox.detener(vieja)
+        self.outbox.iniciar()
+        self.outbox.detener(vieja)
+        hilo = self.outbox._hilo
+        hilo.join(timeout=0.3)
+        self.assertTrue(hilo.is_alive())
+        self.outbox.detener()
+        hilo.join(timeout=5)
+        self.assertFalse(hilo.is_alive())
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,130 @@
+# -*- coding: utf-8 -*-
+"""
+Pruebas de la cola de impresión con los backends de archivo y simulado.
+"""
+
+import os
+import shutil
+import tempfile
+import time
+import unittest
+from utils.print_spooler import ArchivoBackend, PrintBackend, PrintSpooler, SimuladoBackend
+
+
+class LoggerFalso:
+    """Acumula los mensajes registrados."""
+
+    def __init__(self):
+        self.mensajes = []
+
+    def log_message(self, mensaje, nivel="INFO"):
+        self.mensajes.append((nivel, mensaje))
+
+
+class BackendConRetencion(SimuladoBackend):
+    """Backend simulado cuya aplicación sigue usando el PDF un tiempo tras imprimir."""
+
+    def __init__(self, retencion, error=None):
+        super().__init__(demora=0.0)
+        self.retencion = retencion
+        self.error = error
+        self.liberados = []
+
+    def liberar(self, ruta_pdf):
+        self.liberados.append(ruta_pdf)
+        return self.error
+
+
+class PrintSpoolerTest(unittest.TestCase):
+    """Pruebas de orden, resultado y liberación de PDFs de la cola de impresión."""
+
+    def setUp(self):
+        self.carpeta = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.carpeta, True)
+        self.logger = LoggerFalso()
+
+    def pdf(self, nombre):
+        ruta = os.path.join(self.carpeta, nombre)
+        with open(ruta, "wb") as f:
+            f.write(b"%PDF-1.4 " + nombre.encode())
+        return ruta
+
+    def test_backend_sin_imprimir_no_se_puede_crear(self):
+        class Incompleto(PrintBackend):
+            nombre = "incompleto"
+
+        with self.assertRaises(TypeError):
+            Incompleto()
+
+    def test_archivo_imprime_en_orden_con_sus_copias(self):
+        destino = os.path.join(self.carpeta, "impresiones")
+        spooler = PrintSpooler(self.logger, backend=ArchivoBackend(destino))
+        trabajos = [spooler.encolar(self.pdf(f"{i}.pdf"), "Caja 1", copias=i + 1) for i in range(3)]
+        spooler.esperar()
+
+        self.assertTrue(all(trabajo.exito for trabajo in trabajos))
+        self.assertEqual(sorted(os.listdir(destino)),
+                         ["000001_Caja_1_x1.pdf", "000002_Caja_1_x2.pdf", "000003_Caja_1_x3.pdf"])
+        with open(os.path.join(destino, "000002_Caja_1_x2.pdf"), "rb") as f:
+            self.assertEqual(f.read(), b"%PDF-1.4 1.pdf")
+
+    def test_simulado_cuenta_trabajos_y_copias(self):
+        backend = SimuladoBackend(demora=0.0)
+        spooler = PrintSpooler(self.logger, backend=backend)
+        terminados = []
+        for i in range(4):
+            spooler.encolar(self.pdf(f"{i}.pdf"), "Caja", copias=2, al_terminar=terminados.append)
+        spooler.esperar()
+
+        self.assertEqual((backend.trabajos, backend.copias), (4, 8))
+        self.assertEqual([os.path.basename(trabajo.ruta_pdf) for trabajo in terminados],
+                         ["0.pdf", "1.pdf", "2.pdf", "3.pdf"])
+        self.assertEqual(spooler.pendientes, 0)
+
+    def test_error_del_backend_se_informa(self):
+        spooler = PrintSpooler(self.logger, backend=ArchivoBackend(os.path.join(self.carpeta, "impresiones")))
+        trabajo = spooler.encolar(os.path.join(self.carpeta, "no_existe.pdf"), "Caja")
+        self.assertFalse(trabajo.esperar(timeout=5))
+        self.assertIsNotNone(trabajo.error)
+        self.assertIn("ERROR", [nivel for nivel, _ in self.logger.mensajes])
+
+    def test_temporal_sin_retencion_se_elimina_al_imprimir(self):
+        spooler = PrintSpooler(self.logger, backend=SimuladoBackend(demora=0.0))
+        ruta = self.pdf("temporal.pdf")
+        conservado = self.pdf("conservado.pdf")
+        spooler.encolar(ruta, "Caja", temporal=True)
+        spooler.encolar(conservado, "Caja")
+        spooler.esperar()
+        self.assertFalse(os.path.exists(ruta))
+        self.assertTrue(os.path.exists(conservado))
+
+    def test_retencion_no_detiene_la_cola(self):
+        backend = BackendConRetencion(retencion=0.3)
+        spooler = PrintSpooler(self.logger, backend=backend)
+        rutas = [self.pdf(f"{i}.pdf") for i in range(3)]
+
+        comienzo = time.monotonic()
+        for ruta in rutas:
+            spooler.encolar(ruta, "Caja", temporal=True)
+        spooler.esperar()
+        self.assertLess(time.monotonic() - comienzo, 0.3)
+        # Los PDFs se conservan mientras la aplicación de impresión puede leerlos
+        self.assertTrue(all(os.path.exists(ruta) for ruta in rutas))
+        self.assertEqual(spooler.diferidos, 3)
+
+        time.sleep(0.6)
+        self.assertEqual(backend.liberados, rutas)
+        self.assertFalse(any(os.path.exists(ruta) for ruta in rutas))
+        self.assertEqual(spooler.diferidos, 0)
+
+    def test_fallo_detectado_al_liberar_se_registra(self):
+        backend = BackendConRetencion(retencion=0.05, error="Adobe Acrobat terminó con código 1")
+        spooler = PrintSpooler(self.logger, backend=backend)
+        spooler.encolar(self.pdf("a.pdf"), "Caja", temporal=True)
+        spooler.esperar()
+        time.sleep(0.3)
+        self.assertIn(("ERROR", "Error al imprimir: Adobe Acrobat terminó con código 1"), self.logger.mensajes)
+
+
+if __name__ == "__main__":
+    unittest.main()
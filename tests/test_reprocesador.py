@@ -0,0 +1,152 @@
+# -*- coding: utf-8 -*-
+"""
+Pruebas del reproceso de la carpeta de error: clasificación, revisión, reintentos y reinicio del hilo.
+"""
+
+import os
+import shutil
+import tempfile
+import time
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+from config.database import DatabaseManager, conectar
+from config.settings import REINTENTO_CONFIG
+from utils.generador import generar_lote
+from utils.reprocesador import ErrorReprocessor, TIPO_REVISION
+
+ACEPTADO = {"StatusCode": "200", "StatusDesc": "OK"}
+NO_DISPONIBLE = {"success": False, "status_code": 503, "message": "", "tipo_error": "http"}
+
+
+class ErrorReprocessorTest(unittest.TestCase):
+    """Pruebas de ErrorReprocessor con una base de datos y un árbol error/ temporales."""
+
+    def setUp(self):
+        self.carpeta = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.carpeta, True)
+        self.db_path = os.path.join(self.carpeta, "prueba.db")
+        DatabaseManager(self.db_path).create_tables()
+        self.ruta_procesado = os.path.join(self.carpeta, "procesado")
+        self.ruta_error = os.path.join(self.ruta_procesado, "error", "01_2026", "15")
+
+        self.archivados = []
+        self.reprocesador = ErrorReprocessor(
+            archivar=lambda documento, ruta, resultado: self.archivados.append(documento.nombre),
+            db_path=self.db_path)
+        self.addCleanup(self.reprocesador.detener)
+
+    def en_error(self, cantidad=1, proporcion_facturas=0.0):
+        """Deja documentos válidos en la carpeta de error y retorna sus rutas."""
+        return generar_lote(self.ruta_error, cantidad, proporcion_facturas=proporcion_facturas, semilla=7)
+
+    def fila(self, ruta):
+        return conectar(self.db_path).execute(
+            "SELECT id, tipo_error, reintentable, intentos, proximo_intento FROM errores WHERE ruta = ?", (ruta,)
+        ).fetchone()
+
+    def test_archivo_existente_queda_en_revision(self):
+        ruta = self.en_error()[0]
+        self.assertEqual(self.reprocesador.indexar(self.ruta_procesado), 1)
+        _, tipo_error, reintentable, _, proximo = self.fila(ruta)
+        self.assertEqual(tipo_error, TIPO_REVISION)
+        self.assertEqual(reintentable, 0)
+        self.assertIsNone(proximo)
+        self.assertEqual(self.reprocesador.contar(), {"total": 1, "reintentables": 0})
+
+    def test_archivo_existente_se_reintenta_si_se_habilita(self):
+        ruta = self.en_error()[0]
+        with mock.patch.dict(REINTENTO_CONFIG, reintentar_existentes=True):
+            self.reprocesador.indexar(self.ruta_procesado)
+        _, tipo_error, reintentable, _, proximo = self.fila(ruta)
+        self.assertEqual(tipo_error, "desconocido")
+        self.assertEqual(reintentable, 1)
+        self.assertLessEqual(proximo, time.time())
+
+    def test_archivo_existente_ilegible_no_se_reintenta(self):
+        os.makedirs(self.ruta_error)
+        ruta = os.path.join(self.ruta_error, "roto.txt")
+        with open(ruta, "wb") as f:
+            f.write(b"\xff\xfe no es utf-8")
+        self.reprocesador.indexar(self.ruta_procesado)
+        _, tipo_error, reintentable, _, _ = self.fila(ruta)
+        self.assertEqual(tipo_error, "parseo")
+        self.assertEqual(reintentable, 0)
+
+    def test_liberar_revision(self):
+        rutas = self.en_error(3)
+        self.reprocesador.indexar(self.ruta_procesado)
+        self.assertEqual(self.reprocesador.liberar_revision(), 3)
+        for ruta in rutas:
+            _, tipo_error, reintentable, intentos, proximo = self.fila(ruta)
+            self.assertEqual((tipo_error, reintentable, intentos), ("desconocido", 1, 0))
+            self.assertLessEqual(proximo, time.time())
+        self.assertEqual(self.reprocesador.liberar_revision(), 0)
+
+    def test_registrar_clasifica_el_resultado(self):
+        self.reprocesador.registrar("/transitorio.txt", self.ruta_procesado, NO_DISPONIBLE)
+        self.reprocesador.registrar("/invalida.txt", self.ruta_procesado,
+                                    {"success": False, "status_code": 200, "tipo_error": "respuesta_invalida"})
+        _, tipo_error, reintentable, _, proximo = self.fila("/transitorio.txt")
+        self.assertEqual((tipo_error, reintentable), ("http", 1))
+        self.assertGreater(proximo, time.time())
+        _, tipo_error, reintentable, _, proximo = self.fila("/invalida.txt")
+        self.assertEqual((tipo_error, reintentable, proximo), ("respuesta_invalida", 0, None))
+
+    def reintentar(self, ruta, resultado, intentos=0):
+        """Reintenta un archivo registrado con una respuesta simulada de la API."""
+        id_error = self.fila(ruta)[0]
+        with mock.patch("utils.reprocesador.process_and_post_txt", return_value=resultado), \
+                mock.patch("utils.reprocesador.config_service.obtener_config",
+                           return_value=SimpleNamespace(datos_api={})):
+            return self.reprocesador.reintentar(id_error, ruta, self.ruta_procesado, intentos)
+
+    def test_reintento_aceptado_se_archiva(self):
+        ruta = self.en_error()[0]
+        self.reprocesador.registrar(ruta, self.ruta_procesado, NO_DISPONIBLE)
+        self.assertTrue(self.reintentar(ruta, ACEPTADO))
+        self.assertIsNone(self.fila(ruta))
+        self.assertEqual(self.archivados, [os.path.basename(ruta)])
+
+    def test_reintento_fallido_hasta_agotar_intentos(self):
+        ruta = self.en_error()[0]
+        self.reprocesador.registrar(ruta, self.ruta_procesado, NO_DISPONIBLE)
+        self.assertFalse(self.reintentar(ruta, NO_DISPONIBLE))
+        _, _, reintentable, intentos, _ = self.fila(ruta)
+        self.assertEqual((reintentable, intentos), (1, 1))
+
+        self.assertFalse(self.reintentar(ruta, NO_DISPONIBLE, REINTENTO_CONFIG["max_intentos"] - 1))
+        _, _, reintentable, intentos, proximo = self.fila(ruta)
+        self.assertEqual((reintentable, intentos, proximo), (0, REINTENTO_CONFIG["max_intentos"], None))
+
+    def test_iniciar_tras_detener_crea_un_hilo_nuevo(self):
+        self.reprocesador.iniciar(self.ruta_procesado)
+        anterior = self.reprocesador._hilo
+        self.reprocesador.detener()
+        self.reprocesador.iniciar(self.ruta_procesado)
+        nuevo = self.reprocesador._hilo
+
+        self.assertIsNot(nuevo, anterior)
+        anterior.join(timeout=5)
+        self.assertFalse(anterior.is_alive())
+        self.assertTrue(nuevo.is_alive())
+        self.reprocesador.detener()
+        nuevo.join(timeout=5)
+        self.assertFalse(nuevo.is_alive())
+
+    def test_detener_una_ejecucion_anterior_no_afecta_a_la_nueva(self):
+        # Detener→Iniciar rápido: el bloque finally de la ejecución vieja llega después
+        vieja = self.reprocesador.iniciar(self.ruta_procesado)
+        self.reprocesador.detener(vieja)
+        self.reprocesador.iniciar(self.ruta_procesado)
+        self.reprocesador.detener(vieja)
+        hilo = self.reprocesador._hilo
+        hilo.join(timeout=0.3)
+        self.assertTrue(hilo.is_alive())
+        self.reprocesador.detener()
+        hilo.join(timeout=5)
+        self.assertFalse(hilo.is_alive())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,115 @@
+# -*- coding: utf-8 -*-
+"""
+Pruebas del envío concurrente por series de folios (DocumentSubmitter).
+"""
+
+import threading
+import time
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+from utils.submitter import DocumentSubmitter
+
+
+def documento(tipo_dte, folio):
+    """Crea un documento mínimo para el enviador."""
+    return SimpleNamespace(tipo_dte=tipo_dte, folio=folio, ruta=f"{tipo_dte}_{folio}.txt", nombre=f"{tipo_dte}_{folio}.txt")
+
+
+class ApiFalsa:
+    """Reemplazo de process_and_post_txt que registra el orden y la concurrencia de los envíos."""
+
+    def __init__(self, demora=0.01):
+        self.demora = demora
+        # Demora por folio (opcional) para que las respuestas lleguen desordenadas
+        self.demoras = {}
+        self.lock = threading.Lock()
+        self.en_curso = {}
+        self.maximo_por_serie = {}
+        self.maximo_total = 0
+        self.recibidos = []
+
+    def __call__(self, ruta, config_data, logger=None, documento=None):
+        serie = documento.tipo_dte
+        with self.lock:
+            self.en_curso[serie] = self.en_curso.get(serie, 0) + 1
+            self.maximo_por_serie[serie] = max(self.maximo_por_serie.get(serie, 0), self.en_curso[serie])
+            self.maximo_total = max(self.maximo_total, sum(self.en_curso.values()))
+            self.recibidos.append((serie, documento.folio))
+        time.sleep(self.demoras.get(documento.folio, self.demora))
+        with self.lock:
+            self.en_curso[serie] -= 1
+        if documento.folio < 0:
+            raise RuntimeError("falla simulada")
+        return {"StatusCode": "200", "StatusDesc": "OK", "FOLIO": documento.folio}
+
+
+class DocumentSubmitterTest(unittest.TestCase):
+    """Pruebas de orden y concurrencia del enviador."""
+
+    def setUp(self):
+        self.api = ApiFalsa()
+        parche = mock.patch("utils.submitter.process_and_post_txt", self.api)
+        parche.start()
+        self.addCleanup(parche.stop)
+        self.submitter = DocumentSubmitter(4)
+        self.addCleanup(self.submitter.cerrar)
+        self.entregados = []
+
+    def al_terminar(self, doc, resultado):
+        self.entregados.append((doc.tipo_dte, doc.folio, resultado))
+
+    def enviar(self, documentos):
+        for doc in documentos:
+            self.submitter.enviar(doc, {}, self.al_terminar)
+        self.assertTrue(self.submitter.esperar(timeout=10))
+
+    def test_envios_en_paralelo_dentro_de_la_serie(self):
+        self.api.demora = 0.05
+        self.enviar([documento(39, folio) for folio in range(8)])
+        self.assertEqual(self.api.maximo_por_serie[39], self.submitter.max_en_vuelo)
+        self.assertLessEqual(self.api.maximo_total, self.submitter.max_en_vuelo)
+
+    def test_entrega_en_orden_de_envio_dentro_de_la_serie(self):
+        # Los primeros folios tardan más: sus respuestas llegan después que las siguientes
+        self.api.demoras = {0: 0.15, 1: 0.1, 2: 0.05}
+        documentos = [documento(39 if i % 2 else 33, i) for i in range(20)]
+        self.enviar(documentos)
+        for serie in (33, 39):
+            esperados = [doc.folio for doc in documentos if doc.tipo_dte == serie]
+            self.assertEqual([folio for tipo, folio, _ in self.entregados if tipo == serie], esperados)
+
+    def test_una_serie_lenta_no_retiene_a_otra(self):
+        self.api.demoras = {0: 0.3}
+        self.enviar([documento(33, 0)] + [documento(39, folio) for folio in range(1, 4)])
+        self.assertEqual([folio for _, folio, _ in self.entregados], [1, 2, 3, 0])
+
+    def test_excepcion_se_entrega_como_resultado(self):
+        self.enviar([documento(39, -1), documento(39, 2)])
+        self.assertEqual([folio for _, folio, _ in self.entregados], [-1, 2])
+        self.assertFalse(self.entregados[0][2]["success"])
+        self.assertEqual(self.entregados[1][2]["StatusCode"], "200")
+
+    def test_error_en_al_terminar_no_detiene_la_serie(self):
+        def fallar(doc, resultado):
+            raise ValueError("archivado fallido")
+
+        self.submitter.enviar(documento(39, 1), {}, fallar)
+        self.submitter.enviar(documento(39, 2), {}, self.al_terminar)
+        self.assertTrue(self.submitter.esperar(timeout=10))
+        self.assertEqual([folio for _, folio, _ in self.entregados], [2])
+        self.assertEqual(self.submitter.en_vuelo, 0)
+
+    def test_limite_en_vuelo(self):
+        self.api.demora = 0.02
+        maximo = []
+        for i in range(12):
+            self.submitter.enviar(documento(39, i), {}, self.al_terminar)
+            maximo.append(self.submitter.en_vuelo)
+        self.assertTrue(self.submitter.esperar(timeout=10))
+        self.assertLessEqual(max(maximo), self.submitter.max_en_vuelo)
+        self.assertEqual(len(self.entregados), 12)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,117 @@
+# -*- coding: utf-8 -*-
+"""
+Pruebas de la validación local de documentos y de su cuarentena.
+"""
+
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+from config.settings import VALIDACION_CONFIG
+from utils.api import process_and_post_txt
+from utils.documento import parsear_documento, parsear_texto
+from utils.file_processor import FileProcessor
+from utils.generador import EMPRESA_PRUEBA, generar_boleta, generar_factura
+from utils.validacion import SEVERIDAD_ADVERTENCIA, describir, tiene_errores, validar_previo
+
+
+def codigos(problemas):
+    return [problema.codigo for problema in problemas]
+
+
+class ValidacionTest(unittest.TestCase):
+    """Pruebas de validar_previo sobre documentos sintéticos válidos y alterados."""
+
+    def test_documentos_generados_son_validos(self):
+        for combinacion in ((), (("D", "$"),), (("R", "$"), ("D", "%"))):
+            self.assertEqual(validar_previo(parsear_texto(generar_boleta(1, "2026-01-15", combinacion=combinacion))), [])
+            self.assertEqual(validar_previo(parsear_texto(generar_factura(1, "2026-01-15", combinacion=combinacion))), [])
+
+    def test_tipo_no_soportado(self):
+        problemas = validar_previo(parsear_texto("->Boleta<-\n41;1;2026-01-15;3;0;;;;;;;;;;\n"))
+        self.assertEqual(codigos(problemas), ["tipo_no_soportado"])
+
+    def test_seccion_faltante(self):
+        texto = generar_boleta(1, "2026-01-15").replace("->BoletaDetalle<-", "->Otra<-")
+        problemas = validar_previo(parsear_texto(texto))
+        self.assertEqual(codigos(problemas), ["seccion_faltante"])
+        self.assertIn("BoletaDetalle", describir(problemas))
+
+    def test_fecha_y_campos_no_numericos(self):
+        texto = generar_boleta(7, "2026-01-15").replace("39;7;2026-01-15;", "39;7;15/01/2026;", 1)
+        texto = texto.replace("->BoletaDetalle<-\n1;", "->BoletaDetalle<-\nuno;", 1)
+        problemas = validar_previo(parsear_texto(texto))
+        self.assertEqual(codigos(problemas), ["fecha_invalida", "campo_no_numerico"])
+        self.assertIn("BoletaDetalle línea 1, campo 1: 'uno'", describir(problemas))
+
+    def test_detalle_incompleto_de_factura(self):
+        texto = generar_factura(1, "2026-01-15", lineas=1)
+        inicio = texto.index("->Detalle<-\n") + len("->Detalle<-\n")
+        fin = texto.index("->ImpuestoRetencion<-")
+        problemas = validar_previo(parsear_texto(texto[:inicio] + "1;2;3\n" + texto[fin:]))
+        self.assertEqual(codigos(problemas), ["detalle_incompleto"])
+
+    def test_totales_descuadrados_solo_advierten(self):
+        lineas = generar_boleta(1, "2026-01-15").split("\n")
+        indice = lineas.index("->BoletaTotales<-") + 1
+        campos = lineas[indice].split(";")
+        campos[3] = str(int(campos[3]) + 1000)
+        lineas[indice] = ";".join(campos)
+        problemas = validar_previo(parsear_texto("\n".join(lineas)))
+        self.assertEqual(codigos(problemas), ["total_descuadrado"])
+        self.assertEqual(problemas[0].severidad, SEVERIDAD_ADVERTENCIA)
+        self.assertFalse(tiene_errores(problemas))
+
+
+class CuarentenaTest(unittest.TestCase):
+    """Pruebas de que un documento inválido no se envía y termina en la cuarentena con su motivo."""
+
+    def setUp(self):
+        self.carpeta = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.carpeta, True)
+        for modulo in ("utils.api", "utils.file_processor", "utils.pdf_stage"):
+            parche = mock.patch(f"{modulo}.obtener_metricas")
+            parche.start()
+            self.addCleanup(parche.stop)
+
+    def escribir_invalida(self):
+        ruta = os.path.join(self.carpeta, "B39_0000009.txt")
+        texto = generar_boleta(9, "2026-01-15").replace("->BoletaTotales<-", "->Otra<-")
+        with open(ruta, "w", encoding="utf-8") as f:
+            f.write(texto)
+        return ruta
+
+    def test_documento_invalido_no_llega_a_la_api(self):
+        ruta = self.escribir_invalida()
+        with mock.patch("utils.api.enviar_request_api") as api:
+            resultado = process_and_post_txt(ruta, dict(EMPRESA_PRUEBA))
+        api.assert_not_called()
+        self.assertEqual(resultado["tipo_error"], "validacion")
+        self.assertTrue(resultado["cuarentena"])
+        self.assertEqual([problema["codigo"] for problema in resultado["problemas"]], ["seccion_faltante"])
+
+    def test_mover_a_cuarentena_guarda_el_motivo(self):
+        ruta = self.escribir_invalida()
+        documento = parsear_documento(ruta)
+        with mock.patch("utils.api.enviar_request_api"):
+            resultado = process_and_post_txt(ruta, dict(EMPRESA_PRUEBA), documento=documento)
+
+        procesador = FileProcessor()
+        self.addCleanup(procesador.submitter.cerrar)
+        ruta_procesado = os.path.join(self.carpeta, "procesado")
+        destino = procesador.mover_a_cuarentena(ruta, ruta_procesado, documento, resultado["problemas"])
+
+        self.assertEqual(destino, os.path.join(ruta_procesado, VALIDACION_CONFIG["carpeta_cuarentena"],
+                                               "01_2026", "15", "B39_0000009.txt"))
+        self.assertFalse(os.path.exists(ruta))
+        with open(destino + ".motivo.json", encoding="utf-8") as f:
+            motivo = json.load(f)
+        self.assertEqual((motivo["tipo_dte"], motivo["folio"]), (39, 9))
+        self.assertEqual(motivo["hash"], documento.hash_contenido)
+        self.assertEqual(motivo["problemas"], resultado["problemas"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,206 @@
+# -*- coding: utf-8 -*-
+"""
+Módulo con un servidor local que simula la API de DTE (/edidte/Document) para pruebas de carga.
+"""
+
+import json
+import random
+import threading
+import time
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+# Ruta del endpoint de documentos (igual que en la API real)
+RUTA_DOCUMENTO = "/edidte/Document"
+
+# Prefijo de las URLs de PDF entregadas en PDFPATH
+RUTA_PDF = "/pdf/"
+
+
+class _ManejadorApi(BaseHTTPRequestHandler):
+    """Atiende las solicitudes de la API simulada (la configuración está en self.server.api)."""
+
+    protocol_version = "HTTP/1.1"
+
+    def setup(self):
+        super().setup()
+        # Se llama una vez por conexión TCP: permite verificar que el cliente reutiliza el pool
+        self.server.api.registrar("conexion")
+
+    def do_POST(self):
+        api = self.server.api
+        inicio = time.perf_counter()
+        largo = int(self.headers.get("Content-Length") or 0)
+        contenido = self.rfile.read(largo)
+
+        if self.path != RUTA_DOCUMENTO:
+            self._responder(404, {"StatusCode": "404", "StatusDesc": "Not Found"})
+            return
+        try:
+            body = json.loads(contenido)
+            folio = body["dte"]["Encabezado"]["IdDoc"]["Folio"]
+        except (ValueError, KeyError, TypeError):
+            self._responder(400, {"StatusCode": "400", "StatusDesc": "Body inválido"})
+            return
+
+        time.sleep(api.sortear_latencia())
+        resultado = api.sortear_resultado()
+        if resultado == "invalida":
+            # Página de error de un proxy intermedio con código 200
+            self._responder_texto(200, "<html><body>Gateway</body></html>")
+            api.registrar(resultado, time.perf_counter() - inicio)
+            return
+        if resultado == "error":
+            codigo, respuesta = 503, {"StatusCode": "503", "StatusDesc": "Servicio no disponible"}
+        elif resultado == "rechazo":
+            codigo, respuesta = 200, {"StatusCode": "400", "StatusDesc": f"Folio {folio} rechazado (simulado)"}
+        else:
+            host = self.headers.get("Host") or f"{api.host}:{api.puerto}"
+            codigo, respuesta = 200, {"StatusCode": "200", "StatusDesc": "OK", "FOLIO": folio,
+                                      "PDFPATH": f"http://{host}{RUTA_PDF}{folio}.pdf"}
+        self._responder(codigo, respuesta)
+        api.registrar(resultado, time.perf_counter() - inicio)
+
+    def do_GET(self):
+        api = self.server.api
+        if not self.path.startswith(RUTA_PDF):
+            self._responder(404, {"StatusCode": "404", "StatusDesc": "Not Found"})
+            return
+        if api.latencia_pdf:
+            time.sleep(api.latencia_pdf)
+        self.send_response(200)
+        self.send_header("Content-Type", "application/pdf")
+        self.send_header("Content-Length", str(len(api.pdf)))
+        self.end_headers()
+        self.wfile.write(api.pdf)
+        api.registrar("pdf")
+
+    def do_HEAD(self):
+        # Precalentamiento de la conexión (http_client.calentar)
+        self.send_response(200)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def _responder(self, codigo, respuesta):
+        datos = json.dumps(respuesta).encode("utf-8")
+        self.send_response(codigo)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(datos)))
+        self.end_headers()
+        self.wfile.write(datos)
+
+    def _responder_texto(self, codigo, texto):
+        datos = texto.encode("utf-8")
+        self.send_response(codigo)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(datos)))
+        self.end_headers()
+        self.wfile.write(datos)
+
+    def log_message(self, format, *args):
+        # Sin registro por solicitud: distorsionaría la medición
+        pass
+
+
+class ApiSimulada:
+    """
+    Clase con un servidor HTTP local que responde como la API de DTE.
+
+    Cada POST a /edidte/Document espera una latencia configurable y responde
+    aceptado (con PDFPATH apuntando al mismo servidor), rechazado (200 con
+    StatusCode 400), con un error transitorio (503) o con un 200 que no es JSON,
+    según las tasas indicadas.
+    Los PDF servidos tienen el tamaño configurado. Atiende cada conexión en su
+    propio hilo, con keep-alive, como un servidor real.
+    """
+
+    def __init__(self, latencia=0.15, variacion=0.5, tasa_error=0.0, tasa_rechazo=0.0, tamano_pdf=40000,
+                 latencia_pdf=0.0, host="127.0.0.1", puerto=0, semilla=None, tasa_invalida=0.0):
+        """
+        Inicializa la API simulada (no la inicia).
+
+        Args:
+            latencia: Segundos promedio de respuesta de cada documento.
+            variacion: Variación relativa de la latencia (0.5 = entre 50% y 150% del promedio).
+            tasa_error: Fracción de documentos que reciben un 503.
+            tasa_rechazo: Fracción de documentos rechazados por la API.
+            tamano_pdf: Tamaño en bytes de los PDF servidos.
+            latencia_pdf: Segundos de espera antes de servir cada PDF.
+            host: Dirección en la que escucha el servidor.
+            puerto: Puerto (0 elige uno libre).
+            semilla: Semilla para sortear latencias y resultados (opcional).
+            tasa_invalida: Fracción de documentos que reciben un 200 con un cuerpo que no es JSON.
+        """
+        self.latencia = latencia
+        self.variacion = variacion
+        self.tasa_error = tasa_error
+        self.tasa_rechazo = tasa_rechazo
+        self.tasa_invalida = tasa_invalida
+        self.latencia_pdf = latencia_pdf
+        self.host = host
+        self.puerto = puerto
+        self.pdf = self._crear_pdf(tamano_pdf)
+        self._rng = random.Random(semilla)
+        self._lock = threading.Lock()
+        self._servidor = None
+        self._hilo = None
+        self.estadisticas = {"aceptado": 0, "rechazo": 0, "error": 0, "invalida": 0, "pdf": 0, "conexion": 0}
+        self.latencias = []
+
+    @staticmethod
+    def _crear_pdf(tamano):
+        """Crea un contenido con cabecera y cierre de PDF del tamaño indicado."""
+        inicio, fin = b"%PDF-1.4\n", b"\n%%EOF\n"
+        return inicio + b"%" * max(0, tamano - len(inicio) - len(fin)) + fin
+
+    @property
+    def url_api(self):
+        """URL del endpoint de documentos."""
+        return f"http://{self.host}:{self.puerto}{RUTA_DOCUMENTO}"
+
+    def iniciar(self):
+        """
+        Inicia el servidor en un hilo en segundo plano.
+
+        Returns:
+            str: URL del endpoint de documentos.
+        """
+        self._servidor = ThreadingHTTPServer((self.host, self.puerto), _ManejadorApi)
+        self._servidor.daemon_threads = True
+        self._servidor.api = self
+        self.puerto = self._servidor.server_address[1]
+        self._hilo = threading.Thread(target=self._servidor.serve_forever, name="ApiSimulada", daemon=True)
+        self._hilo.start()
+        return self.url_api
+
+    def detener(self):
+        """Detiene el servidor y espera a su hilo."""
+        if self._servidor is not None:
+            self._servidor.shutdown()
+            self._servidor.server_close()
+            self._hilo.join()
+            self._servidor = None
+
+    def sortear_latencia(self):
+        """Retorna la latencia de una respuesta, dentro del rango configurado."""
+        with self._lock:
+            factor = self._rng.uniform(1 - self.variacion, 1 + self.variacion)
+        return max(0.0, self.latencia * factor)
+
+    def sortear_resultado(self):
+        """Retorna el resultado de un envío: "aceptado", "rechazo", "error" o "invalida"."""
+        with self._lock:
+            azar = self._rng.random()
+        if azar < self.tasa_error:
+            return "error"
+        if azar < self.tasa_error + self.tasa_rechazo:
+            return "rechazo"
+        if azar < self.tasa_error + self.tasa_rechazo + self.tasa_invalida:
+            return "invalida"
+        return "aceptado"
+
+    def registrar(self, resultado, segundos=None):
+        """Contabiliza una respuesta y, para los documentos, su tiempo de atención."""
+        with self._lock:
+            self.estadisticas[resultado] += 1
+            if segundos is not None:
+                self.latencias.append(segundos)
@@ -0,0 +1,282 @@
+# -*- coding: utf-8 -*-
+"""
+Módulo para la carga masiva (backfill) de archivos TXT históricos a la API.
+"""
+
+import csv
+import datetime
+import glob
+import hashlib
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from config.database import DatabaseManager, conectar
+from config.settings import DB_CONFIG, PROCESS_CONFIG
+from config import config_service
+from utils.api import process_and_post_txt, es_reintentable
+from utils.batch_writer import BatchWriter
+from utils.documento import parsear_documento
+from utils.ledger import es_aceptado
+
+# Estados de un archivo en la tabla backfill
+ESTADO_ACEPTADO = "aceptado"      # La API aceptó el documento
+ESTADO_DUPLICADO = "duplicado"    # Ya había sido aceptado antes (registro de envíos)
+ESTADO_RECHAZADO = "rechazado"    # Error definitivo (validación, parseo, 4xx)
+ESTADO_ERROR = "error"            # Error transitorio (transporte, 5xx); se reintenta al retomar
+
+# Estados que no se vuelven a procesar al retomar una ejecución
+ESTADOS_FINALES = (ESTADO_ACEPTADO, ESTADO_DUPLICADO, ESTADO_RECHAZADO)
+
+SQL_GUARDAR = (
+    "INSERT INTO backfill (ejecucion, ruta, nombre, tipo_dte, folio, estado, tipo_error, detalle, pdf, segundos, procesado) "
+    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?) "
+    "ON CONFLICT(ejecucion, ruta) DO UPDATE SET nombre = excluded.nombre, tipo_dte = excluded.tipo_dte, "
+    "folio = excluded.folio, estado = excluded.estado, tipo_error = excluded.tipo_error, detalle = excluded.detalle, "
+    "pdf = excluded.pdf, segundos = excluded.segundos, procesado = excluded.procesado"
+)
+
+COLUMNAS_REPORTE = ("ruta", "nombre", "tipo_dte", "folio", "estado", "tipo_error", "detalle", "pdf", "segundos", "procesado")
+
+
+def expandir_rutas(entradas, recursivo=False):
+    """
+    Obtiene la lista de archivos TXT a partir de carpetas, archivos o patrones glob.
+
+    Args:
+        entradas: Lista de carpetas, archivos o patrones (p. ej. "archivo/03_2025/**/*.txt").
+        recursivo: Si es True, las carpetas se recorren incluyendo sus subcarpetas.
+
+    Returns:
+        list: Rutas absolutas de los TXT, sin repetir y ordenadas.
+    """
+    rutas = set()
+    for entrada in entradas:
+        if os.path.isdir(entrada):
+            if recursivo:
+                for carpeta, _, archivos in os.walk(entrada):
+                    rutas.update(os.path.join(carpeta, nombre) for nombre in archivos)
+            else:
+                with os.scandir(entrada) as it:
+                    rutas.update(e.path for e in it if e.is_file())
+        else:
+            rutas.update(glob.glob(entrada, recursive=True))
+
+    return sorted(os.path.abspath(ruta) for ruta in rutas
+                  if ruta.lower().endswith(".txt") and os.path.isfile(ruta))
+
+
+def id_ejecucion(entradas):
+    """
+    Genera un identificador de ejecución estable para un mismo conjunto de entradas.
+
+    Repetir el mismo comando retoma la ejecución anterior en lugar de empezar de cero.
+
+    Args:
+        entradas: Lista de carpetas, archivos o patrones.
+
+    Returns:
+        str: Identificador de 12 caracteres.
+    """
+    clave = "\n".join(sorted(os.path.abspath(entrada) for entrada in entradas))
+    return hashlib.sha1(clave.encode("utf-8")).hexdigest()[:12]
+
+
+class BackfillRunner:
+    """
+    Clase para enviar a la API un archivo de TXT históricos con un pool de hilos.
+
+    Los archivos se leen en su ubicación original y no se mueven ni se imprimen.
+    El resultado de cada archivo se guarda en la tabla `backfill` (por lotes, con
+    BatchWriter), lo que permite retomar una ejecución interrumpida: al volver a
+    ejecutarla se omiten los archivos ya aceptados, duplicados o rechazados y se
+    reintentan los que fallaron por errores transitorios. Los documentos ya
+    aceptados en otro momento no se reenvían gracias al registro de envíos.
+    """
+
+    def __init__(self, ejecucion, workers=None, reintentar_rechazados=False, db_path=None):
+        """
+        Inicializa la carga masiva.
+
+        Args:
+            ejecucion: Identificador de la ejecución (ver id_ejecucion).
+            workers: Cantidad de envíos simultáneos. Si es None, usa PROCESS_CONFIG["max_en_vuelo"].
+            reintentar_rechazados: Si es True, al retomar también se reenvían los rechazados.
+            db_path: Ruta al archivo de base de datos. Si es None, usa la ruta de DB_CONFIG.
+        """
+        self.ejecucion = ejecucion
+        self.workers = max(1, int(workers or PROCESS_CONFIG["max_en_vuelo"]))
+        self.reintentar_rechazados = reintentar_rechazados
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self.estadisticas = {}
+
+    def pendientes(self, rutas):
+        """
+        Filtra los archivos que ya tienen un resultado final en esta ejecución.
+
+        Args:
+            rutas: Lista de rutas de TXT.
+
+        Returns:
+            list: Rutas que faltan por procesar, en el mismo orden.
+        """
+        finales = ESTADOS_FINALES
+        if self.reintentar_rechazados:
+            finales = (ESTADO_ACEPTADO, ESTADO_DUPLICADO)
+        marcadores = ", ".join("?" for _ in finales)
+        hechos = {fila[0] for fila in conectar(self.db_path).execute(
+            f"SELECT ruta FROM backfill WHERE ejecucion = ? AND estado IN ({marcadores})",
+            (self.ejecucion, *finales))}
+        return [ruta for ruta in rutas if ruta not in hechos]
+
+    def ejecutar(self, rutas, detener=None, al_progresar=None, intervalo=1.0):
+        """
+        Procesa los archivos pendientes de la ejecución.
+
+        Args:
+            rutas: Lista de rutas de TXT (ver expandir_rutas).
+            detener: Evento que interrumpe la ejecución; los envíos en curso terminan (opcional).
+            al_progresar: Función (estadisticas) llamada cada `intervalo` segundos y al terminar (opcional).
+            intervalo: Segundos entre llamadas a `al_progresar`.
+
+        Returns:
+            dict: Estadísticas de la ejecución (total, omitidos, procesados, por estado, por_segundo).
+        """
+        DatabaseManager(self.db_path).create_tables()
+        pendientes = self.pendientes(rutas)
+        config_data = config_service.obtener_config().datos_api
+
+        self.estadisticas = {
+            "total": len(rutas), "omitidos": len(rutas) - len(pendientes), "procesados": 0,
+            ESTADO_ACEPTADO: 0, ESTADO_DUPLICADO: 0, ESTADO_RECHAZADO: 0, ESTADO_ERROR: 0,
+            "segundos": 0.0, "por_segundo": 0.0, "interrumpido": False
+        }
+        escritor = BatchWriter(self.db_path or DB_CONFIG["path"], SQL_GUARDAR, tamano_lote=100,
+                               intervalo=1.0, nombre="BackfillCheckpoint")
+        inicio = time.monotonic()
+        proximo_aviso = inicio + intervalo
+
+        try:
+            with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="Backfill") as executor:
+                en_vuelo = set()
+                siguiente = iter(pendientes)
+                agotado = False
+
+                while True:
+                    # Mantener a lo más 2 archivos por hilo en la cola del pool
+                    while not agotado and len(en_vuelo) < self.workers * 2:
+                        if detener is not None and detener.is_set():
+                            self.estadisticas["interrumpido"] = True
+                            agotado = True
+                            break
+                        ruta = next(siguiente, None)
+                        if ruta is None:
+                            agotado = True
+                            break
+                        en_vuelo.add(executor.submit(self._procesar, ruta, config_data))
+
+                    if not en_vuelo:
+                        break
+
+                    listos, en_vuelo = wait(en_vuelo, timeout=max(0, proximo_aviso - time.monotonic()),
+                                            return_when=FIRST_COMPLETED)
+                    for futuro in listos:
+                        fila = futuro.result()
+                        escritor.agregar(fila)
+                        self._contar(fila[5])
+
+                    ahora = time.monotonic()
+                    if ahora >= proximo_aviso:
+                        self._actualizar_ritmo(inicio)
+                        if al_progresar:
+                            al_progresar(dict(self.estadisticas))
+                        proximo_aviso = ahora + intervalo
+        finally:
+            escritor.cerrar()
+
+        self._actualizar_ritmo(inicio)
+        if al_progresar:
+            al_progresar(dict(self.estadisticas))
+        return dict(self.estadisticas)
+
+    def _procesar(self, ruta, config_data):
+        """
+        Envía un archivo a la API y arma la fila de avance con su resultado.
+
+        Args:
+            ruta: Ruta del TXT.
+            config_data: Datos de la empresa para la API.
+
+        Returns:
+            tuple: Parámetros de SQL_GUARDAR.
+        """
+        inicio = time.perf_counter()
+        documento = None
+        try:
+            documento = parsear_documento(ruta)
+            resultado = process_and_post_txt(ruta, config_data, documento=documento)
+        except Exception as e:
+            resultado = {"success": False, "error": str(e), "tipo_error": "parseo"}
+
+        pdf = None
+        tipo_error = None
+        detalle = None
+        if es_aceptado(resultado):
+            estado = ESTADO_DUPLICADO if resultado.get("duplicado") else ESTADO_ACEPTADO
+            pdf = resultado.get("PDFPATH")
+        else:
+            estado = ESTADO_ERROR if es_reintentable(resultado) else ESTADO_RECHAZADO
+            tipo_error = resultado.get("tipo_error") or "validacion"
+            detalle = (resultado.get("error") or resultado.get("message") or resultado.get("StatusDesc")
+                       or str(resultado.get("status_code") or ""))
+
+        return (self.ejecucion, ruta, os.path.basename(ruta),
+                documento.tipo_dte if documento else None, documento.folio if documento else None,
+                estado, tipo_error, detalle, pdf, round(time.perf_counter() - inicio, 3),
+                datetime.datetime.now().isoformat(timespec="seconds"))
+
+    def _contar(self, estado):
+        """Actualiza los contadores con el resultado de un archivo."""
+        with self._lock:
+            self.estadisticas["procesados"] += 1
+            self.estadisticas[estado] += 1
+
+    def _actualizar_ritmo(self, inicio):
+        """Calcula el tiempo transcurrido y los archivos por segundo."""
+        segundos = time.monotonic() - inicio
+        self.estadisticas["segundos"] = round(segundos, 1)
+        self.estadisticas["por_segundo"] = round(self.estadisticas["procesados"] / segundos, 1) if segundos > 0 else 0.0
+
+    def resumen(self):
+        """
+        Cuenta los archivos de la ejecución por estado (incluye ejecuciones anteriores).
+
+        Returns:
+            dict: Estado -> cantidad de archivos.
+        """
+        return dict(conectar(self.db_path).execute(
+            "SELECT estado, COUNT(*) FROM backfill WHERE ejecucion = ? GROUP BY estado", (self.ejecucion,)))
+
+    def exportar_reporte(self, ruta_reporte, solo_fallidos=False):
+        """
+        Escribe un reporte CSV con el resultado de cada archivo de la ejecución.
+
+        Args:
+            ruta_reporte: Ruta del archivo CSV.
+            solo_fallidos: Si es True, solo incluye los archivos rechazados o con error.
+
+        Returns:
+            int: Cantidad de filas escritas.
+        """
+        sql = f"SELECT {', '.join(COLUMNAS_REPORTE)} FROM backfill WHERE ejecucion = ?"
+        if solo_fallidos:
+            sql += f" AND estado IN ('{ESTADO_RECHAZADO}', '{ESTADO_ERROR}')"
+        sql += " ORDER BY ruta"
+
+        filas = conectar(self.db_path).execute(sql, (self.ejecucion,)).fetchall()
+        with open(ruta_reporte, "w", newline="", encoding="utf-8") as f:
+            escritor = csv.writer(f, delimiter=";")
+            escritor.writerow(COLUMNAS_REPORTE)
+            escritor.writerows(filas)
+        return len(filas)
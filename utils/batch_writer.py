@@ -0,0 +1,175 @@
+# -*- coding: utf-8 -*-
+"""
+Módulo para escribir registros en SQLite por lotes desde un hilo en segundo plano.
+"""
+
+import atexit
+import queue
+import sqlite3
+import collections
+import threading
+import time
+from config.database import conectar, cerrar_conexion
+
+# Marca interna para pedir al hilo escritor que vacíe la cola
+_VACIAR = object()
+
+
+class BatchWriter:
+    """
+    Clase para insertar filas en SQLite sin bloquear a quien las genera.
+
+    `agregar()` solo encola la fila. Un hilo en segundo plano acumula las filas y
+    las escribe con `executemany` en una única transacción cuando se alcanza
+    `tamano_lote` filas o cuando la más antigua lleva `intervalo` segundos en
+    memoria, y también al cerrar la aplicación. `estado()` informa cuántas filas
+    esperan y hace cuánto llegó la más antigua.
+    """
+
+    def __init__(self, db_path, sql_insert, tamano_lote=200, intervalo=1.0, sql_preparar=None, nombre="BatchWriter"):
+        """
+        Inicializa el escritor por lotes.
+
+        Args:
+            db_path: Ruta de la base de datos SQLite.
+            sql_insert: Sentencia INSERT parametrizada para cada fila.
+            tamano_lote: Cantidad de filas que fuerza una escritura.
+            intervalo: Segundos máximos que una fila espera antes de escribirse.
+            sql_preparar: Sentencias a ejecutar una vez al abrir la conexión, p. ej. CREATE TABLE (opcional).
+            nombre: Nombre del hilo escritor.
+        """
+        self.db_path = db_path
+        self.sql_insert = sql_insert
+        self.tamano_lote = max(1, int(tamano_lote))
+        self.intervalo = intervalo
+        self.sql_preparar = sql_preparar
+        self._cola = queue.Queue()
+        self._cerrado = False
+        # Instante (time.monotonic) de llegada de cada fila aún no escrita, en orden
+        self._llegadas = collections.deque()
+        self._lock_llegadas = threading.Lock()
+        self.escritas = 0
+        self.errores = 0
+        self._hilo = threading.Thread(target=self._bucle, name=nombre, daemon=True)
+        self._hilo.start()
+
+        # Escribir lo pendiente aunque la aplicación termine sin llamar a cerrar()
+        atexit.register(self.cerrar)
+
+    def agregar(self, fila):
+        """
+        Encola una fila para escribirla en el próximo lote. Nunca bloquea.
+
+        Args:
+            fila: Tupla con los parámetros de `sql_insert`.
+        """
+        if self._cerrado:
+            return
+        with self._lock_llegadas:
+            self._llegadas.append(time.monotonic())
+            self._cola.put(fila)
+
+    def estado(self):
+        """
+        Retorna el estado de la escritura, para medir cuánto se atrasa respecto de quien genera las filas.
+
+        Returns:
+            dict: Filas pendientes de escribir, segundos que lleva esperando la más antigua,
+            filas escritas y filas perdidas por errores de SQLite.
+        """
+        with self._lock_llegadas:
+            pendientes = len(self._llegadas)
+            retraso = time.monotonic() - self._llegadas[0] if pendientes else 0.0
+        return {"pendientes": pendientes, "retraso": retraso, "escritas": self.escritas, "errores": self.errores}
+
+    def vaciar(self, timeout=None):
+        """
+        Escribe de inmediato las filas pendientes y espera a que terminen.
+
+        Args:
+            timeout: Tiempo máximo de espera en segundos (opcional).
+
+        Returns:
+            bool: True si se escribieron antes del tiempo indicado.
+        """
+        if self._cerrado:
+            return not self._hilo.is_alive()
+        listo = threading.Event()
+        self._cola.put((_VACIAR, listo))
+        return listo.wait(timeout)
+
+    def cerrar(self, timeout=5):
+        """
+        Escribe las filas pendientes y detiene el hilo escritor.
+
+        Args:
+            timeout: Tiempo máximo de espera en segundos.
+        """
+        if self._cerrado:
+            return
+        self._cerrado = True
+        self._cola.put(None)
+        self._hilo.join(timeout)
+
+    def _bucle(self):
+        """Ciclo del hilo escritor: acumula filas y las escribe por lotes."""
+        conn = None
+        lote = []
+        limite = None  # Momento en que debe escribirse el lote actual
+
+        try:
+            conn = conectar(self.db_path)
+            if self.sql_preparar:
+                conn.executescript(self.sql_preparar)
+        except sqlite3.Error as e:
+            print(f"Error al abrir la base de datos para escritura por lotes: {e}")
+
+        while True:
+            espera = None if limite is None else max(0, limite - time.monotonic())
+            try:
+                elemento = self._cola.get(timeout=espera)
+            except queue.Empty:
+                # Se cumplió el intervalo del lote actual
+                elemento = (_VACIAR, None)
+
+            if elemento is None:
+                self._escribir(conn, lote)
+                break
+
+            if elemento[0] is _VACIAR:
+                self._escribir(conn, lote)
+                lote, limite = [], None
+                if elemento[1] is not None:
+                    elemento[1].set()
+                continue
+
+            lote.append(elemento)
+            if limite is None:
+                limite = time.monotonic() + self.intervalo
+            if len(lote) >= self.tamano_lote:
+                self._escribir(conn, lote)
+                lote, limite = [], None
+
+        if conn is not None:
+            cerrar_conexion(self.db_path)
+
+    def _escribir(self, conn, lote):
+        """Inserta un lote de filas en una única transacción."""
+        if not lote:
+            return
+        try:
+            if conn is None:
+                # El error de conexión ya se informó al abrir la base de datos
+                self.errores += len(lote)
+                return
+            with conn:
+                conn.executemany(self.sql_insert, lote)
+            self.escritas += len(lote)
+        except sqlite3.Error as e:
+            # No hay dónde registrar el error sin volver a esta misma cola
+            print(f"Error SQLite al escribir {len(lote)} registros: {e}")
+            self.errores += len(lote)
+        finally:
+            with self._lock_llegadas:
+                for _ in range(min(len(lote), len(self._llegadas))):
+                    self._llegadas.popleft()
@@ -0,0 +1,250 @@
+# -*- coding: utf-8 -*-
+"""
+Módulo con los micro-benchmarks de interpretación, construcción del body y serialización.
+"""
+
+import datetime
+import gc
+import json
+import os
+import platform
+import statistics
+import subprocess
+import time
+from requests import Response
+from requests.adapters import BaseAdapter
+from config.settings import BENCHMARK_CONFIG
+from utils import http_client
+from utils.api import construir_body_boleta, construir_body_factura, enviar_request_api
+from utils.documento import parsear_texto
+from utils.generador import generar_textos, EMPRESA_PRUEBA
+from utils.validacion import validar_previo
+
+# Servidor ficticio: las solicitudes a esta URL las responde _AdaptadorSimulado
+URL_SIMULADA = "http://api-simulada.invalid/edidte/Document"
+
+# Respuesta de la API simulada
+RESPUESTA_SIMULADA = {"StatusCode": "200", "StatusDesc": "OK", "PDFPATH": "http://api-simulada.invalid/dte.pdf"}
+
+# Pruebas disponibles, en el orden en que se ejecutan
+PRUEBAS = ("parseo", "validacion", "body_boleta", "body_factura", "json", "envio_simulado")
+
+
+class _AdaptadorSimulado(BaseAdapter):
+    """Adaptador de requests que responde sin red, para medir solo el costo del cliente HTTP."""
+
+    def __init__(self, respuesta):
+        super().__init__()
+        self.contenido = json.dumps(respuesta).encode("utf-8")
+
+    def send(self, request, **kwargs):
+        response = Response()
+        response.status_code = 200
+        response.headers["Content-Type"] = "application/json"
+        response.encoding = "utf-8"
+        response._content = self.contenido
+        response.url = request.url
+        response.request = request
+        return response
+
+    def close(self):
+        pass
+
+
+def _medir(funcion, entradas, repeticiones):
+    """
+    Ejecuta una función sobre todas las entradas varias veces y mide cada ronda.
+
+    El recolector de basura se desactiva durante la medición (como en timeit)
+    para que sus pausas no se mezclen con el costo de la función.
+
+    Returns:
+        dict: Microsegundos por documento (mediana y mínimo de las rondas) y documentos por segundo.
+    """
+    if not entradas:
+        return None
+
+    tiempos = []
+    habilitado = gc.isenabled()
+    gc.disable()
+    try:
+        for _ in range(repeticiones):
+            inicio = time.perf_counter()
+            for entrada in entradas:
+                funcion(entrada)
+            tiempos.append(time.perf_counter() - inicio)
+    finally:
+        if habilitado:
+            gc.enable()
+
+    mediana = statistics.median(tiempos) / len(entradas)
+    return {
+        "documentos": len(entradas),
+        "us_por_doc": round(mediana * 1e6, 2),
+        "us_minimo": round(min(tiempos) / len(entradas) * 1e6, 2),
+        "docs_por_segundo": round(1 / mediana, 1) if mediana > 0 else 0.0
+    }
+
+
+def _commit_actual():
+    """Retorna el commit de git del código medido, o None si no está disponible."""
+    try:
+        salida = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                                timeout=5, cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+        return salida.stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def ejecutar(documentos=None, lineas=None, lineas_max=None, repeticiones=None, semilla=None, pruebas=None,
+             etiqueta=None):
+    """
+    Ejecuta los micro-benchmarks sobre un corpus sintético en memoria.
+
+    Cada prueba mide una etapa aislada: interpretación del TXT, validación local,
+    construcción del body de boletas y facturas, serialización JSON y el envío con
+    la capa HTTP simulada (sin red). No se lee ni se escribe ningún archivo ni la
+    base de datos.
+
+    Args:
+        documentos: Cantidad de documentos del corpus. Por defecto, BENCHMARK_CONFIG["documentos"].
+        lineas: Líneas de detalle por documento. Por defecto, BENCHMARK_CONFIG["lineas"].
+        lineas_max: Máximo de líneas de detalle, para un corpus con tamaños variados (opcional).
+        repeticiones: Rondas por prueba. Por defecto, BENCHMARK_CONFIG["repeticiones"].
+        semilla: Semilla del generador. Por defecto, BENCHMARK_CONFIG["semilla"].
+        pruebas: Nombres de las pruebas a ejecutar (ver PRUEBAS). Por defecto, todas.
+        etiqueta: Nombre libre de la ejecución (p. ej. la versión publicada) (opcional).
+
+    Returns:
+        dict: Registro de la ejecución (fecha, commit, entorno, parámetros y resultados por prueba).
+
+    Raises:
+        KeyError: Si alguna prueba no existe.
+    """
+    parametros = {
+        "documentos": documentos or BENCHMARK_CONFIG["documentos"],
+        "lineas": lineas or BENCHMARK_CONFIG["lineas"],
+        "lineas_max": lineas_max,
+        "semilla": BENCHMARK_CONFIG["semilla"] if semilla is None else semilla,
+    }
+    repeticiones = repeticiones or BENCHMARK_CONFIG["repeticiones"]
+    pruebas = list(pruebas or PRUEBAS)
+    desconocidas = set(pruebas) - set(PRUEBAS)
+    if desconocidas:
+        raise KeyError(f"Pruebas desconocidas: {', '.join(sorted(desconocidas))}")
+
+    textos = list(generar_textos(parametros["documentos"], lineas=parametros["lineas"],
+                                 lineas_max=parametros["lineas_max"], semilla=parametros["semilla"]))
+    documentos_dte = [parsear_texto(texto, nombre) for nombre, texto in textos]
+    boletas = [documento for documento in documentos_dte if documento.tipo_dte == 39]
+    facturas = [documento for documento in documentos_dte if documento.tipo_dte == 33]
+    bodies = ([construir_body_boleta(documento, EMPRESA_PRUEBA) for documento in boletas]
+              + [construir_body_factura(documento, EMPRESA_PRUEBA) for documento in facturas])
+
+    casos = {
+        "parseo": (lambda entrada: parsear_texto(entrada[1], entrada[0]), textos),
+        "validacion": (validar_previo, documentos_dte),
+        "body_boleta": (lambda documento: construir_body_boleta(documento, EMPRESA_PRUEBA), boletas),
+        "body_factura": (lambda documento: construir_body_factura(documento, EMPRESA_PRUEBA), facturas),
+        # Igual que requests al enviar json=body
+        "json": (lambda body: json.dumps(body, allow_nan=False).encode("utf-8"), bodies),
+        "envio_simulado": (lambda body: enviar_request_api(body, EMPRESA_PRUEBA["apikey"]), bodies),
+    }
+
+    resultados = {}
+    url_anterior = http_client.obtener_opcion("api_url")
+    try:
+        if "envio_simulado" in pruebas:
+            http_client.configurar(api_url=URL_SIMULADA)
+            http_client.obtener_sesion().mount(URL_SIMULADA.rsplit("/", 2)[0], _AdaptadorSimulado(RESPUESTA_SIMULADA))
+        for nombre in pruebas:
+            funcion, entradas = casos[nombre]
+            resultados[nombre] = _medir(funcion, entradas, repeticiones)
+    finally:
+        if "envio_simulado" in pruebas:
+            http_client.configurar(api_url=url_anterior)
+
+    return {
+        "fecha": datetime.datetime.now().isoformat(timespec="seconds"),
+        "etiqueta": etiqueta,
+        "commit": _commit_actual(),
+        "python": platform.python_version(),
+        "plataforma": platform.platform(),
+        "repeticiones": repeticiones,
+        "parametros": parametros,
+        "resultados": resultados
+    }
+
+
+def ultimo_registro(ruta, parametros):
+    """
+    Busca la última ejecución guardada con los mismos parámetros de corpus.
+
+    Args:
+        ruta: Archivo de resultados (JSON Lines).
+        parametros: Parámetros del corpus (ver ejecutar).
+
+    Returns:
+        dict: Registro anterior o None si no hay uno comparable.
+    """
+    if not os.path.exists(ruta):
+        return None
+
+    anterior = None
+    with open(ruta, encoding="utf-8") as f:
+        for linea in f:
+            try:
+                registro = json.loads(linea)
+            except ValueError:
+                continue
+            if registro.get("parametros") == parametros:
+                anterior = registro
+    return anterior
+
+
+def guardar(registro, ruta=None):
+    """
+    Agrega el registro de una ejecución al historial de resultados.
+
+    Args:
+        registro: Registro retornado por ejecutar.
+        ruta: Archivo de resultados. Por defecto, BENCHMARK_CONFIG["resultados"].
+
+    Returns:
+        str: Ruta del archivo de resultados.
+    """
+    ruta = ruta or BENCHMARK_CONFIG["resultados"]
+    carpeta = os.path.dirname(ruta)
+    if carpeta:
+        os.makedirs(carpeta, exist_ok=True)
+    with open(ruta, "a", encoding="utf-8") as f:
+        f.write(json.dumps(registro, ensure_ascii=False) + "\n")
+    return ruta
+
+
+def comparar(registro, anterior, umbral=None):
+    """
+    Compara una ejecución con la anterior y detecta las pruebas que empeoraron.
+
+    Args:
+        registro: Registro de la ejecución actual.
+        anterior: Registro de la ejecución anterior (o None).
+        umbral: Aumento relativo tolerado. Por defecto, BENCHMARK_CONFIG["umbral_regresion"].
+
+    Returns:
+        dict: Prueba -> variación relativa del tiempo por documento (positiva = más lenta),
+        solo para las pruebas que superan el umbral.
+    """
+    if not anterior:
+        return {}
+
+    umbral = BENCHMARK_CONFIG["umbral_regresion"] if umbral is None else umbral
+    regresiones = {}
+    for nombre, actual in registro["resultados"].items():
+        previo = anterior.get("resultados", {}).get(nombre)
+        if not actual or not previo or not previo.get("us_por_doc"):
+            continue
+        variacion = actual["us_por_doc"] / previo["us_por_doc"] - 1
+        if variacion > umbral:
+            regresiones[nombre] = round(variacion, 3)
+    return regresiones
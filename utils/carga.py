@@ -0,0 +1,269 @@
+# -*- coding: utf-8 -*-
+"""
+Módulo para la prueba de carga de extremo a extremo con la API simulada y la impresora simulada.
+"""
+
+import contextlib
+import os
+import queue
+import shutil
+import statistics
+import tempfile
+import threading
+import time
+from config.settings import CARGA_CONFIG, DB_CONFIG, SPOOLER_CONFIG
+try:
+    import resource
+except ImportError:
+    # En Windows no existe el módulo resource; la memoria máxima no se informa
+    resource = None
+
+# Etapas informadas, en orden: las de la tabla metricas_etapas y las calculadas por la prueba
+ETAPAS = ("escaneo", "parseo", "body", "api", "api_servidor", "movimiento", "documento",
+          "descarga_pdf", "archivado_pdf", "impresion", "ingesta", "extremo_a_extremo")
+
+
+def percentiles(valores):
+    """
+    Calcula los percentiles 50, 95 y 99 de una lista de tiempos.
+
+    Args:
+        valores: Tiempos en segundos.
+
+    Returns:
+        dict: Cantidad, p50, p95, p99 y máximo en milisegundos (None si no hay valores).
+    """
+    if not valores:
+        return None
+    if len(valores) == 1:
+        cortes = valores * 99
+    else:
+        cortes = statistics.quantiles(valores, n=100, method="inclusive")
+    return {
+        "cantidad": len(valores),
+        "p50_ms": round(cortes[49] * 1000, 1),
+        "p95_ms": round(cortes[94] * 1000, 1),
+        "p99_ms": round(cortes[98] * 1000, 1),
+        "max_ms": round(max(valores) * 1000, 1)
+    }
+
+
+def _memoria_maxima_mb():
+    """Retorna la memoria residente máxima del proceso en MB, o None si no se puede medir."""
+    if resource is None:
+        return None
+    maxima = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux informa KB; macOS, bytes
+    return round(maxima / (1024 * 1024 if os.uname().sysname == "Darwin" else 1024), 1)
+
+
+def ejecutar_carga(documentos=None, tasa=None, latencia_api=None, variacion_latencia=None, tasa_error=None,
+                   tasa_rechazo=None, tamano_pdf=None, copias=None, timeout=None, proporcion_facturas=0.5,
+                   lineas=3, lineas_max=None, semilla=1, carpeta=None):
+    """
+    Ejecuta el procesamiento real (FileProcessor) sobre TXT generados contra la API simulada.
+
+    La prueba usa una carpeta de trabajo y una base de datos propias, la API
+    simulada en un puerto local y la impresora simulada, por lo que funciona en
+    cualquier sistema sin tocar la configuración de la aplicación. Los logs de
+    la aplicación se escriben en <carpeta>/carga.log.
+
+    Los tiempos de cada etapa se leen de la tabla metricas_etapas de la prueba
+    (ver utils.metricas). Además se calculan:
+        api_servidor: atención de cada envío en la API simulada (incluye la latencia configurada).
+        ingesta: desde que el archivo llega a la carpeta hasta que se archiva.
+        extremo_a_extremo: desde que el archivo llega hasta que termina su PDF.
+
+    Args:
+        documentos: Cantidad de documentos. Los valores None usan CARGA_CONFIG.
+        tasa: Documentos por segundo que llegan a la carpeta (0: todos al inicio).
+        latencia_api: Segundos promedio de respuesta de la API simulada.
+        variacion_latencia: Variación relativa de la latencia.
+        tasa_error: Fracción de envíos con error transitorio (503).
+        tasa_rechazo: Fracción de documentos rechazados.
+        tamano_pdf: Bytes de cada PDF.
+        copias: Copias impresas por documento (0: sin impresión).
+        timeout: Segundos máximos de la prueba.
+        proporcion_facturas: Fracción de facturas entre los documentos.
+        lineas: Líneas de detalle por documento.
+        lineas_max: Máximo de líneas de detalle (opcional).
+        semilla: Semilla de los documentos y de la API simulada.
+        carpeta: Carpeta de trabajo. Si es None se usa una temporal que se elimina al terminar.
+
+    Returns:
+        dict: Resultado con throughput, percentiles por etapa, memoria y contadores.
+    """
+    opciones = dict(CARGA_CONFIG)
+    opciones.update({clave: valor for clave, valor in (
+        ("documentos", documentos), ("tasa", tasa), ("latencia_api", latencia_api),
+        ("variacion_latencia", variacion_latencia), ("tasa_error", tasa_error), ("tasa_rechazo", tasa_rechazo),
+        ("tamano_pdf", tamano_pdf), ("copias", copias), ("timeout", timeout)) if valor is not None})
+
+    temporal = carpeta is None
+    base = tempfile.mkdtemp(prefix="carga_") if temporal else os.path.abspath(carpeta)
+    ruta_procesar = os.path.join(base, "procesar")
+    ruta_procesado = os.path.join(base, "procesado")
+    os.makedirs(ruta_procesar, exist_ok=True)
+    os.makedirs(ruta_procesado, exist_ok=True)
+
+    # La prueba trabaja sobre su propia base de datos e impresora
+    DB_CONFIG["path"] = os.path.join(base, "carga.db")
+    SPOOLER_CONFIG["backend"] = "simulado"
+
+    from config.database import DatabaseManager
+    from utils.api_simulada import ApiSimulada
+    from utils import http_client
+
+    DatabaseManager().create_tables()
+    api = ApiSimulada(opciones["latencia_api"], opciones["variacion_latencia"], opciones["tasa_error"],
+                      opciones["tasa_rechazo"], opciones["tamano_pdf"], semilla=semilla)
+    api.iniciar()
+    url_anterior = http_client.obtener_opcion("api_url")
+    http_client.configurar(api_url=api.url_api)
+
+    try:
+        with open(os.path.join(base, "carga.log"), "w", encoding="utf-8") as log, contextlib.redirect_stdout(log):
+            resultado = _ejecutar(opciones, base, ruta_procesar, ruta_procesado, api, proporcion_facturas,
+                                  lineas, lineas_max, semilla)
+    finally:
+        api.detener()
+        http_client.configurar(api_url=url_anterior)
+        if temporal:
+            shutil.rmtree(base, ignore_errors=True)
+
+    resultado["carpeta"] = None if temporal else base
+    resultado["api_simulada"] = dict(api.estadisticas)
+    resultado["etapas"]["api_servidor"] = percentiles(api.latencias)
+    return resultado
+
+
+def _ejecutar(opciones, base, ruta_procesar, ruta_procesado, api, proporcion_facturas, lineas, lineas_max, semilla):
+    """Configura la aplicación, procesa los documentos y mide los tiempos (ver ejecutar_carga)."""
+    from config import config_service
+    from config.modelos import ConfigSnapshot, DirectoriosConfig, EmpresaConfig, ImpresionConfig
+    from utils.file_processor import FileProcessor
+    from utils.generador import EMPRESA_PRUEBA, generar_textos
+    from utils.logger import Logger
+    from utils.metricas import obtener_metricas
+
+    empresa = EmpresaConfig(EMPRESA_PRUEBA["rut_empresa"], EMPRESA_PRUEBA["razon_social"], EMPRESA_PRUEBA["telefono"],
+                            EMPRESA_PRUEBA["direccion"], EMPRESA_PRUEBA["comuna"], EMPRESA_PRUEBA["email"],
+                            EMPRESA_PRUEBA["codsuc_sii"], EMPRESA_PRUEBA["giro"], EMPRESA_PRUEBA["act_economica"],
+                            EMPRESA_PRUEBA["apikey"], EMPRESA_PRUEBA["tpv"], "SANTIAGO", "METROPOLITANA")
+    copias = int(opciones["copias"])
+    impresion = ImpresionConfig(1 if copias else 0, "simulada", max(1, copias), 0, os.path.join(base, "descargas"))
+    config_service.fijar_config(ConfigSnapshot(0, empresa, DirectoriosConfig(ruta_procesar, ruta_procesado, 1),
+                                               impresion, False))
+
+    textos = list(generar_textos(opciones["documentos"], proporcion_facturas=proporcion_facturas, lineas=lineas,
+                                 lineas_max=lineas_max, semilla=semilla))
+    folios = {}
+    for nombre, _ in textos:
+        folios[int(nombre[4:-4])] = nombre
+
+    llegada = {}
+    memoria_inicial = _memoria_maxima_mb()
+    logger = Logger()
+    file_processor = FileProcessor(logger)
+    detener = threading.Event()
+
+    def escribir(nombre, texto):
+        ruta = os.path.join(ruta_procesar, nombre)
+        with open(ruta + ".tmp", "w", encoding="utf-8", newline="") as f:
+            f.write(texto)
+        os.replace(ruta + ".tmp", ruta)
+        llegada[nombre] = time.time()
+
+    def alimentar():
+        # Llegada a ritmo constante, como las ventas de un local
+        intervalo = 1 / opciones["tasa"]
+        proximo = time.monotonic()
+        for nombre, texto in textos:
+            if detener.is_set():
+                return
+            proximo += intervalo
+            escribir(nombre, texto)
+            detener.wait(max(0, proximo - time.monotonic()))
+
+    if not opciones["tasa"]:
+        # Todos los documentos esperan desde el inicio (vaciado de una carpeta acumulada)
+        for nombre, texto in textos:
+            escribir(nombre, texto)
+
+    inicio = time.time()
+    if not opciones["tasa"]:
+        llegada = dict.fromkeys(llegada, inicio)
+    file_processor.start()
+    file_processor.process_files(ruta_procesar, ruta_procesado, 1)
+    alimentador = None
+    if opciones["tasa"]:
+        alimentador = threading.Thread(target=alimentar, name="CargaAlimentador", daemon=True)
+        alimentador.start()
+
+    esperar_pdf = bool(copias)
+    archivado, exito, pdf_listo = {}, {}, {}
+    retenidos = set()
+    limite = time.monotonic() + opciones["timeout"]
+    try:
+        while time.monotonic() < limite:
+            terminados = len(archivado) == len(textos)
+            if terminados and (not esperar_pdf or len(pdf_listo) >= sum(exito.values())):
+                break
+            try:
+                evento = file_processor.eventos.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            if evento["tipo"] == "archivo":
+                if evento.get("retenido"):
+                    # Se archivará cuando la bandeja de salida logre enviarlo
+                    retenidos.add(evento["archivo"])
+                    continue
+                nombre = evento["archivo"]
+                archivado[nombre] = evento["hora"]
+                exito[nombre] = bool(evento.get("exito"))
+            elif evento["tipo"] == "pdf":
+                nombre = folios.get(evento.get("folio"))
+                if nombre:
+                    pdf_listo[nombre] = evento["hora"]
+    finally:
+        detener.set()
+        if alimentador:
+            alimentador.join()
+        file_processor.stop()
+        file_processor.esperar(10)
+        logger.cerrar()
+
+    etapas = {}
+    for etapa, duracion_ms in _leer_metricas(obtener_metricas()):
+        etapas.setdefault(etapa, []).append(duracion_ms / 1000)
+
+    fin = max(archivado.values(), default=inicio)
+    segundos = fin - inicio
+    completos = [nombre for nombre in archivado if nombre in llegada]
+    return {
+        "documentos": len(textos),
+        "archivados": len(archivado),
+        "aceptados": sum(exito.values()),
+        "fallidos": len(archivado) - sum(exito.values()),
+        "retenidos": len(retenidos),
+        "incompleto": len(archivado) < len(textos),
+        "segundos": round(segundos, 2),
+        "docs_por_segundo": round(len(archivado) / segundos, 1) if segundos > 0 else 0.0,
+        "etapas": {
+            **{etapa: percentiles(valores) for etapa, valores in etapas.items()},
+            "ingesta": percentiles([archivado[nombre] - llegada[nombre] for nombre in completos]),
+            "extremo_a_extremo": percentiles([pdf_listo.get(nombre, archivado[nombre]) - llegada[nombre]
+                                              for nombre in completos]),
+        },
+        "pdf": dict(file_processor.pdf_stage.estadisticas),
+        "memoria_mb": {"inicial": memoria_inicial, "maxima": _memoria_maxima_mb()},
+        "opciones": opciones
+    }
+
+
+def _leer_metricas(metricas):
+    """Escribe las métricas pendientes y retorna las filas (etapa, duracion_ms) de la prueba."""
+    from config.database import conectar
+
+    metricas.vaciar()
+    return conectar().execute("SELECT etapa, duracion_ms FROM metricas_etapas").fetchall()
@@ -0,0 +1,158 @@
+# -*- coding: utf-8 -*-
+"""
+Módulo con el índice incremental de la carpeta de entrada.
+"""
+
+import heapq
+import os
+import time
+from config.settings import PROCESS_CONFIG
+
+
+class DirectoryIndex:
+    """
+    Índice de los archivos pendientes de una carpeta ordenados por fecha de modificación.
+
+    Mantiene (nombre, mtime, tamaño) de cada archivo en un diccionario y un min-heap
+    por mtime. Cada refresco recorre la carpeta con os.scandir una sola vez y solo
+    consulta el stat de los archivos que no estaban en la instantánea anterior, por lo
+    que obtener el siguiente archivo cuesta O(log n) y no un ordenamiento completo.
+
+    Un archivo que aún se está escribiendo no se entrega: antes de extraerlo se
+    vuelve a consultar su stat y solo se entrega si su (mtime, tamaño) no cambió
+    desde la última vez y no cambió en los últimos `estabilidad` segundos.
+    """
+
+    def __init__(self, ruta, extension='.txt', estabilidad=None):
+        """
+        Inicializa el índice.
+
+        Args:
+            ruta: Carpeta a indexar.
+            extension: Extensión de los archivos a considerar (se ignoran los demás).
+            estabilidad: Segundos que un archivo debe permanecer sin cambios antes de
+                         entregarse (0 lo desactiva). Por defecto PROCESS_CONFIG["espera_estabilidad"].
+        """
+        self.ruta = ruta
+        self.extension = extension.lower()
+        self.estabilidad = PROCESS_CONFIG["espera_estabilidad"] if estabilidad is None else estabilidad
+        # True si el último siguiente() no entregó nada porque el más antiguo aún cambiaba
+        self.asentando = False
+        self._entradas = {}  # nombre -> (mtime, tamaño, momento en que se vio así por primera vez)
+        self._heap = []      # (mtime, nombre), con entradas obsoletas que se descartan al extraer
+
+    def __len__(self):
+        """Cantidad de archivos pendientes en el índice."""
+        return len(self._entradas)
+
+    def refrescar(self):
+        """
+        Actualiza el índice a partir de la instantánea anterior.
+
+        En Windows os.scandir entrega el stat sin llamadas adicionales, por lo que se
+        aprovecha para detectar cambios de mtime; en otros sistemas solo se consulta el
+        stat de los archivos nuevos.
+
+        Returns:
+            int: Cantidad de archivos pendientes tras el refresco.
+        """
+        stat_gratuito = os.name == 'nt'
+        vistos = set()
+
+        with os.scandir(self.ruta) as entradas:
+            for entrada in entradas:
+                nombre = entrada.name
+                if not nombre.lower().endswith(self.extension):
+                    continue
+
+                conocido = nombre in self._entradas
+                if conocido and not stat_gratuito:
+                    vistos.add(nombre)
+                    continue
+
+                try:
+                    if not entrada.is_file():
+                        continue
+                    stat = entrada.stat()
+                except OSError:
+                    # El archivo desapareció entre el listado y el stat
+                    continue
+
+                vistos.add(nombre)
+                if not conocido or self._entradas[nombre][:2] != (stat.st_mtime, stat.st_size):
+                    self._agregar(nombre, stat.st_mtime, stat.st_size)
+
+        # Quitar los archivos que ya no están en la carpeta
+        for nombre in self._entradas.keys() - vistos:
+            del self._entradas[nombre]
+
+        self._compactar()
+        return len(self._entradas)
+
+    def siguiente(self):
+        """
+        Extrae el archivo más antiguo del índice si ya terminó de escribirse.
+
+        Returns:
+            tuple: (nombre, mtime, tamaño) o None si no hay archivos pendientes o el
+            más antiguo aún está cambiando (en ese caso `asentando` queda en True).
+        """
+        self.asentando = False
+        cambiados = set()
+        while self._heap:
+            mtime, nombre = self._heap[0]
+            entrada = self._entradas.get(nombre)
+            # Ignorar entradas obsoletas (archivo eliminado o con mtime actualizado)
+            if entrada is None or entrada[0] != mtime:
+                heapq.heappop(self._heap)
+                continue
+
+            if self.estabilidad > 0 and (nombre in cambiados or not self._estable(nombre, entrada)):
+                if nombre not in self._entradas:
+                    # Desapareció: su entrada del heap quedó obsoleta
+                    continue
+                if nombre not in cambiados and self._entradas[nombre][0] != mtime:
+                    # Su mtime cambió: volvió a entrar al heap en otra posición
+                    cambiados.add(nombre)
+                    continue
+                # El más antiguo aún se está escribiendo; los demás son más recientes
+                self.asentando = True
+                return None
+
+            heapq.heappop(self._heap)
+            del self._entradas[nombre]
+            return nombre, mtime, entrada[1]
+        return None
+
+    def _estable(self, nombre, entrada):
+        """
+        Vuelve a consultar el stat de un archivo y actualiza su entrada si cambió.
+
+        Returns:
+            bool: True si no cambió desde la última consulta ni en los últimos `estabilidad`
+            segundos (según su mtime o, si el reloj del origen difiere, según cuándo se vio).
+        """
+        try:
+            stat = os.stat(os.path.join(self.ruta, nombre))
+        except OSError:
+            # El archivo desapareció
+            del self._entradas[nombre]
+            return False
+        if (stat.st_mtime, stat.st_size) != entrada[:2]:
+            self._agregar(nombre, stat.st_mtime, stat.st_size)
+            return False
+        return (time.time() - entrada[0] >= self.estabilidad
+                or time.monotonic() - entrada[2] >= self.estabilidad)
+
+    def _agregar(self, nombre, mtime, tamano):
+        """Registra o actualiza un archivo en el índice."""
+        anterior = self._entradas.get(nombre)
+        self._entradas[nombre] = (mtime, tamano, time.monotonic())
+        if anterior is None or anterior[0] != mtime:
+            heapq.heappush(self._heap, (mtime, nombre))
+
+    def _compactar(self):
+        """Reconstruye el heap cuando acumula demasiadas entradas obsoletas."""
+        if len(self._heap) > 2 * len(self._entradas) + 64:
+            self._heap = [(entrada[0], nombre) for nombre, entrada in self._entradas.items()]
+            heapq.heapify(self._heap)
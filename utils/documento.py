@@ -0,0 +1,166 @@
+# -*- coding: utf-8 -*-
+"""
+Módulo para interpretar los archivos TXT de documentos tributarios (DTE).
+"""
+
+import hashlib
+import os
+from types import MappingProxyType
+
+# Secciones de cada tipo de documento: (encabezado, totales, detalle, descuentos/recargos)
+SECCIONES_BOLETA = ("Boleta", "BoletaTotales", "BoletaDetalle", "BoletaDescRec")
+SECCIONES_FACTURA = ("Encabezado", "Totales", "Detalle", None)
+
+
+class DocumentoDTE:
+    """
+    Documento tributario interpretado a partir de un archivo TXT.
+
+    Es inmutable y se interpreta una sola vez por archivo: el mismo objeto se usa
+    para construir el body de la API, para enrutar los errores por fecha y para
+    archivar el archivo.
+
+    Atributos:
+        ruta: Ruta del archivo de origen.
+        nombre: Nombre del archivo de origen.
+        tipo_dte: Tipo de DTE (39 Boleta, 33 Factura) o None si no se reconoce.
+        folio: Folio del documento (int) o None si no viene informado.
+        fecha: Fecha de emisión en formato YYYY-MM-DD o None.
+        encabezado: Campos de la primera línea de la sección Boleta/Encabezado.
+        totales: Campos de la primera línea de la sección de totales.
+        detalle: Campos de cada línea de detalle.
+        desc_rec: Campos de cada línea de descuentos/recargos (solo Boleta).
+        referencia: Campos de la primera línea de la sección Referencia.
+        secciones: Todas las secciones del archivo (nombre -> tupla de líneas).
+        hash_contenido: SHA-256 (hex) del contenido del archivo.
+    """
+
+    __slots__ = ("ruta", "nombre", "tipo_dte", "folio", "fecha", "encabezado",
+                 "totales", "detalle", "desc_rec", "referencia", "secciones", "hash_contenido")
+
+    def __init__(self, ruta, secciones, hash_contenido=None):
+        """
+        Inicializa el documento a partir de sus secciones ya separadas.
+
+        Args:
+            ruta: Ruta del archivo de origen.
+            secciones: Diccionario nombre de sección -> lista de líneas.
+            hash_contenido: SHA-256 (hex) del contenido del archivo (opcional).
+        """
+        if "Boleta" in secciones:
+            nombres = SECCIONES_BOLETA
+            tipo_por_defecto = 39
+        elif "Encabezado" in secciones:
+            nombres = SECCIONES_FACTURA
+            tipo_por_defecto = 33
+        else:
+            nombres = (None, None, None, None)
+            tipo_por_defecto = None
+
+        encabezado = _primera_linea(secciones, nombres[0])
+        referencia = _primera_linea(secciones, "Referencia")
+
+        if encabezado:
+            tipo_dte = _entero(encabezado[0])
+        else:
+            tipo_dte = tipo_por_defecto
+
+        # La Boleta informa el folio en el encabezado; la Factura en la referencia
+        if tipo_por_defecto == 39:
+            folio = _entero(encabezado[1]) if len(encabezado) > 1 else None
+        else:
+            folio = _entero(referencia[2]) if len(referencia) > 2 else None
+
+        valores = {
+            "ruta": ruta,
+            "nombre": os.path.basename(ruta),
+            "tipo_dte": tipo_dte,
+            "folio": folio,
+            "fecha": encabezado[2] if len(encabezado) > 2 and encabezado[2] else None,
+            "encabezado": encabezado,
+            "totales": _primera_linea(secciones, nombres[1]),
+            "detalle": _todas_las_lineas(secciones, nombres[2]),
+            "desc_rec": _todas_las_lineas(secciones, nombres[3]),
+            "referencia": referencia,
+            "secciones": MappingProxyType({nombre: tuple(lineas) for nombre, lineas in secciones.items()}),
+            "hash_contenido": hash_contenido,
+        }
+        for campo, valor in valores.items():
+            object.__setattr__(self, campo, valor)
+
+    def __setattr__(self, nombre, valor):
+        raise AttributeError("DocumentoDTE es inmutable")
+
+    def __delattr__(self, nombre):
+        raise AttributeError("DocumentoDTE es inmutable")
+
+    def __repr__(self):
+        return f"DocumentoDTE(nombre={self.nombre!r}, tipo_dte={self.tipo_dte}, folio={self.folio}, fecha={self.fecha!r})"
+
+
+def parsear_texto(texto, ruta="", hash_contenido=None):
+    """
+    Separa el contenido de un TXT en secciones y construye el documento.
+
+    Args:
+        texto: Contenido del archivo.
+        ruta: Ruta del archivo de origen (opcional).
+        hash_contenido: SHA-256 de los bytes originales. Si no se entrega, se
+                        calcula sobre el texto codificado en UTF-8.
+
+    Returns:
+        DocumentoDTE: Documento interpretado.
+    """
+    secciones = {}
+    seccion_actual = None
+
+    for linea in texto.split("\n"):
+        linea = linea.strip()
+        if linea.startswith("->"):
+            seccion_actual = linea.strip("->").strip("<-")
+            secciones[seccion_actual] = []
+        elif seccion_actual:
+            secciones[seccion_actual].append(linea)
+
+    if hash_contenido is None:
+        hash_contenido = hashlib.sha256(texto.encode('utf-8')).hexdigest()
+    return DocumentoDTE(ruta, secciones, hash_contenido)
+
+
+def parsear_documento(ruta):
+    """
+    Lee un archivo TXT una única vez y lo interpreta.
+
+    Args:
+        ruta: Ruta al archivo TXT.
+
+    Returns:
+        DocumentoDTE: Documento interpretado.
+
+    Raises:
+        OSError: Si no se puede leer el archivo.
+        UnicodeDecodeError: Si el archivo no está en UTF-8.
+    """
+    with open(ruta, 'rb') as archivo:
+        datos = archivo.read()
+    return parsear_texto(datos.decode('utf-8'), ruta, hashlib.sha256(datos).hexdigest())
+
+
+def _primera_linea(secciones, nombre):
+    """Retorna los campos de la primera línea de una sección o una tupla vacía."""
+    lineas = secciones.get(nombre) if nombre else None
+    return tuple(lineas[0].split(";")) if lineas else ()
+
+
+def _todas_las_lineas(secciones, nombre):
+    """Retorna los campos de todas las líneas de una sección."""
+    lineas = secciones.get(nombre) if nombre else None
+    return tuple(tuple(linea.split(";")) for linea in lineas) if lineas else ()
+
+
+def _entero(valor):
+    """Convierte un campo a entero o retorna None si no es numérico."""
+    try:
+        return int(valor)
+    except (TypeError, ValueError):
+        return None
@@ -0,0 +1,130 @@
+# -*- coding: utf-8 -*-
+"""
+Módulo para compilar los payloads de la API sin enviarlos (dry-run).
+"""
+
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from config.settings import DRY_RUN_CONFIG
+from utils.api import construir_body
+from utils.documento import parsear_documento
+from utils.validacion import validar_previo, validar_body, tiene_errores
+
+# Datos de la empresa en cada proceso de trabajo (se fijan al iniciar el proceso)
+_config_proceso = None
+
+
+def compilar_archivo(ruta, config_data, incluir_body=True):
+    """
+    Interpreta un TXT, construye su body y lo valida, sin llamar a la API.
+
+    Args:
+        ruta: Ruta del TXT.
+        config_data: Datos de la empresa para la API.
+        incluir_body: Si es False, el resultado no incluye el body (solo la validación).
+
+    Returns:
+        dict: Resultado con archivo, tipo_dte, folio, hash, valido, problemas, body y error.
+    """
+    resultado = {"archivo": ruta, "tipo_dte": None, "folio": None, "hash": None,
+                 "valido": False, "problemas": [], "body": None, "error": None}
+    body = None
+    try:
+        documento = parsear_documento(ruta)
+        resultado.update(tipo_dte=documento.tipo_dte, folio=documento.folio, hash=documento.hash_contenido)
+        # Con errores de estructura el body no se puede construir
+        problemas = validar_previo(documento)
+        if not tiene_errores(problemas):
+            body = construir_body(documento, config_data)
+            problemas += validar_body(documento, body)
+    except Exception as e:
+        resultado["error"] = f"{type(e).__name__}: {e}"
+        return resultado
+
+    resultado["problemas"] = [problema.como_dict() for problema in problemas]
+    resultado["valido"] = not tiene_errores(problemas)
+    if incluir_body:
+        resultado["body"] = body
+    return resultado
+
+
+def _iniciar_proceso(config_data):
+    """Fija los datos de la empresa en un proceso de trabajo."""
+    global _config_proceso
+    _config_proceso = config_data
+
+
+def _compilar_bloque(rutas, incluir_body):
+    """
+    Compila un bloque de archivos en un proceso de trabajo.
+
+    Las líneas se serializan en el proceso de trabajo para que el proceso
+    principal solo tenga que escribirlas.
+
+    Returns:
+        list: Tuplas (línea NDJSON, valido, con_problemas).
+    """
+    lineas = []
+    for ruta in rutas:
+        resultado = compilar_archivo(ruta, _config_proceso, incluir_body)
+        lineas.append((json.dumps(resultado, ensure_ascii=False), resultado["valido"], bool(resultado["problemas"])))
+    return lineas
+
+
+def compilar(rutas, salida, config_data, procesos=None, incluir_body=True):
+    """
+    Compila los payloads de una lista de TXT en paralelo y los escribe como NDJSON.
+
+    Cada línea de la salida es el resultado de compilar_archivo para un archivo,
+    en el mismo orden de `rutas`. Los archivos se reparten en bloques entre
+    procesos (el armado del body es trabajo de CPU); con pocos archivos se
+    compila en el mismo proceso para no pagar el arranque de los procesos.
+
+    Args:
+        rutas: Lista de rutas de TXT.
+        salida: Ruta del archivo NDJSON, o "-" para la salida estándar.
+        config_data: Datos de la empresa para la API.
+        procesos: Cantidad de procesos. Si es None, usa DRY_RUN_CONFIG["procesos"] (o uno por CPU).
+        incluir_body: Si es False, solo se escribe la validación de cada archivo.
+
+    Returns:
+        dict: Estadísticas (total, validos, invalidos, con_problemas, segundos, por_segundo).
+    """
+    procesos = procesos or DRY_RUN_CONFIG["procesos"] or os.cpu_count() or 1
+    tamano = max(1, int(DRY_RUN_CONFIG["tamano_bloque"]))
+    bloques = [rutas[i:i + tamano] for i in range(0, len(rutas), tamano)]
+    estadisticas = {"total": len(rutas), "validos": 0, "con_problemas": 0, "invalidos": 0}
+    inicio = time.perf_counter()
+
+    destino = sys.stdout if salida == "-" else open(salida, "w", encoding="utf-8")
+    try:
+        if procesos > 1 and len(rutas) >= DRY_RUN_CONFIG["minimo_paralelo"]:
+            with ProcessPoolExecutor(max_workers=procesos, initializer=_iniciar_proceso,
+                                     initargs=(config_data,)) as executor:
+                resultados = executor.map(_compilar_bloque, bloques, [incluir_body] * len(bloques))
+                for lineas in resultados:
+                    _escribir(destino, lineas, estadisticas)
+        else:
+            _iniciar_proceso(config_data)
+            for bloque in bloques:
+                _escribir(destino, _compilar_bloque(bloque, incluir_body), estadisticas)
+    finally:
+        if destino is not sys.stdout:
+            destino.close()
+
+    segundos = time.perf_counter() - inicio
+    estadisticas["segundos"] = round(segundos, 2)
+    estadisticas["por_segundo"] = round(len(rutas) / segundos, 1) if segundos > 0 else 0.0
+    return estadisticas
+
+
+def _escribir(destino, lineas, estadisticas):
+    """Escribe un bloque de líneas NDJSON y actualiza las estadísticas."""
+    destino.write("".join(linea + "\n" for linea, _, _ in lineas))
+    for _, valido, con_problemas in lineas:
+        estadisticas["validos"] += valido
+        estadisticas["invalidos"] += not valido
+        estadisticas["con_problemas"] += con_problemas
@@ -4,14 +4,35 @@ Módulo para procesar archivos - Versión optimizada.
 """
 
 import datetime
+import json
 import os
+import queue
 import shutil
-from utils.api import process_and_post_txt
-from config.database import DatabaseManager
+import threading
+import time
+from utils.api import process_and_post_txt, preparar_body, es_reintentable
+from utils.documento import parsear_documento
+from utils import http_client
+from config import config_service
+from config.settings import PROCESS_CONFIG, VALIDACION_CONFIG
 from utils.logger import Logger
+from utils.watcher import DirectoryWatcher
+from utils.directory_index import DirectoryIndex
+from utils.submitter import DocumentSubmitter
+from utils.pdf_stage import PdfStage
+from utils.outbox import Outbox
+from utils.reprocesador import ErrorReprocessor
+from utils.print_spooler import trabajos_pendientes
+from utils.metricas import obtener_metricas, ETAPA_ESCANEO, ETAPA_PARSEO, ETAPA_MOVIMIENTO, ETAPA_DOCUMENTO
 
 class FileProcessor:
-    """Clase para gestionar el procesamiento de archivos."""
+    """
+    Clase para gestionar el procesamiento de archivos.
+    
+    El procesamiento corre en un hilo de trabajo propio. La interfaz gráfica no
+    participa en el ciclo: solo consume los eventos de progreso publicados en la
+    cola thread-safe `eventos`.
+    """
     
     def __init__(self, logger=None, api_key=None):
         """
@@ -24,12 +45,36 @@ class FileProcessor:
         self.logger = logger
         self.api_key = api_key
         self.is_running = False
-        # Cargar configuración al inicio para evitar consultas repetitivas
+        # Datos de la empresa para la API, tomados de la configuración en memoria
         self.config_data = None
-        self.db_manager = None
-        if logger:
-            # Inicializar DatabaseManager una sola vez
-            self.db_manager = DatabaseManager(log_function=self.logger.log_message if self.logger else None)
+        self._snapshot_config = None
+        
+        # Cola de eventos de progreso para la interfaz (thread-safe)
+        self.eventos = queue.Queue()
+        
+        # Estado del hilo de trabajo
+        self._hilo = None
+        self._detener = threading.Event()
+        # Evita que dos hilos (p. ej. al detener y reiniciar rápido) procesen a la vez
+        self._lock_procesamiento = threading.Lock()
+        self._watcher = None
+        # Índice incremental de la carpeta de entrada
+        self._indice = None
+        
+        # Envío concurrente a la API con límite de documentos en vuelo
+        self.submitter = DocumentSubmitter(PROCESS_CONFIG["max_en_vuelo"], self.logger)
+        
+        # Etapa asíncrona de descarga, archivado e impresión de PDFs
+        self.pdf_stage = PdfStage(self.logger, notificar=self._emitir_evento)
+        
+        # Documentos retenidos mientras la API no responde
+        self.outbox = Outbox(self.logger, al_terminar=self._al_terminar_outbox, al_descartar=self._al_descartar_outbox)
+        
+        # Reproceso automático de la carpeta de error
+        self.reprocesador = ErrorReprocessor(self.logger, archivar=self.archivar_resultado)
+        
+        # Tiempos de cada etapa (tabla metricas_etapas)
+        self.metricas = obtener_metricas()
     
     def set_api_key(self, api_key):
         """Establece la clave API."""
@@ -39,291 +84,590 @@ class FileProcessor:
         """
         Inicia el procesamiento de archivos y carga la configuración de la BD.
         """
-        # Cargar la configuración una sola vez al iniciar
-        if self.db_manager:
-            try:
-                self.config_data = self.db_manager.load_config_data()
-                if self.logger:
-                    self.logger.log_message("Configuración cargada exitosamente al iniciar el procesador")
-            except Exception as e:
-                if self.logger:
-                    self.logger.log_message(f"Error al cargar configuración inicial: {e}", "ERROR")
+        try:
+            self._cargar_config()
+            if self.logger:
+                self.logger.log_message("Configuración cargada exitosamente al iniciar el procesador")
+        except Exception as e:
+            if self.logger:
+                self.logger.log_message(f"Error al cargar configuración inicial: {e}", "ERROR")
         
         self.is_running = True
     
     def stop(self):
-        """Detiene el procesamiento de archivos."""
+        """
+        Detiene el procesamiento de archivos.
+        
+        No bloquea: el hilo de trabajo termina el documento en curso y luego sale.
+        """
         self.is_running = False
+        self._detener.set()
+        if self._watcher:
+            self._watcher.stop()
+    
+    def esperar(self, timeout=None):
+        """
+        Espera a que el hilo de trabajo termine (tras llamar a stop()).
+
+        Args:
+            timeout: Tiempo máximo de espera en segundos (opcional).
+
+        Returns:
+            bool: True si el hilo terminó.
+        """
+        if self._hilo is None:
+            return True
+        self._hilo.join(timeout)
+        return not self._hilo.is_alive()
+
+    def _emitir_evento(self, tipo, **datos):
+        """
+        Publica un evento de progreso en la cola de eventos.
+        
+        Args:
+            tipo: Tipo de evento (inicio, archivo, lote, pdf, detenido).
+            **datos: Datos adicionales del evento.
+        """
+        datos["tipo"] = tipo
+        datos["hora"] = time.time()
+        if tipo == "archivo":
+            # Contadores de documentos por resultado para el endpoint de métricas
+            resultado = "retenido" if datos.get("retenido") else "aceptado" if datos.get("exito") else "fallido"
+            self.metricas.contar("documentos", resultado)
+        self.eventos.put(datos)
+    
+    def estado(self):
+        """
+        Retorna el estado actual de las colas del procesamiento.
+        
+        Solo lee contadores en memoria (no revisa la carpeta de entrada ni la base
+        de datos), por lo que se puede consultar con frecuencia desde otro hilo.
+        
+        Returns:
+            dict: Si está procesando, archivos pendientes en la carpeta de entrada según
+            la última revisión (None si aún no se revisa), envíos en vuelo y su máximo,
+            documentos retenidos en la bandeja de salida, PDFs y trabajos de impresión pendientes.
+        """
+        indice = self._indice
+        return {
+            "procesando": self.is_running,
+            "pendientes_entrada": len(indice) if indice is not None else None,
+            "en_vuelo": self.submitter.en_vuelo,
+            "max_en_vuelo": self.submitter.max_en_vuelo,
+            "retenidos": self.outbox.pendientes,
+            "pdf_pendientes": self.pdf_stage.pendientes,
+            "impresion_pendientes": trabajos_pendientes()
+        }
+    
+    def process_files(self, ruta_procesar, ruta_procesado, intervalo, root=None):
+        """
+        Inicia el hilo de trabajo que procesa los archivos de la carpeta especificada.
+        
+        Args:
+            ruta_procesar: Ruta donde se buscarán los archivos a procesar.
+            ruta_procesado: Ruta donde se moverán los archivos procesados.
+            intervalo: Tiempo en segundos entre cada verificación.
+            root: Parámetro heredado, ya no se utiliza (el ciclo no depende de Tkinter).
+        """
+        # Cada ejecución tiene su propio evento de detención
+        self._detener = threading.Event()
+        self._hilo = threading.Thread(
+            target=self._bucle_procesamiento,
+            args=(ruta_procesar, ruta_procesado, intervalo, self._detener),
+            name="FileProcessor",
+            daemon=True
+        )
+        self._hilo.start()
     
-    def process_files(self, ruta_procesar, ruta_procesado, intervalo, root):
+    def _bucle_procesamiento(self, ruta_procesar, ruta_procesado, intervalo, detener):
         """
-        Procesa los archivos de la carpeta especificada.
+        Ciclo principal del hilo de trabajo.
         
         Args:
             ruta_procesar: Ruta donde se buscarán los archivos a procesar.
             ruta_procesado: Ruta donde se moverán los archivos procesados.
             intervalo: Tiempo en segundos entre cada verificación.
-            root: Ventana principal de Tkinter para programar la siguiente ejecución.
+            detener: Evento que señala el fin de esta ejecución.
+        """
+        self._emitir_evento("inicio", ruta_procesar=ruta_procesar)
+        
+        # Abrir por adelantado la conexión con la API (fuera del hilo de la interfaz)
+        if http_client.obtener_opcion("calentar_al_iniciar"):
+            http_client.calentar(self.logger)
+        
+        # Vigilar la carpeta por eventos; el intervalo queda como respaldo
+        watcher = None
+        if DirectoryWatcher.disponible(ruta_procesar):
+            watcher = DirectoryWatcher(ruta_procesar, self.logger)
+            watcher.start()
+            self._watcher = watcher
+        elif self.logger:
+            self.logger.log_message(f"Revisando {ruta_procesar} por intervalo cada {intervalo} segundos.", "INFO")
+        
+        # Eliminar las métricas más antiguas que la retención configurada
+        try:
+            self.metricas.purgar()
+        except Exception as e:
+            if self.logger:
+                self.logger.log_message(f"No se pudieron depurar las métricas antiguas: {e}", "WARNING")
+        
+        # Reenviar en segundo plano los documentos retenidos y los de la carpeta de error.
+        # Cada ejecución detiene solo sus propios hilos: tras un Detener→Iniciar rápido
+        # este bloque finally no debe detener los hilos de la ejecución nueva
+        envio_outbox = self.outbox.iniciar()
+        reproceso = self.reprocesador.iniciar(ruta_procesado, puede_enviar=lambda: not self.outbox.en_espera())
+        
+        try:
+            while not detener.is_set():
+                with self._lock_procesamiento:
+                    if detener.is_set():
+                        break
+                    quedan_pendientes = self.procesar_lote(ruta_procesar, ruta_procesado, detener)
+                
+                if quedan_pendientes is None:
+                    # Error no recuperable (por ejemplo, directorio inexistente)
+                    break
+                
+                # Solo se espera cuando la carpeta quedó vacía: hasta que llegue
+                # un archivo nuevo o, como respaldo, hasta cumplir el intervalo
+                if not quedan_pendientes:
+                    if watcher:
+                        watcher.esperar(intervalo)
+                    else:
+                        detener.wait(intervalo)
+                elif self._indice is not None and self._indice.asentando:
+                    # Solo quedan archivos que aún se están escribiendo
+                    detener.wait(min(intervalo, max(0.1, self._indice.estabilidad / 2)))
+        except Exception as e:
+            if self.logger:
+                self.logger.log_message(f"Error inesperado en el hilo de procesamiento: {e}", "ERROR")
+        finally:
+            if watcher:
+                # Esperar al hilo del vigilante para no cerrar el intérprete con él activo
+                watcher.stop(timeout=2)
+            self.outbox.detener(envio_outbox)
+            if reproceso is not None:
+                self.reprocesador.detener(reproceso)
+            if not detener.is_set():
+                # El hilo terminó por sí mismo: reflejarlo en el estado
+                self.is_running = False
+            self._emitir_evento("detenido")
+    
+    def procesar_lote(self, ruta_procesar, ruta_procesado, detener=None):
+        """
+        Procesa un lote de archivos de la carpeta especificada.
+        
+        En modo lote (PROCESS_CONFIG["drenar_lote"]) se drena la cola pendiente en
+        orden de fecha de modificación hasta vaciar la carpeta o agotar el presupuesto
+        de tiempo del ciclo. Los archivos se obtienen del índice incremental de la
+        carpeta, que ignora los archivos que no son TXT.
+        
+        Args:
+            ruta_procesar: Ruta donde se buscarán los archivos a procesar.
+            ruta_procesado: Ruta donde se moverán los archivos procesados.
+            detener: Evento de detención a respetar entre archivos (opcional).
+            
+        Returns:
+            bool: True si quedaron archivos pendientes, False si la carpeta quedó vacía,
+                  None si el procesamiento no puede continuar.
         """
         try:
             # Verificar si el directorio de procesar existe
             if not os.path.exists(ruta_procesar):
                 if self.logger:
                     self.logger.log_message(f"Directorio {ruta_procesar} no encontrado.", "ERROR")
-                return
+                return None
 
-            # Obtener lista de archivos en la ruta de procesar
-            archivos = os.listdir(ruta_procesar)
-            if not archivos:
+            # Actualizar el índice incremental de la carpeta (solo archivos TXT)
+            if self._indice is None or self._indice.ruta != ruta_procesar:
+                self._indice = DirectoryIndex(ruta_procesar)
+            indice = self._indice
+            with self.metricas.medir(ETAPA_ESCANEO) as span:
+                hay_archivos = indice.refrescar()
+                span.detalle = f"{len(indice)} pendientes"
+            if not hay_archivos:
                 if self.logger:
                     self.logger.log_message("Directorio vacío.", "INFO")
                     self.logger.log_message_sindb("--------------------------------------------------------------------------------------------------------------", "INFO")
-            else:
-                # Ordenar por fecha de modificación y tomar el archivo más antiguo
-                archivos.sort(key=lambda x: os.path.getmtime(os.path.join(ruta_procesar, x)))
-                archivo_mas_antiguo = archivos[0]
-                ruta_archivo = os.path.join(ruta_procesar, archivo_mas_antiguo)
-                destino_procesado = os.path.join(ruta_procesado, archivo_mas_antiguo)
-
-                if self.logger:
-                    self.logger.log_message(f"Archivo encontrado: {archivo_mas_antiguo}")
-                    self.logger.log_message(f"Procesando archivo: {archivo_mas_antiguo}")
-
-                # Variable para controlar si el archivo debe ser movido
-                mover_archivo = True
+                self._emitir_evento("lote", procesados=0, pendientes=0)
+                return False
+            
+            # En modo no lote se procesa un único archivo por ciclo
+            maximo = None if PROCESS_CONFIG["drenar_lote"] else 1
+            
+            limite = time.monotonic() + PROCESS_CONFIG["presupuesto_lote"]
+            procesados = 0
+            while maximo is None or procesados < maximo:
+                if detener is not None and detener.is_set():
+                    break
+                # Extraer el archivo más antiguo del índice (O(log n))
+                siguiente = indice.siguiente()
+                if siguiente is None:
+                    break
+                nombre_archivo = siguiente[0]
+                inicio = time.monotonic()
                 
-                # Verificar extensión del archivo para procesamiento específico
-                if archivo_mas_antiguo.lower().endswith('.txt'):
-                    if self.logger:
-                        self.logger.log_message(f"Archivo TXT detectado, preparando para enviar a API: {archivo_mas_antiguo}")
-                    
-                    try:
-                        # Usar la configuración ya cargada en el inicio
-                        if not self.config_data:
-                            # Solo si no se cargó previamente o necesita actualizarse
-                            if not self.db_manager:
-                                self.db_manager = DatabaseManager(log_function=self.logger.log_message if self.logger else None)
-                            self.config_data = self.db_manager.load_config_data()
-                            if self.logger:
-                                self.logger.log_message("Cargando configuración por primera vez")
-                        
-                        if self.logger:
-                            self.logger.log_message(f"Enviando a API: {archivo_mas_antiguo}")
-                        
-                        # Procesar y enviar a API usando la config ya cargada
-                        result = process_and_post_txt(ruta_archivo, self.config_data, self.logger)
-                        
-                        if self.logger:
-                            self.logger.log_message(f"Resultado de API: {result}")
-                        
-                        # Solo mover el archivo si la respuesta contiene StatusCode 200 y StatusDesc OK
-                        if (result and 
-                            result.get('StatusCode') == "200" and 
-                            result.get('StatusDesc') == "OK"):
-                            if self.logger:
-                                self.logger.log_message(f"Archivo enviado a API exitosamente: {archivo_mas_antiguo}")
-                        else:
-                            # No mover el archivo a procesados, sino a error/mes_año/dia
-                            mover_archivo = False
-                            
-                            # Extraer la fecha del documento
-                            fecha_documento = self.extraer_fecha_documento(ruta_archivo)
-                            
-                            if fecha_documento:
-                                # Convertir la fecha a objetos para obtener año, mes y día
-                                fecha = datetime.datetime.strptime(fecha_documento, '%Y-%m-%d')
-                                mes_anio = f"{fecha.strftime('%m_%Y')}"  # formato: mes_año (01_2025)
-                                dia = f"{fecha.day:02d}"  # formato: día con dos dígitos (01, 02, etc.)
-                                
-                                # Crear la estructura de carpetas para errores: error/mes_año/dia
-                                ruta_error_base = os.path.join(ruta_procesado, "error")
-                                os.makedirs(ruta_error_base, exist_ok=True)
-                                
-                                ruta_error_mes = os.path.join(ruta_error_base, mes_anio)
-                                os.makedirs(ruta_error_mes, exist_ok=True)
-                                
-                                ruta_error_dia = os.path.join(ruta_error_mes, dia)
-                                os.makedirs(ruta_error_dia, exist_ok=True)
-                                
-                                # Definir la ruta de destino en la carpeta de error del día correspondiente
-                                destino_error = os.path.join(ruta_error_dia, archivo_mas_antiguo)
-                            else:
-                                # Si no se pudo extraer la fecha, usar la estructura anterior
-                                fecha_actual = datetime.datetime.now()
-                                nombre_carpeta_mes = f"{fecha_actual.strftime('%m_%Y')}"
-                                
-                                ruta_error_base = os.path.join(ruta_procesado, "error")
-                                os.makedirs(ruta_error_base, exist_ok=True)
-                                
-                                ruta_error_mes = os.path.join(ruta_error_base, nombre_carpeta_mes)
-                                os.makedirs(ruta_error_mes, exist_ok=True)
-                                
-                                destino_error = os.path.join(ruta_error_mes, archivo_mas_antiguo)
-                            
-                            try:
-                                shutil.move(ruta_archivo, destino_error)
-                                if self.logger:
-                                    self.logger.log_message(f"Error al enviar a API. StatusCode: {result.get('StatusCode', 'No disponible')}, StatusDesc: {result.get('StatusDesc', 'No disponible')}. Archivo movido a carpeta de error: {destino_error}", "ERROR")
-                            except Exception as move_error:
-                                if self.logger:
-                                    self.logger.log_message(f"No se pudo mover el archivo a la carpeta de error: {move_error}", "ERROR")
-                    except Exception as api_error:
-                        mover_archivo = False
-                        if self.logger:
-                            self.logger.log_message(f"Error al procesar con API: {api_error}", "ERROR")
-                        
-                        # Extraer la fecha del documento
-                        fecha_documento = self.extraer_fecha_documento(ruta_archivo)
-                        
-                        if fecha_documento:
-                            # Convertir la fecha a objetos para obtener año, mes y día
-                            fecha = datetime.datetime.strptime(fecha_documento, '%Y-%m-%d')
-                            mes_anio = f"{fecha.strftime('%m_%Y')}"  # formato: mes_año (01_2025)
-                            dia = f"{fecha.day:02d}"  # formato: día con dos dígitos (01, 02, etc.)
-                            
-                            # Crear la estructura de carpetas para errores: error/mes_año/dia
-                            ruta_error_base = os.path.join(ruta_procesado, "error")
-                            os.makedirs(ruta_error_base, exist_ok=True)
-                            
-                            ruta_error_mes = os.path.join(ruta_error_base, mes_anio)
-                            os.makedirs(ruta_error_mes, exist_ok=True)
-                            
-                            ruta_error_dia = os.path.join(ruta_error_mes, dia)
-                            os.makedirs(ruta_error_dia, exist_ok=True)
-                            
-                            # Definir la ruta de destino en la carpeta de error del día correspondiente
-                            destino_error = os.path.join(ruta_error_dia, archivo_mas_antiguo)
-                        else:
-                            # Si no se pudo extraer la fecha, usar la estructura anterior
-                            fecha_actual = datetime.datetime.now()
-                            nombre_carpeta_mes = f"{fecha_actual.strftime('%m_%Y')}"
-                            
-                            ruta_error_base = os.path.join(ruta_procesado, "error")
-                            os.makedirs(ruta_error_base, exist_ok=True)
-                            
-                            ruta_error_mes = os.path.join(ruta_error_base, nombre_carpeta_mes)
-                            os.makedirs(ruta_error_mes, exist_ok=True)
-                            
-                            destino_error = os.path.join(ruta_error_mes, archivo_mas_antiguo)
-                        
-                        try:
-                            shutil.move(ruta_archivo, destino_error)
-                            if self.logger:
-                                self.logger.log_message(f"Error al procesar con API. Archivo movido a carpeta de error: {destino_error}", "ERROR")
-                        except Exception as move_error:
-                            if self.logger:
-                                self.logger.log_message(f"No se pudo mover el archivo a la carpeta de error: {move_error}", "ERROR")
+                documento = self.preparar_documento(nombre_archivo, ruta_procesar, ruta_procesado)
+                procesados += 1
+                if documento is None:
+                    self._emitir_evento("archivo", archivo=nombre_archivo, exito=False,
+                                        duracion=time.monotonic() - inicio)
+                elif self.outbox.en_espera():
+                    # La API viene fallando: este se retiene sin intentar el envío
+                    self._retener(documento, ruta_procesado, inicio)
+                else:
+                    # Envío concurrente; el archivado ocurre al llegar la respuesta
+                    self.submitter.enviar(
+                        documento, self.config_data,
+                        lambda doc, result, inicio=inicio: self._al_terminar_envio(doc, result, ruta_procesado, inicio)
+                    )
                 
-                # Mover el archivo al directorio procesado solo si se obtuvo éxito
-                if mover_archivo:
-                    try:
-                        shutil.move(ruta_archivo, destino_procesado)
-                        if self.logger:
-                            self.logger.log_message(f"Archivo procesado y movido a carpeta procesados: {archivo_mas_antiguo}", "INFO")
-                            self.logger.log_message_sindb("--------------------------------------------------------------------------------------------------------------", "INFO")
-                    except Exception as e:
-                        # Manejar errores al mover el archivo exitoso
-                        if self.logger:
-                            self.logger.log_message(f"Error al mover archivo procesado: {e}", "ERROR")
-                        
-                        # Extraer la fecha del documento
-                        fecha_documento = self.extraer_fecha_documento(ruta_archivo)
-                        
-                        if fecha_documento:
-                            # Convertir la fecha a objetos para obtener año, mes y día
-                            fecha = datetime.datetime.strptime(fecha_documento, '%Y-%m-%d')
-                            mes_anio = f"{fecha.strftime('%m_%Y')}"  # formato: mes_año (01_2025)
-                            dia = f"{fecha.day:02d}"  # formato: día con dos dígitos (01, 02, etc.)
-                            
-                            # Crear la estructura de carpetas para errores: error/mes_año/dia
-                            ruta_error_base = os.path.join(ruta_procesado, "error")
-                            os.makedirs(ruta_error_base, exist_ok=True)
-                            
-                            ruta_error_mes = os.path.join(ruta_error_base, mes_anio)
-                            os.makedirs(ruta_error_mes, exist_ok=True)
-                            
-                            ruta_error_dia = os.path.join(ruta_error_mes, dia)
-                            os.makedirs(ruta_error_dia, exist_ok=True)
-                            
-                            # Definir la ruta de destino en la carpeta de error del día correspondiente
-                            destino_error = os.path.join(ruta_error_dia, archivo_mas_antiguo)
-                        else:
-                            # Si no se pudo extraer la fecha, usar la estructura anterior
-                            fecha_actual = datetime.datetime.now()
-                            nombre_carpeta_mes = f"{fecha_actual.strftime('%m_%Y')}"
-                            
-                            ruta_error_base = os.path.join(ruta_procesado, "error")
-                            os.makedirs(ruta_error_base, exist_ok=True)
-                            
-                            ruta_error_mes = os.path.join(ruta_error_base, nombre_carpeta_mes)
-                            os.makedirs(ruta_error_mes, exist_ok=True)
-                            
-                            destino_error = os.path.join(ruta_error_mes, archivo_mas_antiguo)
-                        
-                        try:
-                            shutil.move(ruta_archivo, destino_error)
-                            if self.logger:
-                                self.logger.log_message(f"Error al mover archivo. Movido a carpeta de error: {destino_error}. Error: {e}", "ERROR")
-                        except Exception as move_error:
-                            if self.logger:
-                                self.logger.log_message(f"No se pudo mover el archivo a la carpeta de error: {move_error}", "ERROR")
-                        finally:
-                            if self.logger:
-                                self.logger.log_message_sindb("--------------------------------------------------------------------------------------------------------------", "INFO")
-
-            # Programar la siguiente ejecución si el proceso sigue activo
-            if self.is_running:
-                root.after(intervalo * 1000, lambda: self.process_files(ruta_procesar, ruta_procesado, intervalo, root))
+                # Volver a revisar la carpeta al terminar el presupuesto del ciclo
+                if time.monotonic() >= limite:
+                    break
+            
+            # Esperar los envíos en vuelo antes de volver a indexar la carpeta
+            self.submitter.esperar()
+            
+            pendientes = len(indice)
+            self._emitir_evento("lote", procesados=procesados, pendientes=pendientes)
+            if pendientes and procesados and self.logger:
+                self.logger.log_message(f"Lote finalizado: {procesados} archivos procesados, {pendientes} pendientes.", "INFO")
+            return pendientes > 0
                 
         except Exception as e:
             if self.logger:
                 self.logger.log_message(f"Error general en el proceso: {e}", "ERROR")
+            return False
+
+    def _cargar_config(self):
+        """
+        Toma los datos de la empresa de la configuración en memoria.
+        
+        No consulta la base de datos salvo que la configuración se haya modificado
+        desde la última lectura; en ese caso se usan los nuevos valores.
+        """
+        snapshot = config_service.obtener_config(self.logger)
+        if snapshot is not self._snapshot_config:
+            self._snapshot_config = snapshot
+            self.config_data = snapshot.datos_api
+            if self.logger:
+                self.logger.log_message(f"Usando configuración versión {snapshot.version}")
 
-    def extraer_fecha_documento(self, ruta_archivo):
+    def preparar_documento(self, nombre_archivo, ruta_procesar, ruta_procesado):
         """
-        Extrae la fecha del documento (ya sea boleta o factura).
+        Lee e interpreta un archivo TXT dejándolo listo para enviar a la API.
+        Si el archivo no se puede interpretar, se mueve a la carpeta de error
+        (o a la cuarentena si su contenido es ilegible).
         
         Args:
-            ruta_archivo: Ruta al archivo TXT.
+            nombre_archivo: Nombre del archivo dentro de ruta_procesar.
+            ruta_procesar: Ruta donde se encuentra el archivo.
+            ruta_procesado: Ruta donde se moverán los archivos procesados.
             
         Returns:
-            str: Fecha en formato YYYY-MM-DD o None si no se pudo extraer.
+            DocumentoDTE: Documento interpretado o None si falló.
         """
+        ruta_archivo = os.path.join(ruta_procesar, nombre_archivo)
+
+        if self.logger:
+            self.logger.log_message(f"Archivo encontrado: {nombre_archivo}")
+            self.logger.log_message(f"Procesando archivo: {nombre_archivo}")
+            self.logger.log_message(f"Archivo TXT detectado, preparando para enviar a API: {nombre_archivo}")
+        
         try:
-            # Leer el archivo
-            with open(ruta_archivo, 'r', encoding='utf-8') as file:
-                lines = file.readlines()
+            # Usar la configuración vigente (en memoria)
+            self._cargar_config()
             
-            # Buscar por secciones
-            current_section = None
-            for line in lines:
-                line = line.strip()
-                
-                # Detectar sección
-                if line.startswith("->"):
-                    current_section = line.strip("->").strip("<-")
-                    continue
-                
-                # Si estamos en la sección Boleta, extraer fecha
-                if current_section == "Boleta" and line:
-                    parts = line.split(';')
-                    if len(parts) > 2:
-                        # La fecha está en la posición 2 (índice desde 0)
-                        return parts[2]  # Retorna la fecha en formato YYYY-MM-DD
-                
-                # Si estamos en la sección Encabezado, extraer fecha
-                if current_section == "Encabezado" and line:
-                    parts = line.split(';')
-                    if len(parts) > 2:
-                        # La fecha está en la posición 2 (índice desde 0)
-                        return parts[2]  # Retorna la fecha en formato YYYY-MM-DD
+            # Leer e interpretar el archivo una única vez
+            with self.metricas.medir(ETAPA_PARSEO, archivo=nombre_archivo) as span:
+                documento = parsear_documento(ruta_archivo)
+                span.asignar_documento(documento)
             
-            # Si llegamos aquí, no se encontró la fecha
             if self.logger:
-                self.logger.log_message(f"No se pudo extraer la fecha del documento: {ruta_archivo}", "WARNING")
+                self.logger.log_message(f"Enviando a API: {nombre_archivo}")
+            return documento
+        except ValueError as e:
+            # Contenido ilegible (p. ej. codificación distinta de UTF-8): no tiene sentido reintentarlo
+            if self.logger:
+                self.logger.log_message(f"Archivo ilegible: {nombre_archivo}: {e}", "ERROR")
+            self.mover_a_cuarentena(ruta_archivo, ruta_procesado, problemas=[
+                {"codigo": "ilegible", "severidad": "error", "mensaje": str(e)}])
             return None
-                
+        except Exception as api_error:
+            if self.logger:
+                self.logger.log_message(f"Error al procesar con API: {api_error}", "ERROR")
+            destino_error = self.mover_a_error(ruta_archivo, ruta_procesado, resultado={
+                "success": False, "error": str(api_error), "tipo_error": "parseo"})
+            if destino_error and self.logger:
+                self.logger.log_message(f"Error al procesar con API. Archivo movido a carpeta de error: {destino_error}", "ERROR")
+            return None
+
+    def procesar_archivo(self, nombre_archivo, ruta_procesar, ruta_procesado):
+        """
+        Procesa un único archivo de forma síncrona: lo envía a la API y lo mueve a
+        la carpeta de procesados o a la carpeta de error según el resultado.
+        
+        Args:
+            nombre_archivo: Nombre del archivo dentro de ruta_procesar.
+            ruta_procesar: Ruta donde se encuentra el archivo.
+            ruta_procesado: Ruta donde se moverán los archivos procesados.
+            
+        Returns:
+            bool: True si el archivo terminó en la carpeta de procesados.
+        """
+        documento = self.preparar_documento(nombre_archivo, ruta_procesar, ruta_procesado)
+        if documento is None:
+            return False
+        
+        # Procesar y enviar a API usando la config ya cargada
+        result = process_and_post_txt(documento.ruta, self.config_data, self.logger, documento=documento)
+        return self.archivar_resultado(documento, ruta_procesado, result)
+
+    def _al_terminar_envio(self, documento, result, ruta_procesado, inicio):
+        """Archiva un documento cuando llega su respuesta desde el enviador concurrente."""
+        self.outbox.registrar_envio(result)
+        # Un fallo transitorio (sin conexión, 5xx) no es un error del documento
+        if es_reintentable(result):
+            error = result.get("error") or f"HTTP {result.get('status_code')}"
+            self._retener(documento, ruta_procesado, inicio, error)
+            return
+        
+        exito = self.archivar_resultado(documento, ruta_procesado, result)
+        duracion = time.monotonic() - inicio
+        self.metricas.registrar(ETAPA_DOCUMENTO, duracion, documento, exito=exito)
+        self._emitir_evento("archivo", archivo=documento.nombre, exito=exito, duracion=duracion)
+
+    def _retener(self, documento, ruta_procesado, inicio, error=None):
+        """
+        Guarda un documento en la bandeja de salida para enviarlo cuando la API responda.
+        
+        Args:
+            documento: DocumentoDTE interpretado.
+            ruta_procesado: Ruta base de archivos procesados.
+            inicio: Momento (time.monotonic) en que se tomó el archivo.
+            error: Descripción del error de envío, si hubo intento (opcional).
+        """
+        body, invalido = preparar_body(documento, self.config_data, self.logger)
+        if invalido:
+            # No se retiene un documento que la API no podría aceptar
+            self.archivar_resultado(documento, ruta_procesado, invalido)
+            duracion = time.monotonic() - inicio
+            self.metricas.registrar(ETAPA_DOCUMENTO, duracion, documento, exito=False)
+            self._emitir_evento("archivo", archivo=documento.nombre, exito=False, duracion=duracion)
+            return
+        
+        try:
+            self.outbox.encolar(documento, body, ruta_procesado, error)
+            retenido = True
+        except Exception as e:
+            if self.logger:
+                self.logger.log_message(f"No se pudo retener el documento {documento.nombre}: {e}", "ERROR")
+            self.mover_a_error(documento.ruta, ruta_procesado, documento)
+            retenido = False
+        
+        duracion = time.monotonic() - inicio
+        self.metricas.registrar(ETAPA_DOCUMENTO, duracion, documento, exito=False,
+                                detalle="retenido" if retenido else None)
+        self._emitir_evento("archivo", archivo=documento.nombre, exito=False, retenido=retenido, duracion=duracion)
+
+    def _al_terminar_outbox(self, documento, result, ruta_procesado):
+        """Archiva un documento retenido una vez que la API lo aceptó o lo rechazó."""
+        exito = self.archivar_resultado(documento, ruta_procesado, result)
+        self._emitir_evento("archivo", archivo=documento.nombre, exito=exito, duracion=0.0)
+
+    def _al_descartar_outbox(self, ruta_archivo, ruta_procesado, result):
+        """Mueve a la carpeta de error un documento retenido que no se pudo interpretar."""
+        destino_error = self.mover_a_error(ruta_archivo, ruta_procesado, resultado=result)
+        if destino_error and self.logger:
+            self.logger.log_message(f"Documento retenido ilegible movido a carpeta de error: {destino_error}", "ERROR")
+        self._emitir_evento("archivo", archivo=os.path.basename(ruta_archivo), exito=False, duracion=0.0)
+
+    def archivar_resultado(self, documento, ruta_procesado, result):
+        """
+        Mueve el archivo de un documento a la carpeta de procesados o de error
+        según la respuesta de la API.
+        
+        Args:
+            documento: DocumentoDTE enviado.
+            ruta_procesado: Ruta donde se moverán los archivos procesados.
+            result: Respuesta de la API o información de error.
+            
+        Returns:
+            bool: True si el archivo terminó en la carpeta de procesados.
+        """
+        ruta_archivo = documento.ruta
+        nombre_archivo = documento.nombre
+        destino_procesado = os.path.join(ruta_procesado, nombre_archivo)
+        
+        if self.logger:
+            self.logger.log_message(f"Resultado de API: {result}")
+        
+        # Solo mover el archivo si la respuesta contiene StatusCode 200 y StatusDesc OK
+        if result and result.get('cuarentena'):
+            # Inválido según la validación local: no se envió a la API
+            self.mover_a_cuarentena(ruta_archivo, ruta_procesado, documento, result.get('problemas'))
+            return False
+        
+        if not (result and 
+                result.get('StatusCode') == "200" and 
+                result.get('StatusDesc') == "OK"):
+            # No mover el archivo a procesados, sino a error/mes_año/dia
+            destino_error = self.mover_a_error(ruta_archivo, ruta_procesado, documento, result)
+            if destino_error and self.logger:
+                self.logger.log_message(f"Error al enviar a API. StatusCode: {result.get('StatusCode', 'No disponible')}, StatusDesc: {result.get('StatusDesc', 'No disponible')}. Archivo movido a carpeta de error: {destino_error}", "ERROR")
+            return False
+        
+        if result.get('duplicado'):
+            # Ya aceptado en un envío anterior: solo falta archivarlo, sin reimprimir
+            if self.logger:
+                self.logger.log_message(f"Archivo ya enviado anteriormente, se archiva sin reenviar ni reimprimir: {nombre_archivo}", "INFO")
+        else:
+            if self.logger:
+                self.logger.log_message(f"Archivo enviado a API exitosamente: {nombre_archivo}")
+            
+            # Descarga e impresión del PDF en su propia etapa; no se espera su resultado
+            if result.get('PDFPATH'):
+                self.pdf_stage.encolar(result, documento)
+        
+        # Mover el archivo al directorio procesado
+        try:
+            with self.metricas.medir(ETAPA_MOVIMIENTO, documento, detalle="procesado"):
+                shutil.move(ruta_archivo, destino_procesado)
+            if self.logger:
+                self.logger.log_message(f"Archivo procesado y movido a carpeta procesados: {nombre_archivo}", "INFO")
+                self.logger.log_message_sindb("--------------------------------------------------------------------------------------------------------------", "INFO")
+            return True
+        except Exception as e:
+            # Manejar errores al mover el archivo exitoso
+            if self.logger:
+                self.logger.log_message(f"Error al mover archivo procesado: {e}", "ERROR")
+            # La API ya aceptó el documento: se registra como no reintentable
+            destino_error = self.mover_a_error(ruta_archivo, ruta_procesado, documento, {
+                "success": False, "error": str(e), "tipo_error": "archivo"})
+            if destino_error and self.logger:
+                self.logger.log_message(f"Error al mover archivo. Movido a carpeta de error: {destino_error}. Error: {e}", "ERROR")
+            if self.logger:
+                self.logger.log_message_sindb("--------------------------------------------------------------------------------------------------------------", "INFO")
+            return False
+
+    def mover_a_error(self, ruta_archivo, ruta_procesado, documento=None, resultado=None):
+        """
+        Mueve un archivo a la carpeta de error error/mes_año/dia según la fecha del documento
+        y lo registra con el motivo del error para el reproceso automático.
+        
+        Args:
+            ruta_archivo: Ruta al archivo que falló.
+            ruta_procesado: Ruta base de archivos procesados.
+            documento: DocumentoDTE ya interpretado (opcional). Si no se entrega o no
+                       tiene fecha, se usa la carpeta del mes actual.
+            resultado: Resultado del envío o del intento de interpretación (opcional).
+            
+        Returns:
+            str: Ruta de destino en la carpeta de error o None si no se pudo mover.
+        """
+        nombre_archivo = os.path.basename(ruta_archivo)
+        
+        try:
+            ruta_error = self._carpeta_por_fecha(os.path.join(ruta_procesado, "error"), ruta_archivo, documento)
+            os.makedirs(ruta_error, exist_ok=True)
+            
+            # Definir la ruta de destino en la carpeta de error correspondiente
+            destino_error = os.path.join(ruta_error, nombre_archivo)
+            with self.metricas.medir(ETAPA_MOVIMIENTO, documento, archivo=nombre_archivo, detalle="error"):
+                shutil.move(ruta_archivo, destino_error)
+        except Exception as move_error:
+            if self.logger:
+                self.logger.log_message(f"No se pudo mover el archivo a la carpeta de error: {move_error}", "ERROR")
+            return None
+        
+        try:
+            self.reprocesador.registrar(destino_error, ruta_procesado, resultado)
+        except Exception as e:
+            if self.logger:
+                self.logger.log_message(f"No se pudo registrar el archivo de error {nombre_archivo}: {e}", "WARNING")
+        return destino_error
+
+    def mover_a_cuarentena(self, ruta_archivo, ruta_procesado, documento=None, problemas=None):
+        """
+        Mueve un documento inválido a cuarentena/mes_año/dia junto a un archivo con el motivo.
+        
+        A diferencia de la carpeta de error, la cuarentena no se reprocesa: el
+        documento debe corregirse en el origen. El motivo se guarda en
+        `<nombre>.motivo.json` con la lista de problemas detectados.
+        
+        Args:
+            ruta_archivo: Ruta al archivo inválido.
+            ruta_procesado: Ruta base de archivos procesados.
+            documento: DocumentoDTE ya interpretado (opcional).
+            problemas: Lista de problemas (diccionarios codigo/severidad/mensaje).
+            
+        Returns:
+            str: Ruta de destino en la cuarentena o None si no se pudo mover.
+        """
+        nombre_archivo = os.path.basename(ruta_archivo)
+        problemas = problemas or []
+        
+        try:
+            base = os.path.join(ruta_procesado, VALIDACION_CONFIG["carpeta_cuarentena"])
+            carpeta = self._carpeta_por_fecha(base, ruta_archivo, documento)
+            os.makedirs(carpeta, exist_ok=True)
+            destino = os.path.join(carpeta, nombre_archivo)
+            with self.metricas.medir(ETAPA_MOVIMIENTO, documento, archivo=nombre_archivo, detalle="cuarentena"):
+                shutil.move(ruta_archivo, destino)
+            
+            motivo = {
+                "archivo": nombre_archivo,
+                "tipo_dte": documento.tipo_dte if documento else None,
+                "folio": documento.folio if documento else None,
+                "hash": documento.hash_contenido if documento else None,
+                "fecha": datetime.datetime.now().isoformat(timespec="seconds"),
+                "problemas": problemas
+            }
+            with open(destino + ".motivo.json", "w", encoding="utf-8") as f:
+                json.dump(motivo, f, ensure_ascii=False, indent=2)
         except Exception as e:
             if self.logger:
-                self.logger.log_message(f"Error al extraer fecha del documento: {e}", "ERROR")
-            return None
\ No newline at end of file
+                self.logger.log_message(f"No se pudo mover el archivo a cuarentena: {e}", "ERROR")
+            return None
+        
+        if self.logger:
+            resumen = "; ".join(p["mensaje"] for p in problemas if p.get("severidad") == "error")
+            self.logger.log_message(f"Documento en cuarentena: {destino}. Motivo: {resumen}", "ERROR")
+        return destino
+
+    def _carpeta_por_fecha(self, base, ruta_archivo, documento=None):
+        """
+        Retorna la carpeta base/mes_año/dia según la fecha del documento.
+        
+        Si no hay documento o su fecha no es válida, usa base/mes_año del mes actual.
+        
+        Args:
+            base: Carpeta base (error o cuarentena).
+            ruta_archivo: Ruta del archivo (para los mensajes).
+            documento: DocumentoDTE ya interpretado (opcional).
+            
+        Returns:
+            str: Ruta de la carpeta.
+        """
+        nombre_archivo = os.path.basename(ruta_archivo)
+        fecha = None
+        if documento is not None and documento.fecha:
+            try:
+                fecha = datetime.datetime.strptime(documento.fecha, '%Y-%m-%d')
+            except ValueError:
+                if self.logger:
+                    self.logger.log_message(f"Fecha de documento inválida en {nombre_archivo}: {documento.fecha}", "WARNING")
+        elif self.logger:
+            self.logger.log_message(f"No se pudo extraer la fecha del documento: {ruta_archivo}", "WARNING")
+        
+        if fecha:
+            mes_anio = f"{fecha.strftime('%m_%Y')}"  # formato: mes_año (01_2025)
+            dia = f"{fecha.day:02d}"  # formato: día con dos dígitos (01, 02, etc.)
+            
+            # Estructura de carpetas: base/mes_año/dia
+            return os.path.join(base, mes_anio, dia)
+        
+        # Si no se pudo extraer la fecha, usar la estructura anterior
+        fecha_actual = datetime.datetime.now()
+        return os.path.join(base, f"{fecha_actual.strftime('%m_%Y')}")
@@ -0,0 +1,225 @@
+# -*- coding: utf-8 -*-
+"""
+Módulo para generar documentos TXT sintéticos (Boleta 39 y Factura 33) con el formato del POS.
+"""
+
+import datetime
+import os
+import random
+
+# Datos de empresa ficticios para construir payloads sin una configuración real
+EMPRESA_PRUEBA = {
+    "rut_empresa": "76000000-0",
+    "razon_social": "EMPRESA DE PRUEBA SPA",
+    "giro": "VENTA DE REPUESTOS",
+    "act_economica": "453000",
+    "direccion": "CALLE FALSA 123",
+    "comuna": "SANTIAGO",
+    "telefono": "221234567",
+    "codsuc_sii": "0",
+    "email": "prueba@example.com",
+    "apikey": "clave-de-prueba",
+    "tpv": "1"
+}
+
+# Catálogo de productos (código, nombre, precio) del que se toman las líneas de detalle
+PRODUCTOS = (
+    (804, "80W90 SUELTO LT", 5462),
+    (468, "LAVAPARABRISAS 1LT", 19900),
+    (269, "ACEITE 1LT", 9900),
+    (112, "FILTRO DE ACEITE", 6490),
+    (315, "FILTRO DE AIRE", 8990),
+    (527, "PASTILLAS DE FRENO", 24990),
+    (641, "REFRIGERANTE 1LT", 4590),
+    (733, "AMPOLLETA H4", 3290),
+    (902, "PLUMILLAS 20 PULG", 7990),
+    (1054, "BATERIA 45AH", 64990),
+)
+
+# Combinaciones de descuentos y recargos: lista de (tipo D/R, tipo de valor $/%)
+COMBINACIONES = {
+    "ninguno": (),
+    "descuento": (("D", "$"),),
+    "descuento_pct": (("D", "%"),),
+    "recargo": (("R", "$"),),
+    "recargo_descuento": (("R", "$"), ("D", "$")),
+}
+
+TASA_IVA = 19
+
+# Líneas fijas del final de cada documento
+OBSERVACION = "->Observacion<-\n;\n;\n;\n"
+
+
+def _detalle(rng, lineas):
+    """Elige los productos y cantidades de las líneas de detalle."""
+    return [(rng.choice(PRODUCTOS), rng.randint(1, 4)) for _ in range(lineas)]
+
+
+def _valor_desc_rec(rng, tipo_valor, base):
+    """Elige el valor de un descuento o recargo: un porcentaje o un monto de hasta el 20% de la base."""
+    if tipo_valor == "%":
+        return rng.choice((5, 10, 15, 20))
+    return max(1, rng.randint(1, max(1, base // 5)) // 10 * 10)
+
+
+def generar_boleta(folio, fecha, lineas=3, combinacion=(), rng=None):
+    """
+    Genera el texto de una Boleta (DTE 39).
+
+    Los precios de la boleta incluyen IVA. BoletaTotales informa el total de las
+    líneas de detalle antes de descuentos y recargos, como lo hace el POS.
+
+    Args:
+        folio: Folio de la boleta.
+        fecha: Fecha de emisión (AAAA-MM-DD).
+        lineas: Cantidad de líneas de detalle.
+        combinacion: Descuentos y recargos a incluir (ver COMBINACIONES).
+        rng: Generador aleatorio (random.Random) para resultados reproducibles (opcional).
+
+    Returns:
+        str: Contenido del TXT.
+    """
+    rng = rng or random.Random()
+    partes = ["->Boleta<-\n",
+              f"39;{folio};{fecha};3;0;{fecha};{fecha};;66666666-6;ABCDEFG;CLIENTE AUXILIAR;GIRO;DIRECCION;COMUNA;CIUDAD;;\n"]
+
+    detalle = []
+    total = 0
+    for numero, ((codigo, nombre, precio), cantidad) in enumerate(_detalle(rng, lineas), start=1):
+        monto = precio * cantidad
+        total += monto
+        detalle.append(f"{numero};{codigo};{nombre};0;{cantidad};{precio};0;{monto};INT1;UN;;\n")
+
+    neto = round(total / (1 + TASA_IVA / 100))
+    partes.append("->BoletaTotales<-\n")
+    partes.append(f"{neto};0;{total - neto};{total};0;{total};0;0;\n")
+    partes.append("->BoletaDetalle<-\n")
+    partes.extend(detalle)
+
+    partes.append("->BoletaDescRec<-\n")
+    for numero, (tipo, tipo_valor) in enumerate(combinacion, start=1):
+        # El POS solo informa recargos como monto fijo
+        if tipo == "R":
+            tipo_valor = "$"
+        descripcion = "DESCUENTO" if tipo == "D" else "RECARGO"
+        partes.append(f"{numero};{tipo};{descripcion};{tipo_valor};{_valor_desc_rec(rng, tipo_valor, total)};0;\n")
+
+    partes.append(OBSERVACION)
+    return "".join(partes)
+
+
+def generar_factura(folio, fecha, lineas=3, combinacion=(), rng=None):
+    """
+    Genera el texto de una Factura (DTE 33).
+
+    Los precios de la factura son netos. Los descuentos y recargos se informan
+    en Totales y el neto ya los incluye; el folio va en la sección Referencia.
+
+    Args:
+        folio: Folio de la factura.
+        fecha: Fecha de emisión (AAAA-MM-DD).
+        lineas: Cantidad de líneas de detalle.
+        combinacion: Descuentos y recargos a incluir (ver COMBINACIONES).
+        rng: Generador aleatorio (random.Random) para resultados reproducibles (opcional).
+
+    Returns:
+        str: Contenido del TXT.
+    """
+    rng = rng or random.Random()
+    detalle = []
+    subtotal = 0
+    for numero, ((codigo, nombre, precio), cantidad) in enumerate(_detalle(rng, lineas), start=1):
+        monto = precio * cantidad
+        subtotal += monto
+        detalle.append(f"{numero};{codigo};{nombre};{cantidad};{precio};0;0;0;0;0;{monto};INT1;UN;;\n")
+
+    # Totales: %desc;desc;%rec;rec (la factura admite un descuento y un recargo globales)
+    globales = {"D": (0, 0), "R": (0, 0)}
+    for tipo, tipo_valor in combinacion:
+        valor = _valor_desc_rec(rng, tipo_valor, subtotal)
+        if tipo_valor == "%":
+            globales[tipo] = (valor, round(subtotal * valor / 100))
+        else:
+            globales[tipo] = (0, valor)
+    (pct_desc, descuento), (pct_rec, recargo) = globales["D"], globales["R"]
+
+    neto = subtotal - descuento + recargo
+    iva = round(neto * TASA_IVA / 100)
+    return "".join([
+        "->Encabezado<-\n",
+        f"33;0;{fecha};0;0;66666666-6;GENERICO;PARTICULAR;NO INFORMADA;NO INFORMADA;NO INFORMADA;;\n",
+        "->Totales<-\n",
+        f"{pct_desc};{descuento};{pct_rec};{recargo};{neto};0;{TASA_IVA};{iva};{neto + iva};0;0;\n",
+        "->Detalle<-\n",
+        *detalle,
+        "->ImpuestoRetencion<-\n",
+        "->Referencia<-\n",
+        f"1;33;{folio};{fecha};0;;\n",
+        OBSERVACION,
+    ])
+
+
+def generar_textos(cantidad, proporcion_facturas=0.5, lineas=3, lineas_max=None, combinaciones=None,
+                   folio_inicial=1, fecha=None, semilla=None):
+    """
+    Genera documentos sintéticos en memoria.
+
+    Con la misma semilla se obtienen exactamente los mismos documentos.
+
+    Args:
+        cantidad: Cantidad de documentos.
+        proporcion_facturas: Fracción de facturas (0 solo boletas, 1 solo facturas).
+        lineas: Cantidad de líneas de detalle (mínimo si se indica lineas_max).
+        lineas_max: Máximo de líneas de detalle; cada documento elige un valor entre lineas y lineas_max (opcional).
+        combinaciones: Nombres de COMBINACIONES a repartir entre los documentos. Por defecto, todas.
+        folio_inicial: Folio del primer documento; los siguientes son correlativos.
+        fecha: Fecha de emisión (AAAA-MM-DD). Por defecto, la fecha actual.
+        semilla: Semilla del generador aleatorio (opcional).
+
+    Yields:
+        tuple: (nombre de archivo, texto del TXT).
+
+    Raises:
+        KeyError: Si alguna combinación no existe.
+    """
+    rng = random.Random(semilla)
+    fecha = fecha or datetime.date.today().isoformat()
+    nombres = list(combinaciones or COMBINACIONES)
+    elegidas = [COMBINACIONES[nombre] for nombre in nombres]
+
+    for indice in range(cantidad):
+        folio = folio_inicial + indice
+        cantidad_lineas = rng.randint(lineas, lineas_max) if lineas_max and lineas_max > lineas else lineas
+        combinacion = elegidas[indice % len(elegidas)]
+        if rng.random() < proporcion_facturas:
+            yield f"F33_{folio:07d}.txt", generar_factura(folio, fecha, cantidad_lineas, combinacion, rng)
+        else:
+            yield f"B39_{folio:07d}.txt", generar_boleta(folio, fecha, cantidad_lineas, combinacion, rng)
+
+
+def generar_lote(carpeta, cantidad, **opciones):
+    """
+    Escribe documentos sintéticos en una carpeta.
+
+    Cada archivo se escribe con un nombre temporal y se renombra al terminar,
+    para que un proceso que vigila la carpeta nunca lea un archivo a medias.
+
+    Args:
+        carpeta: Carpeta de destino (se crea si no existe).
+        cantidad: Cantidad de documentos.
+        **opciones: Opciones de generar_textos.
+
+    Returns:
+        list: Rutas de los archivos escritos.
+    """
+    os.makedirs(carpeta, exist_ok=True)
+    rutas = []
+    for nombre, texto in generar_textos(cantidad, **opciones):
+        ruta = os.path.join(carpeta, nombre)
+        temporal = ruta + ".tmp"
+        with open(temporal, "w", encoding="utf-8", newline="") as f:
+            f.write(texto)
+        os.replace(temporal, ruta)
+        rutas.append(ruta)
+    return rutas
@@ -0,0 +1,130 @@
+# -*- coding: utf-8 -*-
+"""
+Módulo con el transporte HTTP compartido para la API de DTE y la descarga de PDFs.
+"""
+
+import threading
+from urllib.parse import urlsplit
+import requests
+from requests.adapters import HTTPAdapter
+from config.settings import HTTP_CONFIG
+
+# Sesión compartida con pool de conexiones persistentes (keep-alive)
+_sesion = None
+_lock_sesion = threading.Lock()
+
+# Opciones vigentes; parten de HTTP_CONFIG y pueden ajustarse con configurar()
+_opciones = dict(HTTP_CONFIG)
+
+
+def configurar(**opciones):
+    """
+    Ajusta las opciones del transporte (por ejemplo, api_url para apuntar a un
+    servidor local de pruebas). La sesión actual se cierra y se recrea en el
+    siguiente uso.
+
+    Args:
+        **opciones: Claves de HTTP_CONFIG a reemplazar.
+    """
+    desconocidas = set(opciones) - set(HTTP_CONFIG)
+    if desconocidas:
+        raise KeyError(f"Opciones HTTP desconocidas: {', '.join(sorted(desconocidas))}")
+    _opciones.update(opciones)
+    cerrar()
+
+
+def obtener_opcion(nombre):
+    """Retorna el valor vigente de una opción del transporte."""
+    return _opciones[nombre]
+
+
+def obtener_sesion():
+    """
+    Obtiene la sesión HTTP compartida, creándola si es necesario.
+
+    Returns:
+        requests.Session: Sesión con pool de conexiones.
+    """
+    global _sesion
+
+    if _sesion is None:
+        with _lock_sesion:
+            if _sesion is None:
+                sesion = requests.Session()
+                adaptador = HTTPAdapter(
+                    pool_connections=_opciones["pool_size"],
+                    pool_maxsize=_opciones["pool_size"],
+                    max_retries=0
+                )
+                sesion.mount("https://", adaptador)
+                sesion.mount("http://", adaptador)
+                _sesion = sesion
+    return _sesion
+
+
+def _timeout():
+    """Retorna la tupla (conexión, lectura) de timeouts vigente."""
+    return (_opciones["timeout_conexion"], _opciones["timeout_lectura"])
+
+
+def post_json(body, headers=None, url=None):
+    """
+    Envía un POST con body JSON reutilizando las conexiones del pool.
+
+    Args:
+        body: Cuerpo del request (se serializa a JSON).
+        headers: Headers adicionales (opcional).
+        url: URL de destino. Por defecto, la URL de la API de DTE.
+
+    Returns:
+        requests.Response: Respuesta del servidor.
+    """
+    return obtener_sesion().post(url or _opciones["api_url"], json=body, headers=headers, timeout=_timeout())
+
+
+def get(url, stream=False):
+    """
+    Envía un GET reutilizando las conexiones del pool.
+
+    Args:
+        url: URL a consultar.
+        stream: Si es True el cuerpo se descarga al iterarlo.
+
+    Returns:
+        requests.Response: Respuesta del servidor.
+    """
+    return obtener_sesion().get(url, stream=stream, timeout=_timeout())
+
+
+def calentar(logger=None):
+    """
+    Abre por adelantado la conexión (TCP + TLS) con el host de la API para que
+    el primer documento no pague el handshake.
+
+    Args:
+        logger: Objeto Logger para registrar eventos (opcional).
+
+    Returns:
+        bool: True si se pudo establecer la conexión.
+    """
+    partes = urlsplit(_opciones["api_url"])
+    url_base = f"{partes.scheme}://{partes.netloc}/"
+    try:
+        obtener_sesion().head(url_base, timeout=_timeout()).close()
+        if logger:
+            logger.log_message(f"Conexión con la API establecida: {partes.netloc}", "INFO")
+        return True
+    except requests.exceptions.RequestException as e:
+        if logger:
+            logger.log_message(f"No se pudo precalentar la conexión con la API: {e}", "WARNING")
+        return False
+
+
+def cerrar():
+    """Cierra la sesión compartida y sus conexiones."""
+    global _sesion
+
+    with _lock_sesion:
+        if _sesion is not None:
+            _sesion.close()
+            _sesion = None
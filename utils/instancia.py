@@ -0,0 +1,94 @@
+# -*- coding: utf-8 -*-
+"""
+Módulo para garantizar que solo una instancia de la aplicación procese archivos.
+"""
+
+import os
+import tempfile
+
+if os.name == "nt":
+    import msvcrt
+else:
+    import fcntl
+
+# Archivo de bloqueo compartido por la interfaz gráfica y el servicio sin interfaz
+LOCK_FILE = os.path.join(tempfile.gettempdir(), "plain_text_demon.lock")
+
+
+class InstanceLock:
+    """
+    Clase para el bloqueo de instancia única basado en un bloqueo de archivo del sistema operativo.
+
+    Usa `fcntl.flock` en Linux/macOS y `msvcrt.locking` en Windows. El sistema
+    operativo libera el bloqueo cuando el proceso termina, aunque sea de forma
+    abrupta, por lo que un archivo que quedó de una ejecución anterior no impide
+    volver a iniciar. El archivo contiene el PID del proceso que tiene el bloqueo.
+    """
+
+    def __init__(self, ruta=None):
+        """
+        Inicializa el bloqueo.
+
+        Args:
+            ruta: Ruta del archivo de bloqueo. Si es None, usa LOCK_FILE.
+        """
+        self.ruta = ruta or LOCK_FILE
+        self._archivo = None
+
+    def adquirir(self):
+        """
+        Intenta tomar el bloqueo sin esperar.
+
+        Returns:
+            bool: True si se obtuvo el bloqueo, False si otra instancia lo tiene.
+        """
+        if self._archivo is not None:
+            return True
+
+        archivo = open(self.ruta, "a+")
+        try:
+            if os.name == "nt":
+                archivo.seek(0)
+                msvcrt.locking(archivo.fileno(), msvcrt.LK_NBLCK, 1)
+            else:
+                fcntl.flock(archivo.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            archivo.close()
+            return False
+
+        # Registrar el PID del proceso dueño del bloqueo
+        archivo.seek(0)
+        archivo.truncate()
+        archivo.write(str(os.getpid()))
+        archivo.flush()
+        self._archivo = archivo
+        return True
+
+    def pid_dueno(self):
+        """
+        Retorna el PID registrado en el archivo de bloqueo.
+
+        Returns:
+            int: PID del proceso que tiene el bloqueo, o None si no se puede leer.
+        """
+        try:
+            with open(self.ruta, "r") as f:
+                return int(f.read().strip())
+        except (OSError, ValueError):
+            return None
+
+    def liberar(self):
+        """Libera el bloqueo si lo tiene este proceso."""
+        if self._archivo is None:
+            return
+        try:
+            if os.name == "nt":
+                self._archivo.seek(0)
+                msvcrt.locking(self._archivo.fileno(), msvcrt.LK_UNLCK, 1)
+            else:
+                fcntl.flock(self._archivo.fileno(), fcntl.LOCK_UN)
+        except OSError:
+            pass
+        finally:
+            self._archivo.close()
+            self._archivo = None
@@ -0,0 +1,183 @@
+# -*- coding: utf-8 -*-
+"""
+Módulo con el registro (ledger) de documentos enviados a la API, para evitar envíos duplicados.
+"""
+
+import datetime
+import json
+import threading
+from config.database import conectar
+
+# Estados de un documento en el registro
+ESTADO_ENVIANDO = "enviando"    # Se inició el envío y aún no hay respuesta (o la aplicación se cerró)
+ESTADO_ACEPTADO = "aceptado"    # La API aceptó el documento (StatusCode 200 / OK)
+
+
+def es_aceptado(resultado):
+    """
+    Indica si la respuesta de la API corresponde a un documento aceptado.
+
+    Args:
+        resultado: Respuesta de la API o información de error.
+
+    Returns:
+        bool: True si la respuesta trae StatusCode 200 y StatusDesc OK.
+    """
+    return bool(resultado) and resultado.get("StatusCode") == "200" and resultado.get("StatusDesc") == "OK"
+
+
+class SubmissionLedger:
+    """
+    Clase que registra cada documento enviado a la API según el hash de su contenido.
+
+    Antes de enviar un documento se consulta si su hash ya fue aceptado; la
+    consulta se hace contra un conjunto en memoria, cargado una sola vez desde la
+    tabla `ledger`, por lo que no agrega accesos a la base de datos en el camino
+    frecuente. Si el documento ya fue aceptado se retorna la respuesta guardada,
+    sin volver a llamar a la API ni a imprimir. Esto cubre el caso en que la API
+    aceptó el documento pero el TXT no alcanzó a moverse a procesados (error al
+    mover o cierre de la aplicación entre el envío y el movimiento).
+    """
+
+    def __init__(self, db_path=None):
+        """
+        Inicializa el registro.
+
+        Args:
+            db_path: Ruta al archivo de base de datos. Si es None, usa la ruta de DB_CONFIG.
+        """
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._aceptados = None
+
+    def _cargar(self):
+        """Carga en memoria los hashes de los documentos aceptados."""
+        if self._aceptados is None:
+            with self._lock:
+                if self._aceptados is None:
+                    filas = conectar(self.db_path).execute(
+                        "SELECT hash FROM ledger WHERE estado = ?", (ESTADO_ACEPTADO,))
+                    self._aceptados = {fila[0] for fila in filas}
+        return self._aceptados
+
+    def buscar(self, hash_contenido):
+        """
+        Busca un documento aceptado por el hash de su contenido.
+
+        Args:
+            hash_contenido: SHA-256 del contenido del TXT.
+
+        Returns:
+            dict: Respuesta guardada de la API, o None si el documento no fue aceptado.
+        """
+        if not hash_contenido or hash_contenido not in self._cargar():
+            return None
+
+        fila = conectar(self.db_path).execute(
+            "SELECT respuesta FROM ledger WHERE hash = ?", (hash_contenido,)).fetchone()
+        if fila is None:
+            return None
+        try:
+            return json.loads(fila[0]) if fila[0] else {}
+        except ValueError:
+            return {}
+
+    def folio_enviado(self, documento, rut_emisor):
+        """
+        Busca si el folio del documento ya fue aceptado con otro contenido.
+
+        Args:
+            documento: DocumentoDTE a enviar.
+            rut_emisor: RUT de la empresa emisora.
+
+        Returns:
+            str: Hash del documento aceptado con el mismo folio, o None.
+        """
+        if not documento.folio:
+            return None
+        fila = conectar(self.db_path).execute(
+            "SELECT hash FROM ledger WHERE rut_emisor = ? AND tipo_dte = ? AND folio = ? AND estado = ? AND hash <> ?",
+            (rut_emisor, documento.tipo_dte, documento.folio, ESTADO_ACEPTADO, documento.hash_contenido)
+        ).fetchone()
+        return fila[0] if fila else None
+
+    def en_curso(self, hash_contenido):
+        """
+        Indica si un envío anterior del documento quedó sin respuesta registrada.
+
+        Args:
+            hash_contenido: SHA-256 del contenido del TXT.
+
+        Returns:
+            bool: True si el documento quedó en estado "enviando".
+        """
+        fila = conectar(self.db_path).execute(
+            "SELECT estado FROM ledger WHERE hash = ?", (hash_contenido,)).fetchone()
+        return fila is not None and fila[0] == ESTADO_ENVIANDO
+
+    def reservar(self, documento, rut_emisor):
+        """
+        Registra que se inicia el envío de un documento.
+
+        Args:
+            documento: DocumentoDTE a enviar.
+            rut_emisor: RUT de la empresa emisora.
+        """
+        conn = conectar(self.db_path)
+        with conn:
+            conn.execute(
+                "INSERT INTO ledger (hash, tipo_dte, folio, rut_emisor, estado, creado) VALUES (?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT(hash) DO NOTHING",
+                (documento.hash_contenido, documento.tipo_dte, documento.folio, rut_emisor, ESTADO_ENVIANDO,
+                 datetime.datetime.now().isoformat(timespec="seconds"))
+            )
+
+    def confirmar(self, hash_contenido, respuesta):
+        """
+        Registra la respuesta de la API de un documento aceptado.
+
+        Args:
+            hash_contenido: SHA-256 del contenido del TXT.
+            respuesta: Respuesta de la API.
+        """
+        conn = conectar(self.db_path)
+        with conn:
+            conn.execute(
+                "UPDATE ledger SET estado = ?, respuesta = ?, confirmado = ? WHERE hash = ?",
+                (ESTADO_ACEPTADO, json.dumps(respuesta), datetime.datetime.now().isoformat(timespec="seconds"),
+                 hash_contenido)
+            )
+        with self._lock:
+            if self._aceptados is not None:
+                self._aceptados.add(hash_contenido)
+
+    def liberar(self, hash_contenido):
+        """
+        Quita la reserva de un documento cuyo envío falló, para que pueda enviarse de nuevo.
+
+        Args:
+            hash_contenido: SHA-256 del contenido del TXT.
+        """
+        conn = conectar(self.db_path)
+        with conn:
+            conn.execute("DELETE FROM ledger WHERE hash = ? AND estado = ?", (hash_contenido, ESTADO_ENVIANDO))
+
+
+# Registro compartido por toda la aplicación
+_ledger = None
+_ledger_lock = threading.Lock()
+
+
+def obtener_ledger():
+    """
+    Retorna el registro de envíos compartido, creándolo la primera vez.
+
+    Returns:
+        SubmissionLedger: Registro de envíos.
+    """
+    global _ledger
+    if _ledger is None:
+        with _ledger_lock:
+            if _ledger is None:
+                _ledger = SubmissionLedger()
+    return _ledger
@@ -0,0 +1,186 @@
+# -*- coding: utf-8 -*-
+"""
+Módulo con la vista acotada de logs para el widget de texto de Tkinter.
+"""
+
+import re
+import threading
+from collections import deque
+from datetime import datetime
+from config.database import conectar
+from config.settings import LOG_CONFIG
+
+# Fecha y hora al inicio de cada línea de log ("dd/mm/aaaa HH:MM:SS - [TIPO] mensaje")
+PATRON_FECHA = re.compile(r"^(\d{2}/\d{2}/\d{4} \d{2}:\d{2}:\d{2}) - ", re.MULTILINE)
+
+# Fecha y hora de log_procesos en un formato que se ordena como texto (aaaammdd HH:MM:SS)
+SQL_MOMENTO = "substr(fecha, 7, 4) || substr(fecha, 4, 2) || substr(fecha, 1, 2) || ' ' || hora"
+
+
+def leer_historial(antes_de=None, rowid_menor=None, limite=None, db_path=None):
+    """
+    Lee de log_procesos los registros anteriores a un momento o a un registro dado.
+
+    La tabla se recorre desde el registro más reciente, por lo que el costo
+    depende de la cantidad de registros leídos y no del tamaño de la tabla.
+
+    Args:
+        antes_de: Momento límite "aaaammdd HH:MM:SS"; se incluyen los registros de ese segundo (opcional).
+        rowid_menor: Solo registros con rowid menor a este valor (opcional).
+        limite: Cantidad máxima de registros. Por defecto LOG_CONFIG["lote_historial"].
+        db_path: Ruta al archivo de base de datos. Si es None, usa la ruta de DB_CONFIG.
+
+    Returns:
+        list: Filas (rowid, fecha, hora, tipo, asunto) de la más reciente a la más antigua.
+    """
+    condiciones, parametros = [], []
+    if antes_de is not None:
+        condiciones.append(f"{SQL_MOMENTO} <= ?")
+        parametros.append(antes_de)
+    if rowid_menor is not None:
+        condiciones.append("rowid < ?")
+        parametros.append(rowid_menor)
+    donde = f"WHERE {' AND '.join(condiciones)} " if condiciones else ""
+    parametros.append(limite or LOG_CONFIG["lote_historial"])
+    return conectar(db_path).execute(
+        f"SELECT rowid, fecha, hora, tipo, asunto FROM log_procesos {donde}ORDER BY rowid DESC LIMIT ?",
+        parametros
+    ).fetchall()
+
+
+class LogView:
+    """
+    Clase para mostrar logs en un widget de texto con un máximo de líneas.
+
+    `agregar()` se puede llamar desde cualquier hilo: solo acumula el mensaje en
+    un buffer circular. Desde el hilo de Tkinter, cada LOG_CONFIG["intervalo_vista_ms"]
+    los mensajes acumulados se insertan con una sola operación, se eliminan las
+    líneas más antiguas que exceden LOG_CONFIG["lineas_visibles"] y se desplaza al
+    final solo si el usuario no está revisando líneas anteriores. Los logs que ya
+    no están en pantalla se leen de la base de datos con `cargar_anteriores()`.
+    """
+
+    def __init__(self, log_textbox, lineas=None, intervalo_ms=None, db_path=None):
+        """
+        Inicializa la vista y programa el volcado periódico.
+
+        Args:
+            log_textbox: Widget tk.Text de solo lectura donde se muestran los logs.
+            lineas: Líneas máximas visibles. Por defecto LOG_CONFIG["lineas_visibles"].
+            intervalo_ms: Intervalo de volcado. Por defecto LOG_CONFIG["intervalo_vista_ms"].
+            db_path: Ruta al archivo de base de datos. Si es None, usa la ruta de DB_CONFIG.
+        """
+        self.log_textbox = log_textbox
+        self.lineas = max(1, int(lineas or LOG_CONFIG["lineas_visibles"]))
+        self.intervalo_ms = intervalo_ms or LOG_CONFIG["intervalo_vista_ms"]
+        self.db_path = db_path
+        # Cada mensaje ocupa al menos una línea: nunca se acumulan más de los que caben,
+        # reservando una para el aviso de mensajes omitidos
+        self._pendientes = deque(maxlen=max(1, self.lineas - 1))
+        self._lock = threading.Lock()
+        self._omitidos = 0
+        # rowid del registro más antiguo mostrado desde el historial (None: aún no se carga)
+        self._rowid_historial = None
+        # Líneas que ya estaban en pantalla del segundo en que empieza el historial
+        self._visibles = set()
+        self.log_textbox.after(self.intervalo_ms, self._volcar)
+
+    def agregar(self, mensaje):
+        """
+        Acumula un mensaje para mostrarlo en el próximo volcado. Nunca bloquea a Tkinter.
+
+        Args:
+            mensaje: Texto del mensaje, terminado en salto de línea.
+        """
+        with self._lock:
+            if len(self._pendientes) == self._pendientes.maxlen:
+                self._omitidos += 1
+            self._pendientes.append(mensaje)
+
+    def _volcar(self):
+        """Inserta los mensajes acumulados y recorta el widget (hilo principal)."""
+        with self._lock:
+            mensajes = list(self._pendientes)
+            self._pendientes.clear()
+            omitidos, self._omitidos = self._omitidos, 0
+
+        if mensajes:
+            if omitidos:
+                mensajes.insert(0, f"... {omitidos} mensajes no mostrados (ver historial en la base de datos)\n")
+            try:
+                self._insertar("".join(mensajes))
+            except Exception as e:
+                print(f"Error al insertar en textbox: {str(e)}")
+
+        try:
+            self.log_textbox.after(self.intervalo_ms, self._volcar)
+        except Exception as e:
+            print(f"Error al programar volcado de logs: {str(e)}")
+
+    def _insertar(self, texto):
+        """Agrega texto al final, elimina las líneas sobrantes y sigue el final si corresponde."""
+        al_final = self.log_textbox.yview()[1] >= 0.999
+        self.log_textbox.config(state="normal")
+        self.log_textbox.insert("end", texto)
+        # Mientras el usuario revisa líneas anteriores se tolera el doble antes de recortar
+        self._recortar(self.lineas if al_final else 2 * self.lineas)
+        self.log_textbox.config(state="disabled")
+        if al_final:
+            self.log_textbox.see("end")
+
+    def _recortar(self, maximo):
+        """Elimina las líneas más antiguas que exceden el máximo."""
+        # Tras el último salto de línea queda una línea vacía que no se cuenta
+        total = int(self.log_textbox.index("end-1c").split(".")[0]) - 1
+        if total > maximo:
+            self.log_textbox.delete("1.0", f"{total - maximo + 1}.0")
+            # El historial cargado ya no está completo en pantalla
+            self._rowid_historial = None
+
+    def cargar_anteriores(self, limite=None):
+        """
+        Muestra al inicio del widget los logs guardados anteriores a la primera línea visible.
+
+        La primera vez se buscan los registros hasta el momento de la línea más
+        antigua en pantalla (sin repetir las que ya se ven); las siguientes
+        continúan desde el último registro cargado.
+
+        Args:
+            limite: Cantidad de registros a leer. Por defecto LOG_CONFIG["lote_historial"].
+
+        Returns:
+            int: Cantidad de registros agregados (0 si no hay más).
+
+        Raises:
+            sqlite3.Error: Si no se puede leer la base de datos.
+        """
+        momento = None
+        if self._rowid_historial is None:
+            self._visibles = set()
+            encontrada = PATRON_FECHA.search(self.log_textbox.get("1.0", "200.0"))
+            if encontrada:
+                fecha_hora = encontrada.group(1)
+                momento = datetime.strptime(fecha_hora, "%d/%m/%Y %H:%M:%S").strftime("%Y%m%d %H:%M:%S")
+                # Líneas de ese mismo segundo que ya están en pantalla
+                self._visibles = {linea for linea in self.log_textbox.get("1.0", "end-1c").splitlines()
+                                  if linea.startswith(fecha_hora)}
+
+        lineas = []
+        while not lineas:
+            if self._rowid_historial is None:
+                filas = leer_historial(antes_de=momento, limite=limite, db_path=self.db_path)
+            else:
+                filas = leer_historial(rowid_menor=self._rowid_historial, limite=limite, db_path=self.db_path)
+            if not filas:
+                return 0
+            self._rowid_historial = filas[-1][0]
+            for _, fecha, hora, tipo, asunto in reversed(filas):
+                linea = f"{fecha} {hora} - [{tipo}] {asunto}"
+                if linea not in self._visibles:
+                    lineas.append(linea + "\n")
+
+        self.log_textbox.config(state="normal")
+        self.log_textbox.insert("1.0", "".join(lineas))
+        self.log_textbox.config(state="disabled")
+        self.log_textbox.see("1.0")
+        return len(lineas)
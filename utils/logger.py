@@ -4,31 +4,69 @@ Módulo para funciones de registro (logging).
 """
 
 import os
-import sqlite3
-import tkinter as tk
+import sys
+import threading
 from datetime import datetime
-from config.settings import DB_CONFIG
+from config.settings import DB_CONFIG, LOG_CONFIG
+from utils.batch_writer import BatchWriter
+from utils.log_view import LogView
+
+# Tabla de logs; se crea al abrir la conexión del escritor si no existe
+SQL_TABLA_LOG = """
+    CREATE TABLE IF NOT EXISTS "log_procesos" (
+        "fecha" TEXT NOT NULL,
+        "hora" TEXT,
+        "tipo" TEXT,
+        "asunto" TEXT
+    );
+"""
 
 class Logger:
-    """Clase para gestionar los logs de la aplicación."""
+    """
+    Clase para gestionar los logs de la aplicación.
+    
+    Puede usarse desde cualquier hilo: los mensajes se acumulan en una vista
+    acotada (LogView) que los inserta en el textbox por lotes desde el hilo
+    principal. Sin textbox (modo servicio) los mensajes se escriben en la
+    salida estándar.
+    """
 
-    def __init__(self, log_textbox):
+    def __init__(self, log_textbox=None):
         """
         Inicializa el logger.
 
         Args:
-            log_textbox: Widget de texto donde se mostrarán los logs.
+            log_textbox: Vista de logs (LogView) o widget de texto donde se mostrarán
+                         los logs. Si es None, los mensajes se escriben en la salida estándar.
         """
         self.log_textbox = log_textbox
+        self._lock_consola = threading.Lock()
+        
+        # Los mensajes se acumulan y se vuelcan al textbox por lotes, con un máximo de líneas
+        self.vista = None
+        if log_textbox is not None:
+            self.vista = log_textbox if isinstance(log_textbox, LogView) else LogView(log_textbox)
         
         # Asegurar que el directorio donde se almacenará la base de datos exista
         db_dir = os.path.dirname(DB_CONFIG["path"])
         if db_dir and not os.path.exists(db_dir):
             os.makedirs(db_dir)
+        
+        # Los mensajes se guardan por lotes en un hilo aparte; log_message no espera al disco
+        self._escritor_db = BatchWriter(
+            DB_CONFIG["path"],
+            "INSERT INTO log_procesos(fecha, hora, tipo, asunto) VALUES (?, ?, ?, ?)",
+            tamano_lote=LOG_CONFIG["tamano_lote"],
+            intervalo=LOG_CONFIG["intervalo_escritura"],
+            sql_preparar=SQL_TABLA_LOG,
+            nombre="LoggerDB"
+        )
 
     def log_message(self, message, tipo="INFO"):
         """
         Registra un mensaje en el textbox y en la base de datos SQLite.
+        
+        La escritura en la base de datos se hace por lotes en segundo plano.
 
         Args:
             message: Mensaje a registrar.
@@ -67,40 +105,38 @@ class Logger:
         self._insert_into_textbox(full_message)
 
     def _insert_into_textbox(self, full_message):
-        """Muestra el mensaje en el widget de logs."""
-        try:
-            self.log_textbox.config(state=tk.NORMAL)
-            self.log_textbox.insert(tk.END, full_message)
-            self.log_textbox.config(state=tk.DISABLED)
-            self.log_textbox.see(tk.END)
-        except Exception as e:
-            print(f"Error al insertar en textbox: {str(e)}")
+        """Muestra el mensaje en el widget de logs (o en la salida estándar si no hay widget)."""
+        if self.vista is None:
+            with self._lock_consola:
+                sys.stdout.write(full_message)
+                sys.stdout.flush()
+            return
+        
+        # La vista solo acumula el mensaje; Tkinter lo inserta en el próximo volcado
+        self.vista.agregar(full_message)
 
     def _save_to_db(self, date, time, tipo, message):
-        """Guarda el mensaje en la base de datos SQLite."""
-        try:
-            # Asegurar que la tabla log_procesos existe antes de intentar insertar
-            with sqlite3.connect(DB_CONFIG["path"]) as conn:
-                cursor = conn.cursor()
-                
-                # Verificar si la tabla log_procesos existe
-                cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='log_procesos'")
-                if not cursor.fetchone():
-                    # Si no existe, crearla
-                    cursor.execute("""
-                        CREATE TABLE IF NOT EXISTS "log_procesos" (
-                            "fecha" TEXT NOT NULL,
-                            "hora" TEXT,
-                            "tipo" TEXT,
-                            "asunto" TEXT
-                        )
-                    """)
-                    conn.commit()
-                
-                # Insertar el log
-                cursor.execute("INSERT INTO log_procesos(fecha, hora, tipo, asunto) VALUES (?, ?, ?, ?)",
-                               (date, time, tipo, message))
-                conn.commit()
-        except sqlite3.Error as e:
-            # En caso de error, lanzar la excepción para manejarla en el método llamador
-            raise Exception(f"Error SQLite al guardar log: {str(e)}")
\ No newline at end of file
+        """Encola el mensaje para guardarlo en la base de datos SQLite en el próximo lote."""
+        self._escritor_db.agregar((date, time, tipo, message))
+
+    def estado_escritura(self):
+        """
+        Retorna el estado de la escritura de logs en la base de datos (ver BatchWriter.estado).
+
+        Returns:
+            dict: Mensajes pendientes, retraso del más antiguo en segundos, escritos y perdidos.
+        """
+        return self._escritor_db.estado()
+
+    def vaciar(self, timeout=None):
+        """
+        Escribe en la base de datos los mensajes pendientes y espera a que terminen.
+
+        Args:
+            timeout: Tiempo máximo de espera en segundos (opcional).
+        """
+        self._escritor_db.vaciar(timeout)
+
+    def cerrar(self):
+        """Escribe los mensajes pendientes y detiene la escritura en segundo plano."""
+        self._escritor_db.cerrar()
@@ -0,0 +1,291 @@
+# -*- coding: utf-8 -*-
+"""
+Módulo para registrar el tiempo de cada etapa del procesamiento de un documento.
+"""
+
+import bisect
+import contextlib
+import datetime
+import threading
+import time
+from config.database import conectar
+from config.settings import DB_CONFIG, METRICAS_CONFIG
+from utils.batch_writer import BatchWriter
+
+# Etapas registradas en la tabla metricas_etapas
+ETAPA_ESCANEO = "escaneo"               # Revisión de la carpeta de entrada (sin archivo)
+ETAPA_PARSEO = "parseo"                 # Lectura e interpretación del TXT
+ETAPA_BODY = "body"                     # Validación local y construcción del body
+ETAPA_API = "api"                       # POST a la API (incluye la espera de la respuesta)
+ETAPA_MOVIMIENTO = "movimiento"         # Movimiento del TXT a procesados, error o cuarentena
+ETAPA_DOCUMENTO = "documento"           # Desde que se toma el archivo hasta que se archiva
+ETAPA_DESCARGA_PDF = "descarga_pdf"     # Descarga del PDF entregado por la API
+ETAPA_ARCHIVADO_PDF = "archivado_pdf"   # Copia del PDF a la carpeta de descargas
+ETAPA_IMPRESION = "impresion"           # Impresión de un trabajo (con todas sus copias)
+
+SQL_INSERTAR = ("INSERT INTO metricas_etapas (inicio, etapa, archivo, tipo_dte, folio, duracion_ms, exito, detalle) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)")
+
+
+def _fecha(instante):
+    """Convierte un instante (time.time) a texto ISO con milisegundos, en hora local."""
+    return datetime.datetime.fromtimestamp(instante).isoformat(sep=" ", timespec="milliseconds")
+
+
+class Span:
+    """
+    Medición en curso de una etapa (ver MetricsRecorder.medir).
+
+    Dentro del bloque se puede completar el documento (p. ej. después de
+    interpretarlo) o marcar la etapa como fallida con un detalle.
+    """
+
+    __slots__ = ("etapa", "archivo", "tipo_dte", "folio", "exito", "detalle")
+
+    def __init__(self, etapa, documento=None, archivo=None, detalle=None):
+        self.etapa = etapa
+        self.archivo = archivo
+        self.tipo_dte = None
+        self.folio = None
+        self.exito = True
+        self.detalle = detalle
+        if documento is not None:
+            self.asignar_documento(documento)
+
+    def asignar_documento(self, documento):
+        """Toma el nombre de archivo, tipo de DTE y folio de un DocumentoDTE."""
+        self.archivo = documento.nombre
+        self.tipo_dte = documento.tipo_dte
+        self.folio = documento.folio
+
+    def fallar(self, detalle=None):
+        """Marca la etapa como fallida."""
+        self.exito = False
+        if detalle is not None:
+            self.detalle = detalle
+
+
+class Histograma:
+    """
+    Distribución en memoria de las duraciones de una etapa.
+
+    Cuenta las duraciones por intervalo (límites en segundos), su suma y las
+    etapas fallidas, como un histograma de Prometheus.
+    """
+
+    __slots__ = ("limites", "conteos", "suma", "cantidad", "fallidas")
+
+    def __init__(self, limites):
+        self.limites = limites
+        self.conteos = [0] * (len(limites) + 1)  # El último intervalo es +Inf
+        self.suma = 0.0
+        self.cantidad = 0
+        self.fallidas = 0
+
+    def agregar(self, duracion, exito=True):
+        """Cuenta una duración en segundos."""
+        self.conteos[bisect.bisect_left(self.limites, duracion)] += 1
+        self.suma += duracion
+        self.cantidad += 1
+        if not exito:
+            self.fallidas += 1
+
+    def como_dict(self):
+        """
+        Retorna el histograma con los conteos acumulados.
+
+        Returns:
+            dict: Conteos acumulados por límite (lista de pares [límite, conteo], el último
+            con límite None para +Inf), suma en segundos, cantidad y fallidas.
+        """
+        acumulados = []
+        total = 0
+        for limite, conteo in zip(self.limites + (None,), self.conteos):
+            total += conteo
+            acumulados.append([limite, total])
+        return {"intervalos": acumulados, "suma": self.suma, "cantidad": self.cantidad, "fallidas": self.fallidas}
+
+
+class MetricsRecorder:
+    """
+    Clase para guardar el tiempo de cada etapa en la tabla metricas_etapas.
+
+    Cada registro lleva la etapa, el instante de inicio, la duración en
+    milisegundos, el archivo, el tipo de DTE, el folio y si la etapa terminó bien.
+    La escritura se hace por lotes en segundo plano (BatchWriter), por lo que
+    registrar una etapa solo encola una fila.
+
+    Además mantiene en memoria un histograma por etapa y contadores (p. ej.
+    documentos por resultado) desde el inicio de la aplicación, que consulta el
+    endpoint de métricas (utils.monitor) sin tocar la base de datos.
+
+    Ejemplo de consulta (p95 de la API por hora de un día):
+        SELECT strftime('%H', inicio) AS hora, duracion_ms FROM metricas_etapas
+        WHERE etapa = 'api' AND inicio BETWEEN '2025-03-11' AND '2025-03-12' ORDER BY hora, duracion_ms
+    """
+
+    def __init__(self, db_path=None):
+        """
+        Inicializa el registro de métricas.
+
+        Args:
+            db_path: Ruta al archivo de base de datos. Si es None, usa la ruta de DB_CONFIG.
+        """
+        self.db_path = db_path
+        self.habilitado = bool(METRICAS_CONFIG["habilitado"])
+        self._escritor = None
+        self.limites = tuple(sorted(float(limite) for limite in METRICAS_CONFIG["limites_histograma"]))
+        self._histogramas = {}
+        self._contadores = {}
+        self._lock = threading.Lock()
+        if self.habilitado:
+            self._escritor = BatchWriter(
+                db_path or DB_CONFIG["path"], SQL_INSERTAR,
+                tamano_lote=METRICAS_CONFIG["tamano_lote"],
+                intervalo=METRICAS_CONFIG["intervalo_escritura"],
+                nombre="MetricasDB"
+            )
+
+    def registrar(self, etapa, duracion, documento=None, archivo=None, exito=True, detalle=None, inicio=None):
+        """
+        Registra la duración de una etapa ya terminada.
+
+        Args:
+            etapa: Nombre de la etapa (ver ETAPA_*).
+            duracion: Duración en segundos.
+            documento: DocumentoDTE procesado (opcional).
+            archivo: Nombre del archivo, si no se entrega el documento (opcional).
+            exito: Si la etapa terminó bien.
+            detalle: Texto adicional (p. ej. el código de respuesta) (opcional).
+            inicio: Instante de inicio (time.time). Por defecto, ahora menos la duración.
+        """
+        span = Span(etapa, documento, archivo, detalle)
+        span.exito = exito
+        self._guardar(span, duracion, inicio)
+
+    @contextlib.contextmanager
+    def medir(self, etapa, documento=None, archivo=None, detalle=None):
+        """
+        Mide la duración de un bloque de código como una etapa.
+
+        Si el bloque lanza una excepción, la etapa se registra como fallida y la
+        excepción se propaga.
+
+        Args:
+            etapa: Nombre de la etapa (ver ETAPA_*).
+            documento: DocumentoDTE procesado (opcional).
+            archivo: Nombre del archivo, si no se entrega el documento (opcional).
+            detalle: Texto adicional (opcional).
+
+        Yields:
+            Span: Medición en curso.
+        """
+        span = Span(etapa, documento, archivo, detalle)
+        inicio = time.time()
+        comienzo = time.perf_counter()
+        try:
+            yield span
+        except BaseException as e:
+            span.fallar(span.detalle or f"{type(e).__name__}: {e}")
+            raise
+        finally:
+            self._guardar(span, time.perf_counter() - comienzo, inicio)
+
+    def _guardar(self, span, duracion, inicio=None):
+        """Cuenta la duración en el histograma de la etapa y encola su fila."""
+        with self._lock:
+            histograma = self._histogramas.get(span.etapa)
+            if histograma is None:
+                histograma = self._histogramas[span.etapa] = Histograma(self.limites)
+            histograma.agregar(duracion, span.exito)
+        if self._escritor is None:
+            return
+        if inicio is None:
+            inicio = time.time() - duracion
+        self._escritor.agregar((_fecha(inicio), span.etapa, span.archivo, span.tipo_dte, span.folio,
+                                round(duracion * 1000, 3), int(bool(span.exito)), span.detalle))
+
+    def contar(self, contador, etiqueta=None, cantidad=1):
+        """
+        Incrementa un contador en memoria.
+
+        Args:
+            contador: Nombre del contador (p. ej. "documentos").
+            etiqueta: Valor que distingue la serie dentro del contador (p. ej. "aceptado") (opcional).
+            cantidad: Incremento.
+        """
+        with self._lock:
+            clave = (contador, etiqueta)
+            self._contadores[clave] = self._contadores.get(clave, 0) + cantidad
+
+    def instantanea(self):
+        """
+        Retorna una copia de los histogramas y contadores en memoria.
+
+        Returns:
+            dict: {"etapas": {etapa: histograma (ver Histograma.como_dict)},
+            "contadores": {contador: {etiqueta: valor}}}.
+        """
+        with self._lock:
+            etapas = {etapa: histograma.como_dict() for etapa, histograma in self._histogramas.items()}
+            contadores = {}
+            for (contador, etiqueta), valor in self._contadores.items():
+                contadores.setdefault(contador, {})[etiqueta] = valor
+        return {"etapas": etapas, "contadores": contadores}
+
+    def estado_escritura(self):
+        """
+        Retorna el estado de la escritura en segundo plano (ver BatchWriter.estado).
+
+        Returns:
+            dict: Estado del escritor, o None si el registro en la tabla está deshabilitado.
+        """
+        return self._escritor.estado() if self._escritor else None
+
+    def purgar(self, dias=None):
+        """
+        Elimina los registros más antiguos que la retención configurada.
+
+        Args:
+            dias: Días a conservar. Por defecto, METRICAS_CONFIG["retencion_dias"] (0: no elimina nada).
+
+        Returns:
+            int: Cantidad de registros eliminados.
+        """
+        dias = METRICAS_CONFIG["retencion_dias"] if dias is None else dias
+        if not dias:
+            return 0
+        limite = _fecha(time.time() - dias * 86400)
+        conn = conectar(self.db_path)
+        with conn:
+            return conn.execute("DELETE FROM metricas_etapas WHERE inicio < ?", (limite,)).rowcount
+
+    def vaciar(self, timeout=None):
+        """Escribe los registros pendientes y espera a que terminen."""
+        if self._escritor:
+            self._escritor.vaciar(timeout)
+
+    def cerrar(self):
+        """Escribe los registros pendientes y detiene la escritura en segundo plano."""
+        if self._escritor:
+            self._escritor.cerrar()
+
+
+# Registro compartido por toda la aplicación
+_metricas = None
+_metricas_lock = threading.Lock()
+
+
+def obtener_metricas():
+    """
+    Retorna el registro de métricas compartido, creándolo la primera vez.
+
+    Returns:
+        MetricsRecorder: Registro de métricas.
+    """
+    global _metricas
+    if _metricas is None:
+        with _metricas_lock:
+            if _metricas is None:
+                _metricas = MetricsRecorder()
+    return _metricas
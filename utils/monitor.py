@@ -0,0 +1,290 @@
+# -*- coding: utf-8 -*-
+"""
+Módulo con el endpoint HTTP local de métricas del procesamiento (formato Prometheus y JSON).
+"""
+
+import json
+import sqlite3
+import threading
+import time
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from config.settings import MONITOR_CONFIG
+from utils.metricas import obtener_metricas
+
+# Rutas del endpoint
+RUTA_PROMETHEUS = "/metrics"
+RUTA_JSON = "/metrics.json"
+
+# Prefijo de los nombres de las métricas
+PREFIJO = "bowa"
+
+# Resultados de documento que siempre se informan (aunque estén en cero)
+RESULTADOS_DOCUMENTO = ("aceptado", "fallido", "retenido")
+
+TIPO_PROMETHEUS = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _etiquetas(**valores):
+    """Formatea las etiquetas de una muestra de Prometheus, escapando sus valores."""
+    if not valores:
+        return ""
+    partes = []
+    for nombre, valor in valores.items():
+        texto = str(valor).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+        partes.append(f'{nombre}="{texto}"')
+    return "{" + ",".join(partes) + "}"
+
+
+def _numero(valor):
+    """Formatea un valor numérico de Prometheus."""
+    if isinstance(valor, bool):
+        return "1" if valor else "0"
+    if isinstance(valor, float):
+        return repr(valor)
+    return str(valor)
+
+
+def formato_prometheus(estado):
+    """
+    Convierte el estado recolectado al formato de texto de Prometheus (0.0.4).
+
+    Args:
+        estado: Diccionario retornado por MonitorServer.recolectar.
+
+    Returns:
+        str: Texto de la exposición, con una línea HELP y TYPE por métrica.
+    """
+    lineas = []
+
+    def metrica(nombre, tipo, ayuda, muestras):
+        nombre = f"{PREFIJO}_{nombre}"
+        muestras = [(sufijo, etiquetas, valor) for sufijo, etiquetas, valor in muestras if valor is not None]
+        if not muestras:
+            return
+        lineas.append(f"# HELP {nombre} {ayuda}")
+        lineas.append(f"# TYPE {nombre} {tipo}")
+        for sufijo, etiquetas, valor in muestras:
+            lineas.append(f"{nombre}{sufijo}{_etiquetas(**etiquetas)} {_numero(valor)}")
+
+    def gauge(nombre, ayuda, valor):
+        metrica(nombre, "gauge", ayuda, [("", {}, valor)])
+
+    procesamiento = estado["procesamiento"]
+    metrica("inicio_segundos", "gauge", "Instante de inicio de la aplicación (segundos desde epoch).",
+            [("", {}, estado["inicio"])])
+    gauge("procesando", "1 si el procesamiento de la carpeta de entrada está activo.", procesamiento["procesando"])
+    metrica("documentos_total", "counter", "Documentos terminados desde el inicio, por resultado.",
+            [("", {"resultado": resultado}, valor) for resultado, valor in estado["documentos"].items()])
+    gauge("entrada_pendientes", "Archivos TXT pendientes en ruta_procesar según la última revisión.",
+          procesamiento["pendientes_entrada"])
+    gauge("api_en_vuelo", "Documentos enviados a la API sin respuesta entregada.", procesamiento["en_vuelo"])
+    gauge("api_max_en_vuelo", "Máximo de documentos en vuelo (PROCESS_CONFIG).", procesamiento["max_en_vuelo"])
+    gauge("bandeja_salida_documentos", "Documentos retenidos en la bandeja de salida esperando a la API.",
+          procesamiento["retenidos"])
+    gauge("pdf_pendientes", "PDFs en cola o en descarga.", procesamiento["pdf_pendientes"])
+    gauge("impresion_pendientes", "Trabajos en la cola de impresión o imprimiéndose.",
+          procesamiento["impresion_pendientes"])
+
+    errores = estado["carpeta_error"]
+    if errores:
+        gauge("error_archivos", "Archivos en la carpeta de error.", errores["total"])
+        gauge("error_reintentables", "Archivos de la carpeta de error que se reintentarán.", errores["reintentables"])
+
+    escritura = estado["escritura"]
+    metrica("escritura_pendientes", "gauge", "Filas en memoria pendientes de escribir en SQLite, por escritor.",
+            [("", {"escritor": nombre}, datos["pendientes"]) for nombre, datos in escritura.items()])
+    metrica("escritura_retraso_segundos", "gauge", "Segundos que lleva esperando la fila pendiente más antigua.",
+            [("", {"escritor": nombre}, datos["retraso"]) for nombre, datos in escritura.items()])
+    metrica("escritura_filas_total", "counter", "Filas escritas en SQLite, por escritor.",
+            [("", {"escritor": nombre}, datos["escritas"]) for nombre, datos in escritura.items()])
+    metrica("escritura_errores_total", "counter", "Filas que no se pudieron escribir, por escritor.",
+            [("", {"escritor": nombre}, datos["errores"]) for nombre, datos in escritura.items()])
+
+    muestras = []
+    fallidas = []
+    for etapa, histograma in estado["etapas"].items():
+        for limite, conteo in histograma["intervalos"]:
+            le = "+Inf" if limite is None else repr(float(limite))
+            muestras.append(("_bucket", {"etapa": etapa, "le": le}, conteo))
+        muestras.append(("_sum", {"etapa": etapa}, histograma["suma"]))
+        muestras.append(("_count", {"etapa": etapa}, histograma["cantidad"]))
+        fallidas.append(("", {"etapa": etapa}, histograma["fallidas"]))
+    metrica("etapa_duracion_segundos", "histogram",
+            "Duración de cada etapa (api: POST a la API; documento: desde que se toma hasta que se archiva).",
+            muestras)
+    metrica("etapa_fallidas_total", "counter", "Etapas terminadas con error.", fallidas)
+
+    return "\n".join(lineas) + "\n"
+
+
+class _ManejadorMonitor(BaseHTTPRequestHandler):
+    """Atiende las consultas del endpoint (el monitor está en self.server.monitor)."""
+
+    def do_GET(self):
+        ruta = self.path.split("?", 1)[0]
+        if ruta not in (RUTA_PROMETHEUS, RUTA_JSON):
+            self._responder(404, "text/plain; charset=utf-8", f"Rutas: {RUTA_PROMETHEUS}, {RUTA_JSON}\n")
+            return
+        try:
+            estado = self.server.monitor.recolectar()
+        except Exception as e:
+            self._responder(500, "text/plain; charset=utf-8", f"Error al recolectar métricas: {e}\n")
+            return
+        if ruta == RUTA_JSON:
+            self._responder(200, "application/json", json.dumps(estado, ensure_ascii=False))
+        else:
+            self._responder(200, TIPO_PROMETHEUS, formato_prometheus(estado))
+
+    def _responder(self, codigo, tipo, texto):
+        datos = texto.encode("utf-8")
+        self.send_response(codigo)
+        self.send_header("Content-Type", tipo)
+        self.send_header("Content-Length", str(len(datos)))
+        self.end_headers()
+        self.wfile.write(datos)
+
+    def log_message(self, format, *args):
+        # Una línea de log por consulta llenaría el registro con cada sondeo del recolector
+        pass
+
+
+class MonitorServer:
+    """
+    Clase con un servidor HTTP local que expone el estado del procesamiento.
+
+    GET /metrics entrega el formato de texto de Prometheus y GET /metrics.json
+    el mismo contenido en JSON. Cada consulta solo lee contadores en memoria
+    (FileProcessor.estado, los histogramas de MetricsRecorder y el estado de los
+    escritores por lotes); el único acceso a la base de datos es el conteo de la
+    carpeta de error, que se reutiliza durante MONITOR_CONFIG["cache_errores"]
+    segundos. Entre consultas el servidor no consume CPU.
+    """
+
+    def __init__(self, file_processor, host=None, puerto=None, logger=None):
+        """
+        Inicializa el endpoint (no lo inicia).
+
+        Args:
+            file_processor: FileProcessor cuyo estado se expone.
+            host: Dirección de escucha. Por defecto MONITOR_CONFIG["host"].
+            puerto: Puerto (0 elige uno libre). Por defecto MONITOR_CONFIG["puerto"].
+            logger: Objeto Logger para registrar eventos (por defecto, el del procesador).
+        """
+        self.file_processor = file_processor
+        self.host = host or MONITOR_CONFIG["host"]
+        self.puerto = MONITOR_CONFIG["puerto"] if puerto is None else puerto
+        self.logger = logger or file_processor.logger
+        self.inicio = time.time()
+        self._servidor = None
+        self._hilo = None
+        self._lock_errores = threading.Lock()
+        self._errores = None
+        self._errores_hasta = 0.0
+
+    @property
+    def url(self):
+        """URL del endpoint en formato Prometheus."""
+        return f"http://{self.host}:{self.puerto}{RUTA_PROMETHEUS}"
+
+    def iniciar(self):
+        """
+        Inicia el servidor en un hilo en segundo plano.
+
+        Returns:
+            str: URL del endpoint en formato Prometheus.
+
+        Raises:
+            OSError: Si no se puede abrir el puerto (p. ej. ya está en uso).
+        """
+        self._servidor = ThreadingHTTPServer((self.host, self.puerto), _ManejadorMonitor)
+        self._servidor.daemon_threads = True
+        self._servidor.monitor = self
+        self.puerto = self._servidor.server_address[1]
+        self._hilo = threading.Thread(target=self._servidor.serve_forever, name="MonitorServer", daemon=True)
+        self._hilo.start()
+        if self.logger:
+            self.logger.log_message(f"Métricas disponibles en {self.url}", "INFO")
+        return self.url
+
+    def detener(self):
+        """Detiene el servidor y espera a su hilo."""
+        if self._servidor is not None:
+            self._servidor.shutdown()
+            self._servidor.server_close()
+            self._hilo.join()
+            self._servidor = None
+
+    def recolectar(self):
+        """
+        Reúne el estado actual del procesamiento.
+
+        Returns:
+            dict: Hora, inicio, estado de las colas (ver FileProcessor.estado), documentos
+            por resultado, carpeta de error, estado de los escritores por lotes e
+            histogramas por etapa (ver MetricsRecorder.instantanea).
+        """
+        metricas = obtener_metricas()
+        instantanea = metricas.instantanea()
+        documentos = dict.fromkeys(RESULTADOS_DOCUMENTO, 0)
+        documentos.update(instantanea["contadores"].get("documentos", {}))
+
+        escritura = {}
+        if self.logger:
+            escritura["log"] = self.logger.estado_escritura()
+        estado_metricas = metricas.estado_escritura()
+        if estado_metricas is not None:
+            escritura["metricas"] = estado_metricas
+
+        return {
+            "hora": time.time(),
+            "inicio": self.inicio,
+            "procesamiento": self.file_processor.estado(),
+            "documentos": documentos,
+            "carpeta_error": self._contar_errores(),
+            "escritura": escritura,
+            "etapas": instantanea["etapas"]
+        }
+
+    def _contar_errores(self):
+        """Retorna el conteo de la carpeta de error, reutilizándolo unos segundos entre consultas."""
+        with self._lock_errores:
+            ahora = time.monotonic()
+            if ahora >= self._errores_hasta:
+                try:
+                    self._errores = self.file_processor.reprocesador.contar()
+                except sqlite3.Error:
+                    self._errores = None
+                self._errores_hasta = ahora + MONITOR_CONFIG["cache_errores"]
+            return self._errores
+
+
+def iniciar_monitor(file_processor, logger=None, direccion=None):
+    """
+    Inicia el endpoint de métricas si se indicó una dirección o está habilitado en MONITOR_CONFIG.
+
+    Un error al abrir el puerto se registra y no detiene la aplicación.
+
+    Args:
+        file_processor: FileProcessor cuyo estado se expone.
+        logger: Objeto Logger para registrar eventos (por defecto, el del procesador).
+        direccion: "PUERTO" o "HOST:PUERTO" (opcional).
+
+    Returns:
+        MonitorServer: Endpoint iniciado, o None si no corresponde o no se pudo iniciar.
+    """
+    if not direccion and not MONITOR_CONFIG["habilitado"]:
+        return None
+    logger = logger or file_processor.logger
+    host, puerto = None, None
+    if direccion:
+        host, _, puerto = str(direccion).rpartition(":")
+        host = host or None
+    try:
+        monitor = MonitorServer(file_processor, host, int(puerto) if puerto else None, logger)
+        monitor.iniciar()
+        return monitor
+    except (OSError, ValueError) as e:
+        if logger:
+            logger.log_message(f"No se pudo iniciar el endpoint de métricas ({direccion or 'MONITOR_CONFIG'}): {e}",
+                               "ERROR")
+        return None
@@ -0,0 +1,307 @@
+# -*- coding: utf-8 -*-
+"""
+Módulo con la bandeja de salida (outbox) para cuando la API de DTE no responde.
+"""
+
+import datetime
+import json
+import os
+import random
+import shutil
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from config.database import conectar
+from config.settings import OUTBOX_CONFIG, PROCESS_CONFIG
+from config import config_service
+from utils.api import enviar_documento, es_reintentable
+from utils.documento import parsear_documento
+
+
+def calcular_backoff(fallos, base, maximo):
+    """
+    Calcula una espera con backoff exponencial y jitter.
+
+    La espera crece al doble con cada fallo hasta `maximo` y se elige al azar
+    entre la mitad y el total, para que los reintentos no lleguen todos juntos.
+
+    Args:
+        fallos: Cantidad de fallos consecutivos (1 para el primero).
+        base: Segundos de espera tras el primer fallo.
+        maximo: Espera máxima en segundos.
+
+    Returns:
+        float: Segundos de espera.
+    """
+    tope = min(maximo, base * (2 ** max(0, fallos - 1)))
+    return random.uniform(tope / 2, tope)
+
+
+class Outbox:
+    """
+    Clase para retener documentos en SQLite y enviarlos cuando la API se recupere.
+
+    Un documento entra a la bandeja cuando su envío falla por un error transitorio
+    (transporte, 5xx, 408 o 429). Se guarda su body ya construido junto con los
+    datos del documento, y el TXT se mueve a ruta_procesado/pendiente para que la
+    carpeta de entrada siga aceptando archivos. Un fallo aislado solo retiene ese
+    documento; tras OUTBOX_CONFIG["fallos_para_retener"] fallos transitorios
+    seguidos (de envíos directos o de la bandeja) el circuito se abre y los
+    nuevos documentos también se retienen sin intentar la API, para no esperar
+    un timeout por archivo. El circuito se cierra con la primera respuesta
+    definitiva de la API.
+
+    Un hilo en segundo plano prueba la API con el documento más antiguo usando
+    backoff exponencial con jitter y, cuando responde, drena el resto por lotes
+    con la concurrencia de PROCESS_CONFIG["max_en_vuelo"].
+    """
+
+    def __init__(self, logger=None, al_terminar=None, al_descartar=None, db_path=None):
+        """
+        Inicializa la bandeja de salida.
+
+        Args:
+            logger: Objeto Logger para registrar eventos (opcional).
+            al_terminar: Función (documento, resultado, ruta_procesado) que archiva
+                         un documento enviado o rechazado definitivamente (opcional).
+            al_descartar: Función (ruta, ruta_procesado, resultado) que mueve a la carpeta
+                          de error un TXT retenido que ya no se puede interpretar (opcional).
+            db_path: Ruta al archivo de base de datos. Si es None, usa la ruta de DB_CONFIG.
+        """
+        self.logger = logger
+        self.al_terminar = al_terminar
+        self.al_descartar = al_descartar
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._despertar = threading.Event()
+        self._detener = threading.Event()
+        self._hilo = None
+        self._pendientes = None
+        self._fallos_consecutivos = 0
+        self._reanudar_en = 0.0
+        # Fallos transitorios seguidos de cualquier envío (directo o de la bandeja)
+        self._fallos_api = 0
+
+    @property
+    def pendientes(self):
+        """Cantidad de documentos retenidos en la bandeja."""
+        if self._pendientes is None:
+            with self._lock:
+                if self._pendientes is None:
+                    fila = conectar(self.db_path).execute("SELECT COUNT(*) FROM outbox").fetchone()
+                    self._pendientes = fila[0]
+        return self._pendientes
+
+    def en_espera(self):
+        """
+        Indica si el circuito está abierto; en ese caso los nuevos documentos deben retenerse.
+
+        Returns:
+            bool: True si los últimos OUTBOX_CONFIG["fallos_para_retener"] envíos fallaron
+            por un error transitorio.
+        """
+        return self._fallos_api >= max(1, OUTBOX_CONFIG["fallos_para_retener"])
+
+    def registrar_envio(self, resultado):
+        """
+        Considera el resultado de un envío directo a la API para el estado del circuito.
+
+        Args:
+            resultado: Resultado del envío (ver utils.api.es_reintentable).
+        """
+        with self._lock:
+            if es_reintentable(resultado):
+                self._fallos_api += 1
+            else:
+                self._fallos_api = 0
+
+    def iniciar(self):
+        """
+        Inicia el hilo que envía los documentos retenidos.
+
+        Si ya había un hilo en marcha se detiene; el nuevo espera a que salga antes
+        de empezar, de modo que nunca hay dos hilos drenando la bandeja.
+
+        Returns:
+            threading.Event: Evento de esta ejecución, para detenerla con detener().
+        """
+        anterior = self._hilo
+        self._detener.set()
+        self._despertar.set()
+        detener = self._detener = threading.Event()
+        self._hilo = threading.Thread(target=self._bucle, args=(detener, anterior), name="Outbox", daemon=True)
+        self._hilo.start()
+        if self.pendientes and self.logger:
+            self.logger.log_message(f"Bandeja de salida con {self.pendientes} documentos pendientes de envío.", "WARNING")
+        return detener
+
+    def detener(self, ejecucion=None):
+        """
+        Detiene el envío de documentos retenidos (la bandeja se conserva en la base de datos).
+
+        Args:
+            ejecucion: Evento retornado por iniciar(). Si se indica, solo se detiene esa
+                       ejecución y no una iniciada después (opcional).
+        """
+        (ejecucion or self._detener).set()
+        self._despertar.set()
+
+    def encolar(self, documento, body, ruta_procesado, error=None):
+        """
+        Retiene un documento en la bandeja y mueve su TXT a la carpeta de pendientes.
+
+        Args:
+            documento: DocumentoDTE interpretado.
+            body: Body ya construido para la API.
+            ruta_procesado: Ruta base de archivos procesados.
+            error: Descripción del último error de envío (opcional).
+
+        Returns:
+            str: Ruta donde quedó retenido el TXT.
+
+        Raises:
+            sqlite3.Error: Si no se pudo registrar (el TXT no se mueve).
+            OSError: Si no se pudo mover el TXT (el registro se deshace).
+        """
+        carpeta = os.path.join(ruta_procesado, OUTBOX_CONFIG["carpeta"])
+        os.makedirs(carpeta, exist_ok=True)
+        destino = os.path.join(carpeta, documento.nombre)
+
+        # Primero el registro: si falla, el TXT sigue en su lugar y quien llama puede moverlo a error
+        conn = conectar(self.db_path)
+        with conn:
+            id_fila = conn.execute(
+                "INSERT INTO outbox (nombre, ruta, ruta_procesado, tipo_dte, folio, fecha, payload, intentos, ultimo_error, creado) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (documento.nombre, destino, ruta_procesado, documento.tipo_dte, documento.folio, documento.fecha,
+                 json.dumps(body), 1 if error else 0, error, datetime.datetime.now().isoformat(timespec="seconds"))
+            ).lastrowid
+        try:
+            shutil.move(documento.ruta, destino)
+        except Exception:
+            with conn:
+                conn.execute("DELETE FROM outbox WHERE id = ?", (id_fila,))
+            raise
+        with self._lock:
+            if self._pendientes is not None:
+                self._pendientes += 1
+
+        if self.logger:
+            self.logger.log_message(f"Documento retenido en bandeja de salida: {documento.nombre}", "WARNING")
+        self._despertar.set()
+        return destino
+
+    def calcular_espera(self, fallos):
+        """
+        Calcula la espera antes del próximo intento de la bandeja.
+
+        Args:
+            fallos: Cantidad de fallos consecutivos.
+
+        Returns:
+            float: Segundos de espera.
+        """
+        return calcular_backoff(fallos, OUTBOX_CONFIG["backoff_base"], OUTBOX_CONFIG["backoff_max"])
+
+    def _bucle(self, detener, anterior=None):
+        """Ciclo del hilo de envío: prueba la API y drena la bandeja cuando responde."""
+        if anterior is not None:
+            anterior.join()
+        with ThreadPoolExecutor(max_workers=max(1, int(PROCESS_CONFIG["max_en_vuelo"])),
+                                thread_name_prefix="OutboxEnvio") as executor:
+            while not detener.is_set():
+                espera = self._reanudar_en - time.monotonic()
+                if espera > 0:
+                    self._despertar.wait(espera)
+                    self._despertar.clear()
+                    continue
+
+                if not self.pendientes:
+                    self._despertar.wait()
+                    self._despertar.clear()
+                    continue
+
+                try:
+                    self._drenar(executor)
+                except Exception as e:
+                    if self.logger:
+                        self.logger.log_message(f"Error al enviar documentos de la bandeja de salida: {e}", "ERROR")
+                    self._registrar_fallo()
+
+    def _drenar(self, executor):
+        """
+        Envía un lote de documentos retenidos con la concurrencia de PROCESS_CONFIG["max_en_vuelo"].
+
+        Los resultados se procesan en orden de llegada a la bandeja, de modo que el
+        archivado respeta el orden de los folios.
+        """
+        # Tras un fallo se prueba con un solo documento antes de enviar en paralelo
+        limite = 1 if self._fallos_consecutivos else OUTBOX_CONFIG["lote"]
+        filas = conectar(self.db_path).execute(
+            "SELECT id, ruta, ruta_procesado, payload FROM outbox ORDER BY id LIMIT ?", (limite,)
+        ).fetchall()
+        if not filas:
+            with self._lock:
+                self._pendientes = 0
+            return
+
+        config_data = config_service.obtener_config(self.logger).datos_api
+        futuros = []
+        for id_fila, ruta, ruta_procesado, payload in filas:
+            try:
+                documento = parsear_documento(ruta)
+            except Exception as e:
+                if self.logger:
+                    self.logger.log_message(f"No se pudo leer el documento retenido {ruta}: {e}", "ERROR")
+                self._finalizar(id_fila, None, ruta_procesado, None)
+                # Sin esto el TXT quedaría en la carpeta de pendientes sin registro en la bandeja
+                if self.al_descartar and os.path.exists(ruta):
+                    self.al_descartar(ruta, ruta_procesado, {"success": False, "error": str(e), "tipo_error": "parseo"})
+                continue
+            futuro = executor.submit(enviar_documento, documento, json.loads(payload), config_data, self.logger)
+            futuros.append((id_fila, documento, ruta_procesado, futuro))
+
+        hubo_fallo = False
+        for id_fila, documento, ruta_procesado, futuro in futuros:
+            resultado = futuro.result()
+            self.registrar_envio(resultado)
+            if es_reintentable(resultado):
+                hubo_fallo = True
+                self._actualizar_intento(id_fila, resultado)
+                continue
+            self._finalizar(id_fila, documento, ruta_procesado, resultado)
+
+        if hubo_fallo:
+            self._registrar_fallo()
+        else:
+            if self._fallos_consecutivos and self.logger:
+                self.logger.log_message("La API respondió nuevamente; enviando documentos retenidos.", "INFO")
+            self._fallos_consecutivos = 0
+
+    def _registrar_fallo(self):
+        """Programa el próximo intento según la cantidad de fallos consecutivos."""
+        self._fallos_consecutivos += 1
+        espera = self.calcular_espera(self._fallos_consecutivos)
+        self._reanudar_en = time.monotonic() + espera
+        if self.logger:
+            self.logger.log_message(
+                f"API no disponible; {self.pendientes} documentos retenidos. Próximo intento en {espera:.0f} s.", "WARNING")
+
+    def _actualizar_intento(self, id_fila, resultado):
+        """Registra un intento fallido de un documento retenido."""
+        error = resultado.get("error") or f"HTTP {resultado.get('status_code')}"
+        conn = conectar(self.db_path)
+        with conn:
+            conn.execute("UPDATE outbox SET intentos = intentos + 1, ultimo_error = ? WHERE id = ?", (error, id_fila))
+
+    def _finalizar(self, id_fila, documento, ruta_procesado, resultado):
+        """Quita un documento de la bandeja y lo entrega para archivarlo."""
+        conn = conectar(self.db_path)
+        with conn:
+            conn.execute("DELETE FROM outbox WHERE id = ?", (id_fila,))
+        with self._lock:
+            if self._pendientes:
+                self._pendientes -= 1
+
+        if documento is not None and self.al_terminar:
+            self.al_terminar(documento, resultado, ruta_procesado)
@@ -0,0 +1,163 @@
+# -*- coding: utf-8 -*-
+"""
+Módulo con la etapa asíncrona de descarga, archivado e impresión de PDFs.
+"""
+
+import os
+import queue
+import threading
+from config.settings import PDF_CONFIG, SPOOLER_CONFIG
+from utils.printer import get_print_config, descargar_pdf, guardar_pdf_local, eliminar_temporal
+from utils.print_spooler import obtener_spooler
+from utils.metricas import obtener_metricas, ETAPA_DESCARGA_PDF, ETAPA_ARCHIVADO_PDF, ETAPA_IMPRESION
+
+
+class PdfStage:
+    """
+    Clase para procesar los PDFs de los documentos aceptados por la API.
+
+    Tiene su propia cola y sus propios hilos de trabajo, de modo que el ciclo de
+    ingesta continúa con el siguiente documento apenas la API responde 200, sin
+    esperar la descarga ni la impresión. La impresión se delega a la cola de
+    impresión compartida. Los resultados de descarga e impresión se contabilizan
+    por separado.
+    """
+
+    def __init__(self, logger=None, workers=None, notificar=None):
+        """
+        Inicializa la etapa de PDFs.
+
+        Args:
+            logger: Objeto Logger para registrar eventos (opcional).
+            workers: Cantidad de hilos de trabajo. Por defecto PDF_CONFIG["workers"].
+            notificar: Función (tipo, **datos) para publicar el resultado de cada PDF (opcional).
+        """
+        self.logger = logger
+        self.notificar = notificar
+        self.spooler = obtener_spooler(logger)
+        self.metricas = obtener_metricas()
+        self._cola = queue.Queue()
+        self._lock = threading.Lock()
+        self.estadisticas = {
+            "descargas_ok": 0,
+            "descargas_error": 0,
+            "archivados_ok": 0,
+            "archivados_error": 0,
+            "impresiones_ok": 0,
+            "impresiones_error": 0,
+        }
+
+        cantidad = workers if workers is not None else PDF_CONFIG["workers"]
+        self._hilos = []
+        for numero in range(max(1, int(cantidad))):
+            hilo = threading.Thread(target=self._bucle, name=f"PdfStage-{numero + 1}", daemon=True)
+            hilo.start()
+            self._hilos.append(hilo)
+
+    @property
+    def pendientes(self):
+        """Cantidad de PDFs en cola o en proceso."""
+        return self._cola.unfinished_tasks
+
+    def encolar(self, respuesta_api, documento=None):
+        """
+        Encola la respuesta de la API para descargar, archivar e imprimir su PDF.
+
+        Args:
+            respuesta_api: Diccionario con la respuesta de la API (debe incluir PDFPATH).
+            documento: DocumentoDTE de la respuesta, para las métricas (opcional).
+        """
+        self._cola.put((respuesta_api, documento))
+
+    def esperar(self):
+        """Bloquea hasta que se procesen e impriman todos los PDFs encolados."""
+        self._cola.join()
+        self.spooler.esperar()
+
+    def _contar(self, clave):
+        """Incrementa un contador de estadísticas."""
+        with self._lock:
+            self.estadisticas[clave] += 1
+
+    def _bucle(self):
+        """Ciclo de los hilos de trabajo."""
+        while True:
+            respuesta_api, documento = self._cola.get()
+            try:
+                self._procesar(respuesta_api, documento)
+            except Exception as e:
+                if self.logger:
+                    self.logger.log_message(f"Error general al procesar PDF: {e}", "ERROR")
+            finally:
+                self._cola.task_done()
+
+    def _procesar(self, respuesta_api, documento=None):
+        """
+        Descarga el PDF de una respuesta y aplica la configuración de impresión.
+
+        Args:
+            respuesta_api: Diccionario con la respuesta de la API.
+            documento: DocumentoDTE de la respuesta (opcional).
+        """
+        pdf_url = respuesta_api['PDFPATH']
+        folio = respuesta_api.get('FOLIO', 'sin_folio')
+
+        print_config = get_print_config(self.logger)
+        if not print_config:
+            if self.logger:
+                self.logger.log_message("No se encontró configuración de impresión", "WARNING")
+            return
+
+        hab_printer, printer_name, num_copias, hab_desc_local, ruta_descargas = print_config
+
+        # Fuera de Windows solo se imprime si se eligió un backend explícito (lp o archivo)
+        imprimir = bool(hab_printer) and (os.name == 'nt' or SPOOLER_CONFIG["backend"] != "auto")
+
+        # Sin descarga local ni impresión no es necesario descargar el PDF
+        if not hab_desc_local and not imprimir:
+            return
+
+        if self.logger:
+            self.logger.log_message(f"Procesando PDF desde: {pdf_url} (Folio: {folio})", "INFO")
+
+        with self.metricas.medir(ETAPA_DESCARGA_PDF, documento) as span:
+            temp_path = descargar_pdf(pdf_url, self.logger)
+            if not temp_path:
+                span.fallar()
+        self._contar("descargas_ok" if temp_path else "descargas_error")
+        resultado = {"folio": folio, "descarga": temp_path is not None, "archivado": None, "impresion": None}
+
+        if not temp_path:
+            self._notificar(resultado)
+            return
+
+        if hab_desc_local:
+            with self.metricas.medir(ETAPA_ARCHIVADO_PDF, documento) as span:
+                resultado["archivado"] = guardar_pdf_local(temp_path, folio, ruta_descargas, self.logger)
+                span.exito = resultado["archivado"]
+            self._contar("archivados_ok" if resultado["archivado"] else "archivados_error")
+
+        if not imprimir:
+            eliminar_temporal(temp_path, self.logger)
+            self._notificar(resultado)
+            return
+
+        # La cola de impresión notifica al terminar el trabajo y elimina el temporal
+        # cuando la aplicación de impresión ya no lo necesita
+        self.spooler.encolar(temp_path, printer_name, num_copias, temporal=True,
+                             al_terminar=lambda trabajo: self._al_imprimir(trabajo, resultado, documento))
+
+    def _al_imprimir(self, trabajo, resultado, documento=None):
+        """Registra el resultado de un trabajo de impresión."""
+        # Las copias se envían al backend en una sola llamada: se mide el trabajo completo
+        self.metricas.registrar(ETAPA_IMPRESION, trabajo.duracion or 0.0, documento, exito=trabajo.exito,
+                                detalle=f"{trabajo.copias} copias" if trabajo.exito else trabajo.error,
+                                inicio=trabajo.inicio)
+        resultado["impresion"] = trabajo.exito
+        self._contar("impresiones_ok" if trabajo.exito else "impresiones_error")
+        self._notificar(resultado)
+
+    def _notificar(self, resultado):
+        """Publica el resultado de un PDF si hay a quién notificar."""
+        if self.notificar:
+            self.notificar("pdf", **resultado)
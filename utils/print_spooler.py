@@ -0,0 +1,527 @@
+# -*- coding: utf-8 -*-
+"""
+Módulo con la cola de impresión de PDFs y sus backends.
+"""
+
+import abc
+import heapq
+import os
+import queue
+import re
+import shutil
+import subprocess
+import threading
+import time
+from config.settings import SPOOLER_CONFIG
+
+# Ubicaciones habituales de SumatraPDF
+RUTAS_SUMATRA = [
+    r"C:\Program Files\SumatraPDF\SumatraPDF.exe",
+    r"C:\Program Files (x86)\SumatraPDF\SumatraPDF.exe",
+    os.path.join(os.environ.get('PROGRAMFILES', r'C:\Program Files'), 'SumatraPDF', 'SumatraPDF.exe'),
+    os.path.join(os.environ.get('PROGRAMFILES(X86)', r'C:\Program Files (x86)'), 'SumatraPDF', 'SumatraPDF.exe')
+]
+
+
+def ejecutar_supervisado(comando, timeout):
+    """
+    Ejecuta un proceso de impresión y lo termina si no finaliza a tiempo.
+
+    Args:
+        comando: Lista con el ejecutable y sus argumentos.
+        timeout: Segundos máximos de ejecución.
+
+    Returns:
+        int: Código de salida del proceso.
+
+    Raises:
+        subprocess.TimeoutExpired: Si el proceso se colgó (ya fue terminado).
+    """
+    # subprocess.run termina el proceso hijo antes de propagar TimeoutExpired
+    proceso = subprocess.run(comando, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                             stdin=subprocess.DEVNULL, timeout=timeout)
+    return proceso.returncode
+
+
+class PrintBackend(abc.ABC):
+    """
+    Interfaz de los backends de impresión.
+
+    Cada backend recibe el trabajo completo (con todas sus copias) y retorna si
+    se envió correctamente; los procesos externos deben ejecutarse con
+    `ejecutar_supervisado` para que se terminen si se cuelgan.
+
+    Los backends que entregan el PDF a una aplicación que lo lee después de que
+    `imprimir` retorna indican en `retencion` cuántos segundos debe conservarse
+    el archivo; la cola de impresión lo libera (ver `liberar`) sin detenerse.
+    """
+
+    nombre = None
+    # Segundos que la aplicación externa puede seguir usando el PDF tras imprimir()
+    retencion = 0.0
+
+    def disponible(self):
+        """
+        Indica si el backend se puede usar en este equipo.
+
+        Returns:
+            bool: True si está disponible.
+        """
+        return True
+
+    @abc.abstractmethod
+    def imprimir(self, ruta_pdf, impresora, copias, timeout):
+        """
+        Envía un PDF a la impresora.
+
+        Args:
+            ruta_pdf: PDF a imprimir.
+            impresora: Nombre de la impresora.
+            copias: Cantidad de copias.
+            timeout: Segundos máximos por proceso de impresión.
+
+        Returns:
+            bool: True si se envió correctamente.
+        """
+
+    def liberar(self, ruta_pdf):
+        """
+        Cierra lo que quede del trabajo de un PDF una vez vencida su retención.
+
+        Args:
+            ruta_pdf: PDF impreso.
+
+        Returns:
+            str: Mensaje de error si se detectó que la impresión falló, o None.
+        """
+        return None
+
+
+class SumatraBackend(PrintBackend):
+    """Imprime con SumatraPDF en modo silencioso, todas las copias en una sola llamada."""
+
+    nombre = "sumatra"
+
+    def __init__(self, ruta_ejecutable=None):
+        self.ruta_ejecutable = ruta_ejecutable or next((ruta for ruta in RUTAS_SUMATRA if os.path.isfile(ruta)), None)
+
+    def disponible(self):
+        return os.name == 'nt' and bool(self.ruta_ejecutable)
+
+    def imprimir(self, ruta_pdf, impresora, copias, timeout):
+        comando = [
+            self.ruta_ejecutable,
+            "-print-to", impresora,
+            "-print-settings", f"{copias}x",
+            "-silent",
+            "-exit-when-done",
+            ruta_pdf
+        ]
+        return ejecutar_supervisado(comando, timeout) == 0
+
+
+class AcrobatBackend(PrintBackend):
+    """
+    Imprime con Adobe Acrobat Reader (/t).
+
+    Acrobat no acepta cantidad de copias, por lo que se lanza una vez por copia, y
+    suele quedar abierto tras imprimir. Los procesos no se esperan: se revisan y se
+    cierran cuando vence la retención (SPOOLER_CONFIG["espera_acrobat"]), momento
+    en que se registra como error un código de salida distinto de cero.
+    """
+
+    nombre = "acrobat"
+
+    def __init__(self, ruta_ejecutable=None, espera=None):
+        self.ruta_ejecutable = ruta_ejecutable or SPOOLER_CONFIG["ruta_acrobat"]
+        self.retencion = SPOOLER_CONFIG["espera_acrobat"] if espera is None else espera
+        self._procesos = {}
+        self._lock = threading.Lock()
+
+    def disponible(self):
+        return os.name == 'nt' and bool(self.ruta_ejecutable) and os.path.isfile(self.ruta_ejecutable)
+
+    def imprimir(self, ruta_pdf, impresora, copias, timeout):
+        procesos = []
+        for _ in range(copias):
+            procesos.append(subprocess.Popen([self.ruta_ejecutable, "/t", ruta_pdf, impresora],
+                                             stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                                             stdin=subprocess.DEVNULL))
+        with self._lock:
+            self._procesos.setdefault(ruta_pdf, []).extend(procesos)
+        # Solo se conoce el resultado de las copias que ya terminaron
+        return all(proceso.poll() in (None, 0) for proceso in procesos)
+
+    def liberar(self, ruta_pdf):
+        with self._lock:
+            procesos = self._procesos.pop(ruta_pdf, [])
+        codigos = []
+        for proceso in procesos:
+            if proceso.poll() is None:
+                # Sigue abierto tras imprimir: es el comportamiento habitual de Acrobat
+                proceso.kill()
+                proceso.wait()
+            elif proceso.returncode != 0:
+                codigos.append(proceso.returncode)
+        if codigos:
+            return f"Adobe Acrobat terminó con código {codigos[0]} al imprimir {ruta_pdf}"
+        return None
+
+
+class ShellBackend(PrintBackend):
+    """
+    Imprime con la acción "print" asociada al PDF en Windows.
+
+    No entrega un proceso que se pueda supervisar, por lo que solo se usa cuando
+    no hay SumatraPDF ni Acrobat. `os.startfile` retorna antes de que la
+    aplicación asociada abra el PDF, así que el archivo se conserva
+    SPOOLER_CONFIG["espera_shell"] segundos antes de borrarlo.
+    """
+
+    nombre = "shell"
+
+    def __init__(self, espera=None):
+        self.retencion = SPOOLER_CONFIG["espera_shell"] if espera is None else espera
+
+    def disponible(self):
+        return os.name == 'nt'
+
+    def imprimir(self, ruta_pdf, impresora, copias, timeout):
+        import win32print
+        win32print.SetDefaultPrinter(impresora)
+        for _ in range(copias):
+            os.startfile(ruta_pdf, "print")
+        return True
+
+
+class LpBackend(PrintBackend):
+    """Imprime con `lp` (CUPS), todas las copias en una sola llamada."""
+
+    nombre = "lp"
+
+    def disponible(self):
+        return shutil.which("lp") is not None
+
+    def imprimir(self, ruta_pdf, impresora, copias, timeout):
+        comando = ["lp", "-n", str(copias)]
+        if impresora:
+            comando += ["-d", impresora]
+        comando.append(ruta_pdf)
+        return ejecutar_supervisado(comando, timeout) == 0
+
+
+class ArchivoBackend(PrintBackend):
+    """
+    Impresora de prueba que copia cada trabajo a una carpeta.
+
+    El nombre del archivo incluye un correlativo, la impresora y las copias
+    (000001_<impresora>_x<copias>.pdf), lo que permite verificar los trabajos.
+    """
+
+    nombre = "archivo"
+
+    def __init__(self, carpeta=None):
+        self.carpeta = carpeta or SPOOLER_CONFIG["carpeta_archivo"]
+        self._correlativo = 0
+        self._lock = threading.Lock()
+
+    def imprimir(self, ruta_pdf, impresora, copias, timeout):
+        os.makedirs(self.carpeta, exist_ok=True)
+        with self._lock:
+            self._correlativo += 1
+            correlativo = self._correlativo
+        impresora_segura = re.sub(r'[^\w.-]+', '_', impresora or "predeterminada")
+        destino = os.path.join(self.carpeta, f"{correlativo:06d}_{impresora_segura}_x{copias}.pdf")
+        shutil.copyfile(ruta_pdf, destino)
+        return True
+
+
+class SimuladoBackend(PrintBackend):
+    """
+    Impresora simulada para pruebas de carga: no escribe nada y tarda un tiempo fijo por copia.
+
+    Permite ejercitar la cola de impresión en cualquier sistema, con un costo
+    parecido al de una impresora real (SPOOLER_CONFIG["demora_simulada"]).
+    """
+
+    nombre = "simulado"
+
+    def __init__(self, demora=None):
+        self.demora = SPOOLER_CONFIG["demora_simulada"] if demora is None else demora
+        self.trabajos = 0
+        self.copias = 0
+
+    def imprimir(self, ruta_pdf, impresora, copias, timeout):
+        time.sleep(self.demora * copias)
+        self.trabajos += 1
+        self.copias += copias
+        return True
+
+
+BACKENDS = {
+    SumatraBackend.nombre: SumatraBackend,
+    AcrobatBackend.nombre: AcrobatBackend,
+    ShellBackend.nombre: ShellBackend,
+    LpBackend.nombre: LpBackend,
+    ArchivoBackend.nombre: ArchivoBackend,
+    SimuladoBackend.nombre: SimuladoBackend,
+}
+
+
+def crear_backend(nombre=None, ruta_acrobat=None):
+    """
+    Crea el backend de impresión indicado.
+
+    Con "auto" se usa, en orden, SumatraPDF, Acrobat o la acción "print" de Windows;
+    en otros sistemas `lp` si existe o, en su defecto, la impresora de archivo.
+
+    Args:
+        nombre: Nombre del backend. Por defecto SPOOLER_CONFIG["backend"].
+        ruta_acrobat: Ruta al ejecutable de Adobe Acrobat Reader (opcional).
+
+    Returns:
+        Backend de impresión.
+
+    Raises:
+        ValueError: Si el nombre del backend no existe.
+    """
+    nombre = nombre or SPOOLER_CONFIG["backend"]
+
+    if nombre == "auto":
+        if os.name == 'nt':
+            candidatos = [SumatraBackend(), AcrobatBackend(ruta_acrobat), ShellBackend()]
+        else:
+            candidatos = [LpBackend(), ArchivoBackend()]
+        return next(backend for backend in candidatos if backend.disponible())
+
+    if nombre not in BACKENDS:
+        raise ValueError(f"Backend de impresión desconocido: {nombre}")
+    if nombre == AcrobatBackend.nombre:
+        return AcrobatBackend(ruta_acrobat)
+    return BACKENDS[nombre]()
+
+
+class PrintJob:
+    """
+    Trabajo de impresión encolado.
+
+    Atributos:
+        ruta_pdf: PDF a imprimir.
+        impresora: Nombre de la impresora.
+        copias: Cantidad de copias.
+        temporal: True si la cola debe eliminar el PDF cuando la impresora ya no lo necesite.
+        exito: True/False una vez terminado, None mientras está pendiente.
+        error: Mensaje de error si el trabajo falló.
+        inicio: Instante (time.time) en que comenzó la impresión.
+        duracion: Segundos que tardó el backend en imprimir todas las copias.
+    """
+
+    def __init__(self, ruta_pdf, impresora, copias, al_terminar=None, backend=None, temporal=False):
+        self.ruta_pdf = ruta_pdf
+        self.impresora = impresora
+        self.copias = max(1, int(copias))
+        self.temporal = temporal
+        self.al_terminar = al_terminar
+        self.backend = backend
+        self.exito = None
+        self.error = None
+        self.inicio = None
+        self.duracion = None
+        self._terminado = threading.Event()
+
+    def esperar(self, timeout=None):
+        """
+        Espera a que el trabajo termine.
+
+        Args:
+            timeout: Tiempo máximo de espera en segundos (opcional).
+
+        Returns:
+            bool: True si se imprimió correctamente.
+        """
+        self._terminado.wait(timeout)
+        return bool(self.exito)
+
+
+class PrintSpooler:
+    """
+    Clase para imprimir PDFs en segundo plano a través de una cola de trabajos.
+
+    Un único hilo atiende la cola, de modo que los trabajos llegan a la impresora
+    en orden y quien encola no espera a que termine la impresión. Cada trabajo se
+    envía con todas sus copias en una sola llamada cuando el backend lo permite, y
+    los procesos de impresión se terminan si exceden SPOOLER_CONFIG["timeout"].
+
+    Los PDFs que la aplicación de impresión aún puede estar leyendo (ver
+    PrintBackend.retencion) se liberan más tarde desde el mismo hilo, sin
+    retrasar los trabajos siguientes.
+    """
+
+    def __init__(self, logger=None, backend=None, timeout=None):
+        """
+        Inicializa la cola de impresión.
+
+        Args:
+            logger: Objeto Logger para registrar eventos (opcional).
+            backend: Backend de impresión. Por defecto se crea según SPOOLER_CONFIG.
+            timeout: Segundos máximos por proceso. Por defecto SPOOLER_CONFIG["timeout"].
+        """
+        self.logger = logger
+        self.backend = backend or crear_backend()
+        self.timeout = timeout if timeout is not None else SPOOLER_CONFIG["timeout"]
+        self._cola = queue.Queue()
+        # Montículo (vencimiento, correlativo, ruta_pdf, backend, temporal) de PDFs por liberar
+        self._diferidos = []
+        self._correlativo = 0
+        self._hilo = threading.Thread(target=self._bucle, name="PrintSpooler", daemon=True)
+        self._hilo.start()
+
+    @property
+    def pendientes(self):
+        """Cantidad de trabajos en cola o en impresión."""
+        return self._cola.unfinished_tasks
+
+    @property
+    def diferidos(self):
+        """Cantidad de PDFs impresos que aún esperan su retención para liberarse."""
+        return len(self._diferidos)
+
+    def encolar(self, ruta_pdf, impresora, copias=1, al_terminar=None, backend=None, temporal=False):
+        """
+        Encola un trabajo de impresión.
+
+        Args:
+            ruta_pdf: PDF a imprimir.
+            impresora: Nombre de la impresora.
+            copias: Cantidad de copias.
+            al_terminar: Función (trabajo) que se llama al terminar, con éxito o error (opcional).
+            backend: Backend a usar solo para este trabajo (opcional).
+            temporal: Si es True, la cola elimina el PDF cuando la impresora ya no lo necesita.
+
+        Returns:
+            PrintJob: Trabajo encolado.
+        """
+        trabajo = PrintJob(ruta_pdf, impresora, copias, al_terminar, backend, temporal)
+        self._cola.put(trabajo)
+        return trabajo
+
+    def esperar(self):
+        """Bloquea hasta que se impriman todos los trabajos encolados."""
+        self._cola.join()
+
+    def _bucle(self):
+        """Ciclo del hilo de impresión."""
+        while True:
+            try:
+                trabajo = self._cola.get(timeout=self._espera_diferidos())
+            except queue.Empty:
+                self._liberar_vencidos()
+                continue
+            try:
+                self._imprimir(trabajo)
+                trabajo._terminado.set()
+                if trabajo.al_terminar:
+                    trabajo.al_terminar(trabajo)
+            except Exception as e:
+                if self.logger:
+                    self.logger.log_message(f"Error al finalizar trabajo de impresión: {e}", "ERROR")
+            finally:
+                trabajo._terminado.set()
+                self._cola.task_done()
+            self._liberar_vencidos()
+
+    def _espera_diferidos(self):
+        """Segundos hasta la próxima liberación pendiente, o None si no hay ninguna."""
+        if not self._diferidos:
+            return None
+        return max(0.0, self._diferidos[0][0] - time.monotonic())
+
+    def _diferir(self, trabajo, backend):
+        """Programa la liberación del PDF de un trabajo según la retención de su backend."""
+        retencion = backend.retencion or 0.0
+        if retencion <= 0:
+            self._liberar(trabajo.ruta_pdf, backend, trabajo.temporal)
+            return
+        self._correlativo += 1
+        heapq.heappush(self._diferidos, (time.monotonic() + retencion, self._correlativo,
+                                         trabajo.ruta_pdf, backend, trabajo.temporal))
+
+    def _liberar_vencidos(self):
+        """Libera los PDFs cuya retención ya venció."""
+        ahora = time.monotonic()
+        while self._diferidos and self._diferidos[0][0] <= ahora:
+            _, _, ruta_pdf, backend, temporal = heapq.heappop(self._diferidos)
+            self._liberar(ruta_pdf, backend, temporal)
+
+    def _liberar(self, ruta_pdf, backend, temporal):
+        """Cierra lo que quede del trabajo en el backend y elimina el PDF si es temporal."""
+        try:
+            error = backend.liberar(ruta_pdf)
+        except Exception as e:
+            error = str(e)
+        if error and self.logger:
+            self.logger.log_message(f"Error al imprimir: {error}", "ERROR")
+        if temporal:
+            try:
+                os.unlink(ruta_pdf)
+            except Exception as e:
+                if self.logger:
+                    self.logger.log_message(f"Error al eliminar archivo temporal: {e}", "WARNING")
+
+    def _imprimir(self, trabajo):
+        """Envía un trabajo al backend y registra su resultado."""
+        backend = trabajo.backend or self.backend
+        trabajo.inicio = time.time()
+        comienzo = time.perf_counter()
+        try:
+            trabajo.exito = bool(backend.imprimir(trabajo.ruta_pdf, trabajo.impresora, trabajo.copias, self.timeout))
+            if not trabajo.exito:
+                trabajo.error = "El proceso de impresión terminó con error"
+        except subprocess.TimeoutExpired:
+            trabajo.exito = False
+            trabajo.error = f"El proceso de impresión no respondió en {self.timeout} s y fue terminado"
+        except Exception as e:
+            trabajo.exito = False
+            trabajo.error = str(e)
+        trabajo.duracion = time.perf_counter() - comienzo
+        self._diferir(trabajo, backend)
+
+        if self.logger:
+            if trabajo.exito:
+                self.logger.log_message(
+                    f"PDF enviado a imprimir ({trabajo.copias} copias) en: {trabajo.impresora} usando {backend.nombre}", "INFO")
+            else:
+                self.logger.log_message(f"Error al imprimir: {trabajo.error}", "ERROR")
+
+
+# Cola de impresión compartida por toda la aplicación
+_spooler = None
+_lock_spooler = threading.Lock()
+
+
+def obtener_spooler(logger=None):
+    """
+    Retorna la cola de impresión compartida, creándola si no existe.
+
+    Args:
+        logger: Objeto Logger para registrar eventos (opcional).
+
+    Returns:
+        PrintSpooler: Cola de impresión compartida.
+    """
+    global _spooler
+    with _lock_spooler:
+        if _spooler is None:
+            _spooler = PrintSpooler(logger)
+        return _spooler
+
+
+def trabajos_pendientes():
+    """
+    Retorna los trabajos pendientes de la cola de impresión compartida, sin crearla.
+
+    Returns:
+        int: Trabajos en cola o en impresión (0 si la cola aún no se ha creado).
+    """
+    spooler = _spooler
+    return spooler.pendientes if spooler is not None else 0
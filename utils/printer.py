@@ -4,17 +4,17 @@ Módulo para funciones relacionadas con impresoras y manejo de PDFs.
 """
 
 import os
-import subprocess
 import sys
-import time
-import win32print
+try:
+    import win32print
+except ImportError:
+    # Fuera de Windows (p. ej. el servicio sin interfaz en Linux) no hay win32print
+    win32print = None
 import requests
 import tempfile
-from config.database import DatabaseManager
-
-# Caché para la configuración de impresión
-_print_config_cache = None
-_db_manager_instance = None
+from config import config_service
+from utils import http_client
+from utils.print_spooler import crear_backend, obtener_spooler
 
 def obtener_impresoras():
     """
@@ -24,6 +24,8 @@ def obtener_impresoras():
         list: Lista con los nombres de las impresoras disponibles.
     """
     impresoras = []
+    if win32print is None:
+        return impresoras
     try:
         # Enumera todas las impresoras disponibles en el sistema
         printers = win32print.EnumPrinters(win32print.PRINTER_ENUM_LOCAL | win32print.PRINTER_ENUM_CONNECTIONS)
@@ -64,31 +66,19 @@ def imprimir_archivo(nombre_impresora, ruta_archivo, num_copias=1):
     
 def get_print_config(logger=None, force_refresh=False):
     """
-    Obtiene la configuración de impresión, utilizando caché si está disponible.
+    Obtiene la configuración de impresión desde la configuración en memoria.
     
     Args:
         logger: Objeto Logger para registrar eventos (opcional).
         force_refresh: Fuerza una actualización desde la base de datos.
         
     Returns:
-        tuple: Configuración de impresión.
+        ImpresionConfig: Configuración de impresión o None si no existe.
     """
-    global _print_config_cache, _db_manager_instance
-    
-    # Si hay caché y no se requiere actualización, usar la caché
-    if _print_config_cache is not None and not force_refresh:
-        return _print_config_cache
-    
-    # Si no hay instancia de DatabaseManager, crearla
-    if _db_manager_instance is None:
-        _db_manager_instance = DatabaseManager(log_function=logger.log_message if logger else None)
-    
     try:
-        # Obtener la configuración de la base de datos
-        _print_config_cache = _db_manager_instance.get_print_config()
-        if logger:
-            logger.log_message("Configuración de impresión cargada desde la base de datos", "INFO")
-        return _print_config_cache
+        if force_refresh:
+            config_service.invalidar()
+        return config_service.obtener_config(logger).impresion
     except Exception as e:
         if logger:
             logger.log_message(f"Error al cargar configuración de impresión: {e}", "ERROR")
@@ -97,7 +87,7 @@ def get_print_config(logger=None, force_refresh=False):
 def procesar_respuesta_api(respuesta_api, logger=None, ruta_acrobat=None, print_config=None):
     """
     Procesa la respuesta de la API y realiza acciones de impresión y/o descarga
-    según la configuración en la base de datos. Usa Adobe Acrobat Reader para imprimir en Windows.
+    según la configuración en la base de datos. La impresión pasa por la cola de impresión.
     
     Args:
         respuesta_api: Diccionario con la respuesta de la API.
@@ -133,8 +123,48 @@ def procesar_respuesta_api(respuesta_api, logger=None, ruta_acrobat=None, print_
         hab_printer, printer_name, num_copias, hab_desc_local, ruta_descargas = print_config
         
         # Descargar el PDF desde la URL
-        try:
-            response = requests.get(pdf_url, stream=True)
+        temp_path = descargar_pdf(pdf_url, logger)
+        if temp_path is None:
+            return False
+        
+        # Procesar según configuración
+        resultado = True
+        
+        # Si está habilitada la descarga local
+        if hab_desc_local and not guardar_pdf_local(temp_path, folio, ruta_descargas, logger):
+            resultado = False
+        
+        # Si está habilitada la impresión y estamos en Windows
+        if hab_printer and os.name == 'nt':  # Solo para Windows
+            # La cola de impresión elimina el temporal cuando la impresora ya no lo necesita
+            if not imprimir_pdf(temp_path, printer_name, num_copias, logger, ruta_acrobat, temporal=True):
+                resultado = False
+        else:
+            # Limpieza: eliminar el archivo temporal
+            eliminar_temporal(temp_path, logger)
+        
+        return resultado
+            
+    except Exception as e:
+        if logger:
+            logger.log_message(f"Error general al procesar respuesta de API: {e}", "ERROR")
+        return False
+
+
+def descargar_pdf(pdf_url, logger=None):
+    """
+    Descarga el PDF de un documento a un archivo temporal.
+    
+    Args:
+        pdf_url: URL del PDF entregada por la API.
+        logger: Objeto Logger para registrar eventos (opcional).
+        
+    Returns:
+        str: Ruta del archivo temporal o None si falló la descarga.
+    """
+    try:
+        # Descargar usando la sesión compartida; el with devuelve la conexión al pool
+        with http_client.get(pdf_url, stream=True) as response:
             response.raise_for_status()  # Lanzará una excepción si hay error HTTP
             
             # Crear un archivo temporal para el PDF
@@ -142,131 +172,89 @@ def procesar_respuesta_api(respuesta_api, logger=None, ruta_acrobat=None, print_
                 temp_path = temp_file.name
                 for chunk in response.iter_content(chunk_size=8192):
                     temp_file.write(chunk)
-            
-            if logger:
-                logger.log_message(f"PDF descargado temporalmente en: {temp_path}", "INFO")
-            
-            # Procesar según configuración
-            resultado = True
-            
-            # Si está habilitada la descarga local
-            if hab_desc_local:
-                if not os.path.exists(ruta_descargas):
-                    os.makedirs(ruta_descargas, exist_ok=True)
-                
-                nombre_archivo = f"{folio}.pdf"
-                ruta_destino = os.path.join(ruta_descargas, nombre_archivo)
-                
-                try:
-                    # Copiar el archivo temporal a la ruta de destino
-                    with open(temp_path, 'rb') as src, open(ruta_destino, 'wb') as dst:
-                        dst.write(src.read())
-                    
-                    if logger:
-                        logger.log_message(f"PDF guardado en: {ruta_destino}", "INFO")
-                except Exception as e:
-                    if logger:
-                        logger.log_message(f"Error al guardar PDF en destino: {e}", "ERROR")
-                    resultado = False
-            
-            # Si está habilitada la impresión y estamos en Windows
-            if hab_printer and os.name == 'nt':  # Solo para Windows
-                try:
-                    # Primero configuramos la impresora predeterminada
-                    win32print.SetDefaultPrinter(printer_name)
-                    
-                    # Buscar SumatraPDF en ubicaciones comunes
-                    sumatra_paths = [
-                        r"C:\Program Files\SumatraPDF\SumatraPDF.exe",
-                        r"C:\Program Files (x86)\SumatraPDF\SumatraPDF.exe",
-                        os.path.join(os.environ.get('PROGRAMFILES', r'C:\Program Files'), 'SumatraPDF', 'SumatraPDF.exe'),
-                        os.path.join(os.environ.get('PROGRAMFILES(X86)', r'C:\Program Files (x86)'), 'SumatraPDF', 'SumatraPDF.exe')
-                    ]
-                    
-                    sumatra_path = None
-                    for path in sumatra_paths:
-                        if os.path.isfile(path):
-                            sumatra_path = path
-                            break
-                    
-                    # Si encontramos SumatraPDF, usarlo para imprimir en modo silencioso
-                    if sumatra_path:
-                        if logger:
-                            logger.log_message(f"Imprimiendo con SumatraPDF en: {printer_name}", "INFO")
-                        
-                        for _ in range(int(num_copias)):
-                            # SumatraPDF con parámetros de impresión silenciosa
-                            # -print-to impresora -print-settings "opciones" -silent archivo.pdf
-                            comando = [
-                                sumatra_path, 
-                                "-print-to", printer_name, 
-                                "-silent", 
-                                "-exit-when-done",
-                                temp_path
-                            ]
-                            proceso = subprocess.Popen(comando, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-                            stdout, stderr = proceso.communicate()
-                            
-                            # Esperar a que el trabajo de impresión se complete
-                            time.sleep(1)
-                        
-                        if logger:
-                            logger.log_message(f"PDF enviado a imprimir ({num_copias} copias) en: {printer_name} usando SumatraPDF", "INFO")
-                    
-                    # Si no encontramos SumatraPDF, intentar con Adobe Acrobat si está disponible
-                    elif ruta_acrobat and os.path.isfile(ruta_acrobat):
-                        if logger:
-                            logger.log_message(f"SumatraPDF no encontrado, usando Adobe Acrobat para imprimir", "WARNING")
-                        
-                        for _ in range(int(num_copias)):
-                            # Adobe Acrobat con parámetros de impresión silenciosa
-                            comando = [ruta_acrobat, "/t", temp_path, printer_name]
-                            proceso = subprocess.Popen(comando, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-                            _, stderr = proceso.communicate()
-                            time.sleep(2)
-                        
-                        if logger:
-                            logger.log_message(f"PDF enviado a imprimir ({num_copias} copias) en: {printer_name} usando Adobe Acrobat", "INFO")
-                    
-                    # Si no encontramos ni SumatraPDF ni Adobe Acrobat, usar el método nativo de Windows
-                    else:
-                        if logger:
-                            logger.log_message("SumatraPDF y Adobe Acrobat no encontrados, usando método nativo para imprimir", "WARNING")
-                        
-                        for _ in range(int(num_copias)):
-                            os.startfile(temp_path, "print")
-                            time.sleep(1)  # Breve pausa entre trabajos de impresión
-                        
-                        if logger:
-                            logger.log_message(f"PDF enviado a imprimir ({num_copias} copias) en: {printer_name} usando método nativo", "INFO")
-                except Exception as e:
-                    if logger:
-                        logger.log_message(f"Error al imprimir: {e}", "ERROR")
-                    resultado = False
-            
-            # Limpieza: eliminar el archivo temporal
-            try:
-                os.unlink(temp_path)
-            except Exception as e:
-                if logger:
-                    logger.log_message(f"Error al eliminar archivo temporal: {e}", "WARNING")
-            
-            return resultado
-            
-        except requests.exceptions.RequestException as e:
-            if logger:
-                logger.log_message(f"Error al descargar PDF: {e}", "ERROR")
-            return False
-            
+        
+        if logger:
+            logger.log_message(f"PDF descargado temporalmente en: {temp_path}", "INFO")
+        return temp_path
+        
+    except requests.exceptions.RequestException as e:
+        if logger:
+            logger.log_message(f"Error al descargar PDF: {e}", "ERROR")
+        return None
+
+
+def guardar_pdf_local(temp_path, folio, ruta_descargas, logger=None):
+    """
+    Copia el PDF descargado a la carpeta de descargas local como <folio>.pdf.
+    
+    Args:
+        temp_path: Ruta del PDF temporal.
+        folio: Folio del documento.
+        ruta_descargas: Carpeta de descargas configurada.
+        logger: Objeto Logger para registrar eventos (opcional).
+        
+    Returns:
+        bool: True si se guardó correctamente.
+    """
+    try:
+        if not os.path.exists(ruta_descargas):
+            os.makedirs(ruta_descargas, exist_ok=True)
+        
+        nombre_archivo = f"{folio}.pdf"
+        ruta_destino = os.path.join(ruta_descargas, nombre_archivo)
+        
+        # Copiar el archivo temporal a la ruta de destino
+        with open(temp_path, 'rb') as src, open(ruta_destino, 'wb') as dst:
+            dst.write(src.read())
+        
+        if logger:
+            logger.log_message(f"PDF guardado en: {ruta_destino}", "INFO")
+        return True
     except Exception as e:
         if logger:
-            logger.log_message(f"Error general al procesar respuesta de API: {e}", "ERROR")
+            logger.log_message(f"Error al guardar PDF en destino: {e}", "ERROR")
         return False
 
 
+def imprimir_pdf(temp_path, printer_name, num_copias, logger=None, ruta_acrobat=None, temporal=False):
+    """
+    Imprime un PDF a través de la cola de impresión y espera el resultado.
+    
+    Args:
+        temp_path: Ruta del PDF a imprimir.
+        printer_name: Nombre de la impresora.
+        num_copias: Número de copias.
+        logger: Objeto Logger para registrar eventos (opcional).
+        ruta_acrobat: Ruta al ejecutable de Adobe Acrobat Reader (opcional).
+        temporal: Si es True, la cola de impresión elimina el PDF cuando ya no lo necesita.
+        
+    Returns:
+        bool: True si se envió a imprimir correctamente.
+    """
+    try:
+        backend = crear_backend(ruta_acrobat=ruta_acrobat) if ruta_acrobat else None
+        trabajo = obtener_spooler(logger).encolar(temp_path, printer_name, num_copias, backend=backend,
+                                                  temporal=temporal)
+    except Exception as e:
+        if logger:
+            logger.log_message(f"Error al imprimir: {e}", "ERROR")
+        if temporal:
+            eliminar_temporal(temp_path, logger)
+        return False
+    return trabajo.esperar()
+
+
+def eliminar_temporal(temp_path, logger=None):
+    """Elimina un archivo temporal, registrando el error si no se puede."""
+    try:
+        os.unlink(temp_path)
+    except Exception as e:
+        if logger:
+            logger.log_message(f"Error al eliminar archivo temporal: {e}", "WARNING")
+
+
 def invalidar_cache():
     """
-    Invalida la caché de configuración para forzar una recarga desde la base de datos.
+    Invalida la configuración en memoria para forzar una recarga desde la base de datos.
     """
-    global _print_config_cache
-    _print_config_cache = None
\ No newline at end of file
+    config_service.invalidar()
@@ -0,0 +1,337 @@
+# -*- coding: utf-8 -*-
+"""
+Módulo para reprocesar automáticamente los archivos de la carpeta de error.
+"""
+
+import datetime
+import os
+import threading
+import time
+from config.database import conectar
+from config.settings import REINTENTO_CONFIG
+from config import config_service
+from utils.api import process_and_post_txt, es_reintentable
+from utils.documento import parsear_documento
+from utils.outbox import calcular_backoff
+from utils.validacion import validar_previo, tiene_errores, describir
+
+# Clasificación de los archivos antiguos de la carpeta de error que esperan la decisión de un operador
+TIPO_REVISION = "revision"
+
+
+def clasificar_resultado(resultado):
+    """
+    Clasifica el motivo por el que un documento terminó en la carpeta de error.
+
+    Args:
+        resultado: Resultado del envío (o del intento de interpretar el archivo).
+
+    Returns:
+        tuple: (tipo_error, status_code, detalle, reintentable).
+    """
+    if not resultado:
+        return "desconocido", None, None, True
+
+    tipo_error = resultado.get("tipo_error")
+    status_code = resultado.get("status_code")
+    detalle = resultado.get("error") or resultado.get("message")
+
+    if tipo_error is None:
+        # La API respondió pero rechazó el documento (StatusCode distinto de 200)
+        tipo_error = "validacion"
+        status_code = resultado.get("StatusCode")
+        detalle = resultado.get("StatusDesc") or detalle
+
+    try:
+        status_code = int(status_code) if status_code is not None else None
+    except (TypeError, ValueError):
+        status_code = None
+
+    return tipo_error, status_code, detalle, es_reintentable(resultado)
+
+
+class ErrorReprocessor:
+    """
+    Clase para devolver al flujo normal los archivos de error/mm_yyyy/dd.
+
+    Cada archivo que llega a la carpeta de error queda registrado en la tabla
+    `errores` con su clasificación (transporte, http, parseo, validacion). Los
+    archivos que ya estaban en la carpeta se indexan al recorrer el árbol y se
+    clasifican interpretándolos y validándolos; como pueden haber sido aceptados
+    por la API (p. ej. si falló su archivado), quedan en revisión y no se
+    reenvían salvo que se habilite REINTENTO_CONFIG["reintentar_existentes"] o se
+    liberen con `liberar_revision()`. Un hilo en segundo plano reenvía los archivos
+    reintentables con backoff por archivo y un máximo de envíos por minuto; los
+    que la API acepta se archivan en la carpeta de procesados y los que se
+    agotan o no son reintentables quedan en error.
+    """
+
+    def __init__(self, logger=None, archivar=None, db_path=None):
+        """
+        Inicializa el reprocesador.
+
+        Args:
+            logger: Objeto Logger para registrar eventos (opcional).
+            archivar: Función (documento, ruta_procesado, resultado) que archiva un
+                      documento aceptado por la API (opcional).
+            db_path: Ruta al archivo de base de datos. Si es None, usa la ruta de DB_CONFIG.
+        """
+        self.logger = logger
+        self.archivar = archivar
+        self.db_path = db_path
+        self._detener = threading.Event()
+        self._hilo = None
+
+    def registrar(self, ruta, ruta_procesado, resultado=None, inmediato=False):
+        """
+        Registra (o actualiza) un archivo movido a la carpeta de error.
+
+        Args:
+            ruta: Ruta del archivo dentro de la carpeta de error.
+            ruta_procesado: Ruta base de archivos procesados.
+            resultado: Resultado del envío o del intento de interpretación (opcional).
+            inmediato: Si es True, un archivo reintentable queda listo para reintentar ya.
+        """
+        tipo_error, status_code, detalle, reintentable = clasificar_resultado(resultado)
+        proximo = None
+        if reintentable:
+            proximo = time.time() if inmediato else time.time() + self._espera(1)
+
+        conn = conectar(self.db_path)
+        with conn:
+            conn.execute(
+                "INSERT INTO errores (ruta, nombre, ruta_procesado, tipo_error, status_code, detalle, "
+                "reintentable, intentos, proximo_intento, registrado) VALUES (?, ?, ?, ?, ?, ?, ?, 0, ?, ?) "
+                "ON CONFLICT(ruta) DO UPDATE SET tipo_error = excluded.tipo_error, status_code = excluded.status_code, "
+                "detalle = excluded.detalle, reintentable = excluded.reintentable, proximo_intento = excluded.proximo_intento",
+                (ruta, os.path.basename(ruta), ruta_procesado, tipo_error, status_code, detalle,
+                 int(reintentable), proximo, datetime.datetime.now().isoformat(timespec="seconds"))
+            )
+
+    def indexar(self, ruta_procesado):
+        """
+        Recorre el árbol error/ y registra los archivos que aún no están en la tabla.
+
+        También quita del registro los archivos que ya no existen (por ejemplo,
+        movidos a mano).
+
+        Args:
+            ruta_procesado: Ruta base de archivos procesados.
+
+        Returns:
+            int: Cantidad de archivos nuevos registrados.
+        """
+        ruta_error = os.path.join(ruta_procesado, "error")
+        if not os.path.isdir(ruta_error):
+            return 0
+
+        conn = conectar(self.db_path)
+        conocidos = {fila[0] for fila in conn.execute(
+            "SELECT ruta FROM errores WHERE ruta_procesado = ?", (ruta_procesado,))}
+
+        encontrados = set()
+        nuevos = []
+        for carpeta, _, archivos in os.walk(ruta_error):
+            for nombre in archivos:
+                if not nombre.lower().endswith(".txt"):
+                    continue
+                ruta = os.path.join(carpeta, nombre)
+                encontrados.add(ruta)
+                if ruta not in conocidos:
+                    nuevos.append(ruta)
+
+        for ruta in nuevos:
+            self._registrar_existente(ruta, ruta_procesado)
+
+        desaparecidos = conocidos - encontrados
+        if desaparecidos:
+            with conn:
+                conn.executemany("DELETE FROM errores WHERE ruta = ?", [(ruta,) for ruta in desaparecidos])
+
+        if nuevos and self.logger:
+            self.logger.log_message(f"Carpeta de error indexada: {len(nuevos)} archivos nuevos.", "INFO")
+        return len(nuevos)
+
+    def contar(self):
+        """
+        Cuenta los archivos registrados en la carpeta de error.
+
+        Returns:
+            dict: Total de archivos y cuántos de ellos son reintentables.
+        """
+        fila = conectar(self.db_path).execute("SELECT COUNT(*), SUM(reintentable) FROM errores").fetchone()
+        return {"total": fila[0], "reintentables": fila[1] or 0}
+
+    def iniciar(self, ruta_procesado, puede_enviar=None):
+        """
+        Inicia el hilo de reproceso.
+
+        Si ya había un hilo en marcha se detiene; el nuevo espera a que salga antes
+        de empezar, de modo que nunca hay dos hilos reintentando archivos.
+
+        Args:
+            ruta_procesado: Ruta base de archivos procesados.
+            puede_enviar: Función sin argumentos que indica si la API está disponible
+                          para reintentos (opcional).
+
+        Returns:
+            threading.Event: Evento de esta ejecución, para detenerla con detener(),
+            o None si el reproceso está deshabilitado.
+        """
+        if not REINTENTO_CONFIG["habilitado"]:
+            return None
+        anterior = self._hilo
+        self._detener.set()
+        detener = self._detener = threading.Event()
+        self._hilo = threading.Thread(target=self._bucle, args=(ruta_procesado, puede_enviar, detener, anterior),
+                                      name="ErrorReprocessor", daemon=True)
+        self._hilo.start()
+        return detener
+
+    def detener(self, ejecucion=None):
+        """
+        Detiene el hilo de reproceso.
+
+        Args:
+            ejecucion: Evento retornado por iniciar(). Si se indica, solo se detiene esa
+                       ejecución y no una iniciada después (opcional).
+        """
+        (ejecucion or self._detener).set()
+
+    def liberar_revision(self, ruta_procesado=None):
+        """
+        Marca para reintento los archivos en revisión (los que ya estaban en la carpeta de error).
+
+        Es la decisión explícita de un operador: esos archivos pueden haber sido
+        aceptados por la API antes de llegar a la carpeta de error.
+
+        Args:
+            ruta_procesado: Limitar a una ruta base de procesados (opcional).
+
+        Returns:
+            int: Cantidad de archivos liberados.
+        """
+        condicion, parametros = "tipo_error = ?", [TIPO_REVISION]
+        if ruta_procesado is not None:
+            condicion += " AND ruta_procesado = ?"
+            parametros.append(ruta_procesado)
+        conn = conectar(self.db_path)
+        with conn:
+            return conn.execute(
+                f"UPDATE errores SET tipo_error = 'desconocido', reintentable = 1, intentos = 0, "
+                f"proximo_intento = ? WHERE {condicion}", [time.time()] + parametros
+            ).rowcount
+
+    def reintentar(self, id_error, ruta, ruta_procesado, intentos):
+        """
+        Reenvía un archivo de la carpeta de error.
+
+        Args:
+            id_error: Identificador del registro en la tabla errores.
+            ruta: Ruta del archivo dentro de la carpeta de error.
+            ruta_procesado: Ruta base de archivos procesados.
+            intentos: Intentos de reproceso realizados antes de este.
+
+        Returns:
+            bool: True si la API aceptó el documento.
+        """
+        conn = conectar(self.db_path)
+        if not os.path.exists(ruta):
+            with conn:
+                conn.execute("DELETE FROM errores WHERE id = ?", (id_error,))
+            return False
+
+        try:
+            documento = parsear_documento(ruta)
+            config_data = config_service.obtener_config(self.logger).datos_api
+            resultado = process_and_post_txt(ruta, config_data, self.logger, documento=documento)
+        except Exception as e:
+            documento = None
+            resultado = {"success": False, "error": str(e), "tipo_error": "parseo"}
+
+        if resultado.get("StatusCode") == "200" and resultado.get("StatusDesc") == "OK":
+            with conn:
+                conn.execute("DELETE FROM errores WHERE id = ?", (id_error,))
+            if self.logger:
+                self.logger.log_message(f"Reproceso exitoso: {os.path.basename(ruta)}", "INFO")
+            if self.archivar:
+                self.archivar(documento, ruta_procesado, resultado)
+            return True
+
+        tipo_error, status_code, detalle, reintentable = clasificar_resultado(resultado)
+        intentos += 1
+        if intentos >= REINTENTO_CONFIG["max_intentos"]:
+            reintentable = False
+        proximo = time.time() + self._espera(intentos + 1) if reintentable else None
+        with conn:
+            conn.execute(
+                "UPDATE errores SET tipo_error = ?, status_code = ?, detalle = ?, reintentable = ?, "
+                "intentos = ?, proximo_intento = ? WHERE id = ?",
+                (tipo_error, status_code, detalle, int(reintentable), intentos, proximo, id_error)
+            )
+        if self.logger:
+            estado = "se reintentará más tarde" if reintentable else "queda en la carpeta de error"
+            self.logger.log_message(f"Reproceso fallido ({tipo_error}) de {os.path.basename(ruta)}; {estado}.", "WARNING")
+        return False
+
+    def _registrar_existente(self, ruta, ruta_procesado):
+        """
+        Clasifica un archivo que ya estaba en la carpeta de error sin registro previo.
+
+        Se interpreta y se valida localmente. Los válidos solo se reintentan si
+        REINTENTO_CONFIG["reintentar_existentes"] lo permite; si no, quedan en revisión.
+        """
+        reintentar = False
+        try:
+            documento = parsear_documento(ruta)
+            problemas = validar_previo(documento)
+            if documento.tipo_dte not in (33, 39):
+                resultado = {"success": False, "error": f"Tipo de DTE no reconocido: {documento.tipo_dte}",
+                             "tipo_error": "validacion"}
+            elif tiene_errores(problemas):
+                resultado = {"success": False, "error": describir(problemas), "tipo_error": "validacion"}
+            elif REINTENTO_CONFIG["reintentar_existentes"]:
+                resultado = None  # Motivo desconocido: se reintenta
+                reintentar = True
+            else:
+                resultado = {"success": False, "tipo_error": TIPO_REVISION,
+                             "error": "Archivo previo al registro de errores; puede haber sido aceptado por la API"}
+        except Exception as e:
+            resultado = {"success": False, "error": str(e), "tipo_error": "parseo"}
+
+        self.registrar(ruta, ruta_procesado, resultado, inmediato=reintentar)
+
+    def _espera(self, intentos):
+        """Segundos de espera antes del reintento número `intentos`."""
+        return calcular_backoff(intentos, REINTENTO_CONFIG["backoff_base"], REINTENTO_CONFIG["backoff_max"])
+
+    def _bucle(self, ruta_procesado, puede_enviar, detener, anterior=None):
+        """Ciclo del hilo: indexa la carpeta de error y reintenta lo que corresponda."""
+        if anterior is not None:
+            anterior.join()
+        separacion = 60.0 / max(1, REINTENTO_CONFIG["por_minuto"])
+        proximo_escaneo = 0.0
+
+        while not detener.is_set():
+            try:
+                if time.monotonic() >= proximo_escaneo:
+                    self.indexar(ruta_procesado)
+                    proximo_escaneo = time.monotonic() + REINTENTO_CONFIG["intervalo_escaneo"]
+
+                filas = conectar(self.db_path).execute(
+                    "SELECT id, ruta, intentos FROM errores WHERE ruta_procesado = ? AND reintentable = 1 "
+                    "AND proximo_intento <= ? ORDER BY proximo_intento LIMIT ?",
+                    (ruta_procesado, time.time(), REINTENTO_CONFIG["lote"])
+                ).fetchall()
+
+                for id_error, ruta, intentos in filas:
+                    if detener.is_set() or (puede_enviar and not puede_enviar()):
+                        break
+                    self.reintentar(id_error, ruta, ruta_procesado, intentos)
+                    # Límite de envíos por minuto
+                    detener.wait(separacion)
+            except Exception as e:
+                if self.logger:
+                    self.logger.log_message(f"Error en el reproceso de la carpeta de error: {e}", "ERROR")
+
+            detener.wait(min(REINTENTO_CONFIG["intervalo_escaneo"], 30))
@@ -0,0 +1,126 @@
+# -*- coding: utf-8 -*-
+"""
+Módulo para enviar documentos a la API de forma concurrente.
+"""
+
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from utils.api import process_and_post_txt
+
+
+class DocumentSubmitter:
+    """
+    Clase para enviar documentos a la API con un límite de solicitudes en vuelo.
+
+    Los envíos se ejecutan en un pool de hilos, pero los resultados de una misma
+    serie de folios (un tipo de DTE) se entregan en el mismo orden en que se
+    enviaron, de modo que el archivado respeta el orden de llegada dentro de cada
+    serie. `enviar()` bloquea cuando se alcanza el límite, lo que acota la memoria
+    y la presión sobre la API.
+    """
+
+    def __init__(self, max_en_vuelo, logger=None):
+        """
+        Inicializa el enviador.
+
+        Args:
+            max_en_vuelo: Cantidad máxima de documentos enviados y aún no entregados.
+            logger: Objeto Logger para registrar eventos (opcional).
+        """
+        self.max_en_vuelo = max(1, int(max_en_vuelo))
+        self.logger = logger
+        self._executor = ThreadPoolExecutor(max_workers=self.max_en_vuelo, thread_name_prefix="EnvioDTE")
+        self._cupos = threading.BoundedSemaphore(self.max_en_vuelo)
+        self._lock = threading.Lock()
+        self._sin_pendientes = threading.Condition(self._lock)
+        self._series = {}          # serie -> deque de (future, documento, al_terminar)
+        self._entregando = set()   # series cuyo orden está siendo entregado por algún hilo
+        self._pendientes = 0
+
+    @property
+    def en_vuelo(self):
+        """Cantidad de documentos enviados cuyo resultado aún no se ha entregado."""
+        return self._pendientes
+
+    @staticmethod
+    def serie_de(documento):
+        """
+        Retorna la serie de folios a la que pertenece un documento.
+
+        Args:
+            documento: DocumentoDTE interpretado.
+
+        Returns:
+            int: Tipo de DTE, que identifica la serie de folios.
+        """
+        return documento.tipo_dte
+
+    def enviar(self, documento, config_data, al_terminar):
+        """
+        Encola el envío de un documento. Bloquea si se alcanzó el límite en vuelo.
+
+        Args:
+            documento: DocumentoDTE interpretado.
+            config_data: Diccionario con datos de configuración.
+            al_terminar: Función (documento, resultado) que se llama con la respuesta,
+                         en orden de envío dentro de la serie.
+        """
+        self._cupos.acquire()
+        serie = self.serie_de(documento)
+        with self._lock:
+            future = self._executor.submit(process_and_post_txt, documento.ruta, config_data,
+                                           self.logger, documento=documento)
+            self._series.setdefault(serie, deque()).append((future, documento, al_terminar))
+            self._pendientes += 1
+        future.add_done_callback(lambda _: self._entregar(serie))
+
+    def esperar(self, timeout=None):
+        """
+        Espera a que se entreguen todos los resultados pendientes.
+
+        Args:
+            timeout: Tiempo máximo de espera en segundos (opcional).
+
+        Returns:
+            bool: True si no quedan envíos pendientes.
+        """
+        with self._sin_pendientes:
+            return self._sin_pendientes.wait_for(lambda: self._pendientes == 0, timeout)
+
+    def cerrar(self):
+        """Espera los envíos pendientes y libera el pool de hilos."""
+        self.esperar()
+        self._executor.shutdown(wait=True)
+
+    def _entregar(self, serie):
+        """Entrega, en orden de envío, los resultados ya disponibles de una serie."""
+        with self._lock:
+            if serie in self._entregando:
+                return
+            self._entregando.add(serie)
+
+        while True:
+            with self._lock:
+                cola = self._series[serie]
+                if not cola or not cola[0][0].done():
+                    self._entregando.discard(serie)
+                    return
+                future, documento, al_terminar = cola.popleft()
+
+            try:
+                resultado = future.result()
+            except Exception as e:
+                resultado = {"success": False, "error": str(e)}
+
+            try:
+                al_terminar(documento, resultado)
+            except Exception as e:
+                if self.logger:
+                    self.logger.log_message(f"Error al finalizar el documento {documento.nombre}: {e}", "ERROR")
+            finally:
+                self._cupos.release()
+                with self._lock:
+                    self._pendientes -= 1
+                    if self._pendientes == 0:
+                        self._sin_pendientes.notify_all()
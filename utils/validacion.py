@@ -0,0 +1,337 @@
+# -*- coding: utf-8 -*-
+"""
+Módulo con las validaciones locales de un documento antes de enviarlo a la API.
+"""
+
+import datetime
+from typing import NamedTuple
+from config.settings import VALIDACION_CONFIG
+from utils.documento import SECCIONES_BOLETA, SECCIONES_FACTURA
+
+# Severidad de un problema
+SEVERIDAD_ERROR = "error"               # El documento no debe enviarse
+SEVERIDAD_ADVERTENCIA = "advertencia"   # El documento puede enviarse, pero conviene revisarlo
+
+
+class Problema(NamedTuple):
+    """Problema detectado al validar un documento."""
+
+    codigo: str
+    severidad: str
+    mensaje: str
+
+    def como_dict(self):
+        """Retorna el problema como diccionario (para JSON)."""
+        return self._asdict()
+
+
+def _numero(valor):
+    """Convierte un campo numérico del TXT (vacío = 0)."""
+    return float(valor) if valor not in (None, "") else 0.0
+
+
+def _campo(linea, indice):
+    """Retorna el campo `indice` de una línea, o None si no existe."""
+    return linea[indice] if len(linea) > indice else None
+
+
+def _descuadra(a, b):
+    """Indica si dos montos difieren en más de la tolerancia de redondeo."""
+    return abs(round(a) - round(b)) > VALIDACION_CONFIG["tolerancia"]
+
+
+def _es_entero(valor):
+    """Indica si un campo del TXT es un entero."""
+    try:
+        int(valor)
+        return True
+    except (TypeError, ValueError):
+        return False
+
+
+def _es_numero(valor, vacio_valido=False):
+    """Indica si un campo del TXT es un número (opcionalmente, si está vacío)."""
+    if vacio_valido and valor in (None, ""):
+        return True
+    try:
+        float(valor)
+        return True
+    except (TypeError, ValueError):
+        return False
+
+
+def _es_fecha(valor):
+    """Indica si un campo del TXT es una fecha YYYY-MM-DD."""
+    try:
+        datetime.datetime.strptime(valor, "%Y-%m-%d")
+        return True
+    except (TypeError, ValueError):
+        return False
+
+
+def _no_numerico(seccion, linea, indice, valor):
+    """Crea el problema de un campo que debía ser numérico."""
+    donde = f"{seccion} línea {linea}" if linea else seccion
+    return Problema("campo_no_numerico", SEVERIDAD_ERROR, f"{donde}, campo {indice + 1}: '{valor}' no es numérico")
+
+
+def _lineas_con_datos(lineas):
+    """Filtra las líneas vacías (p. ej. la línea final en blanco de una sección)."""
+    return [(numero, partes) for numero, partes in enumerate(lineas, start=1) if any(campo.strip() for campo in partes)]
+
+
+def _validar_boleta(documento):
+    """Validaciones de estructura de una Boleta (DTE 39)."""
+    problemas = []
+    nombre_enc, nombre_tot, nombre_det, nombre_dr = SECCIONES_BOLETA
+    encabezado = documento.encabezado
+    totales = documento.totales
+
+    if len(encabezado) < 14:
+        problemas.append(Problema("encabezado_incompleto", SEVERIDAD_ERROR,
+                                  f"La sección {nombre_enc} tiene {len(encabezado)} campos; se esperan al menos 14"))
+    else:
+        for indice in (0, 1, 3):
+            if not _es_entero(encabezado[indice]):
+                problemas.append(_no_numerico(nombre_enc, None, indice, encabezado[indice]))
+        if not _es_fecha(encabezado[2]):
+            problemas.append(Problema("fecha_invalida", SEVERIDAD_ERROR,
+                                      f"Fecha de emisión '{encabezado[2]}' no tiene el formato AAAA-MM-DD"))
+
+    if len(totales) < 4:
+        problemas.append(Problema("totales_incompletos", SEVERIDAD_ERROR,
+                                  f"La sección {nombre_tot} tiene {len(totales)} campos; se esperan al menos 4"))
+    else:
+        for indice in range(4):
+            if not _es_entero(totales[indice]):
+                problemas.append(_no_numerico(nombre_tot, None, indice, totales[indice]))
+
+    for numero, partes in _lineas_con_datos(documento.detalle):
+        if len(partes) < 10:
+            problemas.append(Problema("detalle_incompleto", SEVERIDAD_ERROR,
+                                      f"{nombre_det} línea {numero} tiene {len(partes)} campos; se esperan al menos 10"))
+            continue
+        for indice in (0, 3, 4, 5, 7):
+            if not _es_entero(partes[indice]):
+                problemas.append(_no_numerico(nombre_det, numero, indice, partes[indice]))
+
+    for numero, partes in _lineas_con_datos(documento.desc_rec):
+        if len(partes) < 6:
+            problemas.append(Problema("descuento_incompleto", SEVERIDAD_ERROR,
+                                      f"{nombre_dr} línea {numero} tiene {len(partes)} campos; se esperan al menos 6"))
+            continue
+        if partes[1] not in ("D", "R"):
+            problemas.append(Problema("descuento_invalido", SEVERIDAD_ERROR,
+                                      f"{nombre_dr} línea {numero}: tipo '{partes[1]}' no es D ni R"))
+        if partes[3] not in ("$", "%"):
+            problemas.append(Problema("descuento_invalido", SEVERIDAD_ERROR,
+                                      f"{nombre_dr} línea {numero}: tipo de valor '{partes[3]}' no es $ ni %"))
+        for indice in (4, 5):
+            if not _es_entero(partes[indice]):
+                problemas.append(_no_numerico(nombre_dr, numero, indice, partes[indice]))
+        # Un descuento fijo se reparte según el total de la boleta
+        if partes[1] == "D" and partes[3] == "$" and len(totales) > 3 and totales[3] in ("0", ""):
+            problemas.append(Problema("descuento_sin_total", SEVERIDAD_ERROR,
+                                      f"{nombre_dr} línea {numero}: descuento fijo sobre una boleta de total 0"))
+    return problemas
+
+
+def _validar_factura(documento):
+    """Validaciones de estructura de una Factura (DTE 33)."""
+    problemas = []
+    nombre_enc, nombre_tot, nombre_det, _ = SECCIONES_FACTURA
+    encabezado = documento.encabezado
+
+    if len(encabezado) < 3:
+        problemas.append(Problema("encabezado_incompleto", SEVERIDAD_ERROR,
+                                  f"La sección {nombre_enc} tiene {len(encabezado)} campos; se esperan al menos 3"))
+    elif not _es_fecha(encabezado[2]):
+        problemas.append(Problema("fecha_invalida", SEVERIDAD_ERROR,
+                                  f"Fecha de emisión '{encabezado[2]}' no tiene el formato AAAA-MM-DD"))
+
+    for indice, valor in enumerate(documento.totales[:9]):
+        if not _es_numero(valor, vacio_valido=True):
+            problemas.append(_no_numerico(nombre_tot, None, indice, valor))
+
+    for numero, partes in _lineas_con_datos(documento.detalle):
+        # Las líneas incompletas no se pueden omitir: cambiarían el documento
+        if len(partes) < 13:
+            problemas.append(Problema("detalle_incompleto", SEVERIDAD_ERROR,
+                                      f"{nombre_det} línea {numero} tiene {len(partes)} campos; se esperan al menos 13"))
+            continue
+        if not _es_entero(partes[0]):
+            problemas.append(_no_numerico(nombre_det, numero, 0, partes[0]))
+        for indice in (3, 4, 10):
+            if not _es_numero(partes[indice]):
+                problemas.append(_no_numerico(nombre_det, numero, indice, partes[indice]))
+        if not _es_numero(partes[9], vacio_valido=True):
+            problemas.append(_no_numerico(nombre_det, numero, 9, partes[9]))
+
+    referencia = documento.referencia
+    if len(referencia) > 2 and not _es_entero(referencia[2]):
+        problemas.append(_no_numerico("Referencia", None, 2, referencia[2]))
+    return problemas
+
+
+def validar_estructura(documento):
+    """
+    Verifica que el documento tenga las secciones y campos que necesita la construcción del body.
+
+    Detecta de antemano lo que de otro modo terminaría en una excepción
+    (IndexError, ValueError) o en una línea de detalle omitida.
+
+    Args:
+        documento: DocumentoDTE interpretado.
+
+    Returns:
+        list: Problemas encontrados.
+    """
+    if documento.tipo_dte == 39:
+        requeridas = SECCIONES_BOLETA[:3]
+    elif documento.tipo_dte == 33:
+        requeridas = SECCIONES_FACTURA[:3]
+    else:
+        return [Problema("tipo_no_soportado", SEVERIDAD_ERROR, f"Tipo de DTE no reconocido: {documento.tipo_dte}")]
+
+    faltantes = [nombre for nombre in requeridas
+                 if not any(linea.strip("; ") for linea in documento.secciones.get(nombre, ()))]
+    if faltantes:
+        return [Problema("seccion_faltante", SEVERIDAD_ERROR,
+                         f"Faltan secciones o están vacías: {', '.join(faltantes)}")]
+
+    if documento.tipo_dte == 39:
+        return _validar_boleta(documento)
+    return _validar_factura(documento)
+
+
+def validar_previo(documento):
+    """
+    Validaciones que no necesitan el body: estructura y, si la estructura es válida, totales.
+
+    Args:
+        documento: DocumentoDTE interpretado.
+
+    Returns:
+        list: Problemas encontrados.
+    """
+    problemas = validar_estructura(documento)
+    if tiene_errores(problemas):
+        return problemas
+    return problemas + validar_totales(documento)
+
+
+def validar_totales(documento):
+    """
+    Verifica que los totales del TXT sean coherentes entre sí (neto, exento, IVA y total).
+
+    Args:
+        documento: DocumentoDTE interpretado.
+
+    Returns:
+        list: Problemas encontrados (lista vacía si los totales cuadran).
+    """
+    problemas = []
+    totales = documento.totales
+    tasa = VALIDACION_CONFIG["tasa_iva"] / 100
+
+    try:
+        if documento.tipo_dte == 39:
+            # BoletaTotales: neto;exento;iva;total;...
+            neto, exento, iva, total = (_numero(_campo(totales, i)) for i in range(4))
+        elif documento.tipo_dte == 33:
+            # Totales: %desc;desc;%rec;rec;neto;exento;tasa;iva;total;...
+            neto, exento, iva, total = (_numero(_campo(totales, i)) for i in (4, 5, 7, 8))
+            if _campo(totales, 6):
+                tasa = _numero(totales[6]) / 100
+        else:
+            return problemas
+    except ValueError as e:
+        return [Problema("totales_no_numericos", SEVERIDAD_ERROR, f"Totales no numéricos: {e}")]
+
+    if _descuadra(neto * tasa, iva):
+        problemas.append(Problema("iva_descuadrado", SEVERIDAD_ADVERTENCIA,
+                                  f"El IVA ({iva:g}) no corresponde al {tasa * 100:g}% del neto ({neto:g})"))
+    if _descuadra(round(neto) + round(exento) + round(iva), total):
+        problemas.append(Problema("total_descuadrado", SEVERIDAD_ADVERTENCIA,
+                                  f"El total ({total:g}) no es neto + exento + IVA ({neto + exento + iva:g})"))
+    return problemas
+
+
+def validar_body(documento, body):
+    """
+    Verifica el body construido: detalle presente, montos válidos y detalle que cuadra con los totales.
+
+    Args:
+        documento: DocumentoDTE interpretado.
+        body: Body construido para la API.
+
+    Returns:
+        list: Problemas encontrados.
+    """
+    problemas = []
+    detalle = body["dte"]["Detalle"]
+    if not detalle:
+        return [Problema("sin_detalle", SEVERIDAD_ERROR, "El documento no tiene líneas de detalle válidas")]
+
+    for item in detalle:
+        if item["QtyItem"] <= 0:
+            problemas.append(Problema("cantidad_invalida", SEVERIDAD_ERROR,
+                                      f"Línea {item['NroLinDet']}: cantidad {item['QtyItem']} no es positiva"))
+        if item["MontoItem"] < 0:
+            problemas.append(Problema("monto_negativo", SEVERIDAD_ERROR,
+                                      f"Línea {item['NroLinDet']}: monto {item['MontoItem']} es negativo"))
+
+    total_detalle = sum(item["MontoItem"] for item in detalle)
+    if documento.tipo_dte == 39:
+        monto_total = body["dte"]["Encabezado"]["Totales"]["MntTotal"]
+        # Cada línea puede aportar su propio redondeo al distribuir descuentos
+        if abs(total_detalle - monto_total) > VALIDACION_CONFIG["tolerancia"] * len(detalle):
+            problemas.append(Problema("detalle_descuadrado", SEVERIDAD_ERROR,
+                                      f"El detalle suma {total_detalle:g} y el total de la boleta es {monto_total:g}"))
+    elif documento.tipo_dte == 33:
+        neto = _numero(_campo(documento.totales, 4))
+        exento = _numero(_campo(documento.totales, 5))
+        if abs(total_detalle - (neto + exento)) > VALIDACION_CONFIG["tolerancia"] * len(detalle):
+            problemas.append(Problema("detalle_descuadrado", SEVERIDAD_ADVERTENCIA,
+                                      f"El detalle suma {total_detalle:g} y neto + exento es {neto + exento:g}"))
+    return problemas
+
+
+def validar(documento, body):
+    """
+    Ejecuta todas las validaciones locales de un documento y su body.
+
+    Args:
+        documento: DocumentoDTE interpretado.
+        body: Body construido para la API.
+
+    Returns:
+        list: Problemas encontrados, primero los de estructura y totales y luego los del body.
+    """
+    return validar_previo(documento) + validar_body(documento, body)
+
+
+def describir(problemas):
+    """
+    Resume los problemas de severidad error en un texto (para logs y la tabla de errores).
+
+    Args:
+        problemas: Lista de Problema.
+
+    Returns:
+        str: Mensajes de los errores separados por "; ".
+    """
+    return "; ".join(problema.mensaje for problema in problemas if problema.severidad == SEVERIDAD_ERROR)
+
+
+def tiene_errores(problemas):
+    """
+    Indica si alguno de los problemas impide enviar el documento.
+
+    Args:
+        problemas: Lista de Problema.
+
+    Returns:
+        bool: True si hay al menos un problema de severidad error.
+    """
+    return any(problema.severidad == SEVERIDAD_ERROR for problema in problemas)
@@ -0,0 +1,130 @@
+# -*- coding: utf-8 -*-
+"""
+Módulo para vigilar la carpeta de entrada mediante eventos del sistema de archivos.
+"""
+
+import os
+import threading
+from config.settings import WATCH_CONFIG
+
+try:
+    from watchfiles import watch, Change
+except ImportError:  # watchfiles no disponible: se usa solo el sondeo por intervalo
+    watch = None
+    Change = None
+
+
+def es_ruta_de_red(ruta):
+    """
+    Determina si una ruta apunta a un recurso compartido de red.
+
+    Args:
+        ruta: Ruta a verificar.
+
+    Returns:
+        bool: True si la ruta es UNC o una unidad de red mapeada.
+    """
+    if ruta.startswith("\\\\") or ruta.startswith("//"):
+        return True
+
+    if os.name == 'nt':
+        try:
+            import ctypes
+            unidad = os.path.splitdrive(os.path.abspath(ruta))[0]
+            DRIVE_REMOTE = 4
+            return ctypes.windll.kernel32.GetDriveTypeW(f"{unidad}\\") == DRIVE_REMOTE
+        except Exception:
+            return False
+    return False
+
+
+class DirectoryWatcher:
+    """
+    Clase para detectar la llegada de archivos TXT a una carpeta.
+
+    Corre en un hilo propio y despierta a quien espera en `esperar()` apenas se
+    crea o termina de escribirse un archivo, en lugar de aguardar el intervalo.
+    """
+
+    def __init__(self, ruta, logger=None):
+        """
+        Inicializa el vigilante de carpeta.
+
+        Args:
+            ruta: Carpeta a vigilar.
+            logger: Objeto Logger para registrar eventos (opcional).
+        """
+        self.ruta = ruta
+        self.logger = logger
+        self._despertar = threading.Event()
+        self._detener = threading.Event()
+        self._hilo = None
+
+    @staticmethod
+    def disponible(ruta):
+        """
+        Indica si se puede vigilar la ruta por eventos.
+
+        Las carpetas de red no entregan eventos confiables, por lo que en ellas
+        se mantiene el sondeo por intervalo.
+
+        Args:
+            ruta: Carpeta a vigilar.
+
+        Returns:
+            bool: True si watchfiles está disponible y la ruta es local.
+        """
+        return watch is not None and WATCH_CONFIG["habilitado"] and not es_ruta_de_red(ruta)
+
+    def start(self):
+        """Inicia el hilo que escucha los eventos de la carpeta."""
+        self._hilo = threading.Thread(target=self._bucle_eventos, name="DirectoryWatcher", daemon=True)
+        self._hilo.start()
+
+    def stop(self, timeout=None):
+        """
+        Detiene el vigilante y libera a quien esté esperando.
+
+        Args:
+            timeout: Si se indica, espera hasta esa cantidad de segundos a que el
+                     hilo del vigilante termine (opcional).
+        """
+        self._detener.set()
+        self._despertar.set()
+        if timeout is not None and self._hilo is not None and self._hilo is not threading.current_thread():
+            self._hilo.join(timeout)
+
+    def esperar(self, timeout):
+        """
+        Espera hasta que llegue un archivo nuevo o se cumpla el tiempo indicado.
+
+        Args:
+            timeout: Tiempo máximo de espera en segundos.
+
+        Returns:
+            bool: True si se detectó un cambio, False si se cumplió el tiempo.
+        """
+        hubo_cambio = self._despertar.wait(timeout)
+        self._despertar.clear()
+        return hubo_cambio
+
+    def _filtrar(self, cambio, ruta):
+        """Considera solo archivos TXT creados o modificados."""
+        return cambio != Change.deleted and ruta.lower().endswith('.txt')
+
+    def _bucle_eventos(self):
+        """Escucha los eventos de la carpeta hasta que se detenga el vigilante."""
+        try:
+            for _ in watch(
+                self.ruta,
+                watch_filter=self._filtrar,
+                debounce=WATCH_CONFIG["debounce_ms"],
+                step=WATCH_CONFIG["step_ms"],
+                stop_event=self._detener,
+                recursive=False,
+                raise_interrupt=False
+            ):
+                self._despertar.set()
+        except Exception as e:
+            if self.logger:
+                self.logger.log_message(f"Error en el vigilante de carpeta, se continúa por intervalo: {e}", "WARNING")